@@ -5,32 +5,70 @@
 """
 
 import os
+import io
+import re
 import uuid
+import hashlib
+import base64
+import threading
 import json
 import time
+import asyncio
+import shutil
 import logging
 import numpy as np
+from collections import OrderedDict
 from datetime import datetime
 from typing import Optional, Dict, Any
 from pathlib import Path
 
 from PIL import Image, ImageDraw
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Header, Query, Request
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, Response
 from fastapi.concurrency import run_in_threadpool
-from celery.result import AsyncResult
 
 from medsam_api_server.celery_app import celery_app
 from medsam_api_server.tasks.segmentation import (
     generate_initial_mask_task,
-    propagate_3d_mask_task
+    propagate_3d_mask_task,
+    merge_propagation_task,
+    dispatch_split_propagation
 )
+from medsam_api_server.tasks.ingest import ingest_volume_task
 from medsam_api_server.core.gpu_manager import get_gpu_manager
 from medsam_api_server.core.model_manager import MedicalImageProcessor
+from medsam_api_server.core import dicom_ingest
+from medsam_api_server.core.mask_codec import (
+    SPARSE_MEDIA_TYPE, RLE_MEDIA_TYPE, MASK_BLOB_MEDIA_TYPE, SPARSE_PREFIX_SIZE,
+    parse_sparse_prefix, parse_sparse_header, decode_rle, decode_mask_blob
+)
+from medsam_api_server.core.storage import (
+    get_storage, job_key, job_prefix, mask_key, save_mask, describe_object, task_result_key, record_job_result,
+    VOLUME_NAME, DICOM_UPLOAD_NAME, RESULT_NAME, SPARSE_RESULT_NAME
+)
+from medsam_api_server.core.job_store import (
+    get_job_store, aload_job_metadata, aload_jobs_metadata,
+    JOB_STORE_URL, JOB_STATUSES, TASK_TYPES
+)
+from medsam_api_server.core.async_redis import get_async_redis, get_task_states, get_task_state, get_queue_length
+from medsam_api_server.core.job_events import (
+    publish_job_event, subscribe_job_events, format_sse, SSE_HEARTBEAT_SECONDS, SSE_MAX_STREAMS
+)
+from medsam_api_server.core.slice_stream import slice_stream_key, decode_stream_entry
+from medsam_api_server.core.cancellation import request_cancel, CANCELLED_STATE
+from medsam_api_server.core.supersession import request_fingerprint, claim_interactive_slot
+from medsam_api_server.core.result_cache import get_result_cache, initial_mask_cache_key, propagation_cache_key
+from medsam_api_server.core.scheduling import (
+    INTERACTIVE_QUEUE, enqueue_headers, check_batch_starvation, should_split_propagation
+)
+from medsam_api_server.core.time_limits import propagation_time_limits, volume_depth
+from medsam_api_server.core.speculation import (
+    SPECULATIVE_PROPAGATION_ENABLED, propagation_fingerprint, claim_speculation
+)
 from medsam_api_server.schemas.api_models import (
     JobCreateResponse, InitialMaskRequest, PropagationRequest,
-    JobStatusResponse, InitialMaskResponse, PropagationResponse,
+    JobStatusResponse, JobStatusBatchRequest, InitialMaskResponse, PropagationResponse,
     TaskStatus, TaskType, TaskProgress, MaskResult, PropagationResult,
     BaseResponse, ErrorResponse
 )
@@ -40,36 +78,570 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/jobs", tags=["jobs"])
 
 # 환경 변수
-DATA_ROOT = os.getenv("DATA_ROOT", "/app/data")
 TEMP_ROOT = os.getenv("TEMP_ROOT", "/app/temp")
 
-# 유틸리티 함수
-def _job_dir(job_id: str) -> str:
-    return os.path.join(DATA_ROOT, job_id)
+# 희소 결과 슬라이스 색인 캐시 (job_id, propagation task_id) -> 색인
+SPARSE_INDEX_CACHE_SIZE = int(os.getenv("SPARSE_INDEX_CACHE_SIZE", "128"))
+# 희소 컨테이너 헤더를 한 번에 읽어올 크기 (부족하면 나머지만 추가로 읽음)
+SPARSE_HEADER_READ_BYTES = 64 * 1024
+# 슬랩 요청당 최대 슬라이스 수
+MAX_SLAB_SLICES = 256
+# 마스크 blob ID (Celery 작업 ID 또는 업로드 시 생성한 UUID)
+MASK_ID_PATTERN = re.compile(r"^[0-9a-fA-F-]{1,64}$")
+
+_sparse_index_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+_sparse_index_lock = threading.Lock()
 
-def _volume_path(job_id: str) -> str:
-    return os.path.join(_job_dir(job_id), "volume.nii.gz")
+# 유틸리티 함수
+def _upload_staging_dir(job_id: str) -> str:
+    """업로드 검증용 로컬 임시 디렉토리 (검증 후 저장소로 이동)"""
+    return os.path.join(TEMP_ROOT, "uploads", job_id)
 
-def _job_metadata_path(job_id: str) -> str:
-    return os.path.join(_job_dir(job_id), "metadata.json")
+def _job_exists(job_id: str) -> bool:
+    return get_job_store().exists(job_id)
 
 def _save_job_metadata(job_id: str, metadata: Dict[str, Any]):
-    """작업 메타데이터 저장"""
-    metadata_path = _job_metadata_path(job_id)
-    with open(metadata_path, 'w') as f:
-        json.dump(metadata, f, indent=2)
-
-def _load_job_metadata(job_id: str) -> Optional[Dict[str, Any]]:
-    """작업 메타데이터 로딩"""
-    metadata_path = _job_metadata_path(job_id)
-    if not os.path.exists(metadata_path):
+    """새 작업 메타데이터 저장"""
+    get_job_store().create(job_id, metadata)
+
+def _append_job_task(job_id: str, task: Dict[str, Any]):
+    """task 기록을 원자적으로 추가 (동시 요청에도 유실 없음) 후 pending 이벤트 발행"""
+    get_job_store().append_task(job_id, task)
+    publish_job_event(job_id, "status", task.get("task_id"), task.get("task_type"), status="pending")
+
+def _ensure_job_ready(job_id: str, metadata: Optional[Dict[str, Any]]):
+    """인제스트가 끝나지 않았거나 실패한 작업이면 요청 거부"""
+    ingest_info = (metadata or {}).get("ingest") or {}
+    ingest_status = ingest_info.get("status")
+    if ingest_status == "ingesting":
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "success": False,
+                "message": f"Job {job_id} is still ingesting",
+                "error_code": "JOB_INGESTING"
+            }
+        )
+    if ingest_status == "failed":
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "success": False,
+                "message": f"Volume ingest failed: {ingest_info.get('error', 'Unknown error')}",
+                "error_code": "INGEST_FAILED"
+            }
+        )
+
+def _wants_sparse_result(format: Optional[str], accept: Optional[str]) -> bool:
+    """결과 형식 결정 (format 파라미터 우선, 없으면 Accept 헤더)"""
+    if format is not None:
+        if format not in ("nifti", "sparse"):
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "success": False,
+                    "message": f"Unsupported result format: {format}",
+                    "error_code": "INVALID_RESULT_FORMAT"
+                }
+            )
+        return format == "sparse"
+    return bool(accept) and SPARSE_MEDIA_TYPE in accept
+
+def _etag_matches(header_value: Optional[str], etag: str) -> bool:
+    """If-None-Match 비교 (목록, 약한 비교, * 지원)"""
+    if not header_value:
+        return False
+    for candidate in (v.strip() for v in header_value.split(",")):
+        if candidate == "*" or (candidate[2:] if candidate.startswith("W/") else candidate) == etag:
+            return True
+    return False
+
+def _parse_range(range_header: Optional[str], if_range: Optional[str], etag: str, size: int) -> Optional[tuple]:
+    """
+    단일 byte range 파싱 (끝 포함 (start, end))
+    
+    형식이 맞지 않거나(끝이 시작보다 앞인 경우 포함, RFC 7233 2.1) 다중 범위, If-Range 불일치면 None (전체 응답),
+    형식은 맞지만 만족할 수 없는 범위면 416
+    """
+    if not range_header:
+        return None
+    if if_range and if_range.strip() != etag:
+        return None
+    
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", range_header.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+    
+    if not match.group(1):
+        # suffix range: 마지막 N 바이트
+        suffix = int(match.group(2))
+        start, end = max(0, size - suffix), size - 1
+        satisfiable = suffix > 0 and size > 0
+    else:
+        start = int(match.group(1))
+        if match.group(2) and int(match.group(2)) < start:
+            # 잘못된 범위는 무시하고 전체 응답
+            return None
+        end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+        satisfiable = start < size
+    
+    if not satisfiable:
+        raise HTTPException(
+            status_code=416,
+            detail={
+                "success": False,
+                "message": f"Requested range not satisfiable (size {size})",
+                "error_code": "RANGE_NOT_SATISFIABLE"
+            },
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+def _task_result_file_key(job_id: str, task_id: str, name: str) -> str:
+    """완료 기록이 아직 없는 전파 결과의 키 (task별 키, 없으면 이전 형식의 작업 단위 키)"""
+    key = task_result_key(job_id, task_id, name)
+    return key if get_storage().exists(key) else job_key(job_id, name)
+
+def _describe_stored_file(key: str) -> Dict[str, Any]:
+    """기록된 크기/해시가 없는 객체의 설명 (없으면 404)"""
+    if not get_storage().exists(key):
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "success": False,
+                "message": "Result file not found",
+                "error_code": "RESULT_NOT_FOUND"
+            }
+        )
+    return describe_object(key)
+
+async def _stored_file_response(request: Request, file_info: Dict[str, Any], filename: str, media_type: str):
+    """
+    저장소 객체 응답
+    
+    - 내용 해시(sha256) 기반 strong ETag, If-None-Match → 304
+    - 단일 byte range (Range/If-Range) → 206, 이어받기 지원
+    - 로컬은 파일 직접 전송, 원격은 프록시 스트리밍
+    """
+    storage = get_storage()
+    key = file_info["key"]
+    size = int(file_info["size"])
+    etag = f'"{file_info["sha256"]}"'
+    
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept"
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    byte_range = _parse_range(request.headers.get("range"), request.headers.get("if-range"), etag, size)
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    
+    if byte_range is not None:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            storage.iter_bytes(key, start, end),
+            status_code=206,
+            media_type=media_type,
+            headers=headers
+        )
+    
+    if storage.is_local:
+        return FileResponse(path=storage.local_path(key), media_type=media_type, headers=headers)
+    
+    headers["Content-Length"] = str(size)
+    return StreamingResponse(storage.iter_bytes(key), media_type=media_type, headers=headers)
+
+async def _propagation_result_response(request: Request, job_id: str, task_id: str,
+                                       completed: Optional[Dict[str, Any]],
+                                       format: Optional[str], accept: Optional[str]):
+    """3D 결과 다운로드 (완료 기록의 크기/해시 사용, 없으면 계산)"""
+    sparse = _wants_sparse_result(format, accept)
+    kind = "sparse" if sparse else "nifti"
+    file_info = ((completed or {}).get("files") or {}).get(kind)
+    if file_info is None:
+        name = SPARSE_RESULT_NAME if sparse else RESULT_NAME
+        key = await run_in_threadpool(_task_result_file_key, job_id, task_id, name)
+        file_info = await run_in_threadpool(_describe_stored_file, key)
+    
+    if sparse:
+        return await _stored_file_response(request, file_info, f"medsam2_result_{job_id}.mskr", SPARSE_MEDIA_TYPE)
+    return await _stored_file_response(request, file_info, f"medsam2_result_{job_id}.nii.gz", "application/octet-stream")
+
+async def _load_sparse_result_index(job_id: str) -> Dict[str, Any]:
+    """
+    최신 3D 전파 결과의 희소 컨테이너 헤더(슬라이스 색인) 로딩
+
+    결과 식별자는 전파 작업 ID이므로 (job_id, task_id)로 캐시하고,
+    이후 슬라이스 요청은 해당 슬라이스 구간만 ranged read 합니다.
+    메타데이터와 task 상태는 비동기 Redis로 읽고, 저장소 읽기만 스레드 풀에서 실행합니다.
+    """
+    metadata = await aload_job_metadata(job_id)
+    if metadata is None:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "success": False,
+                "message": f"Job {job_id} not found",
+                "error_code": "JOB_NOT_FOUND"
+            }
+        )
+    
+    propagation_tasks = [t for t in metadata.get("tasks", []) if t.get("task_type") == "propagation"]
+    if not propagation_tasks:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "success": False,
+                "message": "No 3D propagation result for this job",
+                "error_code": "RESULT_NOT_FOUND"
+            }
+        )
+    
+    task_id = propagation_tasks[-1].get("task_id")
+    cache_key = (job_id, task_id)
+    with _sparse_index_lock:
+        index = _sparse_index_cache.get(cache_key)
+        if index is not None:
+            _sparse_index_cache.move_to_end(cache_key)
+            return index
+    
+    completed = metadata.get("result") or {}
+    if completed.get("task_id") != task_id and (await get_task_state(task_id)).state != "SUCCESS":
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "success": False,
+                "message": "Task is not completed yet",
+                "error_code": "TASK_NOT_COMPLETED"
+            }
+        )
+    
+    # 결과 파일은 task별 키
+    sparse_info = (completed.get("files") or {}).get("sparse") if completed.get("task_id") == task_id else None
+    if sparse_info:
+        key = sparse_info["key"]
+    else:
+        key = await run_in_threadpool(_task_result_file_key, job_id, task_id, SPARSE_RESULT_NAME)
+    index = await run_in_threadpool(_read_sparse_result_index, task_id, key)
+    with _sparse_index_lock:
+        _sparse_index_cache[cache_key] = index
+        while len(_sparse_index_cache) > SPARSE_INDEX_CACHE_SIZE:
+            _sparse_index_cache.popitem(last=False)
+    return index
+
+def _read_sparse_result_index(task_id: str, key: str) -> Dict[str, Any]:
+    """저장소의 희소 컨테이너 헤더를 읽어 슬라이스 색인 구성"""
+    storage = get_storage()
+    if not storage.exists(key):
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "success": False,
+                "message": "Sparse result not found",
+                "error_code": "RESULT_NOT_FOUND"
+            }
+        )
+    
+    head = storage.get_bytes(key, 0, SPARSE_HEADER_READ_BYTES - 1)
+    header_len = parse_sparse_prefix(head)
+    data_offset = SPARSE_PREFIX_SIZE + header_len
+    if len(head) < data_offset:
+        head += storage.get_bytes(key, len(head), data_offset - 1)
+    header = parse_sparse_header(head[SPARSE_PREFIX_SIZE:data_offset])
+    
+    bbox = header["bbox"]
+    index = {
+        "task_id": task_id,
+        "key": key,
+        "shape": header["shape"],
+        "bbox": bbox,
+        "data_offset": data_offset,
+        # 슬라이스 데이터는 볼륨 bbox의 (y, x) 범위로 잘려 있음
+        "crop": None if bbox is None else [bbox[2], bbox[4], bbox[3] - bbox[2] + 1, bbox[5] - bbox[4] + 1],
+        "slices": {entry[0]: entry for entry in header["slices"]}
+    }
+    return index
+
+def _read_result_slice(index: Dict[str, Any], slice_index: int) -> Dict[str, Any]:
+    """슬라이스 하나의 RLE 바이트와 면적/bbox (비어있는 슬라이스는 빈 RLE)"""
+    entry = index["slices"].get(slice_index)
+    if entry is None:
+        return {"z": slice_index, "area": 0, "bbox": None, "rle": b""}
+    
+    _, offset, length, area, y0, y1, x0, x1 = entry
+    start = index["data_offset"] + offset
+    rle = get_storage().get_bytes(index["key"], start, start + length - 1)
+    return {"z": slice_index, "area": area, "bbox": [y0, y1, x0, x1], "rle": rle}
+
+def _check_slice_range(index: Dict[str, Any], start: int, end: int):
+    depth = index["shape"][0]
+    if start < 0 or end >= depth or start > end:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "success": False,
+                "message": f"Invalid slice range {start}-{end} (volume has {depth} slices)",
+                "error_code": "INVALID_SLICE_INDEX"
+            }
+        )
+
+def _result_slice_png(index: Dict[str, Any], result_slice: Dict[str, Any]) -> bytes:
+    """RLE 슬라이스를 원본 크기 PNG (0/255)로 변환"""
+    _, height, width = index["shape"]
+    mask = np.zeros((height, width), dtype=np.uint8)
+    if result_slice["area"] > 0:
+        y0, x0, crop_h, crop_w = index["crop"]
+        mask[y0:y0 + crop_h, x0:x0 + crop_w] = decode_rle(result_slice["rle"], (crop_h, crop_w)) * 255
+    buffer = io.BytesIO()
+    Image.fromarray(mask).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def _mask_blob_png(blob: bytes) -> bytes:
+    """마스크 blob을 원본 크기 PNG (0/255)로 변환"""
+    mask, _ = decode_mask_blob(blob)
+    buffer = io.BytesIO()
+    Image.fromarray(mask * 255).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def _invalid_mask(message: str) -> HTTPException:
+    return HTTPException(
+        status_code=400,
+        detail={
+            "success": False,
+            "message": message,
+            "error_code": "INVALID_MASK"
+        }
+    )
+
+def _check_mask_id(mask_id: str):
+    if not MASK_ID_PATTERN.match(mask_id):
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "success": False,
+                "message": f"Invalid mask ID: {mask_id}",
+                "error_code": "INVALID_MASK_ID"
+            }
+        )
+
+def _check_mask_shape(shape, metadata: Dict[str, Any]):
+    """마스크 크기가 볼륨 슬라이스 (y, x)와 같은지 확인"""
+    volume_shape = ((metadata or {}).get("volume_info") or {}).get("shape")
+    if volume_shape and list(shape) != list(volume_shape[1:]):
+        raise _invalid_mask(f"Mask shape {list(shape)} does not match slice shape {list(volume_shape[1:])}")
+
+def _resolve_reference_mask(job_id: str, metadata: Dict[str, Any], request: PropagationRequest) -> str:
+    """
+    전파 요청의 참조 마스크를 작업 저장소의 mask_id로 변환
+    
+    - initial_mask_task_id: 같은 작업의 초기 마스크 task (blob ID = task ID)
+    - mask_id: 저장된 마스크 (초기 마스크 결과 또는 업로드한 편집 마스크)
+    - mask_data: 호환용 base64 PNG → blob으로 저장 후 참조
+    """
+    if request.mask_data:
+        try:
+            mask_img = Image.open(io.BytesIO(base64.b64decode(request.mask_data))).convert("L")
+        except Exception as e:
+            raise _invalid_mask(f"Invalid mask_data: {e}")
+        mask = np.array(mask_img) > 0
+        _check_mask_shape(mask.shape, metadata)
+        return save_mask(job_id, str(uuid.uuid4()), mask)["mask_id"]
+    
+    mask_id = request.mask_id
+    if request.initial_mask_task_id:
+        initial_tasks = {
+            t["task_id"] for t in metadata.get("tasks", []) if t.get("task_type") == "initial_mask"
+        }
+        if request.initial_mask_task_id not in initial_tasks:
+            raise HTTPException(
+                status_code=404,
+                detail={
+                    "success": False,
+                    "message": f"Initial mask task {request.initial_mask_task_id} not found in job {job_id}",
+                    "error_code": "MASK_NOT_FOUND"
+                }
+            )
+        mask_id = request.initial_mask_task_id
+    
+    _check_mask_id(mask_id)
+    if not get_storage().exists(mask_key(job_id, mask_id)):
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "success": False,
+                "message": f"Mask {mask_id} not found (initial mask may not be completed yet)",
+                "error_code": "MASK_NOT_FOUND"
+            }
+        )
+    return mask_id
+
+def _record_cached_task(job_id: str, task: Dict[str, Any], final_result: Dict[str, Any], **event_data):
+    """
+    캐시로 완료한 task 기록
+    
+    Celery 결과 백엔드에 SUCCESS로 먼저 기록하므로 /status, /result, 이벤트는
+    워커가 완료한 경우와 같게 동작합니다.
+    """
+    task_id = task["task_id"]
+    celery_app.backend.store_result(task_id, final_result, "SUCCESS")
+    get_job_store().append_task(job_id, task, status="completed")
+    publish_job_event(job_id, "status", task_id, task["task_type"], status="completed", cached=True, **event_data)
+
+
+def _complete_initial_mask_from_cache(job_id: str, task_id: str, request: InitialMaskRequest,
+                                      fingerprint: str, cache_key: str) -> Optional[Dict[str, Any]]:
+    """결과 캐시 적중 시 GPU 큐를 거치지 않고 초기 마스크 task 완료 (미적중이면 None)"""
+    cache = get_result_cache()
+    entry = cache.get(cache_key)
+    if not entry:
+        return None
+    try:
+        restored = cache.restore_file(entry, "mask", mask_key(job_id, task_id))
+    except Exception as e:
+        logger.warning(f"Dropping unusable result cache entry {cache_key}: {e}")
+        cache.invalidate(cache_key)
+        return None
+    if not restored:
+        # 조회 후 제거된 항목 (다른 요청이 다시 기록했을 수 있으므로 제거하지 않음)
+        logger.info(f"Result cache entry {cache_key} was evicted before restore")
+        return None
+    
+    # 같은 슬라이스의 진행 중인 이전 요청은 캐시 적중이어도 대체
+    slot = claim_interactive_slot(job_id, request.slice_index, fingerprint, task_id)
+    result = dict(entry["result"])
+    result["mask"] = {**result["mask"], "mask_id": task_id, "url": f"/api/v1/jobs/{job_id}/masks/{task_id}"}
+    final_result = {
+        "job_id": job_id,
+        "task_type": "initial_mask",
+        "status": "completed",
+        "processing_time": 0.0,
+        "cached": True,
+        "result": result
+    }
+    _record_cached_task(job_id, {
+        "task_id": task_id,
+        "task_type": "initial_mask",
+        "started_at": datetime.utcnow().isoformat(),
+        "request_data": request.dict(),
+        "cached": True,
+        "superseded_task_id": None if slot["coalesced"] else slot["superseded"]
+    }, final_result, result=result)
+    return final_result
+
+
+def _propagation_cache_key(job_id: str, metadata: Dict[str, Any], mask_id: str,
+                           request: PropagationRequest) -> Optional[str]:
+    """볼륨 해시 + 참조 마스크 내용 해시 + 전파 파라미터"""
+    volume_sha256 = (metadata.get("volume_file") or {}).get("sha256")
+    if not volume_sha256:
+        return None
+    return propagation_cache_key(
+        volume_sha256, describe_object(mask_key(job_id, mask_id))["sha256"],
+        request.reference_slice, request.start_slice, request.end_slice, request.window_level
+    )
+
+
+def _complete_propagation_from_cache(job_id: str, task_id: str, request_data: Dict[str, Any],
+                                     cache_key: str) -> Optional[Dict[str, Any]]:
+    """결과 캐시 적중 시 GPU 큐를 거치지 않고 3D 전파 task 완료 (미적중이면 None)"""
+    cache = get_result_cache()
+    entry = cache.get(cache_key)
+    if not entry:
         return None
+    result_key = task_result_key(job_id, task_id, RESULT_NAME)
+    sparse_key = task_result_key(job_id, task_id, SPARSE_RESULT_NAME)
     try:
-        with open(metadata_path, 'r') as f:
-            return json.load(f)
+        restored = cache.restore_file(entry, "nifti", result_key) and cache.restore_file(entry, "sparse", sparse_key)
     except Exception as e:
-        logger.error(f"Failed to load metadata for job {job_id}: {e}")
+        logger.warning(f"Dropping unusable result cache entry {cache_key}: {e}")
+        cache.invalidate(cache_key)
+        return None
+    if not restored:
+        # 조회 후 제거된 항목 (다른 요청이 다시 기록했을 수 있으므로 제거하지 않음)
+        logger.info(f"Result cache entry {cache_key} was evicted before restore")
+        get_storage().delete(result_key)
+        return None
+    
+    result_url = f"/api/v1/jobs/{job_id}/result"
+    result = {**entry["result"], "result_file_url": result_url, "result_key": result_key}
+    write_stats = result["result_write"]
+    record_job_result(job_id, {
+        "task_id": task_id,
+        "status": "completed",
+        "completed_at": datetime.utcnow().isoformat(),
+        "cached": True,
+        "files": {
+            "nifti": {"key": result_key, "size": write_stats["bytes_written"], "sha256": write_stats["sha256"]},
+            "sparse": {"key": sparse_key, "size": write_stats["sparse_bytes"], "sha256": write_stats["sparse_sha256"]}
+        }
+    })
+    final_result = {
+        "job_id": job_id,
+        "task_type": "propagation",
+        "status": "completed",
+        "processing_time": 0.0,
+        "cached": True,
+        "result": result
+    }
+    _record_cached_task(job_id, {
+        "task_id": task_id,
+        "task_type": "propagation",
+        "started_at": datetime.utcnow().isoformat(),
+        "request_data": request_data,
+        "cached": True
+    }, final_result, result_url=result_url)
+    return final_result
+
+def _claim_speculative_propagation(job_id: str, mask_id: str, request: PropagationRequest,
+                                   request_data: Dict[str, Any], cache_key: Optional[str]) -> Optional[str]:
+    """
+    같은 전파를 미리 시작한 추측이 있으면 사용 (사용자에게 반환할 task ID, 없으면 None)
+    
+    실행 중이면 그 task를 채택하고, 이미 끝났으면 저장된 결과를 병합 작업(CPU)으로 기록합니다.
+    맞지 않는 추측은 claim_speculation이 취소합니다.
+    """
+    fingerprint = propagation_fingerprint(
+        mask_id, request.reference_slice, request.start_slice, request.end_slice, request.window_level
+    )
+    decision = claim_speculation(job_id, fingerprint, cache_key)
+    if not decision:
         return None
+    
+    task = {
+        "task_type": "propagation",
+        "started_at": datetime.utcnow().isoformat(),
+        "request_data": request_data,
+        "speculative": True
+    }
+    if decision["action"] == "adopt":
+        # 이미 GPU에서 실행 중이므로 바로 processing
+        task_id = decision["task_id"]
+        get_job_store().append_task(job_id, {"task_id": task_id, **task}, status="processing")
+        publish_job_event(job_id, "status", task_id, "propagation", status="processing")
+        return task_id
+    
+    task_id = str(uuid.uuid4())
+    _append_job_task(job_id, {"task_id": task_id, **task})
+    merge_propagation_task.apply_async(
+        args=[[decision["record"]["partial"]]],
+        kwargs={
+            "job_id": job_id,
+            "reference_slice": request.reference_slice,
+            "start_slice": request.start_slice,
+            "end_slice": request.end_slice,
+            "cache_key": cache_key
+        },
+        task_id=task_id,
+        headers=enqueue_headers()
+    )
+    return task_id
+
 
 # def _save_debug_image_with_bbox(
 #     image_slice: np.ndarray,
@@ -96,61 +668,252 @@ def _load_job_metadata(job_id: str) -> Optional[Dict[str, Any]]:
 #         logger.error(f"디버그 이미지 저장 실패: {e}")
 
 
+def _status_task_ids(metadata: Dict[str, Any]) -> list:
+    """상태 판단에 필요한 Celery task ID (인제스트 중이면 인제스트 task, 최신 task)"""
+    ingest_info = metadata.get("ingest") or {}
+    latest_task = metadata["tasks"][-1] if metadata.get("tasks") else {}
+    ingest_task_id = ingest_info.get("task_id") if ingest_info.get("status") == "ingesting" else None
+    return [ingest_task_id, latest_task.get("task_id")]
+
+
+def _resolve_job_status(job_id: str, metadata: Dict[str, Any], task_states: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    메타데이터와 미리 조회한 task 상태로 작업 상태 항목 계산
+    
+    (단건/일괄 상태 조회 공용, Redis 조회는 호출 측에서 한 번에 수행)
+    """
+    # 최신 작업 상태 확인
+    current_status = TaskStatus.PENDING
+    current_task_type = None
+    progress = None
+    result_url = None
+    error_details = None
+    
+    ingest_info = metadata.get("ingest") or {}
+    latest_task = metadata["tasks"][-1] if metadata.get("tasks") else {}
+    ingest_task_id = ingest_info.get("task_id")
+    
+    if ingest_info.get("status") == "ingesting":
+        # 인제스트 워커가 비정상 종료된 경우 Celery 상태로 실패 감지
+        current_status = TaskStatus.INGESTING
+        if ingest_task_id:
+            ingest_result = task_states[ingest_task_id]
+            if ingest_result.state == "FAILURE":
+                current_status = TaskStatus.FAILED
+                error_details = {
+                    "error": f"Volume ingest failed: {ingest_result.info}",
+                    "task_id": ingest_task_id
+                }
+    elif ingest_info.get("status") == "failed":
+        current_status = TaskStatus.FAILED
+        error_details = {
+            "error": f"Volume ingest failed: {ingest_info.get('error', 'Unknown error')}",
+            "task_id": ingest_info.get("task_id")
+        }
+    elif latest_task:
+        # 가장 최근 작업 확인
+        task_id = latest_task.get("task_id")
+        
+        if task_id:
+            task_result = task_states[task_id]
+            current_task_type = latest_task.get("task_type")
+            
+            if task_result.state == "PENDING":
+                # 워커가 받기 전에 취소된 task는 결과 백엔드에 기록이 없음
+                if metadata.get("status") == TaskStatus.CANCELLED:
+                    current_status = TaskStatus.CANCELLED
+                else:
+                    current_status = TaskStatus.PENDING
+            elif task_result.state in (CANCELLED_STATE, "REVOKED"):
+                current_status = TaskStatus.CANCELLED
+            elif task_result.state == "RETRY":
+                # 시간 초과 후 체크포인트에서 재개 대기 중
+                current_status = TaskStatus.PROCESSING
+            elif task_result.state == "PROCESSING":
+                current_status = TaskStatus.PROCESSING
+                # 진행률 정보 추출
+                if task_result.info and isinstance(task_result.info, dict):
+                    progress = TaskProgress(
+                        current_step=task_result.info.get("progress", 0),
+                        total_steps=100,
+                        percentage=task_result.info.get("progress", 0),
+                        estimated_remaining_time=task_result.info.get("eta_seconds"),
+                        slices_per_second=task_result.info.get("slices_per_second"),
+                        current_operation=task_result.info.get("current_operation")
+                    )
+            elif task_result.state == "SUCCESS":
+                current_status = TaskStatus.COMPLETED
+                if current_task_type == "propagation":
+                    result_url = f"/api/v1/jobs/{job_id}/result"
+            elif task_result.state == "FAILURE":
+                current_status = TaskStatus.FAILED
+                # task_result.info가 dict인지 확인
+                if isinstance(task_result.info, dict):
+                    error_msg = task_result.info.get("error", "Unknown error")
+                else:
+                    # Exception 객체인 경우 문자열로 변환
+                    error_msg = str(task_result.info) if task_result.info else "Unknown error"
+                
+                error_details = {
+                    "error": error_msg,
+                    "task_id": task_id
+                }
+    
+    return {
+        "status": current_status,
+        "task_type": current_task_type,
+        "progress": progress,
+        "result_url": result_url,
+        "error_details": error_details
+    }
+
+
+@router.get("")
+async def list_jobs(
+    status: Optional[str] = Query(None, description="작업 상태 필터"),
+    task_type: Optional[str] = Query(None, description="작업 유형 필터 (initial_mask, propagation)"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=200)
+):
+    """
+    작업 목록 조회 (최신순, 페이지 단위)
+    
+    작업 저장소의 정렬된 색인에서 읽으므로 저장소 디렉토리를 스캔하지 않습니다.
+    """
+    try:
+        if status is not None and status not in JOB_STATUSES:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "success": False,
+                    "message": f"Unknown status: {status} (expected one of {list(JOB_STATUSES)})",
+                    "error_code": "INVALID_FILTER"
+                }
+            )
+        if task_type is not None and task_type not in TASK_TYPES:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "success": False,
+                    "message": f"Unknown task type: {task_type} (expected one of {list(TASK_TYPES)})",
+                    "error_code": "INVALID_FILTER"
+                }
+            )
+        
+        total, jobs = await run_in_threadpool(
+            get_job_store().list_jobs, status, task_type, (page - 1) * page_size, page_size
+        )
+        
+        return JSONResponse(
+            status_code=200,
+            content={
+                "success": True,
+                "message": f"Retrieved {len(jobs)} jobs",
+                "timestamp": datetime.utcnow().isoformat(),
+                "total": total,
+                "page": page,
+                "page_size": page_size,
+                "jobs": jobs
+            }
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to list jobs: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "success": False,
+                "message": f"Failed to list jobs: {str(e)}",
+                "error_code": "JOB_LIST_FAILED"
+            }
+        )
+
+
 @router.post("", response_model=JobCreateResponse)
 async def create_job(file: UploadFile = File(...)):
     """
     새 작업 생성 및 파일 업로드
     
-    NIfTI 파일(.nii.gz)을 업로드하여 새로운 작업을 생성합니다.
+    NIfTI 파일(.nii.gz) 또는 zip으로 묶은 DICOM 시리즈(.zip)를 업로드하여
+    새로운 작업을 생성합니다.
     """
     try:
         # 파일 검증
-        if not file.filename or not file.filename.endswith(".nii.gz"):
+        if file.filename and file.filename.endswith(".nii.gz"):
+            source_format = "nifti"
+        elif file.filename and file.filename.lower().endswith(".zip"):
+            source_format = "dicom"
+        else:
             raise HTTPException(
                 status_code=400,
                 detail={
                     "success": False,
-                    "message": "Only .nii.gz files are supported",
+                    "message": "Only .nii.gz files or zipped DICOM series (.zip) are supported",
                     "error_code": "INVALID_FILE_FORMAT"
                 }
             )
         
         # 작업 ID 생성
         job_id = str(uuid.uuid4())
-        job_path = _job_dir(job_id)
-        os.makedirs(job_path, exist_ok=True)
+        staging_dir = _upload_staging_dir(job_id)
+        await run_in_threadpool(os.makedirs, staging_dir, exist_ok=True)
         
-        # 파일 저장
-        volume_path = _volume_path(job_id)
+        # 파일 저장 (디스크 쓰기는 스레드 풀에서 수행하여 이벤트 루프 블로킹 방지)
+        upload_name = VOLUME_NAME if source_format == "nifti" else DICOM_UPLOAD_NAME
+        upload_path = os.path.join(staging_dir, upload_name)
         total_size = 0
+        # 다운로드 ETag용 원본 해시 (업로드하면서 계산)
+        digest = hashlib.sha256()
+        
+        def _write_chunk(fh, data: bytes):
+            fh.write(data)
+            digest.update(data)
         
-        with open(volume_path, "wb") as f:
+        f = await run_in_threadpool(open, upload_path, "wb")
+        try:
             while True:
                 chunk = await file.read(1024 * 1024)  # 1MB chunks
                 if not chunk:
                     break
                 total_size += len(chunk)
-                f.write(chunk)
+                await run_in_threadpool(_write_chunk, f, chunk)
+        finally:
+            await run_in_threadpool(f.close)
         
-        # 파일 검증 (NIfTI 로딩 테스트)
+        # 헤더만 검증 (차원, 데이터 타입, 기하 정보) - 픽셀 디코딩은 인제스트 작업에서 수행
         try:
-            processor = MedicalImageProcessor()
-            # run_in_threadpool을 사용하여 블로킹 I/O 위임
-            volume_data, metadata = await run_in_threadpool(processor.load_nifti, volume_path)
-            logger.info(f"Uploaded volume shape: {volume_data.shape}")
+            if source_format == "nifti":
+                processor = MedicalImageProcessor()
+                header_info = await run_in_threadpool(processor.read_nifti_header, upload_path)
+            else:
+                series = await run_in_threadpool(dicom_ingest.read_series_headers, upload_path)
+                header_info = {
+                    "shape": series["shape"],
+                    "spacing": series["spacing"],
+                    "dtype": series["dtype"],
+                    "origin": series["origin"],
+                    "direction": series["direction"]
+                }
+            logger.info(f"Uploaded volume header: shape={header_info['shape']}, dtype={header_info['dtype']}")
         except Exception as e:
-            # 실패시 파일 삭제
-            if os.path.exists(volume_path):
-                os.remove(volume_path)
+            # 실패시 임시 업로드 삭제
+            await run_in_threadpool(shutil.rmtree, staging_dir, True)
             raise HTTPException(
                 status_code=400,
                 detail={
                     "success": False,
-                    "message": f"Invalid NIfTI file: {str(e)}",
-                    "error_code": "INVALID_NIFTI_FILE"
+                    "message": f"Invalid {'NIfTI file' if source_format == 'nifti' else 'DICOM series'}: {str(e)}",
+                    "error_code": "INVALID_NIFTI_FILE" if source_format == "nifti" else "INVALID_DICOM_SERIES"
                 }
             )
         
+        # 검증된 업로드를 저장소로 이동 (S3 백엔드는 멀티파트 업로드)
+        storage = get_storage()
+        await run_in_threadpool(storage.put_file, job_key(job_id, upload_name), upload_path, True)
+        await run_in_threadpool(shutil.rmtree, staging_dir, True)
+        
         # 작업 메타데이터 저장
         job_metadata = {
             "job_id": job_id,
@@ -158,30 +921,51 @@ async def create_job(file: UploadFile = File(...)):
             "file_info": {
                 "filename": file.filename,
                 "size_bytes": total_size,
-                "content_type": file.content_type or "application/octet-stream"
+                "content_type": file.content_type or "application/octet-stream",
+                "source_format": source_format
             },
             "volume_info": {
-                "shape": volume_data.shape,
-                "spacing": metadata.get("spacing", [1.0, 1.0, 1.0]),
-                "dtype": str(volume_data.dtype)
+                key: header_info[key]
+                for key in ("shape", "spacing", "dtype", "affine", "origin", "direction")
+                if key in header_info
+            },
+            "status": TaskStatus.INGESTING,
+            "ingest": {
+                "status": "ingesting",
+                # 인제스트 작업이 메타데이터를 갱신하므로 작업 ID를 미리 정해 먼저 저장
+                "task_id": str(uuid.uuid4())
             },
-            "status": TaskStatus.PENDING,
             "tasks": []
         }
-        _save_job_metadata(job_id, job_metadata)
+        if source_format == "nifti":
+            # DICOM은 인제스트 작업이 volume.nii.gz를 만든 뒤 기록
+            job_metadata["volume_file"] = {
+                "key": job_key(job_id, VOLUME_NAME),
+                "size": total_size,
+                "sha256": digest.hexdigest()
+            }
+        await run_in_threadpool(_save_job_metadata, job_id, job_metadata)
+        
+        # 백그라운드 인제스트 시작 (전체 디코딩, 통계, 포맷 변환)
+        ingest_task_id = job_metadata["ingest"]["task_id"]
+        ingest_volume_task.apply_async(
+            kwargs={"job_id": job_id, "source_format": source_format},
+            task_id=ingest_task_id
+        )
         
-        logger.info(f"Created job {job_id}: {file.filename} ({total_size} bytes)")
+        logger.info(f"Created job {job_id}: {file.filename} ({total_size} bytes), ingest task {ingest_task_id}")
         
         return JobCreateResponse(
             success=True,
-            message="Job created successfully",
+            message="Job created successfully, volume ingest started",
             timestamp=datetime.utcnow().isoformat(),
             job_id=job_id,
             upload_info={
                 "filename": file.filename,
                 "size_bytes": total_size,
-                "volume_shape": volume_data.shape,
-                "total_slices": volume_data.shape[0]
+                "volume_shape": header_info["shape"],
+                "total_slices": header_info["shape"][0],
+                "status": TaskStatus.INGESTING
             }
         )
         
@@ -205,11 +989,13 @@ async def generate_initial_mask(job_id: str, request: InitialMaskRequest):
     2D 초기 마스크 생성
     
     지정된 슬라이스에서 bounding box를 사용하여 초기 2D 마스크를 생성합니다.
+    같은 슬라이스의 이전 요청은 취소되고(대체), 진행 중인 같은 요청이 있으면 그 task를 공유합니다(병합).
+    같은 볼륨 내용에 같은 요청이 이전에 완료되었으면 결과 캐시로 바로 완료합니다 (cached=true).
     """
     try:
-        # 작업 존재 확인
-        volume_path = _volume_path(job_id)
-        if not os.path.exists(volume_path):
+        # 작업 존재 및 인제스트 완료 확인
+        job_metadata = await aload_job_metadata(job_id)
+        if not job_metadata:
             raise HTTPException(
                 status_code=404,
                 detail={
@@ -218,13 +1004,14 @@ async def generate_initial_mask(job_id: str, request: InitialMaskRequest):
                     "error_code": "JOB_NOT_FOUND"
                 }
             )
+        _ensure_job_ready(job_id, job_metadata)
         
         # --- START: Debugging code ---
         # try:
         #     debug_img_path = os.path.join(TEMP_ROOT, f"{job_id}_slice_{request.slice_index}_debug.png")
         #     processor = MedicalImageProcessor()
         #     # run_in_threadpool을 사용하여 블로킹 I/O 위임
-        #     volume_data, _ = await run_in_threadpool(processor.load_nifti, volume_path)
+        #     volume_data, _ = await run_in_threadpool(processor.load_nifti, get_job_volume_path(job_id))
             
         #     if 0 <= request.slice_index < volume_data.shape[0]:
         #         target_slice = volume_data[request.slice_index]
@@ -243,12 +1030,41 @@ async def generate_initial_mask(job_id: str, request: InitialMaskRequest):
         #     logger.error(f"디버그 이미지 생성 실패 (job {job_id}): {e}")
         # --- END: Debugging code ---
 
-        # GPU 자원 확인 (비동기 실행)
+        bounding_box = [request.bounding_box.x1, request.bounding_box.y1,
+                        request.bounding_box.x2, request.bounding_box.y2]
+        fingerprint = request_fingerprint(request.slice_index, bounding_box, request.window_level)
+        
+        # 결과 캐시 적중이면 GPU 큐를 거치지 않고 바로 완료
+        cache_key = initial_mask_cache_key(
+            (job_metadata.get("volume_file") or {}).get("sha256"),
+            request.slice_index, bounding_box, request.window_level
+        )
+        if cache_key:
+            task_id = str(uuid.uuid4())
+            cached_result = await run_in_threadpool(
+                _complete_initial_mask_from_cache, job_id, task_id, request, fingerprint, cache_key
+            )
+            if cached_result:
+                logger.info(f"Served initial mask for job {job_id} from result cache, task {task_id}")
+                return InitialMaskResponse(
+                    success=True,
+                    message="Initial mask served from result cache",
+                    timestamp=datetime.utcnow().isoformat(),
+                    job_id=job_id,
+                    task_id=task_id,
+                    cached=True,
+                    result=MaskResult(**cached_result["result"])
+                )
+        
+        # GPU 자원 확인 (큐 길이는 비동기 Redis로 읽고, NVML 확인만 스레드 풀에서 실행)
+        # 대화형 작업은 배치 큐를 앞지르므로 대화형 큐 길이만 봄
+        queue_position = await get_queue_length(INTERACTIVE_QUEUE)
         gpu_manager = get_gpu_manager()
-        can_accept = await run_in_threadpool(gpu_manager.can_accept_job, "initial_mask")
+        can_accept = await run_in_threadpool(
+            gpu_manager.can_accept_job, "initial_mask", queue_length=queue_position or 0
+        )
         
         if not can_accept:
-            queue_position = await run_in_threadpool(gpu_manager.get_queue_position, job_id)
             raise HTTPException(
                 status_code=503,
                 detail={
@@ -259,26 +1075,45 @@ async def generate_initial_mask(job_id: str, request: InitialMaskRequest):
                 }
             )
         
-        # Celery 작업 시작
-        task = generate_initial_mask_task.delay(
-            job_id=job_id,
-            volume_path=volume_path,
-            slice_index=request.slice_index,
-            bounding_box=[request.bounding_box.x1, request.bounding_box.y1, 
-                         request.bounding_box.x2, request.bounding_box.y2],
-            window_level=request.window_level
-        )
-        
-        # 메타데이터 업데이트
-        metadata = _load_job_metadata(job_id)
-        if metadata:
-            metadata["tasks"].append({
-                "task_id": task.id,
-                "task_type": "initial_mask",
-                "started_at": datetime.utcnow().isoformat(),
-                "request_data": request.dict()
-            })
-            _save_job_metadata(job_id, metadata)
+        # 같은 슬라이스의 이전 요청 대체 / 진행 중인 같은 요청 병합
+        slot = await run_in_threadpool(
+            claim_interactive_slot, job_id, request.slice_index, fingerprint, str(uuid.uuid4())
+        )
+        task_id = slot["task_id"]
+        
+        if slot["coalesced"]:
+            logger.info(f"Coalesced initial mask request for job {job_id} into task {task_id}")
+            return InitialMaskResponse(
+                success=True,
+                message="Joined in-progress initial mask generation",
+                timestamp=datetime.utcnow().isoformat(),
+                job_id=job_id,
+                task_id=task_id,
+                coalesced=True,
+                result=None
+            )
+        
+        # task 기록을 먼저 추가한 뒤 같은 ID로 Celery 작업 시작 (워커의 상태 갱신이 기록보다 앞서지 않도록)
+        await run_in_threadpool(_append_job_task, job_id, {
+            "task_id": task_id,
+            "task_type": "initial_mask",
+            "started_at": datetime.utcnow().isoformat(),
+            "request_data": request.dict(),
+            "superseded_task_id": slot["superseded"]
+        })
+        task = generate_initial_mask_task.apply_async(
+            kwargs={
+                "job_id": job_id,
+                "slice_index": request.slice_index,
+                "bounding_box": bounding_box,
+                "window_level": request.window_level,
+                "cache_key": cache_key
+            },
+            task_id=task_id,
+            headers=enqueue_headers()
+        )
+        # 대화형 작업이 계속 들어오는 동안 오래 밀린 배치 작업 승격
+        await run_in_threadpool(check_batch_starvation)
         
         logger.info(f"Started initial mask generation for job {job_id}, task {task.id}")
         
@@ -287,6 +1122,8 @@ async def generate_initial_mask(job_id: str, request: InitialMaskRequest):
             message="Initial mask generation started",
             timestamp=datetime.utcnow().isoformat(),
             job_id=job_id,
+            task_id=task_id,
+            superseded_task_id=slot["superseded"],
             result=None
         )
         
@@ -312,9 +1149,9 @@ async def propagate_3d_mask(job_id: str, request: PropagationRequest):
     참조 2D 마스크를 시작/끝 슬라이스까지 양방향으로 전파합니다.
     """
     try:
-        # 작업 존재 확인
-        volume_path = _volume_path(job_id)
-        if not os.path.exists(volume_path):
+        # 작업 존재 및 인제스트 완료 확인
+        job_metadata = await aload_job_metadata(job_id)
+        if not job_metadata:
             raise HTTPException(
                 status_code=404,
                 detail={
@@ -323,13 +1160,67 @@ async def propagate_3d_mask(job_id: str, request: PropagationRequest):
                     "error_code": "JOB_NOT_FOUND"
                 }
             )
+        _ensure_job_ready(job_id, job_metadata)
+        
+        # 참조 마스크는 ID로만 전달 (워커가 작업 저장소에서 직접 읽음)
+        mask_id = await run_in_threadpool(_resolve_reference_mask, job_id, job_metadata, request)
+        request_data = {
+            "reference_slice": request.reference_slice,
+            "start_slice": request.start_slice,
+            "end_slice": request.end_slice,
+            "mask_id": mask_id
+        }
+        
+        # 결과 캐시 적중이면 GPU 큐를 거치지 않고 바로 완료
+        cache_key = await run_in_threadpool(_propagation_cache_key, job_id, job_metadata, mask_id, request)
+        if cache_key:
+            task_id = str(uuid.uuid4())
+            cached_result = await run_in_threadpool(
+                _complete_propagation_from_cache, job_id, task_id, request_data, cache_key
+            )
+            if cached_result:
+                logger.info(f"Served 3D propagation for job {job_id} from result cache, task {task_id}")
+                return PropagationResponse(
+                    success=True,
+                    message="3D propagation served from result cache",
+                    timestamp=datetime.utcnow().isoformat(),
+                    job_id=job_id,
+                    task_id=task_id,
+                    cached=True,
+                    result=PropagationResult(
+                        result_file_url=cached_result["result"]["result_file_url"],
+                        total_slices=cached_result["result"]["total_slices"],
+                        processed_slices=cached_result["result"]["processed_slices"],
+                        processing_time=0.0,
+                        volume_statistics=cached_result["result"].get("volume_statistics")
+                    )
+                )
+        
+        # 같은 전파를 미리 시작한 추측이 있으면 채택 (GPU 큐를 다시 거치지 않음)
+        if SPECULATIVE_PROPAGATION_ENABLED:
+            speculative_task_id = await run_in_threadpool(
+                _claim_speculative_propagation, job_id, mask_id, request, request_data, cache_key
+            )
+            if speculative_task_id:
+                logger.info(f"Using speculative 3D propagation for job {job_id}, task {speculative_task_id}")
+                return PropagationResponse(
+                    success=True,
+                    message="3D propagation started",
+                    timestamp=datetime.utcnow().isoformat(),
+                    job_id=job_id,
+                    task_id=speculative_task_id,
+                    speculative=True,
+                    result=None
+                )
         
-        # GPU 자원 확인 (비동기 실행)
+        # GPU 자원 확인 (큐 길이는 비동기 Redis로 읽고, NVML 확인만 스레드 풀에서 실행)
+        queue_position = await get_queue_length()
         gpu_manager = get_gpu_manager()
-        can_accept = await run_in_threadpool(gpu_manager.can_accept_job, "propagation")
+        can_accept = await run_in_threadpool(
+            gpu_manager.can_accept_job, "propagation", queue_length=queue_position or 0
+        )
         
         if not can_accept:
-            queue_position = await run_in_threadpool(gpu_manager.get_queue_position, job_id)
             raise HTTPException(
                 status_code=503,
                 detail={
@@ -340,39 +1231,55 @@ async def propagate_3d_mask(job_id: str, request: PropagationRequest):
                 }
             )
         
-        # Celery 작업 시작
-        task = propagate_3d_mask_task.delay(
-            job_id=job_id,
-            volume_path=volume_path,
-            reference_slice=request.reference_slice,
-            start_slice=request.start_slice,
-            end_slice=request.end_slice,
-            reference_mask_b64=request.mask_data,
-            window_level=request.window_level
-        )
-        
-        # 메타데이터 업데이트
-        metadata = _load_job_metadata(job_id)
-        if metadata:
-            metadata["tasks"].append({
-                "task_id": task.id,
-                "task_type": "propagation",
-                "started_at": datetime.utcnow().isoformat(),
-                "request_data": {
-                    "reference_slice": request.reference_slice,
-                    "start_slice": request.start_slice,
-                    "end_slice": request.end_slice
-                }
-            })
-            _save_job_metadata(job_id, metadata)
+        # 시간 제한은 볼륨 깊이와 측정된 슬라이스당 처리 시간으로 작업마다 계산
+        soft_limit, hard_limit = await run_in_threadpool(
+            propagation_time_limits, volume_depth(job_metadata)
+        )
         
-        logger.info(f"Started 3D propagation for job {job_id}, task {task.id}")
+        # task 기록을 먼저 추가한 뒤 같은 ID로 Celery 작업 시작
+        task_id = str(uuid.uuid4())
+        await run_in_threadpool(_append_job_task, job_id, {
+            "task_id": task_id,
+            "task_type": "propagation",
+            "started_at": datetime.utcnow().isoformat(),
+            "request_data": request_data
+        })
+        propagation_kwargs = {
+            "job_id": job_id,
+            "reference_slice": request.reference_slice,
+            "start_slice": request.start_slice,
+            "end_slice": request.end_slice,
+            "reference_mask_id": mask_id,
+            "window_level": request.window_level,
+            "cache_key": cache_key
+        }
+        split = should_split_propagation(queue_position)
+        if split:
+            # GPU 큐에 여유가 있으면 순방향/역방향을 두 워커에서 동시에 실행 (병합 작업이 task_id를 가짐)
+            task = await run_in_threadpool(
+                dispatch_split_propagation, task_id,
+                soft_time_limit=soft_limit, time_limit=hard_limit, **propagation_kwargs
+            )
+        else:
+            task = propagate_3d_mask_task.apply_async(
+                kwargs=propagation_kwargs,
+                task_id=task_id,
+                soft_time_limit=soft_limit,
+                time_limit=hard_limit,
+                headers=enqueue_headers()
+            )
         
-        return PropagationResponse(
+        logger.info(
+            f"Started {'split ' if split else ''}3D propagation for job {job_id}, task {task.id} "
+            f"(soft time limit {soft_limit}s)"
+        )
+        
+        return PropagationResponse(
             success=True,
             message="3D propagation started",
             timestamp=datetime.utcnow().isoformat(),
             job_id=job_id,
+            task_id=task_id,
             result=None
         )
         
@@ -390,6 +1297,73 @@ async def propagate_3d_mask(job_id: str, request: PropagationRequest):
         )
 
 
+@router.post("/status:batch")
+async def get_job_status_batch(request: JobStatusBatchRequest):
+    """
+    여러 작업 상태 일괄 조회
+    
+    메타데이터는 작업 저장소 파이프라인 한 번, task 상태는 결과 백엔드 MGET 한 번,
+    큐 길이는 한 번만 읽습니다. since를 주면 그 이후 변경된 작업만 반환하며,
+    진행률은 작업 저장소에 기록되지 않으므로 처리 중/인제스트 중인 작업은 항상 포함합니다.
+    """
+    try:
+        server_time = time.time()
+        job_ids = list(dict.fromkeys(request.job_ids))
+        
+        metadata_by_job = await aload_jobs_metadata(job_ids)
+        found = {job_id: metadata for job_id, metadata in metadata_by_job.items() if metadata}
+        
+        task_ids = [task_id for metadata in found.values() for task_id in _status_task_ids(metadata)]
+        task_states, queue_position = await asyncio.gather(
+            get_task_states(task_ids),
+            get_queue_length()
+        )
+        
+        jobs = []
+        for job_id, metadata in found.items():
+            fields = _resolve_job_status(job_id, metadata, task_states)
+            updated_ts = datetime.fromisoformat(metadata["updated_at"]).timestamp()
+            if (request.since is not None and updated_ts < request.since
+                    and fields["status"] not in (TaskStatus.PROCESSING, TaskStatus.INGESTING)):
+                continue
+            progress = fields["progress"]
+            jobs.append({
+                "job_id": job_id,
+                "status": fields["status"].value,
+                "task_type": fields["task_type"],
+                "progress": progress.dict() if progress else None,
+                "result_url": fields["result_url"],
+                "error_details": fields["error_details"],
+                "updated_at": metadata["updated_at"]
+            })
+        
+        return JSONResponse(
+            status_code=200,
+            content={
+                "success": True,
+                "message": f"Retrieved status of {len(jobs)} jobs",
+                "timestamp": datetime.utcnow().isoformat(),
+                "server_time": server_time,
+                "queue_position": queue_position,
+                "jobs": jobs,
+                "not_found": [job_id for job_id in job_ids if job_id not in found]
+            }
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get batch status for {len(request.job_ids)} jobs: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "success": False,
+                "message": f"Failed to get job status: {str(e)}",
+                "error_code": "STATUS_CHECK_FAILED"
+            }
+        )
+
+
 @router.get("/{job_id}/status", response_model=JobStatusResponse)
 async def get_job_status(job_id: str):
     """
@@ -398,8 +1372,9 @@ async def get_job_status(job_id: str):
     작업의 현재 상태, 진행률, 결과 등을 조회합니다.
     """
     try:
-        # 작업 존재 확인
-        if not os.path.exists(_job_dir(job_id)):
+        # 메타데이터 로딩 (비동기 Redis, 한 번의 파이프라인 왕복, 없으면 404)
+        metadata = await aload_job_metadata(job_id)
+        if not metadata:
             raise HTTPException(
                 status_code=404,
                 detail={
@@ -409,81 +1384,20 @@ async def get_job_status(job_id: str):
                 }
             )
         
-        # 메타데이터 로딩 (비동기 실행)
-        # run_in_threadpool을 사용하여 블로킹 I/O 위임
-        metadata = await run_in_threadpool(_load_job_metadata, job_id)
-        if not metadata:
-            raise HTTPException(
-                status_code=404,
-                detail={
-                    "success": False,
-                    "message": f"Job metadata not found for {job_id}",
-                    "error_code": "METADATA_NOT_FOUND"
-                }
-            )
-        
-        # 최신 작업 상태 확인
-        current_status = TaskStatus.PENDING
-        current_task_type = None
-        progress = None
-        result_url = None
-        error_details = None
-        
-        if metadata.get("tasks"):
-            # 가장 최근 작업 확인
-            latest_task = metadata["tasks"][-1]
-            task_id = latest_task.get("task_id")
-            
-            if task_id:
-                task_result = AsyncResult(task_id, app=celery_app)
-                current_task_type = latest_task.get("task_type")
-                
-                if task_result.state == "PENDING":
-                    current_status = TaskStatus.PENDING
-                elif task_result.state == "PROCESSING":
-                    current_status = TaskStatus.PROCESSING
-                    # 진행률 정보 추출
-                    if task_result.info and isinstance(task_result.info, dict):
-                        progress = TaskProgress(
-                            current_step=task_result.info.get("progress", 0),
-                            total_steps=100,
-                            percentage=task_result.info.get("progress", 0),
-                            current_operation=task_result.info.get("current_operation")
-                        )
-                elif task_result.state == "SUCCESS":
-                    current_status = TaskStatus.COMPLETED
-                    if current_task_type == "propagation":
-                        result_url = f"/api/v1/jobs/{job_id}/result"
-                elif task_result.state == "FAILURE":
-                    current_status = TaskStatus.FAILED
-                    # task_result.info가 dict인지 확인
-                    if isinstance(task_result.info, dict):
-                        error_msg = task_result.info.get("error", "Unknown error")
-                    else:
-                        # Exception 객체인 경우 문자열로 변환
-                        error_msg = str(task_result.info) if task_result.info else "Unknown error"
-                    
-                    error_details = {
-                        "error": error_msg,
-                        "task_id": task_id
-                    }
-        
-        # 큐 위치 확인 (비동기 실행)
-        gpu_manager = get_gpu_manager()
-        # run_in_threadpool을 사용하여 블로킹 호출(Lock 대기 포함)을 위임
-        queue_position = await run_in_threadpool(gpu_manager.get_queue_position, job_id)
+        # task 상태(MGET 한 번)와 큐 길이를 동시에 조회 (스레드 풀 사용 없음)
+        task_states, queue_position = await asyncio.gather(
+            get_task_states(_status_task_ids(metadata)),
+            get_queue_length()
+        )
+        fields = _resolve_job_status(job_id, metadata, task_states)
         
         return JobStatusResponse(
             success=True,
             message="Job status retrieved successfully",
             timestamp=datetime.utcnow().isoformat(),
             job_id=job_id,
-            status=current_status,
-            task_type=current_task_type,
-            progress=progress,
-            result_url=result_url,
-            error_details=error_details,
-            queue_position=queue_position
+            queue_position=queue_position,
+            **fields
         )
         
     except HTTPException:
@@ -500,17 +1414,91 @@ async def get_job_status(job_id: str):
         )
 
 
+@router.get("/{job_id}/events")
+async def stream_job_events(request: Request, job_id: str):
+    """
+    작업 이벤트 스트림 (Server-Sent Events)
+    
+    연결 직후 현재 상태를 status 이벤트로 한 번 보내고, 이후 워커/API가 발행한
+    status(pending, processing, completed, failed)와 progress 이벤트를 그대로 전달합니다.
+    초기 마스크의 completed 이벤트에는 결과(마스크 참조)가 포함되어 /result 조회가 필요 없습니다.
+    """
+    # 구독을 먼저 시작해야 현재 상태 조회와 구독 사이의 이벤트를 놓치지 않음
+    pubsub = await subscribe_job_events(job_id)
+    try:
+        metadata = await aload_job_metadata(job_id)
+        if not metadata:
+            raise HTTPException(
+                status_code=404,
+                detail={
+                    "success": False,
+                    "message": f"Job {job_id} not found",
+                    "error_code": "JOB_NOT_FOUND"
+                }
+            )
+        task_states = await get_task_states(_status_task_ids(metadata))
+    except BaseException:
+        await pubsub.aclose()
+        raise
+    
+    fields = _resolve_job_status(job_id, metadata, task_states)
+    latest_task = metadata["tasks"][-1] if metadata.get("tasks") else {}
+    snapshot = {
+        "type": "status",
+        "job_id": job_id,
+        "task_id": latest_task.get("task_id"),
+        "task_type": fields["task_type"],
+        "ts": time.time(),
+        "status": fields["status"].value,
+        "progress": fields["progress"].percentage if fields["progress"] else None,
+        "result_url": fields["result_url"],
+        "error_details": fields["error_details"],
+        "snapshot": True
+    }
+    
+    async def event_stream():
+        try:
+            yield format_sse(snapshot)
+            while not await request.is_disconnected():
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=SSE_HEARTBEAT_SECONDS
+                )
+                if message is None:
+                    # 프록시/브라우저가 유휴 연결을 끊지 않도록 주석 전송
+                    yield ": heartbeat\n\n"
+                    continue
+                yield format_sse(json.loads(message["data"]))
+        finally:
+            await pubsub.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/{job_id}/result")
-async def get_job_result(job_id: str):
+async def get_job_result(
+    request: Request,
+    job_id: str,
+    format: Optional[str] = Query(None, description="3D 결과 형식: nifti 또는 sparse"),
+    accept: Optional[str] = Header(None)
+):
     """
     작업 결과 조회
     
     2D initial mask의 경우 JSON으로 마스크 데이터 반환
     3D propagation의 경우 NIfTI 파일 다운로드
+    (format=sparse 또는 Accept: application/vnd.medsam.sparse-mask 이면 희소 RLE 컨테이너)
+    
+    3D 결과는 ETag/If-None-Match와 Range 요청을 지원하며, 완료 기록이 있으면
+    Celery 결과 백엔드(Redis)를 조회하지 않습니다.
     """
     try:
-        # 작업 존재 확인
-        if not os.path.exists(_job_dir(job_id)):
+        # 메타데이터 로딩 (비동기 Redis, 한 번의 파이프라인 왕복, 없으면 404)
+        metadata = await aload_job_metadata(job_id)
+        if not metadata:
             raise HTTPException(
                 status_code=404,
                 detail={
@@ -519,12 +1507,7 @@ async def get_job_result(job_id: str):
                     "error_code": "JOB_NOT_FOUND"
                 }
             )
-        
-        # 메타데이터 로딩 (비동기 실행)
-        # run_in_threadpool을 사용하여 블로킹 I/O 위임
-        metadata = await run_in_threadpool(_load_job_metadata, job_id)
-        logger.info(f"Loaded metadata for job {job_id}: {metadata is not None}")
-        if not metadata or not metadata.get("tasks"):
+        if not metadata.get("tasks"):
             logger.error(f"No tasks found for job {job_id}. Metadata: {metadata}")
             raise HTTPException(
                 status_code=404,
@@ -553,8 +1536,13 @@ async def get_job_result(job_id: str):
                 }
             )
         
-        # Celery 작업 결과 확인
-        task_result = AsyncResult(task_id, app=celery_app)
+        # 완료 기록이 있는 3D 결과는 Redis 조회 없이 바로 서빙
+        completed = metadata.get("result") or {}
+        if task_type == "propagation" and completed.get("task_id") == task_id:
+            return await _propagation_result_response(request, job_id, task_id, completed, format, accept)
+        
+        # Celery 작업 결과 확인 (비동기 Redis로 결과 백엔드 조회)
+        task_result = await get_task_state(task_id)
         
         logger.info(f"Task {task_id} ready: {task_result.ready()}, state: {task_result.state}")
         
@@ -569,6 +1557,16 @@ async def get_job_result(job_id: str):
                 }
             )
         
+        if task_result.state in (CANCELLED_STATE, "REVOKED"):
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "success": False,
+                    "message": "Task was cancelled",
+                    "error_code": "TASK_CANCELLED"
+                }
+            )
+        
         if task_result.failed():
             error_info = task_result.info if task_result.info else "Unknown error"
             raise HTTPException(
@@ -598,23 +1596,7 @@ async def get_job_result(job_id: str):
         
         # 3D propagation의 경우 파일 다운로드
         elif task_type == "propagation":
-            result_path = os.path.join(TEMP_ROOT, f"{job_id}_result.nii.gz")
-            
-            if not os.path.exists(result_path):
-                raise HTTPException(
-                    status_code=404,
-                    detail={
-                        "success": False,
-                        "message": "Result file not found",
-                        "error_code": "RESULT_NOT_FOUND"
-                    }
-                )
-            
-            return FileResponse(
-                path=result_path,
-                filename=f"medsam2_result_{job_id}.nii.gz",
-                media_type="application/octet-stream"
-            )
+            return await _propagation_result_response(request, job_id, task_id, None, format, accept)
         
         else:
             raise HTTPException(
@@ -644,6 +1626,456 @@ async def get_job_result(job_id: str):
         )
 
 
+@router.get("/{job_id}/volume")
+async def get_job_volume(request: Request, job_id: str):
+    """
+    원본 볼륨(.nii.gz) 다운로드
+    
+    결과 다운로드와 동일하게 ETag/If-None-Match와 Range 요청을 지원합니다.
+    """
+    try:
+        metadata = await aload_job_metadata(job_id)
+        if metadata is None:
+            raise HTTPException(
+                status_code=404,
+                detail={
+                    "success": False,
+                    "message": f"Job {job_id} not found",
+                    "error_code": "JOB_NOT_FOUND"
+                }
+            )
+        
+        file_info = metadata.get("volume_file")
+        if file_info is None:
+            # DICOM 업로드는 인제스트가 끝나야 volume.nii.gz가 생성됨
+            _ensure_job_ready(job_id, metadata)
+            file_info = await run_in_threadpool(_describe_stored_file, job_key(job_id, VOLUME_NAME))
+        
+        return await _stored_file_response(
+            request, file_info, f"medsam2_volume_{job_id}.nii.gz", "application/octet-stream"
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get volume for job {job_id}: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "success": False,
+                "message": f"Failed to get volume: {str(e)}",
+                "error_code": "VOLUME_RETRIEVAL_FAILED"
+            }
+        )
+
+
+@router.get("/{job_id}/result/slices/{slice_index}")
+async def get_result_slice(
+    job_id: str,
+    slice_index: int,
+    format: str = Query("rle", description="rle (볼륨 bbox로 자른 varint RLE) 또는 png"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    3D 결과의 단일 슬라이스 조회
+    
+    전체 결과를 내려받지 않고 희소 컨테이너에서 해당 슬라이스만 읽습니다.
+    면적과 bbox는 X-Mask-* 헤더로 전달됩니다.
+    """
+    try:
+        if format not in ("rle", "png"):
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "success": False,
+                    "message": f"Unsupported slice format: {format}",
+                    "error_code": "INVALID_RESULT_FORMAT"
+                }
+            )
+        
+        index = await _load_sparse_result_index(job_id)
+        _check_slice_range(index, slice_index, slice_index)
+        
+        # 결과는 전파 작업 ID 단위로 불변이므로 ETag로 재검증
+        etag = f'"{index["task_id"]}-{slice_index}-{format}"'
+        cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=cache_headers)
+        
+        result_slice = await run_in_threadpool(_read_result_slice, index, slice_index)
+        bbox = result_slice["bbox"]
+        headers = {
+            **cache_headers,
+            "X-Mask-Area": str(result_slice["area"]),
+            "X-Mask-BBox": ",".join(str(v) for v in bbox) if bbox else "",
+            "X-Mask-Crop": ",".join(str(v) for v in index["crop"]) if index["crop"] else ""
+        }
+        
+        if format == "png":
+            content = await run_in_threadpool(_result_slice_png, index, result_slice)
+            return Response(content=content, media_type="image/png", headers=headers)
+        return Response(content=result_slice["rle"], media_type=RLE_MEDIA_TYPE, headers=headers)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get result slice {slice_index} for job {job_id}: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "success": False,
+                "message": f"Failed to get result slice: {str(e)}",
+                "error_code": "RESULT_RETRIEVAL_FAILED"
+            }
+        )
+
+
+@router.get("/{job_id}/result/slices")
+async def get_result_slab(
+    job_id: str,
+    start: int = Query(..., ge=0),
+    end: int = Query(..., ge=0),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    3D 결과의 연속 슬라이스 구간(slab) 조회
+    
+    비어있지 않은 슬라이스만 base64 RLE로 반환합니다 (crop 영역 기준).
+    """
+    try:
+        index = await _load_sparse_result_index(job_id)
+        _check_slice_range(index, start, end)
+        if end - start + 1 > MAX_SLAB_SLICES:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "success": False,
+                    "message": f"Slab too large (max {MAX_SLAB_SLICES} slices)",
+                    "error_code": "INVALID_SLICE_INDEX"
+                }
+            )
+        
+        etag = f'"{index["task_id"]}-{start}-{end}"'
+        cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=cache_headers)
+        
+        def _read_slab():
+            # 비어있지 않은 슬라이스는 컨테이너에 연속 저장되므로 한 번의 ranged read로 읽음
+            entries = [index["slices"][z] for z in range(start, end + 1) if z in index["slices"]]
+            if not entries:
+                return []
+            first_offset = entries[0][1]
+            last_end = entries[-1][1] + entries[-1][2]
+            base = index["data_offset"] + first_offset
+            blob = get_storage().get_bytes(index["key"], base, index["data_offset"] + last_end - 1)
+            return [
+                {
+                    "z": z,
+                    "area": area,
+                    "bbox": [y0, y1, x0, x1],
+                    "rle": base64.b64encode(blob[offset - first_offset:offset - first_offset + length]).decode("ascii")
+                }
+                for z, offset, length, area, y0, y1, x0, x1 in entries
+            ]
+        
+        slices = await run_in_threadpool(_read_slab)
+        return JSONResponse(
+            status_code=200,
+            headers=cache_headers,
+            content={
+                "success": True,
+                "message": "Result slab retrieved successfully",
+                "timestamp": datetime.now().isoformat(),
+                "job_id": job_id,
+                "shape": index["shape"],
+                "crop": index["crop"],  # [y0, x0, height, width]
+                "start": start,
+                "end": end,
+                "slices": slices
+            }
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get result slab {start}-{end} for job {job_id}: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "success": False,
+                "message": f"Failed to get result slab: {str(e)}",
+                "error_code": "RESULT_RETRIEVAL_FAILED"
+            }
+        )
+
+
+@router.get("/{job_id}/result/stream")
+async def stream_result_slices(
+    request: Request,
+    job_id: str,
+    task_id: Optional[str] = Query(None, description="전파 task ID (기본: 최신 전파 작업)"),
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    전파 중 슬라이스 미리보기 스트림 (Server-Sent Events)
+    
+    slice 이벤트(z, area, bbox, shape, base64 RLE)를 전파 순서대로 보내고 end 이벤트로 끝납니다.
+    Redis Stream을 재생 버퍼로 쓰므로 늦게 연결해도 처음부터, 재연결 시에는 Last-Event-ID 이후부터 받습니다.
+    슬라이스는 후처리 전 결과이며 최종 마스크는 /result로 받습니다.
+    """
+    metadata = await aload_job_metadata(job_id)
+    if not metadata:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "success": False,
+                "message": f"Job {job_id} not found",
+                "error_code": "JOB_NOT_FOUND"
+            }
+        )
+    
+    propagation_tasks = [t for t in metadata.get("tasks", []) if t.get("task_type") == "propagation"]
+    if task_id is None and propagation_tasks:
+        task_id = propagation_tasks[-1].get("task_id")
+    if not task_id or task_id not in {t.get("task_id") for t in propagation_tasks}:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "success": False,
+                "message": "No 3D propagation task for this job",
+                "error_code": "RESULT_NOT_FOUND"
+            }
+        )
+    
+    client = get_async_redis(JOB_STORE_URL, decode_responses=True, pool_size=SSE_MAX_STREAMS)
+    key = slice_stream_key(job_id, task_id)
+    completed = metadata.get("result") or {}
+    stream_gone = completed.get("task_id") == task_id and not await client.exists(key)
+    
+    async def event_stream():
+        if stream_gone:
+            # 재생 버퍼가 만료된 완료 작업은 최종 결과 위치만 안내
+            yield format_sse({"type": "end", "status": "completed", "result_url": f"/api/v1/jobs/{job_id}/result"})
+            return
+        last_id = last_event_id or "0-0"
+        while not await request.is_disconnected():
+            replies = await client.xread({key: last_id}, count=64, block=int(SSE_HEARTBEAT_SECONDS * 1000))
+            if not replies:
+                yield ": heartbeat\n\n"
+                continue
+            for entry_id, fields in replies[0][1]:
+                last_id = entry_id
+                event = decode_stream_entry(fields)
+                yield f"id: {entry_id}\n" + format_sse(event)
+                if event.get("type") == "end":
+                    return
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/{job_id}/masks")
+async def upload_mask(request: Request, job_id: str):
+    """
+    편집한 2D 마스크 업로드
+    
+    본문은 마스크 blob (Content-Type: application/vnd.medsam.mask-blob, 보통 rle 인코딩)이며,
+    반환된 mask_id로 /propagate를 요청합니다.
+    """
+    try:
+        job_metadata = await aload_job_metadata(job_id)
+        if not job_metadata:
+            raise HTTPException(
+                status_code=404,
+                detail={
+                    "success": False,
+                    "message": f"Job {job_id} not found",
+                    "error_code": "JOB_NOT_FOUND"
+                }
+            )
+        
+        blob = await request.body()
+        try:
+            mask, header = await run_in_threadpool(decode_mask_blob, blob)
+        except Exception as e:
+            raise _invalid_mask(f"Invalid mask blob: {e}")
+        _check_mask_shape(mask.shape, job_metadata)
+        
+        # 서버 기본 인코딩으로 다시 저장 (면적/bbox도 서버에서 계산)
+        mask_ref = await run_in_threadpool(save_mask, job_id, str(uuid.uuid4()), mask)
+        logger.info(f"Uploaded mask {mask_ref['mask_id']} for job {job_id} ({len(blob)} bytes, {header['encoding']})")
+        
+        return JSONResponse(
+            status_code=201,
+            content={
+                "success": True,
+                "message": "Mask uploaded successfully",
+                "timestamp": datetime.now().isoformat(),
+                "job_id": job_id,
+                "mask": mask_ref
+            }
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to upload mask for job {job_id}: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "success": False,
+                "message": f"Failed to upload mask: {str(e)}",
+                "error_code": "MASK_UPLOAD_FAILED"
+            }
+        )
+
+
+@router.get("/{job_id}/masks/{mask_id}")
+async def get_mask(
+    request: Request,
+    job_id: str,
+    mask_id: str,
+    format: str = Query("blob", description="blob (헤더 + RLE/bitpack/PNG payload) 또는 png")
+):
+    """
+    2D 마스크 조회
+    
+    초기 마스크 결과는 Celery 결과 백엔드 대신 작업 저장소에 blob으로 저장되며,
+    작업 결과에는 이 엔드포인트의 URL과 요약 통계만 담깁니다.
+    """
+    try:
+        if format not in ("blob", "png"):
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "success": False,
+                    "message": f"Unsupported mask format: {format}",
+                    "error_code": "INVALID_RESULT_FORMAT"
+                }
+            )
+        _check_mask_id(mask_id)
+        
+        key = mask_key(job_id, mask_id)
+        file_info = await run_in_threadpool(_describe_stored_file, key)
+        
+        if format == "blob":
+            return await _stored_file_response(request, file_info, f"mask_{mask_id}.msk", MASK_BLOB_MEDIA_TYPE)
+        
+        # PNG 변환본도 blob 해시로 재검증 (마스크는 ID 단위로 불변)
+        etag = f'"{file_info["sha256"]}-png"'
+        cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=cache_headers)
+        
+        blob = await run_in_threadpool(get_storage().get_bytes, key)
+        content = await run_in_threadpool(_mask_blob_png, blob)
+        return Response(content=content, media_type="image/png", headers=cache_headers)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get mask {mask_id} for job {job_id}: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "success": False,
+                "message": f"Failed to get mask: {str(e)}",
+                "error_code": "RESULT_RETRIEVAL_FAILED"
+            }
+        )
+
+
+def _cancel_job_task(job_id: str, task_id: str, task_type: Optional[str]):
+    """취소 플래그/revoke 후 작업 상태와 이벤트 기록"""
+    request_cancel(task_id)
+    get_job_store().set_task_status(job_id, task_id, "cancelled")
+    publish_job_event(job_id, "status", task_id, task_type, status="cancelled")
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_job_task(
+    job_id: str,
+    task_id: Optional[str] = Query(None, description="취소할 task ID (기본값: 최신 task)")
+):
+    """
+    작업 취소
+    
+    대기 중인 task는 워커가 실행하지 않고, 실행 중인 task는 다음 프레임 경계에서 중단되어
+    GPU 슬롯을 반환합니다. 이미 끝난 task는 409를 반환합니다.
+    """
+    try:
+        metadata = await aload_job_metadata(job_id)
+        if not metadata:
+            raise HTTPException(
+                status_code=404,
+                detail={
+                    "success": False,
+                    "message": f"Job {job_id} not found",
+                    "error_code": "JOB_NOT_FOUND"
+                }
+            )
+        
+        tasks = metadata.get("tasks") or []
+        if task_id:
+            target = next((task for task in tasks if task.get("task_id") == task_id), None)
+        else:
+            target = tasks[-1] if tasks else None
+        if not target or not target.get("task_id"):
+            raise HTTPException(
+                status_code=404,
+                detail={
+                    "success": False,
+                    "message": "Task not found",
+                    "error_code": "TASK_NOT_FOUND"
+                }
+            )
+        
+        task_id = target["task_id"]
+        task_state = await get_task_state(task_id)
+        if task_state.ready():
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "success": False,
+                    "message": f"Task {task_id} already finished ({task_state.state})",
+                    "error_code": "TASK_NOT_CANCELLABLE"
+                }
+            )
+        
+        await run_in_threadpool(_cancel_job_task, job_id, task_id, target.get("task_type"))
+        logger.info(f"Cancellation requested for task {task_id} of job {job_id} (state: {task_state.state})")
+        
+        return JSONResponse(
+            status_code=202,
+            content={
+                "success": True,
+                "message": "Cancellation requested",
+                "job_id": job_id,
+                "task_id": task_id,
+                "task_type": target.get("task_type"),
+                "previous_state": task_state.state,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to cancel task for job {job_id}: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "success": False,
+                "message": f"Failed to cancel task: {str(e)}",
+                "error_code": "CANCEL_FAILED"
+            }
+        )
+
+
 @router.delete("/{job_id}")
 async def delete_job(job_id: str, background_tasks: BackgroundTasks):
     """
@@ -652,9 +2084,7 @@ async def delete_job(job_id: str, background_tasks: BackgroundTasks):
     작업과 관련된 모든 파일을 삭제합니다.
     """
     try:
-        job_path = _job_dir(job_id)
-        
-        if not os.path.exists(job_path):
+        if not await run_in_threadpool(_job_exists, job_id):
             raise HTTPException(
                 status_code=404,
                 detail={
@@ -664,18 +2094,14 @@ async def delete_job(job_id: str, background_tasks: BackgroundTasks):
                 }
             )
         
+        # 메타데이터와 색인은 즉시 삭제 (목록에서 바로 사라지도록)
+        await run_in_threadpool(get_job_store().delete, job_id)
+        
         # 백그라운드에서 파일 삭제
         def cleanup_files():
             try:
-                import shutil
-                # 작업 디렉토리 삭제
-                if os.path.exists(job_path):
-                    shutil.rmtree(job_path)
-                
-                # 결과 파일 삭제
-                result_path = os.path.join(TEMP_ROOT, f"{job_id}_result.nii.gz")
-                if os.path.exists(result_path):
-                    os.remove(result_path)
+                # 작업 디렉토리 (볼륨, 마스크, 결과) 삭제
+                get_storage().delete_prefix(job_prefix(job_id))
                 
                 logger.info(f"Cleaned up files for job {job_id}")
             except Exception as e:
@@ -12,8 +12,11 @@ from typing import List
 
 from medsam_api_server.core.gpu_manager import get_gpu_manager
 from medsam_api_server.core.model_manager import get_model_manager
+from medsam_api_server.core.serialization import get_serialization_stats
+from medsam_api_server.core.result_cache import get_result_cache
+from medsam_api_server.core.scheduling import get_queue_stats
 from medsam_api_server.schemas.api_models import (
-    BaseResponse, SystemInfo, GPUInfo, JobInfo
+    BaseResponse, SystemInfo, SystemStatusResponse, QueueStats, GPUInfo, JobInfo
 )
 
 logger = logging.getLogger(__name__)
@@ -21,9 +24,9 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/system", tags=["system"])
 
 
-@router.get("/status", response_model=BaseResponse)
+@router.get("/status", response_model=SystemStatusResponse)
 async def get_system_status():
-    """시스템 전체 상태 조회"""
+    """시스템 전체 상태 조회 (GPU 큐별 깊이/대기 시간 포함)"""
     try:
         gpu_manager = get_gpu_manager()
         # run_in_threadpool을 사용하여 블로킹 호출을 스레드 풀로 위임
@@ -52,11 +55,19 @@ async def get_system_status():
             gpu=gpu_info
         )
         
-        return BaseResponse(
+        # 큐 상태 (브로커를 읽지 못해도 나머지 상태는 반환)
+        try:
+            queue_stats = await run_in_threadpool(get_queue_stats)
+        except Exception as e:
+            logger.warning(f"Failed to get queue stats: {e}")
+            queue_stats = {}
+        
+        return SystemStatusResponse(
             success=True,
             message="System status retrieved successfully",
             timestamp=datetime.utcnow().isoformat(),
-            **{"system_info": system_info_model}
+            system_info=system_info_model,
+            queues={queue: QueueStats(**stats) for queue, stats in queue_stats.items()}
         )
         
     except Exception as e:
@@ -156,6 +167,56 @@ async def get_active_jobs():
         )
 
 
+@router.get("/serialization")
+async def get_serialization_status():
+    """작업별 Celery 메시지/결과 직렬화 크기 (JSON 대비 절감률 포함)"""
+    try:
+        stats = await run_in_threadpool(get_serialization_stats)
+        
+        return {
+            "success": True,
+            "message": "Serialization stats retrieved successfully",
+            "timestamp": datetime.utcnow().isoformat(),
+            "serialization": stats
+        }
+        
+    except Exception as e:
+        logger.error(f"Failed to get serialization stats: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "success": False,
+                "message": f"Failed to get serialization stats: {str(e)}",
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        )
+
+
+@router.get("/cache")
+async def get_result_cache_status():
+    """결과 캐시 항목 수/크기 (내용 기반 키, LRU 제거)"""
+    try:
+        stats = await run_in_threadpool(get_result_cache().get_stats)
+        
+        return {
+            "success": True,
+            "message": "Result cache stats retrieved successfully",
+            "timestamp": datetime.utcnow().isoformat(),
+            "result_cache": stats
+        }
+        
+    except Exception as e:
+        logger.error(f"Failed to get result cache stats: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "success": False,
+                "message": f"Failed to get result cache stats: {str(e)}",
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        )
+
+
 @router.get("/model", response_model=BaseResponse)
 async def get_model_status():
     """모델 상태 조회"""
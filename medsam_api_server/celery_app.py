@@ -1,7 +1,14 @@
 import os
 import logging
 from celery import Celery
-from celery.signals import worker_ready, worker_shutdown
+from celery.signals import worker_ready, worker_shutdown, task_prerun
+from kombu import Queue
+
+from medsam_api_server.core.serialization import register_serializer
+from medsam_api_server.core.scheduling import (
+    INTERACTIVE_QUEUE, BATCH_QUEUE, SPECULATIVE_QUEUE, WORKER_GPU_QUEUES, MERGE_QUEUE,
+    ENQUEUED_AT_HEADER, record_queue_wait
+)
 
 logger = logging.getLogger(__name__)
 
@@ -17,15 +24,20 @@ def create_celery_app() -> Celery:
         backend=result_backend,
         include=[
             "medsam_api_server.tasks.segmentation",
+            "medsam_api_server.tasks.ingest",
         ],
     )
 
+    # msgpack + zlib 직렬화기 (기존 JSON 메시지/결과도 content type으로 협상해 계속 읽음)
+    serializer = register_serializer()
+
     # GPU 작업에 최적화된 설정
     app.conf.update(
         # 직렬화 설정
-        task_serializer="json",
-        accept_content=["json"],
-        result_serializer="json",
+        task_serializer=serializer,
+        accept_content=["medsam", "json"] if serializer != "json" else ["json"],
+        result_serializer=serializer,
+        result_accept_content=["medsam", "json"] if serializer != "json" else ["json"],
         
         # 시간대 설정
         timezone="Asia/Seoul",
@@ -39,6 +51,8 @@ def create_celery_app() -> Celery:
         # 결과 설정
         result_expires=3600 * 24,  # 24시간
         result_persistent=True,
+        # 프레임 경계 선점으로 워커가 직접 실행한 대화형 작업(apply)도 결과 백엔드에 기록
+        task_store_eager_result=True,
         
         # 워커 설정 (GPU 작업에 최적화)
         worker_concurrency=1,  # GPU는 동시 처리 제한
@@ -46,22 +60,29 @@ def create_celery_app() -> Celery:
         task_acks_late=True,  # 작업 완료 후 ACK
         worker_max_tasks_per_child=100,  # 메모리 누수 방지 (모델 로딩 오버헤드 감소를 위해 증가)
         
-        # 작업 라우팅
+        # 작업 라우팅 (대화형 2D와 배치 3D를 분리, core/scheduling.py)
         task_routes={
-            "generate_initial_mask": {"queue": "gpu_tasks"},
-            "propagate_3d_mask": {"queue": "gpu_tasks"},
+            "generate_initial_mask": {"queue": INTERACTIVE_QUEUE},
+            "propagate_3d_mask": {"queue": BATCH_QUEUE},
+            "propagate_3d_direction": {"queue": BATCH_QUEUE},  # 분할 전파 방향별 하위 작업
+            "merge_propagation": {"queue": MERGE_QUEUE},  # 분할 전파 병합 (CPU)
+            "speculative_propagation": {"queue": SPECULATIVE_QUEUE},  # 추측 전파 (최저 우선순위)
+            "ingest_volume": {"queue": "ingest_tasks"},  # CPU 전용 (GPU 큐와 분리)
             "cleanup_old_results": {"queue": "maintenance_tasks"},
         },
         
-        # 큐 설정
-        task_default_queue="gpu_tasks",
+        # 큐 설정 (-Q 없이 시작한 GPU 워커는 GPU 큐를 이 순서대로 소비)
+        task_queues=[Queue(name) for name in WORKER_GPU_QUEUES],
+        task_default_queue=BATCH_QUEUE,
         task_create_missing_queues=True,
+        # 앞 큐가 비었을 때만 다음 큐 확인 (기본 round_robin은 큐를 번갈아 소비)
+        broker_transport_options={"queue_order_strategy": "priority"},
         
         # 재시도 설정
         task_default_retry_delay=60,  # 1분
         task_max_retries=3,
         
-        # 타임아웃 설정
+        # 타임아웃 설정 (2D 등 짧은 작업 기본값, 3D 전파는 제출 시 볼륨 깊이로 작업별 제한 지정 - core/time_limits.py)
         task_soft_time_limit=60,  # 1분 소프트 타임아웃 (무한 로딩 방지)
         task_time_limit=120,  # 2분 하드 타임아웃
         
@@ -91,6 +112,13 @@ def worker_ready_handler(sender=None, **kwargs):
     except ImportError:
         logger.warning("⚠️ PyTorch not available")
     
+    # 이전 실행에서 프레임 경계 선점으로 꺼낸 뒤 끝내지 못한 대화형 작업 되돌리기
+    try:
+        from medsam_api_server.tasks.preemption import requeue_preempted
+        requeue_preempted()
+    except Exception as e:
+        logger.error(f"❌ Failed to requeue preempted interactive tasks: {e}")
+    
     # 모델 매니저 초기화 (실제 로딩은 첫 작업시)
     try:
         from medsam_api_server.core.model_manager import get_model_manager
@@ -100,6 +128,18 @@ def worker_ready_handler(sender=None, **kwargs):
         logger.error(f"❌ Failed to initialize model manager: {e}")
 
 
+@task_prerun.connect
+def task_prerun_handler(task_id=None, task=None, **kwargs):
+    """큐 대기 시간 기록 (enqueued_at 헤더가 있는 작업만)"""
+    request = task.request if task is not None else None
+    if request is None:
+        return
+    queue = (request.delivery_info or {}).get("routing_key")
+    # 프레임 경계 선점으로 apply한 작업은 메시지 헤더가 request.headers에 그대로 있음
+    enqueued_at = getattr(request, ENQUEUED_AT_HEADER, None) or (getattr(request, "headers", None) or {}).get(ENQUEUED_AT_HEADER)
+    record_queue_wait(queue, enqueued_at)
+
+
 @worker_shutdown.connect
 def worker_shutdown_handler(sender=None, **kwargs):
     """워커 종료시 실행"""
@@ -0,0 +1,163 @@
+"""
+API용 비동기 Redis 접근 모듈
+
+async 핸들러에서 AsyncResult(...).state나 connection_or_acquire()를 직접 호출하면
+Redis 왕복마다 이벤트 루프가 멈추거나 스레드 풀을 점유합니다.
+브로커/결과 백엔드/작업 저장소를 URL별 redis.asyncio 커넥션 풀로 읽고,
+요청 하나에서 필요한 키는 파이프라인(MGET 등)으로 한 번에 읽습니다.
+
+Celery 결과 백엔드의 키/디코딩 규칙은 celery_app.backend를 그대로 사용하므로
+직렬화기(core/serialization.py)가 바뀌어도 동일하게 동작합니다.
+"""
+
+import os
+import time
+import logging
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Iterable
+
+from medsam_api_server.celery_app import celery_app
+from medsam_api_server.core.scheduling import GPU_QUEUES
+
+logger = logging.getLogger(__name__)
+
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
+CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/1")
+
+# API 프로세스당 URL별 최대 연결 수
+REDIS_POOL_SIZE = int(os.getenv("REDIS_POOL_SIZE", "50"))
+# 큐 길이 캐시 (GPUResourceManager와 같은 TTL)
+QUEUE_LENGTH_CACHE_TTL = float(os.getenv("QUEUE_LENGTH_CACHE_TTL", "2.0"))
+
+# Celery에서 완료로 보는 상태
+READY_STATES = frozenset({"SUCCESS", "FAILURE", "REVOKED", "CANCELLED"})
+EXCEPTION_STATES = frozenset({"FAILURE", "REVOKED", "RETRY"})
+
+_clients: Dict[tuple, Any] = {}
+_queue_length_cache: Dict[str, tuple] = {}
+
+
+def get_async_redis(url: str, decode_responses: bool = False, pool_size: Optional[int] = None):
+    """
+    URL별 redis.asyncio 클라이언트 (공유 커넥션 풀, 이벤트 루프 안에서만 사용)
+
+    pool_size를 지정하면 별도 풀을 사용 (pub/sub처럼 연결을 오래 점유하는 용도)
+    """
+    key = (url, decode_responses, pool_size)
+    client = _clients.get(key)
+    if client is None:
+        import redis.asyncio as aioredis
+
+        pool = aioredis.ConnectionPool.from_url(
+            url, max_connections=pool_size or REDIS_POOL_SIZE, decode_responses=decode_responses
+        )
+        client = aioredis.Redis(connection_pool=pool)
+        _clients[key] = client
+    return client
+
+
+async def close_async_redis():
+    """서버 종료 시 커넥션 풀 정리"""
+    for client in list(_clients.values()):
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Failed to close Redis client: {e}")
+    _clients.clear()
+
+
+@dataclass
+class TaskState:
+    """AsyncResult의 state/info/ready()에 해당하는 조회 결과"""
+    task_id: str
+    state: str = "PENDING"
+    info: Any = None
+    date_done: Optional[str] = None
+
+    def ready(self) -> bool:
+        return self.state in READY_STATES
+
+    def successful(self) -> bool:
+        return self.state == "SUCCESS"
+
+    def failed(self) -> bool:
+        return self.state == "FAILURE"
+
+    @property
+    def result(self) -> Any:
+        return self.info
+
+
+def _decode_task_state(task_id: str, payload: Optional[bytes]) -> TaskState:
+    if payload is None:
+        return TaskState(task_id=task_id)
+
+    backend = celery_app.backend
+    meta = backend.decode_result(payload)
+    state = meta.get("status", "PENDING")
+    info = meta.get("result")
+    if state in EXCEPTION_STATES and isinstance(info, dict):
+        try:
+            info = backend.exception_to_python(info)
+        except Exception:
+            pass
+    return TaskState(task_id=task_id, state=state, info=info, date_done=meta.get("date_done"))
+
+
+async def get_task_states(task_ids: Iterable[Optional[str]]) -> Dict[str, TaskState]:
+    """여러 task 상태를 결과 백엔드에서 MGET 한 번으로 조회"""
+    task_ids = [task_id for task_id in dict.fromkeys(task_ids) if task_id]
+    if not task_ids:
+        return {}
+
+    backend = celery_app.backend
+    keys = [backend.get_key_for_task(task_id) for task_id in task_ids]
+    payloads = await get_async_redis(CELERY_RESULT_BACKEND).mget(keys)
+    return {
+        task_id: _decode_task_state(task_id, payload)
+        for task_id, payload in zip(task_ids, payloads)
+    }
+
+
+async def get_task_state(task_id: str) -> TaskState:
+    return (await get_task_states([task_id])).get(task_id, TaskState(task_id=task_id))
+
+
+async def get_queue_lengths(queues: List[str]) -> Dict[str, Optional[int]]:
+    """
+    브로커 큐 길이 (짧게 캐시, 캐시가 없는 큐만 파이프라인으로 LLEN)
+
+    Redis 오류 시 None을 돌려주고 요청은 계속 처리합니다.
+    """
+    now = time.time()
+    lengths: Dict[str, Optional[int]] = {}
+    missing = []
+    for queue in queues:
+        cached = _queue_length_cache.get(queue)
+        if cached and now - cached[0] < QUEUE_LENGTH_CACHE_TTL:
+            lengths[queue] = cached[1]
+        else:
+            missing.append(queue)
+
+    if missing:
+        try:
+            pipe = get_async_redis(CELERY_BROKER_URL).pipeline(transaction=False)
+            for queue in missing:
+                pipe.llen(queue)
+            for queue, length in zip(missing, await pipe.execute()):
+                _queue_length_cache[queue] = (now, int(length))
+                lengths[queue] = int(length)
+        except Exception as e:
+            logger.warning(f"Failed to read queue lengths: {e}")
+            for queue in missing:
+                lengths[queue] = None
+    return lengths
+
+
+async def get_queue_length(queue: Optional[str] = None) -> Optional[int]:
+    """큐 길이 (queue가 없으면 GPU 큐 전체 합)"""
+    queues = [queue] if queue else list(GPU_QUEUES)
+    lengths = await get_queue_lengths(queues)
+    if any(length is None for length in lengths.values()):
+        return None
+    return sum(lengths.values())
@@ -0,0 +1,78 @@
+"""
+작업 취소 (협조적 취소)
+
+POST /api/v1/jobs/{job_id}/cancel은 대기 중인 Celery 작업을 revoke하고
+Redis에 취소 플래그를 기록합니다. 이미 실행 중인 작업은 프레임 사이에서 플래그를 확인해
+TaskCancelled로 빠져나가며, 컨텍스트 매니저/finally에서 GPU 슬롯과 메모리를 정리합니다.
+
+키:
+    medsam:task:{task_id}:cancel   CANCEL_FLAG_TTL 후 만료
+"""
+
+import os
+import time
+import logging
+
+from medsam_api_server.core.job_store import KEY_PREFIX
+
+logger = logging.getLogger(__name__)
+
+# 취소 플래그 보관 시간 (초) - task_time_limit보다 길어야 함
+CANCEL_FLAG_TTL = int(os.getenv("CANCEL_FLAG_TTL", "86400"))
+# 실행 중 작업이 Redis에서 플래그를 확인하는 최소 간격 (초, 프레임마다 왕복하지 않도록)
+CANCEL_CHECK_INTERVAL = float(os.getenv("CANCEL_CHECK_INTERVAL", "0.5"))
+
+# Celery 결과 백엔드에 기록하는 취소 상태 (REVOKED는 실행 전에 revoke된 경우)
+CANCELLED_STATE = "CANCELLED"
+
+
+class TaskCancelled(Exception):
+    """취소 요청으로 작업 중단"""
+
+
+class TaskYielded(Exception):
+    """실제 요청에 워커를 내주려고 중단 (취소와 달리 전파 체크포인트를 남김)"""
+
+
+def cancel_key(task_id: str) -> str:
+    return f"{KEY_PREFIX}:task:{task_id}:cancel"
+
+
+def request_cancel(task_id: str):
+    """취소 플래그 기록 후 대기 중인 작업 revoke (실행 중인 작업은 강제 종료하지 않음)"""
+    from medsam_api_server.celery_app import celery_app
+    from medsam_api_server.core.job_store import get_job_store
+
+    get_job_store().client.set(cancel_key(task_id), time.time(), ex=CANCEL_FLAG_TTL)
+    celery_app.control.revoke(task_id)
+
+
+def is_cancel_requested(task_id: str) -> bool:
+    from medsam_api_server.core.job_store import get_job_store
+
+    try:
+        return bool(get_job_store().client.exists(cancel_key(task_id)))
+    except Exception as e:
+        logger.warning(f"Failed to check cancellation for task {task_id}: {e}")
+        return False
+
+
+class CancellationCheck:
+    """
+    실행 중 취소 확인 (호출할 때마다 확인하되 Redis는 CANCEL_CHECK_INTERVAL마다만 조회)
+
+    취소가 요청되었으면 TaskCancelled 발생
+    """
+
+    def __init__(self, task_id: str, interval: float = CANCEL_CHECK_INTERVAL):
+        self.task_id = task_id
+        self.interval = interval
+        self._last_check = 0.0
+
+    def __call__(self):
+        now = time.time()
+        if now - self._last_check < self.interval:
+            return
+        self._last_check = now
+        if is_cancel_requested(self.task_id):
+            raise TaskCancelled(f"Task {self.task_id} was cancelled")
@@ -0,0 +1,218 @@
+"""
+DICOM 시리즈 인제스트 모듈
+
+압축(zip)된 DICOM 시리즈를 NIfTI 경로와 동일한 볼륨으로 변환합니다.
+- 인스턴스 헤더 파싱 및 위치 기준 정렬
+- 프로세스 풀 병렬 픽셀 디코딩 (작업 볼륨 .npy에 직접 기록)
+- SimpleITK와 동일한 LPS 기하 정보 (spacing, origin, direction)
+"""
+
+import os
+import logging
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Tuple
+
+import numpy as np
+
+try:
+    import pydicom
+    PYDICOM_AVAILABLE = True
+except ImportError:
+    PYDICOM_AVAILABLE = False
+    logging.warning("pydicom not available, DICOM upload disabled")
+
+logger = logging.getLogger(__name__)
+
+# 디코딩 프로세스 수 (기본값: CPU 코어 수)
+DICOM_DECODE_WORKERS = int(os.getenv("DICOM_DECODE_WORKERS", "0")) or (os.cpu_count() or 1)
+
+
+def _require_pydicom():
+    if not PYDICOM_AVAILABLE:
+        raise RuntimeError("pydicom is not installed; DICOM upload is not supported")
+
+
+def _read_member_header(archive: zipfile.ZipFile, name: str):
+    """zip 멤버에서 픽셀 데이터 전까지만 읽어 헤더 파싱 (DICOM이 아니면 None)"""
+    try:
+        with archive.open(name) as fp:
+            ds = pydicom.dcmread(fp, stop_before_pixels=True)
+    except Exception:
+        return None
+    if "ImagePositionPatient" not in ds or "ImageOrientationPatient" not in ds:
+        return None
+    return ds
+
+
+def _stored_value_range(ds) -> Tuple[int, int]:
+    """저장된 픽셀 값의 가능한 범위 (BitsStored, PixelRepresentation 기준)"""
+    bits_stored = int(ds.get("BitsStored", ds.get("BitsAllocated", 16)))
+    if int(ds.get("PixelRepresentation", 0)) == 1:
+        return -(1 << (bits_stored - 1)), (1 << (bits_stored - 1)) - 1
+    return 0, (1 << bits_stored) - 1
+
+
+def _output_dtype(ds, rescale: List[Tuple[float, float]], integral: bool) -> str:
+    """
+    출력 볼륨 데이터 타입
+
+    저장 범위에 슬라이스별 rescale을 적용한 최소/최대값이 들어가는 가장 작은 정수 타입을 고릅니다.
+    부호 없는 16비트(PixelRepresentation=0)나 rescale 후 int16 범위를 넘는 값은 int32,
+    정수가 아닌 rescale이나 int32 범위를 넘는 값은 float32를 사용합니다.
+    """
+    if not integral:
+        return "float32"
+    lo, hi = _stored_value_range(ds)
+    values = [v * slope + intercept for slope, intercept in rescale for v in (lo, hi)]
+    low, high = min(values), max(values)
+    for dtype in ("int16", "int32"):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return "float32"
+
+
+def read_series_headers(zip_path: str) -> Dict[str, Any]:
+    """
+    zip 안의 DICOM 인스턴스 헤더를 파싱하고 위치 순으로 정렬
+
+    여러 시리즈가 섞여 있으면 인스턴스가 가장 많은 시리즈를 사용합니다.
+
+    Returns:
+        Dict with sorted member names, geometry (SimpleITK 규약) and rescale info
+    """
+    _require_pydicom()
+
+    if not zipfile.is_zipfile(zip_path):
+        raise ValueError("Upload is not a valid zip archive")
+
+    series: Dict[str, List[Tuple[str, Any]]] = {}
+    with zipfile.ZipFile(zip_path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            ds = _read_member_header(archive, info.filename)
+            if ds is None:
+                continue
+            series.setdefault(str(ds.get("SeriesInstanceUID", "")), []).append((info.filename, ds))
+
+    if not series:
+        raise ValueError("No DICOM image instances found in archive")
+
+    series_uid, instances = max(series.items(), key=lambda item: len(item[1]))
+    if len(instances) < 2:
+        raise ValueError("DICOM series must contain at least 2 slices")
+
+    first = instances[0][1]
+    orientation = np.array([float(v) for v in first.ImageOrientationPatient])
+    row_dir, col_dir = orientation[:3], orientation[3:]
+    normal = np.cross(row_dir, col_dir)
+
+    rows, cols = int(first.Rows), int(first.Columns)
+    for name, ds in instances:
+        if int(ds.Rows) != rows or int(ds.Columns) != cols:
+            raise ValueError(f"Inconsistent slice dimensions in {name}")
+        if not np.allclose([float(v) for v in ds.ImageOrientationPatient], orientation, atol=1e-4):
+            raise ValueError(f"Inconsistent slice orientation in {name}")
+
+    # 슬라이스 법선 방향 투영값 기준 정렬
+    positions = [
+        (float(np.dot([float(v) for v in ds.ImagePositionPatient], normal)), name, ds)
+        for name, ds in instances
+    ]
+    positions.sort(key=lambda item: item[0])
+
+    offsets = np.array([p[0] for p in positions])
+    gaps = np.diff(offsets)
+    if np.any(gaps < 1e-4):
+        raise ValueError("Duplicate slice positions in DICOM series")
+    slice_spacing = float(np.median(gaps))
+
+    pixel_spacing = [float(v) for v in first.get("PixelSpacing", [1.0, 1.0])]
+    origin = [float(v) for v in positions[0][2].ImagePositionPatient]
+
+    # SimpleITK direction: 각 열이 x(행 방향), y(열 방향), z(법선) 축
+    direction = np.column_stack([row_dir, col_dir, normal]).flatten()
+
+    # Rescale (Modality LUT) 정보 및 출력 데이터 타입 결정
+    rescale = []
+    integral = True
+    for _, _, ds in positions:
+        slope = float(ds.get("RescaleSlope", 1.0))
+        intercept = float(ds.get("RescaleIntercept", 0.0))
+        rescale.append((slope, intercept))
+        integral = integral and slope.is_integer() and intercept.is_integer()
+
+    dtype = _output_dtype(first, rescale, integral)
+
+    return {
+        "series_instance_uid": series_uid,
+        "members": [p[1] for p in positions],
+        "rescale": rescale,
+        "shape": (len(positions), rows, cols),
+        "dtype": dtype,
+        "spacing": (pixel_spacing[1], pixel_spacing[0], slice_spacing),
+        "origin": tuple(origin),
+        "direction": tuple(float(v) for v in direction)
+    }
+
+
+def _decode_slice_batch(zip_path: str, npy_path: str, batch: List[Tuple[int, str, float, float]]) -> int:
+    """프로세스 풀 워커: 슬라이스 묶음을 디코딩해 공유 .npy memmap에 직접 기록"""
+    volume = np.load(npy_path, mmap_mode="r+")
+    with zipfile.ZipFile(zip_path) as archive:
+        for index, name, slope, intercept in batch:
+            with archive.open(name) as fp:
+                ds = pydicom.dcmread(fp)
+            pixels = ds.pixel_array.astype(np.float64 if volume.dtype.kind == "f" else np.int64)
+            if slope != 1.0 or intercept != 0.0:
+                pixels = pixels * slope + intercept
+            volume[index] = pixels.astype(volume.dtype)
+    volume.flush()
+    del volume
+    return len(batch)
+
+
+def convert_series_to_volume(zip_path: str, npy_path: str, series: Dict[str, Any]) -> Tuple[np.ndarray, Dict]:
+    """
+    DICOM 시리즈를 병렬 디코딩하여 npy_path에 (z, y, x) 볼륨으로 기록
+
+    Returns:
+        (memory-mapped volume, metadata) - MedicalImageProcessor.load_nifti와 같은 형식
+    """
+    _require_pydicom()
+
+    shape = tuple(series["shape"])
+    dtype = np.dtype(series["dtype"])
+
+    # 출력 파일을 미리 할당하고, 각 프로세스가 서로 겹치지 않는 슬라이스에 직접 기록
+    volume = np.lib.format.open_memmap(npy_path, mode="w+", dtype=dtype, shape=shape)
+    del volume
+
+    jobs = [
+        (index, name, slope, intercept)
+        for index, (name, (slope, intercept)) in enumerate(zip(series["members"], series["rescale"]))
+    ]
+    n_workers = max(1, min(DICOM_DECODE_WORKERS, len(jobs)))
+    # 코어당 여러 묶음으로 나눠 부하 균형 유지
+    batch_size = max(1, len(jobs) // (n_workers * 4))
+    batches = [jobs[i:i + batch_size] for i in range(0, len(jobs), batch_size)]
+
+    logger.info(f"Decoding {len(jobs)} DICOM slices with {n_workers} processes ({len(batches)} batches)")
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = [executor.submit(_decode_slice_batch, zip_path, npy_path, batch) for batch in batches]
+        decoded = sum(f.result() for f in futures)
+
+    if decoded != len(jobs):
+        raise RuntimeError(f"Decoded {decoded} of {len(jobs)} DICOM slices")
+
+    volume = np.load(npy_path, mmap_mode="r")
+    metadata = {
+        "spacing": series["spacing"],
+        "origin": series["origin"],
+        "direction": series["direction"],
+        "shape": volume.shape,
+        "dtype": str(volume.dtype)
+    }
+    return volume, metadata
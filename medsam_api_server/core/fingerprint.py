@@ -0,0 +1,37 @@
+"""
+요청 파라미터 지문
+
+중복 요청 판별(supersession), 결과 캐시 키(result_cache), 전파 체크포인트(result_sink),
+추측 전파 채택(speculation)이 같은 정규화/해시 규칙을 쓰도록 한 곳에 둡니다.
+규칙이 달라지면 같은 요청이 서로 다른 지문을 갖게 되므로 여기서만 바꿉니다.
+"""
+
+import json
+import hashlib
+from typing import Dict, Any, List, Optional
+
+
+def normalize_window_level(window_level: Optional[List[float]]) -> Optional[List[float]]:
+    """[window, level]을 소수점 셋째 자리로 반올림 (없으면 None)"""
+    return [round(float(v), 3) for v in window_level] if window_level else None
+
+
+def params_hash(params: Dict[str, Any], algorithm: str = "sha1") -> str:
+    """파라미터 dict의 hex 해시 (키 순서와 무관)"""
+    return hashlib.new(algorithm, json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def propagation_params(reference_mask: str, reference_slice: int, start_slice: int, end_slice: int,
+                       window_level: Optional[List[float]] = None) -> Dict[str, Any]:
+    """
+    전파 요청의 정규화한 파라미터
+
+    reference_mask는 용도에 따라 마스크 ID(체크포인트, 추측 전파) 또는 마스크 내용 해시(결과 캐시)입니다.
+    """
+    return {
+        "reference_mask": reference_mask,
+        "reference_slice": int(reference_slice),
+        "start_slice": int(start_slice),
+        "end_slice": int(end_slice),
+        "window_level": normalize_window_level(window_level)
+    }
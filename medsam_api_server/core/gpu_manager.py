@@ -16,6 +16,7 @@ from contextlib import contextmanager
 from dataclasses import dataclass
 from threading import Lock, RLock
 from medsam_api_server.celery_app import celery_app
+from medsam_api_server.core.scheduling import gpu_queue_length
 
 try:
     import GPUtil
@@ -159,8 +160,13 @@ class GPUResourceManager:
                 is_available=len(self._active_jobs) < self.max_concurrent_jobs,
             )
     
-    def can_accept_job(self, task_type: str, estimated_memory: float = 2000) -> bool:
-        """새 작업을 수용할 수 있는지 확인"""
+    def can_accept_job(self, task_type: str, estimated_memory: float = 2000,
+                       queue_length: Optional[int] = None) -> bool:
+        """
+        새 작업을 수용할 수 있는지 확인
+
+        queue_length를 넘기면 브로커를 다시 읽지 않음 (API는 비동기 Redis 클라이언트로 미리 조회)
+        """
         # 1. GPU 상태 확인 (Lock 없이 수행 - NVML 호출이 느릴 수 있음)
         # CPU 모드에서는 항상 True
         if self.gpu_count > 0:
@@ -182,17 +188,19 @@ class GPUResourceManager:
             # 3. 큐 대기열 확인 (Celery Inspection)
             # 실제 워커가 바쁜지 확인하기 위해 큐 깊이를 체크
             try:
-                # 캐시 확인
+                # 캐시 확인 (호출 측이 이미 읽은 값이 있으면 그대로 사용)
                 current_time = time.time()
                 timestamp, cached_length = self._queue_length_cache
                 
-                if current_time - timestamp < self._cache_ttl:
+                if queue_length is not None:
+                    self._queue_length_cache = (current_time, queue_length)
+                elif current_time - timestamp < self._cache_ttl:
                     queue_length = cached_length
                 else:
                     # Redis 브로커에서 직접 큐 길이 확인 (더 빠름)
                     with celery_app.connection_or_acquire() as conn:
-                        # 'gpu_tasks' 큐의 길이 확인
-                        queue_length = conn.default_channel.client.llen("gpu_tasks")
+                        # GPU 큐(대화형 + 배치) 전체 길이 확인
+                        queue_length = gpu_queue_length(conn.default_channel.client)
                         # 캐시 업데이트
                         self._queue_length_cache = (current_time, queue_length)
                 
@@ -236,6 +244,18 @@ class GPUResourceManager:
                     device_info = "GPU" if self.gpu_count > 0 else "CPU"
                     logger.info(f"Released {device_info} for job {job_id}, duration: {duration:.2f}s")
     
+    @contextmanager
+    def yield_slot(self, job_id: str):
+        """실행 중인 작업의 슬롯을 잠시 내줌 (프레임 경계 선점으로 대화형 작업을 처리하는 동안), 끝나면 복원"""
+        with self._lock:
+            job_info = self._active_jobs.pop(job_id, None)
+        try:
+            yield
+        finally:
+            if job_info is not None:
+                with self._lock:
+                    self._active_jobs[job_id] = job_info
+    
     def get_active_jobs(self) -> List[JobInfo]:
         """활성 작업 목록 조회"""
         with self._lock:
@@ -256,7 +276,7 @@ class GPUResourceManager:
                 # 실제로는 Celery가 태스크 ID로 관리하므로 job_id로 직접 찾기는 어려움
                 # 여기서는 단순히 큐 길이만 반환하거나, 예상 대기 시간을 반환하는 것이 현실적
                 
-                queue_length = conn.default_channel.client.llen("gpu_tasks")
+                queue_length = gpu_queue_length(conn.default_channel.client)
                 
                 # 캐시 업데이트
                 self._queue_length_cache = (current_time, queue_length)
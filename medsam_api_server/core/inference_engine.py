@@ -6,17 +6,29 @@ MedSAM2 추론 엔진
 
 import os
 import gc
+import time
 import base64
 import logging
 import threading
+import uuid
 import numpy as np
 from io import BytesIO
 from typing import Tuple, Optional, Dict, Any, List
 from PIL import Image
 import torch
+from celery.exceptions import SoftTimeLimitExceeded
 
 from medsam_api_server.core.model_manager import get_model_manager, MedicalImageProcessor
 from medsam_api_server.core.gpu_manager import get_gpu_manager
+from medsam_api_server.core.storage import (
+    get_storage, save_mask, load_mask, task_result_key, RESULT_NAME, SPARSE_RESULT_NAME
+)
+from medsam_api_server.core.result_sink import (
+    ResultSink, PropagationInProgress, propagation_checkpoint_id, sink_prefix, acquire_sink_lock, release_sink_lock,
+    DIRECTIONS, SINK_SLAB_SLICES
+)
+from medsam_api_server.core.mask_codec import write_sparse_volume, read_sparse_header
+from medsam_api_server.core.cancellation import TaskCancelled, TaskYielded
 
 logger = logging.getLogger(__name__)
 
@@ -132,7 +144,9 @@ class MedSAM2InferenceEngine:
         volume_path: str,
         slice_index: int,
         bounding_box: List[int],
-        window_level: Optional[List[float]] = None
+        window_level: Optional[List[float]] = None,
+        mask_id: Optional[str] = None,
+        cancel_check: Optional[callable] = None
     ) -> Dict[str, Any]:
         """
         2D 초기 마스크 생성
@@ -143,16 +157,18 @@ class MedSAM2InferenceEngine:
             slice_index: 대상 슬라이스 인덱스
             bounding_box: [x1, y1, x2, y2] 좌표
             window_level: [window, level] 윈도우 레벨
+            mask_id: 마스크 blob ID (기본값: 작업 내 새 UUID)
+            cancel_check: 취소 확인 함수 (취소되었으면 TaskCancelled 발생, 추론 직전에 호출)
             
         Returns:
-            Dict containing mask data and metadata
+            Dict containing mask reference (blob은 작업 저장소에 저장) and metadata
         """
         logger.info(f"Starting initial mask generation for job {job_id}")
         
         with self.gpu_manager.acquire_gpu(job_id, "initial_mask", estimated_duration=30):
             try:
-                # 1. 볼륨 데이터 로딩
-                volume_data, metadata = self.processor.load_nifti(volume_path)
+                # 1. 볼륨 데이터 로딩 (인제스트된 경우 mmap으로 필요한 슬라이스만 읽음)
+                volume_data, metadata = self.processor.load_volume(volume_path)
                 logger.info(f"Loaded volume: {volume_data.shape}")
                 
                 # 2. 슬라이스 검증
@@ -160,7 +176,7 @@ class MedSAM2InferenceEngine:
                     raise ValueError(f"Slice index {slice_index} out of range (max: {volume_data.shape[0]-1})")
                 
                 # 3. 대상 슬라이스 추출
-                target_slice = volume_data[slice_index]
+                target_slice = np.array(volume_data[slice_index])
                 
                 # 5. Bounding box 검증
                 if not self.processor.validate_bounding_box(bounding_box, target_slice.shape):
@@ -168,6 +184,8 @@ class MedSAM2InferenceEngine:
                 
                 # 6. MedSAM2 추론 (단일 슬라이스)
                 # 전처리는 _run_single_slice_inference 내부에서 일관되게 처리
+                if cancel_check:
+                    cancel_check()
                 model = self.model_manager.get_model()
                 mask = self._run_single_slice_inference(
                     model, 
@@ -176,22 +194,24 @@ class MedSAM2InferenceEngine:
                     window_level=window_level
                 )
                 
-                # 7. 결과 인코딩
-                mask_b64 = self._encode_mask_to_base64(mask)
+                # 7. 마스크 blob 저장 (Celery 결과 백엔드에는 참조와 요약만 남김)
+                mask_ref = save_mask(job_id, mask_id or str(uuid.uuid4()), mask)
                 
                 # 8. 메타데이터 수집
                 result = {
-                    "mask_data": mask_b64,
+                    "mask": mask_ref,
                     "slice_index": slice_index,
                     "original_shape": target_slice.shape,
                     "bounding_box": bounding_box,
-                    "window_level": window_level,
-                    "volume_metadata": metadata
+                    "window_level": window_level
                 }
                 
                 logger.info(f"Initial mask generation completed for job {job_id}")
                 return result
                 
+            except TaskCancelled:
+                logger.info(f"Initial mask generation cancelled for job {job_id}")
+                raise
             except Exception as e:
                 logger.error(f"Initial mask generation failed for job {job_id}: {e}")
                 raise
@@ -202,17 +222,48 @@ class MedSAM2InferenceEngine:
                 gc.collect()
     
     def propagate_3d_from_mask(self, job_id: str, volume_path: str, reference_slice: int, 
-                              start_slice: int, end_slice: int, reference_mask_b64: str,
+                              start_slice: int, end_slice: int, reference_mask_id: str,
                               window_level: Optional[List[float]] = None,
-                              progress_callback: Optional[callable] = None) -> Dict[str, Any]:
-        """2D 마스크로부터 3D 전파 실행 (MedSAM2 Video Predictor 원본 방식)"""
+                              progress_callback: Optional[callable] = None,
+                              slice_callback: Optional[callable] = None,
+                              cancel_check: Optional[callable] = None,
+                              yield_callback: Optional[callable] = None,
+                              directions: Tuple[str, ...] = DIRECTIONS,
+                              partial_key: Optional[str] = None,
+                              lock_owner: Optional[str] = None,
+                              lock_ttl: Optional[int] = None,
+                              result_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        2D 마스크로부터 3D 전파 실행 (MedSAM2 Video Predictor 원본 방식)
+        
+        progress_callback(progress, operation[, frames_done, frames_total])은 전파 중 프레임마다 호출되므로
+        호출 측에서 기록 빈도를 조절해야 합니다.
+        slice_callback(z, mask_2d)은 슬라이스가 기록될 때마다 호출됩니다 (후처리 전 미리보기).
+        cancel_check()는 프레임 사이마다 호출되며, 취소되었으면 TaskCancelled로 중단합니다.
+        yield_callback()도 프레임 사이마다 호출됩니다 (전파 상태는 유지한 채 대기 중인 대화형 작업 처리).
+        
+        같은 요청의 체크포인트가 있으면(재시도/시간 초과 후 재개) 완료된 방향은 건너뛰고,
+        진행 중이던 방향은 마지막으로 기록한 슬라이스의 마스크를 조건 프레임으로 추가해 그 슬라이스부터 이어갑니다.
+        실패하면 체크포인트를 남기고, 취소되면 지웁니다.
+        
+        분할 전파(directions에 한 방향, partial_key 지정)는 그 방향만 전파하고 후처리 없이
+        희소 컨테이너로 partial_key에 저장합니다. 후처리는 merge_propagation_partials에서 합친 뒤 수행합니다.
+        
+        lock_owner(task ID)를 주면 싱크를 열기 전에 결과 파일 잠금을 잡습니다. 같은 요청이 다른 task에서
+        실행 중이면 PropagationInProgress로 거절합니다 (lock_ttl은 잠금 만료 시간, 보통 작업의 하드 시간 제한).
+        
+        결과 파일은 result_id(결과를 기록할 task ID, 기본값은 lock_owner)별 키에 저장합니다.
+        """
+        sink = None
+        keep_checkpoint = False
+        locked_prefix = None
         try:
             logger.info(f"Starting 3D propagation from mask for job {job_id}")
             logger.info(f"Reference slice: {reference_slice}, Range: {start_slice}-{end_slice}")
             
-            # 1. NIfTI 파일 로딩
+            # 1. 볼륨 로딩 (인제스트 변환본 우선)
             processor = MedicalImageProcessor()
-            volume, metadata = processor.load_nifti(volume_path)
+            volume, metadata = processor.load_volume(volume_path)
             logger.info(f"Loaded volume: {volume.shape}")
             
             # 2. Video model 로딩
@@ -220,15 +271,10 @@ class MedSAM2InferenceEngine:
             if model is None:
                 raise RuntimeError("Video model not available for 3D propagation")
             
-            # 3. 참조 마스크 디코딩
-            import base64
-            from PIL import Image
-            import io
-
-            mask_bytes = base64.b64decode(reference_mask_b64)
-            mask_img = Image.open(io.BytesIO(mask_bytes)).convert('L')
-            reference_mask = np.array(mask_img) > 0
-            logger.info(f"Reference mask shape: {reference_mask.shape}")
+            # 3. 참조 마스크 로딩 (작업 저장소의 blob)
+            reference_mask, _ = load_mask(job_id, reference_mask_id)
+            reference_mask = reference_mask > 0
+            logger.info(f"Reference mask {reference_mask_id} shape: {reference_mask.shape}")
             
             # 4. 볼륨 전처리 (MedSAM2 원본 방식 + Custom WW/WL)
             if window_level:
@@ -263,40 +309,44 @@ class MedSAM2InferenceEngine:
             # 중요: SAM2에게는 512x512 이미지를 준다고 알려야 함 (Padding된 이미지이므로)
             video_height, video_width = self.image_size, self.image_size
             
-            # 8. 결과 마스크 초기화
-            mask_3d = np.zeros(volume.shape, dtype=np.uint8)
+            # 8. 결과 싱크 초기화 (슬라이스 단위로 mmap 파일에 기록, 같은 요청의 체크포인트가 있으면 이어서 사용)
+            # 분할 전파는 방향별로 체크포인트와 mmap을 따로 사용 (동시에 실행되는 반대 방향 subtask와 겹치지 않음)
+            checkpoint_id = propagation_checkpoint_id(
+                reference_mask_id, reference_slice, start_slice, end_slice, window_level, directions=directions
+            )
+            sink_key = "-".join(directions) if tuple(directions) != DIRECTIONS else None
+            if lock_owner:
+                prefix = sink_prefix(job_id, checkpoint_id, sink_key)
+                holder = acquire_sink_lock(prefix, lock_owner, lock_ttl)
+                if holder is not None:
+                    raise PropagationInProgress(prefix, holder)
+                locked_prefix = prefix
+            sink = ResultSink(job_id, volume.shape, on_slice=slice_callback,
+                              checkpoint_id=checkpoint_id, sink_key=sink_key)
+            for direction in DIRECTIONS:
+                if direction not in directions and not sink.direction_complete(direction):
+                    sink.complete_direction(direction)
+            
+            # 진행률의 프레임 수는 이번 실행이 맡은 방향만 계산
+            total_forward = volume.shape[0] - reference_slice
+            total_backward = reference_slice
+            forward_frames_total = total_forward if "forward" in directions else 0
+            frames_total = forward_frames_total + (total_backward if "backward" in directions else 0)
+            # 이번 실행에서 실제로 전파한 프레임 수와 시간 (슬라이스당 처리 시간 측정용)
+            frames_propagated = 0
+            propagation_started = time.time()
             
             # 9. MedSAM2 Video Predictor로 3D 전파
             with torch.inference_mode(), torch.autocast("cuda", dtype=torch.bfloat16):
                 # 상태 초기화
+                if cancel_check:
+                    cancel_check()
                 inference_state = model.init_state(img_tensor, video_height, video_width)
                 if progress_callback:
                     progress_callback(10, "MedSAM2 상태 초기화 완료")
                 
                 # 참조 마스크 전처리 (리사이즈 + 패딩)
-                # reference_mask: (H, W) -> (1, H, W)
-                ref_mask_tensor = torch.from_numpy(reference_mask).float().unsqueeze(0).unsqueeze(0) # (1, 1, H, W)
-                
-                # Resize Mask
-                ref_mask_resized = torch.nn.functional.interpolate(
-                    ref_mask_tensor,
-                    size=(padding_info['new_h'], padding_info['new_w']),
-                    mode='nearest' # 마스크는 nearest neighbor
-                )
-                
-                # Pad Mask
-                ref_mask_padded = torch.nn.functional.pad(
-                    ref_mask_resized,
-                    (0, padding_info['pad_w'], 0, padding_info['pad_h']),
-                    mode='constant',
-                    value=0
-                )
-                
-                # (1, 1, 512, 512) -> (512, 512)
-                ref_mask_input = ref_mask_padded.squeeze(0).squeeze(0)
-                
-                if torch.cuda.is_available():
-                    ref_mask_input = ref_mask_input.cuda()
+                ref_mask_input = self._prepare_mask_input(reference_mask, padding_info)
 
                 # 참조 슬라이스에 마스크 추가 (add_new_mask 사용)
                 # obj_id=1
@@ -326,7 +376,7 @@ class MedSAM2InferenceEngine:
                     else:
                         mask_orig = mask_cropped.astype(np.uint8)
                         
-                    mask_3d[reference_slice] = mask_orig
+                    sink.write_slice(reference_slice, mask_orig)
                     logger.info(f"Saved reference mask at slice {reference_slice}")
 
                 if progress_callback:
@@ -334,9 +384,17 @@ class MedSAM2InferenceEngine:
                 
                 # Forward propagation (참조 → 끝)
                 forward_count = 0
-                total_forward = volume.shape[0] - reference_slice
-                logger.info(f"Starting forward propagation from slice {reference_slice} to {end_slice}")
-                for out_frame_idx, out_obj_ids, out_mask_logits in model.propagate_in_video(inference_state):
+                forward_frames = ()
+                forward_start = self._resume_frame(model, inference_state, sink, "forward", reference_slice, padding_info)
+                if forward_start is not None:
+                    forward_count = forward_start - reference_slice
+                    logger.info(f"Starting forward propagation from slice {forward_start} to {end_slice}")
+                    forward_frames = model.propagate_in_video(inference_state, start_frame_idx=forward_start)
+                for out_frame_idx, out_obj_ids, out_mask_logits in forward_frames:
+                    if cancel_check:
+                        cancel_check()
+                    if yield_callback:
+                        yield_callback()
                     if start_slice <= out_frame_idx <= end_slice:
                         # 결과 마스크 (512x512)
                         mask_512 = (out_mask_logits[0] > 0.0).cpu().numpy()[0]
@@ -356,14 +414,18 @@ class MedSAM2InferenceEngine:
                         else:
                             mask_orig = mask_cropped.astype(np.uint8)
                             
-                        mask_3d[out_frame_idx] = mask_orig
+                        sink.write_slice(out_frame_idx, mask_orig)
+                        sink.mark_progress("forward", out_frame_idx)
                         if forward_count % 10 == 0:  # 10개마다 로그
                             logger.info(f"Forward: saved mask at slice {out_frame_idx}")
                     
                     forward_count += 1
+                    frames_propagated += 1
                     if progress_callback and total_forward > 0:
                         progress = 20 + (forward_count / total_forward) * 35
-                        progress_callback(int(progress), f"순방향 전파: {out_frame_idx}/{end_slice}")
+                        progress_callback(int(progress), f"순방향 전파: {out_frame_idx}/{end_slice}",
+                                          forward_count, frames_total)
+                sink.complete_direction("forward")
                 
                 # 상태 리셋 후 Backward propagation
                 model.reset_state(inference_state)
@@ -381,9 +443,19 @@ class MedSAM2InferenceEngine:
                 
                 # Backward propagation (참조 → 시작)
                 backward_count = 0
-                total_backward = reference_slice
-                logger.info(f"Starting backward propagation from slice {reference_slice} to {start_slice}")
-                for out_frame_idx, out_obj_ids, out_mask_logits in model.propagate_in_video(inference_state, reverse=True):
+                backward_frames = ()
+                backward_start = self._resume_frame(model, inference_state, sink, "backward", reference_slice, padding_info)
+                if backward_start is not None:
+                    backward_count = reference_slice - backward_start
+                    logger.info(f"Starting backward propagation from slice {backward_start} to {start_slice}")
+                    backward_frames = model.propagate_in_video(
+                        inference_state, start_frame_idx=backward_start, reverse=True
+                    )
+                for out_frame_idx, out_obj_ids, out_mask_logits in backward_frames:
+                    if cancel_check:
+                        cancel_check()
+                    if yield_callback:
+                        yield_callback()
                     if start_slice <= out_frame_idx < reference_slice:  # 중복 방지
                         # 결과 마스크 (512x512)
                         mask_512 = (out_mask_logits[0] > 0.0).cpu().numpy()[0]
@@ -401,30 +473,51 @@ class MedSAM2InferenceEngine:
                         else:
                             mask_orig = mask_cropped.astype(np.uint8)
                             
-                        mask_3d[out_frame_idx] = mask_orig
+                        sink.write_slice(out_frame_idx, mask_orig)
+                        sink.mark_progress("backward", out_frame_idx)
                         if backward_count % 5 == 0:  # 5개마다 로그
                             logger.info(f"Backward: saved mask at slice {out_frame_idx}")
                     
                     backward_count += 1
+                    frames_propagated += 1
                     if progress_callback and total_backward > 0:
                         progress = 55 + (backward_count / total_backward) * 35
-                        progress_callback(int(progress), f"역방향 전파: {out_frame_idx}/{start_slice}")
+                        progress_callback(int(progress), f"역방향 전파: {out_frame_idx}/{start_slice}",
+                                          forward_frames_total + backward_count, frames_total)
+                sink.complete_direction("backward")
+                propagation_time = time.time() - propagation_started
                 
                 # 상태 리셋
                 model.reset_state(inference_state)
                 
+                checkpoint_stats = {
+                    "resumed": sink.resumed,
+                    "frames_propagated": frames_propagated,
+                    "propagation_time": propagation_time
+                }
+                if partial_key:
+                    # 분할 전파: 이 방향의 결과만 저장 (병합 작업이 합친 뒤 후처리)
+                    partial_write = self._save_partial_result(job_id, sink, metadata, partial_key)
+                    logger.info(f"Partial 3D propagation {list(directions)} completed for job {job_id}")
+                    return {
+                        "partial_key": partial_key,
+                        "partial_write": partial_write,
+                        "directions": list(directions),
+                        "total_slices": volume.shape[0],
+                        "checkpoint": checkpoint_stats
+                    }
+                
                 if progress_callback:
                     progress_callback(90, "3D 마스크 후처리 중...")
                 
-                # 10. 후처리 (가장 큰 연결된 구성요소만 유지)
-                if np.any(mask_3d):  # 마스크가 비어있지 않을 때만 실행
-                    mask_3d = get_largest_connected_component(mask_3d)
+                # 10. 후처리 (가장 큰 연결된 구성요소만 유지, mmap 데이터에서 직접 처리)
+                sink.keep_largest_component()
                 
                 # 11. 결과 저장
-                result_file_path = self._save_3d_result(job_id, mask_3d, metadata, start_slice)
+                result_keys, write_stats = self._save_3d_result(job_id, sink, metadata, result_id or lock_owner)
                 
                 # 12. 통계 계산
-                volume_stats = self._calculate_volume_statistics(mask_3d, metadata)
+                volume_stats = sink.statistics(metadata)
                 
                 if progress_callback:
                     progress_callback(100, "3D 전파 완료!")
@@ -432,18 +525,41 @@ class MedSAM2InferenceEngine:
                 logger.info(f"3D propagation completed for job {job_id}")
                 
                 return {
-                    "result_file_path": result_file_path,
+                    **result_keys,  # result_key, sparse_key
+                    "result_write": write_stats,
                     "total_slices": volume.shape[0],
                     "processed_slices": end_slice - start_slice + 1,
                     "volume_statistics": volume_stats,
                     "slice_range": [start_slice, end_slice],
-                    "reference_slice": reference_slice
+                    "reference_slice": reference_slice,
+                    "checkpoint": checkpoint_stats
                 }
                 
+        except TaskCancelled:
+            logger.info(f"3D propagation cancelled for job {job_id}")
+            raise
+        except SoftTimeLimitExceeded:
+            # 작업이 체크포인트에서 재개하도록 그대로 전달
+            logger.warning(f"3D propagation for job {job_id} hit its soft time limit, keeping checkpoint")
+            keep_checkpoint = True
+            raise
+        except TaskYielded:
+            # 추측 전파가 실제 요청에 자리를 내줌 (같은 요청이 오면 체크포인트에서 이어감)
+            logger.info(f"3D propagation for job {job_id} yielded to queued work, keeping checkpoint")
+            keep_checkpoint = True
+            raise
+        except PropagationInProgress as e:
+            logger.warning(f"3D propagation for job {job_id} refused: {e}")
+            raise
         except Exception as e:
             logger.error(f"3D propagation from mask failed: {e}", exc_info=True)
+            keep_checkpoint = True
             raise RuntimeError(f"3D propagation from mask failed: {e}")
         finally:
+            if sink is not None:
+                sink.close(keep_checkpoint=keep_checkpoint)
+            if locked_prefix is not None:
+                release_sink_lock(locked_prefix, lock_owner)
             # GPU 메모리 정리
             if torch.cuda.is_available():
                 torch.cuda.empty_cache()
@@ -583,38 +699,145 @@ class MedSAM2InferenceEngine:
         mask = (mask > 128).astype(np.uint8)
         return mask
     
-    def _save_3d_result(self, job_id: str, mask_3d: np.ndarray, 
-                       metadata: Dict, start_slice: int) -> str:
-        """3D 결과 저장"""
-        temp_root = os.getenv("TEMP_ROOT", "/app/temp")
-        result_path = os.path.join(temp_root, f"{job_id}_result.nii.gz")
+    def merge_propagation_partials(self, job_id: str, partial_keys: List[str], reference_slice: int,
+                                   start_slice: int, end_slice: int,
+                                   progress_callback: Optional[callable] = None,
+                                   result_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        분할 전파의 방향별 결과를 합쳐 후처리 후 저장 (GPU 불필요)
         
-        # NIfTI로 저장
-        self.processor.save_nifti(mask_3d, result_path, metadata)
+        반환 형식은 propagate_3d_from_mask와 같습니다. 기하 정보는 희소 컨테이너 헤더에서 읽으므로 볼륨을 다시 열지 않습니다.
+        결과 파일과 임시 mmap은 result_id(결과를 기록할 task ID)별로 둡니다.
+        """
+        result_id = result_id or uuid.uuid4().hex
+        sink = None
+        try:
+            storage = get_storage()
+            partials = [storage.get_bytes(key) for key in partial_keys]
+            header, _ = read_sparse_header(partials[0])
+            metadata = {key: tuple(header[key]) for key in ("spacing", "origin", "direction")}
+            
+            sink = ResultSink(job_id, tuple(header["shape"]), sink_key=f"merge-{result_id}")
+            for data in partials:
+                sink.merge_sparse(data)
+            
+            if progress_callback:
+                progress_callback(90, "3D 마스크 후처리 중...")
+            
+            # 후처리 (가장 큰 연결된 구성요소만 유지)
+            sink.keep_largest_component()
+            result_keys, write_stats = self._save_3d_result(job_id, sink, metadata, result_id)
+            volume_stats = sink.statistics(metadata)
+            
+            if progress_callback:
+                progress_callback(100, "3D 전파 완료!")
+            
+            logger.info(f"Merged {len(partial_keys)} partial propagations for job {job_id}")
+            return {
+                **result_keys,
+                "result_write": write_stats,
+                "total_slices": sink.shape[0],
+                "processed_slices": end_slice - start_slice + 1,
+                "volume_statistics": volume_stats,
+                "slice_range": [start_slice, end_slice],
+                "reference_slice": reference_slice
+            }
+        except Exception as e:
+            logger.error(f"Merging partial propagations failed: {e}", exc_info=True)
+            raise RuntimeError(f"Merging partial propagations failed: {e}")
+        finally:
+            if sink is not None:
+                sink.close()
+
+    def _prepare_mask_input(self, mask: np.ndarray, padding_info: Dict) -> torch.Tensor:
+        """원본 크기 2D 마스크 → 모델 입력 크기 (리사이즈 + 패딩)"""
+        # mask: (H, W) -> (1, 1, H, W)
+        mask_tensor = torch.from_numpy(np.asarray(mask)).float().unsqueeze(0).unsqueeze(0)
         
-        return result_path
-    
-    def _calculate_volume_statistics(self, mask_3d: np.ndarray, 
-                                   metadata: Dict) -> Dict[str, Any]:
-        """볼륨 통계 계산"""
-        # 복셀 개수
-        total_voxels = mask_3d.size
-        positive_voxels = np.sum(mask_3d > 0)
+        # Resize Mask
+        mask_resized = torch.nn.functional.interpolate(
+            mask_tensor,
+            size=(padding_info['new_h'], padding_info['new_w']),
+            mode='nearest' # 마스크는 nearest neighbor
+        )
+        
+        # Pad Mask
+        mask_padded = torch.nn.functional.pad(
+            mask_resized,
+            (0, padding_info['pad_w'], 0, padding_info['pad_h']),
+            mode='constant',
+            value=0
+        )
         
-        # 볼륨 계산 (mm³)
-        spacing = metadata.get("spacing", (1.0, 1.0, 1.0))
-        voxel_volume = spacing[0] * spacing[1] * spacing[2]  # mm³
-        total_volume = positive_voxels * voxel_volume
+        # (1, 1, 512, 512) -> (512, 512)
+        mask_input = mask_padded.squeeze(0).squeeze(0)
         
-        return {
-            "total_voxels": int(total_voxels),
-            "positive_voxels": int(positive_voxels),
-            "volume_percentage": float(positive_voxels / total_voxels * 100) if total_voxels > 0 else 0.0,
-            "volume_mm3": float(total_volume),
-            "volume_ml": float(total_volume / 1000),  # ml
-            "spacing": spacing,
-            "shape": mask_3d.shape
-        }
+        if torch.cuda.is_available():
+            mask_input = mask_input.cuda()
+        return mask_input
+
+    def _resume_frame(self, model, inference_state, sink: ResultSink, direction: str,
+                      reference_slice: int, padding_info: Dict) -> Optional[int]:
+        """
+        방향별 전파 시작 프레임 (이미 완료된 방향이면 None)
+        
+        체크포인트가 있으면 마지막으로 기록한 슬라이스의 마스크를 조건 프레임으로 추가하고 그 슬라이스부터 시작합니다.
+        참조 마스크만 조건으로 처음부터 전파한 결과와 완전히 같지는 않지만, 직전 슬라이스 결과를 그대로 잇습니다.
+        """
+        if sink.direction_complete(direction):
+            logger.info(f"Skipping {direction} propagation for job {sink.job_id} (completed in checkpoint)")
+            return None
+        resume_slice = sink.resume_point(direction)
+        if resume_slice is None or resume_slice == reference_slice:
+            return reference_slice
+        model.add_new_mask(
+            inference_state=inference_state,
+            frame_idx=resume_slice,
+            obj_id=1,
+            mask=self._prepare_mask_input(sink.mask[resume_slice] > 0, padding_info)
+        )
+        logger.info(f"Resuming {direction} propagation for job {sink.job_id} from slice {resume_slice}")
+        return resume_slice
+
+    def _save_partial_result(self, job_id: str, sink: ResultSink, metadata: Dict, partial_key: str) -> Dict[str, Any]:
+        """분할 전파 결과를 희소 컨테이너로 저장소에 기록"""
+        temp_root = os.getenv("TEMP_ROOT", "/app/temp")
+        partial_path = os.path.join(temp_root, f"{job_id}_{os.path.basename(partial_key)}")
+        write_stats = write_sparse_volume(sink.mask, partial_path, metadata, SINK_SLAB_SLICES)
+        get_storage().put_file(partial_key, partial_path, move=True)
+        return write_stats
+
+    def _save_3d_result(self, job_id: str, sink: ResultSink, metadata: Dict,
+                        result_id: Optional[str] = None) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """
+        3D 결과 저장 (로컬 임시 파일에 쓴 뒤 저장소로 업로드)
+        
+        같은 작업의 다른 전파와 겹치지 않도록 임시 파일과 저장소 키 모두 result_id별로 둡니다.
+        
+        Returns:
+            ({"result_key", "sparse_key"}, 저장 통계)
+        """
+        result_id = result_id or uuid.uuid4().hex
+        temp_root = os.getenv("TEMP_ROOT", "/app/temp")
+        result_path = os.path.join(temp_root, f"{job_id}_{result_id}_result.nii.gz")
+        sparse_path = os.path.join(temp_root, f"{job_id}_{result_id}_result.mskr")
+        
+        try:
+            # NIfTI(블록 병렬 gzip) 및 희소 컨테이너로 저장
+            write_stats = sink.finalize(result_path, sparse_path, metadata)
+            
+            storage = get_storage()
+            keys = {
+                "result_key": task_result_key(job_id, result_id, RESULT_NAME),
+                "sparse_key": task_result_key(job_id, result_id, SPARSE_RESULT_NAME)
+            }
+            storage.put_file(keys["sparse_key"], sparse_path, move=True)
+            storage.put_file(keys["result_key"], result_path, move=True)
+            return keys, write_stats
+        finally:
+            for path in (result_path, sparse_path):
+                if os.path.exists(path):
+                    os.remove(path)
 
 
 # 전역 추론 엔진 인스턴스
@@ -0,0 +1,76 @@
+"""
+작업 이벤트 (Redis pub/sub)
+
+워커와 API가 작업 상태 변화/진행률을 작업별 채널로 발행하고,
+GET /api/v1/jobs/{job_id}/events가 이를 Server-Sent Events로 전달합니다.
+클라이언트는 /status를 주기적으로 폴링하지 않고 완료 즉시 결과를 가져갈 수 있습니다.
+
+채널:
+    medsam:job:{job_id}:events
+
+이벤트 (JSON):
+    {"type": "status" | "progress", "job_id", "task_id", "task_type", "ts", ...}
+    - status: status (pending, processing, completed, failed, cancelled, ingesting), 완료 시 result, 실패 시 error
+    - progress: progress (0-100), current_operation
+
+pub/sub은 보관하지 않으므로 구독 직후 현재 상태를 한 번 보내는 것은 API 측 책임입니다.
+"""
+
+import os
+import json
+import time
+import logging
+from typing import Dict, Any, Optional
+
+from medsam_api_server.core.job_store import JOB_STORE_URL, KEY_PREFIX
+
+logger = logging.getLogger(__name__)
+
+# SSE 연결 유지를 위한 주석(heartbeat) 간격 (초)
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+# API 프로세스당 동시 SSE 구독 수 (구독마다 Redis 연결 하나를 점유)
+SSE_MAX_STREAMS = int(os.getenv("SSE_MAX_STREAMS", "1000"))
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+def job_events_channel(job_id: str) -> str:
+    return f"{KEY_PREFIX}:job:{job_id}:events"
+
+
+def publish_job_event(job_id: str, event_type: str, task_id: Optional[str] = None,
+                      task_type: Optional[str] = None, **data):
+    """작업 이벤트 발행 (실패해도 작업에는 영향 없음)"""
+    from medsam_api_server.core.job_store import get_job_store
+
+    event = {
+        "type": event_type,
+        "job_id": job_id,
+        "task_id": task_id,
+        "task_type": task_type,
+        "ts": time.time(),
+        **data
+    }
+    try:
+        get_job_store().client.publish(job_events_channel(job_id), json.dumps(event, default=str))
+    except Exception as e:
+        logger.debug(f"Failed to publish job event for {job_id}: {e}")
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """이벤트 → SSE 메시지 (event 이름은 type)"""
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+async def subscribe_job_events(job_id: str):
+    """
+    작업 채널 구독 (redis.asyncio PubSub)
+
+    반환된 PubSub은 호출 측에서 unsubscribe/aclose 해야 합니다.
+    """
+    from medsam_api_server.core.async_redis import get_async_redis
+
+    client = get_async_redis(JOB_STORE_URL, decode_responses=True, pool_size=SSE_MAX_STREAMS)
+    pubsub = client.pubsub()
+    await pubsub.subscribe(job_events_channel(job_id))
+    return pubsub
@@ -0,0 +1,428 @@
+"""
+작업 메타데이터 저장소 (Redis)
+
+작업마다 metadata.json을 다시 쓰던 방식 대신 Redis에 저장합니다.
+여러 API 레플리카와 워커가 동시에 갱신해도 업데이트가 사라지지 않고,
+목록 조회는 디렉토리 스캔 없이 정렬된 색인에서 바로 읽습니다.
+
+키 구조:
+    medsam:job:{job_id}            hash - 최상위 메타데이터 항목(f:{key}, JSON)과 색인용 필드
+    medsam:job:{job_id}:tasks      list - 작업(task) 기록, RPUSH로 원자적 추가
+    medsam:jobs:created            zset - 생성 시각 색인
+    medsam:jobs:status:{status}    zset - 상태별 색인 (갱신 시각)
+    medsam:jobs:task_type:{type}   zset - 작업 유형별 색인 (마지막 작업 시각)
+
+기존 metadata.json 가져오기:
+    python -m medsam_api_server.core.job_store migrate
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import argparse
+import threading
+from enum import Enum
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+JOB_STORE_URL = os.getenv("JOB_STORE_URL", "redis://localhost:6379/2")
+
+KEY_PREFIX = "medsam"
+FIELD_PREFIX = "f:"
+JOB_STATUSES = ("ingesting", "pending", "processing", "completed", "failed", "cancelled")
+TASK_TYPES = ("initial_mask", "propagation")
+
+# 낙관적 잠금(WATCH) 충돌 시 재시도 횟수
+MAX_UPDATE_RETRIES = 10
+
+
+def _job_key(job_id: str) -> str:
+    return f"{KEY_PREFIX}:job:{job_id}"
+
+
+def _tasks_key(job_id: str) -> str:
+    return f"{KEY_PREFIX}:job:{job_id}:tasks"
+
+
+def _created_index() -> str:
+    return f"{KEY_PREFIX}:jobs:created"
+
+
+def _status_index(status: str) -> str:
+    return f"{KEY_PREFIX}:jobs:status:{status}"
+
+
+def _task_type_index(task_type: str) -> str:
+    return f"{KEY_PREFIX}:jobs:task_type:{task_type}"
+
+
+def _status_value(status) -> str:
+    return status.value if isinstance(status, Enum) else str(status)
+
+
+def _timestamp(value: Optional[str]) -> float:
+    """ISO 시각 → Unix timestamp (없거나 잘못되면 현재 시각)"""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, default=lambda v: _status_value(v) if isinstance(v, Enum) else str(v))
+
+
+class JobStore:
+    """Redis 기반 작업 메타데이터 저장소"""
+
+    def __init__(self, url: str = JOB_STORE_URL):
+        import redis
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+
+    # === 기록 ===
+
+    def create(self, job_id: str, metadata: Dict[str, Any]):
+        """작업 생성 (tasks는 별도 리스트로 저장)"""
+        metadata = dict(metadata)
+        tasks = metadata.pop("tasks", []) or []
+        status = _status_value(metadata.get("status", "pending"))
+        created_ts = _timestamp(metadata.get("created_at"))
+        now = time.time()
+
+        fields = {f"{FIELD_PREFIX}{key}": _dumps(value) for key, value in metadata.items()}
+        fields.update({"status": status, "created_ts": created_ts, "updated_ts": now})
+
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(_job_key(job_id), _tasks_key(job_id))
+        pipe.hset(_job_key(job_id), mapping=fields)
+        pipe.zadd(_created_index(), {job_id: created_ts})
+        for other in JOB_STATUSES:
+            pipe.zrem(_status_index(other), job_id)
+        pipe.zadd(_status_index(status), {job_id: now})
+        for task in tasks:
+            self._queue_task_append(pipe, job_id, task)
+        pipe.execute()
+
+    def _queue_task_append(self, pipe, job_id: str, task: Dict[str, Any]):
+        task_type = task.get("task_type")
+        task_ts = _timestamp(task.get("started_at"))
+        pipe.rpush(_tasks_key(job_id), _dumps(task))
+        pipe.hset(_job_key(job_id), mapping={
+            "latest_task_id": task.get("task_id", ""),
+            "latest_task_type": task_type or ""
+        })
+        # 유형 색인은 마지막 작업 기준 (이전 작업 유형 색인에서 제거)
+        for other in TASK_TYPES:
+            if other != task_type:
+                pipe.zrem(_task_type_index(other), job_id)
+        if task_type:
+            pipe.zadd(_task_type_index(task_type), {job_id: task_ts})
+
+    def append_task(self, job_id: str, task: Dict[str, Any], status: str = "pending"):
+        """작업(task) 기록을 원자적으로 추가하고 작업 상태 갱신"""
+        now = time.time()
+        pipe = self.client.pipeline(transaction=True)
+        self._queue_task_append(pipe, job_id, task)
+        self._queue_status(pipe, job_id, status, now)
+        pipe.execute()
+
+    def _queue_status(self, pipe, job_id: str, status: str, now: float):
+        status = _status_value(status)
+        pipe.hset(_job_key(job_id), mapping={
+            f"{FIELD_PREFIX}status": _dumps(status),
+            "status": status,
+            "updated_ts": now
+        })
+        for other in JOB_STATUSES:
+            if other != status:
+                pipe.zrem(_status_index(other), job_id)
+        pipe.zadd(_status_index(status), {job_id: now})
+
+    def update(self, job_id: str, updates: Dict[str, Any]):
+        """
+        메타데이터 부분 업데이트 (dict 값은 기존 값과 병합)
+
+        병합 대상 항목만 WATCH로 읽고 MULTI로 기록하므로 동시 갱신이 유실되지 않습니다.
+        """
+        import redis
+
+        key = _job_key(job_id)
+        merge_fields = [f"{FIELD_PREFIX}{k}" for k, v in updates.items() if isinstance(v, dict)]
+
+        for _ in range(MAX_UPDATE_RETRIES):
+            with self.client.pipeline(transaction=True) as pipe:
+                try:
+                    pipe.watch(key)
+                    if not pipe.exists(key):
+                        raise FileNotFoundError(f"Job metadata not found for {job_id}")
+                    current = dict(zip(merge_fields, pipe.hmget(key, merge_fields))) if merge_fields else {}
+
+                    fields = {}
+                    for k, value in updates.items():
+                        field = f"{FIELD_PREFIX}{k}"
+                        existing = json.loads(current[field]) if current.get(field) else None
+                        if isinstance(value, dict) and isinstance(existing, dict):
+                            existing.update(value)
+                            value = existing
+                        fields[field] = _dumps(value)
+
+                    now = time.time()
+                    pipe.multi()
+                    pipe.hset(key, mapping={**fields, "updated_ts": now})
+                    if "status" in updates:
+                        self._queue_status(pipe, job_id, updates["status"], now)
+                    pipe.execute()
+                    return
+                except redis.WatchError:
+                    continue
+        raise RuntimeError(f"Concurrent metadata updates for job {job_id} did not settle")
+
+    def set_task_status(self, job_id: str, task_id: str, status: str) -> bool:
+        """최신 task일 때만 작업 상태 갱신 (이전 task의 늦은 완료가 상태를 덮어쓰지 않도록)"""
+        import redis
+
+        key = _job_key(job_id)
+        for _ in range(MAX_UPDATE_RETRIES):
+            with self.client.pipeline(transaction=True) as pipe:
+                try:
+                    pipe.watch(key)
+                    if pipe.hget(key, "latest_task_id") != task_id:
+                        pipe.unwatch()
+                        return False
+                    pipe.multi()
+                    self._queue_status(pipe, job_id, status, time.time())
+                    pipe.execute()
+                    return True
+                except redis.WatchError:
+                    continue
+        return False
+
+    def delete(self, job_id: str):
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(_job_key(job_id), _tasks_key(job_id))
+        pipe.zrem(_created_index(), job_id)
+        for status in JOB_STATUSES:
+            pipe.zrem(_status_index(status), job_id)
+        for task_type in TASK_TYPES:
+            pipe.zrem(_task_type_index(task_type), job_id)
+        pipe.execute()
+
+    # === 조회 ===
+
+    def exists(self, job_id: str) -> bool:
+        return bool(self.client.exists(_job_key(job_id)))
+
+    def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """작업 메타데이터 (tasks 포함) - 한 번의 파이프라인 왕복"""
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hgetall(_job_key(job_id))
+        pipe.lrange(_tasks_key(job_id), 0, -1)
+        fields, tasks = pipe.execute()
+        if not fields:
+            return None
+        return self._decode(fields, tasks)
+
+    @staticmethod
+    def _decode(fields: Dict[str, str], tasks: List[str]) -> Dict[str, Any]:
+        metadata = {
+            key[len(FIELD_PREFIX):]: json.loads(value)
+            for key, value in fields.items() if key.startswith(FIELD_PREFIX)
+        }
+        metadata["status"] = fields.get("status", metadata.get("status"))
+        metadata["updated_at"] = datetime.fromtimestamp(float(fields.get("updated_ts", 0))).isoformat()
+        metadata["tasks"] = [json.loads(task) for task in tasks]
+        return metadata
+
+    def list_jobs(self, status: Optional[str] = None, task_type: Optional[str] = None,
+                  offset: int = 0, limit: int = 50) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        색인 기반 작업 목록 (최신순)
+
+        필터가 없으면 생성 시각, 있으면 상태/작업 유형 색인의 갱신 시각 기준으로 정렬합니다.
+        """
+        indexes = []
+        if status:
+            indexes.append(_status_index(status))
+        if task_type:
+            indexes.append(_task_type_index(task_type))
+
+        temp_key = None
+        if not indexes:
+            index = _created_index()
+        elif len(indexes) == 1:
+            index = indexes[0]
+        else:
+            temp_key = index = f"{KEY_PREFIX}:jobs:tmp:{uuid.uuid4()}"
+            pipe = self.client.pipeline(transaction=True)
+            pipe.zinterstore(temp_key, indexes, aggregate="MAX")
+            pipe.expire(temp_key, 30)
+            pipe.execute()
+
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.zcard(index)
+            pipe.zrevrange(index, offset, offset + limit - 1)
+            total, job_ids = pipe.execute()
+        finally:
+            if temp_key:
+                self.client.delete(temp_key)
+
+        summary_fields = [
+            "status", "created_ts", "updated_ts", "latest_task_id", "latest_task_type",
+            f"{FIELD_PREFIX}file_info"
+        ]
+        pipe = self.client.pipeline(transaction=False)
+        for job_id in job_ids:
+            pipe.hmget(_job_key(job_id), summary_fields)
+        rows = pipe.execute() if job_ids else []
+
+        items = []
+        for job_id, row in zip(job_ids, rows):
+            job_status, created_ts, updated_ts, latest_task_id, latest_task_type, file_info = row
+            if job_status is None:
+                continue  # 목록 조회 중 삭제된 작업
+            file_info = json.loads(file_info) if file_info else {}
+            items.append({
+                "job_id": job_id,
+                "status": job_status,
+                "created_at": datetime.fromtimestamp(float(created_ts)).isoformat(),
+                "updated_at": datetime.fromtimestamp(float(updated_ts)).isoformat(),
+                "latest_task_id": latest_task_id or None,
+                "latest_task_type": latest_task_type or None,
+                "filename": file_info.get("filename"),
+                "source_format": file_info.get("source_format")
+            })
+        return int(total), items
+
+
+# 전역 저장소 인스턴스
+_job_store: Optional[JobStore] = None
+_job_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """작업 저장소 싱글톤 인스턴스 반환"""
+    global _job_store
+    if _job_store is None:
+        with _job_store_lock:
+            if _job_store is None:
+                _job_store = JobStore()
+    return _job_store
+
+
+def load_job_metadata(job_id: str) -> Optional[Dict[str, Any]]:
+    """작업 메타데이터 로딩 (없으면 None)"""
+    try:
+        return get_job_store().load(job_id)
+    except Exception as e:
+        logger.error(f"Failed to load metadata for job {job_id}: {e}")
+        return None
+
+
+def update_job_metadata(job_id: str, updates: Dict[str, Any]):
+    """작업 메타데이터 부분 업데이트 (dict 값은 병합)"""
+    get_job_store().update(job_id, updates)
+
+
+async def aload_job_metadata(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    async 핸들러용 메타데이터 로딩 (redis.asyncio 커넥션 풀, 한 번의 파이프라인 왕복)
+    """
+    return (await aload_jobs_metadata([job_id])).get(job_id)
+
+
+async def aload_jobs_metadata(job_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    여러 작업의 메타데이터를 한 번의 파이프라인으로 로딩 (없는 작업은 None)
+    """
+    from medsam_api_server.core.async_redis import get_async_redis
+
+    if not job_ids:
+        return {}
+    pipe = get_async_redis(JOB_STORE_URL, decode_responses=True).pipeline(transaction=False)
+    for job_id in job_ids:
+        pipe.hgetall(_job_key(job_id))
+        pipe.lrange(_tasks_key(job_id), 0, -1)
+    replies = await pipe.execute()
+
+    results: Dict[str, Optional[Dict[str, Any]]] = {}
+    for i, job_id in enumerate(job_ids):
+        fields, tasks = replies[2 * i], replies[2 * i + 1]
+        results[job_id] = JobStore._decode(fields, tasks) if fields else None
+    return results
+
+
+# === metadata.json 마이그레이션 ===
+
+def _migrated_status(job_id: str, metadata: Dict[str, Any], storage) -> str:
+    """
+    가져온 작업의 상태를 저장된 기록으로 계산
+
+    이전 형식은 작업 생성 시 "pending"만 기록하고 이후 상태는 Celery에서 조회했으므로
+    저장된 status 값은 사용하지 않고 인제스트 기록, 마지막 task, 결과로 판단합니다.
+    """
+    from medsam_api_server.core.storage import job_key, RESULT_NAME
+
+    ingest_status = (metadata.get("ingest") or {}).get("status")
+    latest_task = metadata["tasks"][-1] if metadata.get("tasks") else {}
+    if ingest_status == "failed":
+        return "failed"
+    if latest_task.get("status") in JOB_STATUSES:
+        return latest_task["status"]
+    if metadata.get("result") or (latest_task and storage.exists(job_key(job_id, RESULT_NAME))):
+        return "completed"
+    if ingest_status == "ingesting":
+        return "ingesting"
+    return "pending"
+
+
+def migrate_from_storage(overwrite: bool = False) -> Dict[str, int]:
+    """
+    작업 저장소의 {job_id}/metadata.json을 작업 저장소(Redis)로 가져오기
+
+    이미 있는 작업은 overwrite=True일 때만 덮어씁니다. 여러 번 실행해도 안전합니다.
+    """
+    from medsam_api_server.core.storage import get_storage, METADATA_NAME
+
+    storage = get_storage()
+    store = get_job_store()
+    counts = {"imported": 0, "skipped": 0, "failed": 0}
+
+    for key in storage.list_keys(""):
+        parts = key.split("/")
+        if len(parts) != 2 or parts[1] != METADATA_NAME:
+            continue
+        job_id = parts[0]
+        try:
+            if store.exists(job_id) and not overwrite:
+                counts["skipped"] += 1
+                continue
+            metadata = json.loads(storage.get_bytes(key))
+            metadata.setdefault("job_id", job_id)
+            metadata.setdefault("tasks", [])
+            metadata["status"] = _migrated_status(job_id, metadata, storage)
+            store.create(job_id, metadata)
+            counts["imported"] += 1
+        except Exception as e:
+            logger.error(f"Failed to migrate metadata for job {job_id}: {e}")
+            counts["failed"] += 1
+
+    logger.info(f"Job metadata migration finished: {counts}")
+    return counts
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="MedSAM2 작업 메타데이터 저장소 관리")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = subparsers.add_parser("migrate", help="기존 metadata.json 파일 가져오기")
+    migrate_parser.add_argument("--overwrite", action="store_true", help="이미 있는 작업도 덮어쓰기")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        print(json.dumps(migrate_from_storage(overwrite=args.overwrite), indent=2))
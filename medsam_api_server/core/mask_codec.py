@@ -0,0 +1,289 @@
+"""
+희소 마스크 인코딩 모듈
+
+3D 결과는 보통 볼륨의 일부만 차지하므로, dense NIfTI 대신 다음 형식을 함께 제공합니다.
+
+희소 3D 컨테이너 (.mskr):
+    magic "MSKR" | uint32 LE 헤더 길이 | JSON 헤더 | 슬라이스 데이터
+    - 헤더: 원본 shape/기하 정보, 마스크의 tight bounding box, 비어있지 않은 슬라이스 색인
+      (슬라이스별 데이터 오프셋/길이, 면적, 2D bounding box)
+    - 슬라이스 데이터: 볼륨 bbox의 (y, x) 범위로 자른 2D 마스크의 RLE
+
+2D RLE:
+    행 우선(row-major)으로 펼친 마스크의 교대 run 길이 (0부터 시작, 첫 run은 0일 수 있음),
+    각 길이는 LEB128 varint
+
+2D 마스크 blob (작업 저장소의 masks/{mask_id}):
+    magic "MSK2" | uint32 LE 헤더 길이 | JSON 헤더 (shape, encoding, area, bbox) | payload
+    - payload 인코딩: rle (기본), bitpack (행 단위 np.packbits), png
+"""
+
+import io
+import os
+import json
+import time
+import struct
+import hashlib
+import logging
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SPARSE_MAGIC = b"MSKR"
+SPARSE_VERSION = 1
+SPARSE_MEDIA_TYPE = "application/vnd.medsam.sparse-mask"
+RLE_MEDIA_TYPE = "application/vnd.medsam.rle-mask"
+MASK_BLOB_MAGIC = b"MSK2"
+MASK_BLOB_MEDIA_TYPE = "application/vnd.medsam.mask-blob"
+MASK_ENCODINGS = ("rle", "bitpack", "png")
+
+# magic + 헤더 길이
+SPARSE_PREFIX_SIZE = 8
+
+# 슬라이스 색인 항목 필드 순서
+SLICE_INDEX_FIELDS = ["z", "offset", "length", "area", "y0", "y1", "x0", "x1"]
+
+
+# === 2D RLE ===
+
+def _encode_varints(values: List[int]) -> bytes:
+    out = bytearray()
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def _decode_varints(data: bytes) -> List[int]:
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    return values
+
+
+def encode_rle(mask: np.ndarray) -> bytes:
+    """2D 이진 마스크 → varint RLE 바이트"""
+    flat = np.asarray(mask).ravel() > 0
+    if flat.size == 0:
+        return b""
+    # 값이 바뀌는 위치로 run 경계 계산 (첫 run은 항상 0 값)
+    boundaries = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    runs = np.diff(np.concatenate(([0], boundaries, [flat.size])))
+    if flat[0]:
+        runs = np.concatenate(([0], runs))
+    return _encode_varints(int(r) for r in runs)
+
+
+def decode_rle(data: bytes, shape: Tuple[int, int]) -> np.ndarray:
+    """varint RLE 바이트 → 2D uint8 마스크"""
+    runs = _decode_varints(data)
+    size = int(shape[0]) * int(shape[1])
+    if sum(runs) != size:
+        raise ValueError(f"RLE length {sum(runs)} does not match mask size {size}")
+    values = np.zeros(len(runs), dtype=np.uint8)
+    values[1::2] = 1
+    return np.repeat(values, runs).reshape(shape)
+
+
+def mask_bbox_2d(mask: np.ndarray) -> Optional[List[int]]:
+    """2D 마스크의 [y0, y1, x0, x1] (끝 포함), 비어있으면 None"""
+    rows = np.flatnonzero(np.any(mask, axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(np.any(mask, axis=0))
+    return [int(rows[0]), int(rows[-1]), int(cols[0]), int(cols[-1])]
+
+
+# === 2D 마스크 blob ===
+
+def encode_mask_blob(mask: np.ndarray, encoding: str = "rle") -> Tuple[bytes, Dict[str, Any]]:
+    """
+    2D 마스크 → blob 바이트와 헤더 (헤더는 참조/요약 통계로도 사용)
+    """
+    if encoding not in MASK_ENCODINGS:
+        raise ValueError(f"Unknown mask encoding: {encoding} (expected one of {list(MASK_ENCODINGS)})")
+
+    binary = np.asarray(mask) > 0
+    if encoding == "rle":
+        payload = encode_rle(binary)
+    elif encoding == "bitpack":
+        payload = np.packbits(binary, axis=1).tobytes()
+    else:
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.fromarray(binary.astype(np.uint8) * 255).save(buffer, format="PNG")
+        payload = buffer.getvalue()
+
+    header = {
+        "version": SPARSE_VERSION,
+        "encoding": encoding,
+        "shape": [int(s) for s in binary.shape],
+        "area": int(np.count_nonzero(binary)),
+        "bbox": mask_bbox_2d(binary)
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    return MASK_BLOB_MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes + payload, header
+
+
+def decode_mask_blob(data: bytes) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """blob 바이트 → 2D uint8 마스크 (0/1)와 헤더"""
+    if len(data) < SPARSE_PREFIX_SIZE or data[:4] != MASK_BLOB_MAGIC:
+        raise ValueError("Not a mask blob")
+    header_len = struct.unpack("<I", data[4:8])[0]
+    header = json.loads(data[SPARSE_PREFIX_SIZE:SPARSE_PREFIX_SIZE + header_len].decode("utf-8"))
+    payload = data[SPARSE_PREFIX_SIZE + header_len:]
+    height, width = header["shape"]
+
+    if header["encoding"] == "rle":
+        mask = decode_rle(payload, (height, width))
+    elif header["encoding"] == "bitpack":
+        packed = np.frombuffer(payload, dtype=np.uint8).reshape(height, -1)
+        mask = np.unpackbits(packed, axis=1, count=width).astype(np.uint8)
+    elif header["encoding"] == "png":
+        from PIL import Image
+
+        mask = (np.array(Image.open(io.BytesIO(payload)).convert("L")) > 0).astype(np.uint8)
+    else:
+        raise ValueError(f"Unknown mask encoding: {header['encoding']}")
+    return mask, header
+
+
+# === 희소 3D 컨테이너 ===
+
+def _volume_bbox(mask: np.ndarray, slab_slices: int) -> Optional[List[int]]:
+    """3D 마스크의 [z0, z1, y0, y1, x0, x1] (끝 포함), 슬랩 단위 투영으로 계산"""
+    z_any = np.zeros(mask.shape[0], dtype=bool)
+    y_any = np.zeros(mask.shape[1], dtype=bool)
+    x_any = np.zeros(mask.shape[2], dtype=bool)
+    for z in range(0, mask.shape[0], slab_slices):
+        slab = np.asarray(mask[z:z + slab_slices]) > 0
+        z_any[z:z + slab_slices] = slab.any(axis=(1, 2))
+        y_any |= slab.any(axis=(0, 2))
+        x_any |= slab.any(axis=(0, 1))
+
+    zs = np.flatnonzero(z_any)
+    if zs.size == 0:
+        return None
+    ys, xs = np.flatnonzero(y_any), np.flatnonzero(x_any)
+    return [int(zs[0]), int(zs[-1]), int(ys[0]), int(ys[-1]), int(xs[0]), int(xs[-1])]
+
+
+def write_sparse_volume(mask: np.ndarray, file_path: str, metadata: Optional[Dict] = None,
+                        slab_slices: int = 32) -> Dict[str, Any]:
+    """
+    (z, y, x) 마스크를 희소 컨테이너로 저장
+
+    Returns:
+        Dict with encode_time, bytes_written, bbox, nonempty_slices, sha256
+    """
+    start_time = time.time()
+    metadata = metadata or {}
+    bbox = _volume_bbox(mask, max(1, slab_slices))
+
+    slices = []
+    chunks = []
+    offset = 0
+    if bbox is not None:
+        z0, z1, y0, y1, x0, x1 = bbox
+        for z in range(z0, z1 + 1):
+            crop = np.asarray(mask[z, y0:y1 + 1, x0:x1 + 1]) > 0
+            slice_bbox = mask_bbox_2d(crop)
+            if slice_bbox is None:
+                continue
+            encoded = encode_rle(crop)
+            # 슬라이스 bbox는 원본 좌표계로 기록
+            slices.append([
+                z, offset, len(encoded), int(np.count_nonzero(crop)),
+                slice_bbox[0] + y0, slice_bbox[1] + y0, slice_bbox[2] + x0, slice_bbox[3] + x0
+            ])
+            chunks.append(encoded)
+            offset += len(encoded)
+
+    header = {
+        "version": SPARSE_VERSION,
+        "encoding": "rle-varint",
+        "shape": [int(s) for s in mask.shape],
+        "bbox": bbox,
+        "spacing": list(metadata.get("spacing", (1.0, 1.0, 1.0))),
+        "origin": list(metadata.get("origin", (0.0, 0.0, 0.0))),
+        "direction": list(metadata.get("direction", (1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0))),
+        "slice_fields": SLICE_INDEX_FIELDS,
+        "slices": slices
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+
+    digest = hashlib.sha256()
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        for chunk in [SPARSE_MAGIC + struct.pack("<I", len(header_bytes)), header_bytes] + chunks:
+            f.write(chunk)
+            digest.update(chunk)
+    os.replace(tmp_path, file_path)
+
+    bytes_written = SPARSE_PREFIX_SIZE + len(header_bytes) + offset
+    encode_time = time.time() - start_time
+    logger.info(f"Saved sparse mask: {file_path}, {len(slices)} slices, {bytes_written} bytes ({encode_time:.2f}s)")
+    return {
+        "encode_time": encode_time,
+        "bytes_written": bytes_written,
+        "bbox": bbox,
+        "nonempty_slices": len(slices),
+        "sha256": digest.hexdigest()
+    }
+
+
+def parse_sparse_prefix(prefix: bytes) -> int:
+    """컨테이너 앞 8바이트에서 JSON 헤더 길이 추출"""
+    if len(prefix) < SPARSE_PREFIX_SIZE or prefix[:4] != SPARSE_MAGIC:
+        raise ValueError("Not a sparse mask container")
+    return struct.unpack("<I", prefix[4:8])[0]
+
+
+def parse_sparse_header(header_bytes: bytes) -> Dict[str, Any]:
+    """JSON 헤더 파싱 (data_offset은 호출 측에서 PREFIX + 헤더 길이로 계산)"""
+    header = json.loads(header_bytes.decode("utf-8"))
+    if header.get("version") != SPARSE_VERSION:
+        raise ValueError(f"Unsupported sparse mask version: {header.get('version')}")
+    return header
+
+
+def read_sparse_header(data: bytes) -> Tuple[Dict[str, Any], int]:
+    """희소 컨테이너의 헤더와 슬라이스 데이터 시작 위치"""
+    header_len = parse_sparse_prefix(data[:SPARSE_PREFIX_SIZE])
+    header = parse_sparse_header(data[SPARSE_PREFIX_SIZE:SPARSE_PREFIX_SIZE + header_len])
+    return header, SPARSE_PREFIX_SIZE + header_len
+
+
+def iter_sparse_slices(data: bytes) -> Iterator[Tuple[int, int, int, np.ndarray]]:
+    """비어있지 않은 슬라이스마다 (z, y0, x0, 볼륨 bbox로 자른 2D 마스크)"""
+    header, data_offset = read_sparse_header(data)
+    bbox = header["bbox"]
+    if bbox is None:
+        return
+
+    _, _, y0, y1, x0, x1 = bbox
+    crop_shape = (y1 - y0 + 1, x1 - x0 + 1)
+    for entry in header["slices"]:
+        z, offset, length = entry[0], entry[1], entry[2]
+        chunk = data[data_offset + offset:data_offset + offset + length]
+        yield z, y0, x0, decode_rle(chunk, crop_shape)
+
+
+def decode_sparse_volume(data: bytes) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """희소 컨테이너 전체 → dense (z, y, x) uint8 마스크와 헤더"""
+    header, _ = read_sparse_header(data)
+    volume = np.zeros(header["shape"], dtype=np.uint8)
+    for z, y0, x0, crop in iter_sparse_slices(data):
+        volume[z, y0:y0 + crop.shape[0], x0:x0 + crop.shape[1]] = crop
+    return volume, header
@@ -21,6 +21,9 @@ import SimpleITK as sitk
 
 logger = logging.getLogger(__name__)
 
+# 허용하는 복셀 타입 (정수/부호없는 정수/실수)
+SUPPORTED_VOXEL_KINDS = ("i", "u", "f")
+
 
 class MedSAM2ModelManager:
     """MedSAM2 모델 관리자 (Video Predictor 통합)"""
@@ -228,6 +231,101 @@ class MedicalImageProcessor:
             logger.error(f"Failed to load NIfTI file {file_path}: {e}")
             raise RuntimeError(f"Failed to load NIfTI file: {e}")
     
+    @staticmethod
+    def read_nifti_header(file_path: str) -> Dict:
+        """NIfTI 헤더만 읽어 검증 (복셀 데이터는 디코딩하지 않음)"""
+        import nibabel as nib
+
+        try:
+            # nibabel은 헤더만 읽고 데이터는 지연 로딩 (gzip도 헤더 바이트만 해제)
+            header = nib.load(file_path).header
+        except Exception as e:
+            raise ValueError(f"Cannot read NIfTI header: {e}")
+
+        dims = tuple(int(d) for d in header.get_data_shape())
+        # 4D 파일은 단일 프레임만 허용
+        if len(dims) == 4 and dims[3] == 1:
+            dims = dims[:3]
+        if len(dims) != 3 or min(dims) <= 0:
+            raise ValueError(f"Expected a 3D volume, got dimensions {dims}")
+
+        dtype = header.get_data_dtype()
+        if dtype.kind not in SUPPORTED_VOXEL_KINDS:
+            raise ValueError(f"Unsupported voxel datatype: {dtype}")
+
+        affine = header.get_best_affine()
+        if not np.all(np.isfinite(affine)) or abs(np.linalg.det(affine[:3, :3])) < 1e-8:
+            raise ValueError("Invalid affine: matrix is singular or not finite")
+
+        zooms = header.get_zooms()[:3]
+        return {
+            # SimpleITK 배열 순서 (z, y, x)와 일치
+            "shape": tuple(reversed(dims)),
+            "spacing": tuple(float(z) for z in zooms),
+            "dtype": str(dtype),
+            "affine": affine.tolist()
+        }
+
+    @staticmethod
+    def convert_to_npy(image_array: np.ndarray, metadata: Dict, npy_path: str):
+        """디코딩된 볼륨을 무압축 .npy + 헤더 JSON으로 저장 (워커에서 mmap 로딩용)"""
+        # 임시 파일에 쓴 뒤 원자적으로 교체 (읽는 쪽이 절반만 쓰인 파일을 보지 않도록)
+        tmp_path = npy_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(image_array))
+        os.replace(tmp_path, npy_path)
+
+        MedicalImageProcessor.save_volume_header(
+            metadata, image_array.shape, image_array.dtype,
+            os.path.splitext(npy_path)[0] + "_header.json"
+        )
+
+    @staticmethod
+    def save_volume_header(metadata: Dict, shape: tuple, dtype, header_path: str):
+        """volume.npy와 짝을 이루는 기하 정보 JSON 저장"""
+        import json
+
+        with open(header_path, "w") as f:
+            json.dump({
+                "spacing": list(metadata["spacing"]),
+                "origin": list(metadata["origin"]),
+                "direction": list(metadata["direction"]),
+                "shape": list(shape),
+                "dtype": str(np.dtype(dtype))
+            }, f)
+
+    @staticmethod
+    def load_volume(volume_path: str) -> tuple[np.ndarray, Dict]:
+        """
+        볼륨 로딩 (인제스트 변환본 우선)
+
+        같은 디렉토리에 인제스트 작업이 만든 volume.npy가 있으면 memory-map으로
+        열어 gzip 디코딩을 생략하고, 없으면 NIfTI를 직접 읽습니다.
+        """
+        import json
+
+        job_dir = os.path.dirname(volume_path)
+        npy_path = os.path.join(job_dir, "volume.npy")
+        header_path = os.path.join(job_dir, "volume_header.json")
+        if os.path.exists(npy_path) and os.path.exists(header_path):
+            try:
+                with open(header_path, "r") as f:
+                    header = json.load(f)
+                image_array = np.load(npy_path, mmap_mode="r")
+                metadata = {
+                    "spacing": tuple(header["spacing"]),
+                    "origin": tuple(header["origin"]),
+                    "direction": tuple(header["direction"]),
+                    "shape": image_array.shape,
+                    "dtype": str(image_array.dtype)
+                }
+                logger.info(f"Memory-mapped volume: {npy_path}, shape: {image_array.shape}")
+                return image_array, metadata
+            except Exception as e:
+                logger.warning(f"Failed to memory-map {npy_path}, falling back to NIfTI: {e}")
+
+        return MedicalImageProcessor.load_nifti(volume_path)
+
     @staticmethod
     def save_nifti(image_array: np.ndarray, file_path: str, reference_metadata: Dict = None):
         """NIfTI 파일 저장"""
@@ -0,0 +1,252 @@
+"""
+결과 캐시 (내용 기반 키)
+
+볼륨 내용, 모델 버전, 정규화한 요청 파라미터가 같으면 결과도 같으므로
+완료된 결과를 그 해시로 보관해 두고, 같은 요청이 오면 GPU 큐를 거치지 않고 바로 완료합니다.
+키에 작업 ID가 없으므로 페이지를 새로고침해 같은 볼륨을 다시 올린 경우에도 적중합니다.
+
+키:
+    medsam:cache:entry:{cache_key}   hash (task_type, result JSON, files JSON, size, created_ts, hits)
+    medsam:cache:lru                 zset (cache_key → 마지막 사용 시각)
+    medsam:cache:bytes               캐시 파일 총 크기
+
+저장소:
+    result_cache/{cache_key}/{copy_id}/{name}  결과 파일 사본 (원래 작업이 삭제되어도 유지)
+
+같은 키를 동시에 기록하면 WATCH/MULTI로 한 항목만 남고, 사본은 기록마다 다른 경로에 두므로
+기록된 항목의 파일을 덮어쓰지 않습니다. 제거는 항목이 가리키는 파일만 삭제합니다.
+
+총 크기가 RESULT_CACHE_MAX_GB를 넘으면 가장 오래 사용하지 않은 항목부터 제거합니다.
+모델 체크포인트를 바꾸면 MODEL_VERSION도 바꿔야 이전 결과가 재사용되지 않습니다.
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+from medsam_api_server.core.job_store import KEY_PREFIX, MAX_UPDATE_RETRIES
+from medsam_api_server.core.fingerprint import params_hash, normalize_window_level, propagation_params
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_MAX_BYTES = int(float(os.getenv("RESULT_CACHE_MAX_GB", "5")) * 1024 ** 3)
+MODEL_VERSION = os.getenv("MODEL_VERSION", "MedSAM2_latest")
+
+CACHE_STORAGE_PREFIX = "result_cache"
+
+
+def _entry_key(cache_key: str) -> str:
+    return f"{KEY_PREFIX}:cache:entry:{cache_key}"
+
+
+def _lru_key() -> str:
+    return f"{KEY_PREFIX}:cache:lru"
+
+
+def _bytes_key() -> str:
+    return f"{KEY_PREFIX}:cache:bytes"
+
+
+def make_cache_key(task_type: str, volume_sha256: Optional[str], params: Dict[str, Any]) -> Optional[str]:
+    """캐시 키 (볼륨 해시를 모르거나 캐시가 꺼져 있으면 None)"""
+    if not RESULT_CACHE_ENABLED or not volume_sha256:
+        return None
+    payload = {
+        "task_type": task_type,
+        "volume": volume_sha256,
+        "model": MODEL_VERSION,
+        "params": params
+    }
+    return params_hash(payload, "sha256")
+
+
+def initial_mask_cache_key(volume_sha256: Optional[str], slice_index: int, bounding_box: List[int],
+                           window_level: Optional[List[float]] = None) -> Optional[str]:
+    return make_cache_key("initial_mask", volume_sha256, {
+        "slice_index": int(slice_index),
+        "bounding_box": [int(v) for v in bounding_box],
+        "window_level": normalize_window_level(window_level)
+    })
+
+
+def propagation_cache_key(volume_sha256: Optional[str], reference_mask_sha256: Optional[str],
+                          reference_slice: int, start_slice: int, end_slice: int,
+                          window_level: Optional[List[float]] = None) -> Optional[str]:
+    if not reference_mask_sha256:
+        return None
+    return make_cache_key("propagation", volume_sha256, propagation_params(
+        reference_mask_sha256, reference_slice, start_slice, end_slice, window_level
+    ))
+
+
+class ResultCache:
+    """Redis 색인 + 저장소 사본으로 구성한 크기 제한 LRU 결과 캐시"""
+
+    def __init__(self, client, max_bytes: int = RESULT_CACHE_MAX_BYTES):
+        self.client = client
+        self.max_bytes = max_bytes
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """캐시 항목 조회 (적중 시 사용 시각 갱신)"""
+        raw = self.client.hgetall(_entry_key(cache_key))
+        if not raw:
+            return None
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zadd(_lru_key(), {cache_key: time.time()})
+        pipe.hincrby(_entry_key(cache_key), "hits", 1)
+        pipe.execute()
+        return {
+            "cache_key": cache_key,
+            "task_type": raw["task_type"],
+            "result": json.loads(raw["result"]),
+            "files": json.loads(raw["files"]),
+            "created_ts": float(raw["created_ts"])
+        }
+
+    def put(self, cache_key: str, task_type: str, result: Dict[str, Any], files: Dict[str, str]):
+        """
+        결과 기록 (files: {이름: 작업 저장소 키} - 캐시 저장소로 복사)
+
+        같은 키가 이미 있으면(동시에 먼저 기록된 경우 포함) 사용 시각만 갱신하고 복사한 사본은 지웁니다.
+        """
+        import redis
+        from medsam_api_server.core.storage import get_storage, copy_object
+
+        entry_key = _entry_key(cache_key)
+        if self.client.exists(entry_key):
+            self.client.zadd(_lru_key(), {cache_key: time.time()})
+            return
+
+        storage = get_storage()
+        copy_id = uuid.uuid4().hex
+        copied = {}
+        total_size = 0
+        for name, src_key in files.items():
+            dst_key = f"{CACHE_STORAGE_PREFIX}/{cache_key}/{copy_id}/{name}"
+            copy_object(src_key, dst_key)
+            size = storage.size(dst_key)
+            copied[name] = {"key": dst_key, "size": size}
+            total_size += size
+
+        for _ in range(MAX_UPDATE_RETRIES):
+            with self.client.pipeline(transaction=True) as pipe:
+                try:
+                    pipe.watch(entry_key)
+                    if pipe.exists(entry_key):
+                        pipe.unwatch()
+                        self.client.zadd(_lru_key(), {cache_key: time.time()})
+                        break
+                    now = time.time()
+                    pipe.multi()
+                    pipe.hset(entry_key, mapping={
+                        "task_type": task_type,
+                        "result": json.dumps(result, default=str),
+                        "files": json.dumps(copied),
+                        "size": total_size,
+                        "created_ts": now,
+                        "hits": 0
+                    })
+                    pipe.zadd(_lru_key(), {cache_key: now})
+                    pipe.incrby(_bytes_key(), total_size)
+                    pipe.execute()
+                    self._evict()
+                    return
+                except redis.WatchError:
+                    continue
+        self._delete_files(copied)
+
+    def restore_file(self, entry: Dict[str, Any], name: str, dst_key: str) -> bool:
+        """
+        캐시 사본을 작업 저장소로 복사
+
+        get 이후 항목이 제거되어 사본이 없으면 False (미적중으로 처리, 항목을 다시 제거하지 않음)
+        """
+        from medsam_api_server.core.storage import get_storage, copy_object
+
+        src_key = entry["files"][name]["key"]
+        try:
+            copy_object(src_key, dst_key)
+        except Exception:
+            if not get_storage().exists(src_key):
+                return False
+            raise
+        return True
+
+    def invalidate(self, cache_key: str):
+        """항목과 그 항목의 저장소 사본 제거 (동시에 제거해도 크기는 한 번만 차감)"""
+        import redis
+
+        entry_key = _entry_key(cache_key)
+        for _ in range(MAX_UPDATE_RETRIES):
+            with self.client.pipeline(transaction=True) as pipe:
+                try:
+                    pipe.watch(entry_key)
+                    size, files = pipe.hmget(entry_key, ["size", "files"])
+                    pipe.multi()
+                    pipe.delete(entry_key)
+                    pipe.zrem(_lru_key(), cache_key)
+                    if files is not None:
+                        pipe.decrby(_bytes_key(), int(size or 0))
+                    pipe.execute()
+                    break
+                except redis.WatchError:
+                    continue
+        else:
+            return
+        if files is not None:
+            self._delete_files(json.loads(files))
+
+    @staticmethod
+    def _delete_files(files: Dict[str, Dict[str, Any]]):
+        from medsam_api_server.core.storage import get_storage
+
+        storage = get_storage()
+        for info in files.values():
+            try:
+                storage.delete(info["key"])
+            except Exception as e:
+                logger.warning(f"Failed to delete result cache file {info['key']}: {e}")
+
+    def _evict(self):
+        """총 크기가 상한 이하가 될 때까지 가장 오래 사용하지 않은 항목 제거"""
+        while int(self.client.get(_bytes_key()) or 0) > self.max_bytes:
+            oldest = self.client.zrange(_lru_key(), 0, 0)
+            if not oldest:
+                break
+            logger.info(f"Evicting result cache entry {oldest[0]}")
+            self.invalidate(oldest[0])
+
+    def get_stats(self) -> Dict[str, Any]:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zcard(_lru_key())
+        pipe.get(_bytes_key())
+        entries, total_bytes = pipe.execute()
+        return {
+            "enabled": RESULT_CACHE_ENABLED,
+            "model_version": MODEL_VERSION,
+            "entries": entries,
+            "bytes": int(total_bytes or 0),
+            "max_bytes": self.max_bytes
+        }
+
+
+# 전역 결과 캐시 인스턴스
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """결과 캐시 싱글톤 인스턴스 반환 (작업 저장소와 같은 Redis 사용)"""
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                from medsam_api_server.core.job_store import get_job_store
+
+                _result_cache = ResultCache(get_job_store().client)
+    return _result_cache
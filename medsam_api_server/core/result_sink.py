@@ -0,0 +1,337 @@
+"""
+3D 전파 결과 싱크
+
+전파 루프가 완료된 슬라이스를 바로 디스크(memory-mapped uint8 .npy)에 기록합니다.
+볼륨 크기의 dense 마스크를 메모리에 두지 않으므로, 후처리(최대 연결 성분)와
+통계 계산, .nii.gz 저장까지 모두 슬랩 단위로 mmap 데이터를 직접 처리합니다.
+
+체크포인트: checkpoint_id(전파 요청 지문)를 주면 mmap 파일 이름에 포함하고,
+방향별로 마지막으로 기록한 슬라이스를 {prefix}_checkpoint.json에 남깁니다.
+체크포인트 ID는 전파 방향도 포함하므로, 분할 전파의 방향별 subtask는 서로 다른 파일을 사용합니다.
+같은 요청을 다시 실행하면(재시도, 시간 초과 후 재개, 같은 요청 재제출) 기존 mmap과 체크포인트를 열어
+완료된 방향은 건너뛰고 나머지 방향은 마지막 슬라이스부터 이어갑니다.
+체크포인트 JSON은 항상 mmap을 flush한 뒤 원자적으로 교체하므로, 기록된 슬라이스는 모두 디스크에 있습니다.
+
+같은 파일을 쓰는 전파(같은 요청이 동시에 실행되는 경우)는 하나만 실행합니다. 엔진은 싱크를 열기 전에
+파일 이름(sink_prefix)으로 잠금을 잡고, 다른 task가 잡고 있으면 PropagationInProgress로 거절합니다.
+같은 task ID의 재시도(시간 초과 후 재개)는 잠금을 이어받습니다.
+
+키:
+    medsam:propagation:lock:{prefix}   잠금을 잡은 task ID, CHECKPOINT_LOCK_TTL(또는 작업의 하드 시간 제한) 후 만료
+"""
+
+import os
+import json
+import time
+import logging
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+import numpy as np
+
+from medsam_api_server.core.result_writer import write_nifti_mask
+from medsam_api_server.core.mask_codec import write_sparse_volume, iter_sparse_slices
+from medsam_api_server.core.fingerprint import params_hash, propagation_params
+from medsam_api_server.core.job_store import KEY_PREFIX, MAX_UPDATE_RETRIES
+
+logger = logging.getLogger(__name__)
+
+# 후처리/통계 계산 시 한 번에 읽는 슬라이스 수
+SINK_SLAB_SLICES = int(os.getenv("RESULT_SINK_SLAB_SLICES", "32"))
+
+PROPAGATION_CHECKPOINT_ENABLED = os.getenv("PROPAGATION_CHECKPOINT_ENABLED", "true").lower() == "true"
+# 체크포인트 기록 간격 (슬라이스 수)
+CHECKPOINT_INTERVAL_SLICES = int(os.getenv("PROPAGATION_CHECKPOINT_SLICES", "16"))
+
+# 잠금을 잡은 worker가 죽었을 때 잠금이 풀리기까지의 시간 (초, 작업의 하드 시간 제한을 모를 때)
+CHECKPOINT_LOCK_TTL = int(os.getenv("PROPAGATION_CHECKPOINT_LOCK_TTL", "3900"))
+
+DIRECTIONS = ("forward", "backward")
+
+
+class PropagationInProgress(RuntimeError):
+    """같은 결과 파일을 쓰는 전파가 다른 task에서 실행 중"""
+
+    def __init__(self, prefix: str, holder: str):
+        super().__init__(f"Propagation {prefix} is already running in task {holder}")
+        self.holder = holder
+
+
+def propagation_checkpoint_id(reference_mask_id: str, reference_slice: int, start_slice: int, end_slice: int,
+                              window_level: Optional[List[float]] = None,
+                              directions: Tuple[str, ...] = DIRECTIONS) -> Optional[str]:
+    """전파 요청 지문 (같은 요청이면 같은 체크포인트, 체크포인트가 꺼져 있으면 None)"""
+    if not PROPAGATION_CHECKPOINT_ENABLED:
+        return None
+    params = propagation_params(reference_mask_id, reference_slice, start_slice, end_slice, window_level)
+    if tuple(directions) != DIRECTIONS:
+        # 방향별 분할 전파는 전체 전파와 다른 체크포인트 사용
+        params["directions"] = list(directions)
+    return params_hash(params)[:16]
+
+
+def sink_prefix(job_id: str, checkpoint_id: Optional[str] = None, sink_key: Optional[str] = None) -> str:
+    """싱크 파일 이름 접두사 (같은 작업의 다른 전파와 겹치지 않도록 체크포인트 ID나 sink_key로 구분)"""
+    suffix = checkpoint_id or sink_key
+    return f"{job_id}_{suffix}" if suffix else job_id
+
+
+def _lock_key(prefix: str) -> str:
+    return f"{KEY_PREFIX}:propagation:lock:{prefix}"
+
+
+def acquire_sink_lock(prefix: str, owner: str, ttl: Optional[int] = None) -> Optional[str]:
+    """
+    싱크 파일 잠금 (잡았으면 None, 다른 task가 잡고 있으면 그 task ID)
+
+    이미 owner가 잡고 있으면(같은 task의 재시도) 만료 시간만 갱신합니다.
+    Redis를 사용할 수 없으면 잠그지 않고 진행합니다.
+    """
+    from medsam_api_server.core.job_store import get_job_store
+
+    ttl = ttl or CHECKPOINT_LOCK_TTL
+    key = _lock_key(prefix)
+    try:
+        client = get_job_store().client
+        if client.set(key, owner, nx=True, ex=ttl):
+            return None
+        holder = client.get(key)
+        if holder is None:
+            # 방금 만료됨
+            return None if client.set(key, owner, nx=True, ex=ttl) else client.get(key)
+        if holder == owner:
+            client.expire(key, ttl)
+            return None
+        return holder
+    except Exception as e:
+        logger.warning(f"Failed to lock propagation {prefix}, continuing without lock: {e}")
+        return None
+
+
+def release_sink_lock(prefix: str, owner: str):
+    """owner가 잡은 잠금만 해제 (만료 후 다른 task가 잡은 잠금은 남김, 실패해도 계속)"""
+    import redis
+    from medsam_api_server.core.job_store import get_job_store
+
+    key = _lock_key(prefix)
+    try:
+        client = get_job_store().client
+        for _ in range(MAX_UPDATE_RETRIES):
+            with client.pipeline(transaction=True) as pipe:
+                try:
+                    pipe.watch(key)
+                    if pipe.get(key) != owner:
+                        pipe.unwatch()
+                        return
+                    pipe.multi()
+                    pipe.delete(key)
+                    pipe.execute()
+                    return
+                except redis.WatchError:
+                    continue
+    except Exception as e:
+        logger.warning(f"Failed to release propagation lock {prefix}: {e}")
+
+
+class ResultSink:
+    """memory-mapped uint8 3D 결과 마스크"""
+
+    def __init__(self, job_id: str, shape: Tuple[int, int, int], temp_root: Optional[str] = None,
+                 on_slice: Optional[Callable[[int, np.ndarray], None]] = None,
+                 checkpoint_id: Optional[str] = None, sink_key: Optional[str] = None):
+        temp_root = temp_root or os.getenv("TEMP_ROOT", "/app/temp")
+        os.makedirs(temp_root, exist_ok=True)
+
+        self.job_id = job_id
+        self.shape = tuple(int(s) for s in shape)
+        prefix = sink_prefix(job_id, checkpoint_id, sink_key)
+        self.mask_path = os.path.join(temp_root, f"{prefix}_result_mask.npy")
+        self.labels_path = os.path.join(temp_root, f"{prefix}_result_labels.npy")
+        self.checkpoint_path = os.path.join(temp_root, f"{prefix}_checkpoint.json") if checkpoint_id else None
+
+        # 방향별 마지막 기록 슬라이스와 완료 여부
+        self.checkpoint: Dict[str, Any] = {
+            "shape": list(self.shape),
+            "forward": None,
+            "backward": None,
+            "forward_complete": False,
+            "backward_complete": False,
+            "direction": None,
+            "saves": 0
+        }
+        self._unsaved = 0
+
+        # 슬라이스별 양성 픽셀 수 (write_slice 시점에 갱신)
+        self.slice_areas = np.zeros(self.shape[0], dtype=np.int64)
+        self.resumed = self._open_checkpoint()
+        if not self.resumed:
+            self.mask = np.lib.format.open_memmap(self.mask_path, mode="w+", dtype=np.uint8, shape=self.shape)
+        # 슬라이스 기록 직후 호출 (진행 중 미리보기 스트림)
+        self.on_slice = on_slice
+
+    def _open_checkpoint(self) -> bool:
+        """같은 요청의 체크포인트가 있으면 mmap을 이어서 열고 슬라이스별 면적 복원"""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path) or not os.path.exists(self.mask_path):
+            return False
+        try:
+            with open(self.checkpoint_path, "r") as f:
+                checkpoint = json.load(f)
+            mask = np.load(self.mask_path, mmap_mode="r+")
+            if tuple(checkpoint.get("shape", ())) != self.shape or mask.shape != self.shape or mask.dtype != np.uint8:
+                raise ValueError(f"checkpoint shape {checkpoint.get('shape')} does not match {list(self.shape)}")
+        except Exception as e:
+            logger.warning(f"Ignoring propagation checkpoint {self.checkpoint_path}: {e}")
+            return False
+
+        self.mask = mask
+        self.checkpoint.update(checkpoint)
+        for z0, z1 in self._slabs():
+            self.slice_areas[z0:z1] = self.mask[z0:z1].reshape(z1 - z0, -1).sum(axis=1)
+        logger.info(
+            f"Resuming propagation for job {self.job_id} from checkpoint "
+            f"(forward={self.checkpoint['forward']}, complete={self.checkpoint['forward_complete']}; "
+            f"backward={self.checkpoint['backward']}, complete={self.checkpoint['backward_complete']})"
+        )
+        return True
+
+    def write_slice(self, index: int, mask_2d: np.ndarray):
+        """완료된 슬라이스 기록"""
+        slice_mask = (mask_2d > 0).astype(np.uint8)
+        self.mask[index] = slice_mask
+        self.slice_areas[index] = int(np.count_nonzero(slice_mask))
+        if self.on_slice is not None:
+            self.on_slice(index, slice_mask)
+
+    def merge_sparse(self, data: bytes):
+        """희소 컨테이너(분할 전파의 방향별 결과)의 양성 픽셀을 합침"""
+        for z, y0, x0, crop in iter_sparse_slices(data):
+            region = self.mask[z, y0:y0 + crop.shape[0], x0:x0 + crop.shape[1]]
+            region |= (crop > 0).astype(np.uint8)
+            self.slice_areas[z] = int(np.count_nonzero(self.mask[z]))
+
+    def resume_point(self, direction: str) -> Optional[int]:
+        """방향의 마지막 체크포인트 슬라이스 (없으면 None)"""
+        return self.checkpoint[direction]
+
+    def direction_complete(self, direction: str) -> bool:
+        return bool(self.checkpoint[f"{direction}_complete"])
+
+    def mark_progress(self, direction: str, index: int):
+        """방향의 기록 완료 슬라이스 갱신 (CHECKPOINT_INTERVAL_SLICES마다 체크포인트 저장)"""
+        self.checkpoint[direction] = int(index)
+        self.checkpoint["direction"] = direction
+        self._unsaved += 1
+        if self._unsaved >= CHECKPOINT_INTERVAL_SLICES:
+            self.save_checkpoint()
+
+    def complete_direction(self, direction: str):
+        self.checkpoint[f"{direction}_complete"] = True
+        self.save_checkpoint()
+
+    def save_checkpoint(self):
+        """mmap flush 후 체크포인트 JSON 교체 (체크포인트가 꺼져 있으면 무시)"""
+        if not self.checkpoint_path or self.mask is None:
+            return
+        self.mask.flush()
+        self.checkpoint["saves"] += 1
+        self.checkpoint["saved_at"] = time.time()
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+        self._unsaved = 0
+
+    def _slabs(self):
+        step = max(1, SINK_SLAB_SLICES)
+        for z in range(0, self.shape[0], step):
+            yield z, min(z + step, self.shape[0])
+
+    def is_empty(self) -> bool:
+        return not np.any(self.slice_areas)
+
+    def keep_largest_component(self):
+        """가장 큰 3D 연결 성분만 유지 (label 결과도 mmap 파일에 기록)"""
+        from scipy import ndimage
+
+        if self.is_empty():
+            return
+
+        self.mask.flush()
+        labels = np.lib.format.open_memmap(self.labels_path, mode="w+", dtype=np.int32, shape=self.shape)
+        try:
+            # skimage.measure.label 기본값과 동일한 26-연결성
+            structure = ndimage.generate_binary_structure(3, 3)
+            n_labels = ndimage.label(self.mask, structure=structure, output=labels)
+            if n_labels <= 1:
+                return
+
+            counts = np.zeros(n_labels + 1, dtype=np.int64)
+            for z0, z1 in self._slabs():
+                counts += np.bincount(labels[z0:z1].ravel(), minlength=n_labels + 1)
+            counts[0] = 0
+            largest = int(np.argmax(counts))
+
+            for z0, z1 in self._slabs():
+                slab = (labels[z0:z1] == largest)
+                self.mask[z0:z1] = slab
+                self.slice_areas[z0:z1] = slab.reshape(z1 - z0, -1).sum(axis=1)
+            self.mask.flush()
+            logger.info(f"Kept largest of {n_labels} components for job {self.job_id} ({counts[largest]} voxels)")
+        finally:
+            del labels
+            if os.path.exists(self.labels_path):
+                os.remove(self.labels_path)
+
+    def statistics(self, metadata: Dict) -> Dict[str, Any]:
+        """볼륨 통계 계산 (슬라이스별 면적 합산, 전체 마스크를 다시 읽지 않음)"""
+        total_voxels = int(np.prod(self.shape))
+        positive_voxels = int(self.slice_areas.sum())
+
+        spacing = metadata.get("spacing", (1.0, 1.0, 1.0))
+        voxel_volume = spacing[0] * spacing[1] * spacing[2]  # mm³
+        total_volume = positive_voxels * voxel_volume
+
+        return {
+            "total_voxels": total_voxels,
+            "positive_voxels": positive_voxels,
+            "volume_percentage": float(positive_voxels / total_voxels * 100) if total_voxels > 0 else 0.0,
+            "volume_mm3": float(total_volume),
+            "volume_ml": float(total_volume / 1000),  # ml
+            "spacing": spacing,
+            "shape": self.shape
+        }
+
+    def finalize(self, result_path: str, sparse_path: str, metadata: Dict) -> Dict[str, Any]:
+        """mmap 마스크를 슬랩 단위로 흘려 .nii.gz와 희소 컨테이너 생성"""
+        self.mask.flush()
+        write_stats = write_nifti_mask(self.mask, result_path, metadata)
+        sparse_stats = write_sparse_volume(self.mask, sparse_path, metadata, SINK_SLAB_SLICES)
+        write_stats["sparse_bytes"] = sparse_stats["bytes_written"]
+        write_stats["sparse_encode_time"] = sparse_stats["encode_time"]
+        write_stats["sparse_sha256"] = sparse_stats["sha256"]
+        write_stats["bbox"] = sparse_stats["bbox"]
+        return write_stats
+
+    def close(self, keep_checkpoint: bool = False):
+        """
+        임시 mmap 파일 정리
+
+        keep_checkpoint=True면 (실패/시간 초과) 마지막 체크포인트를 저장하고 mmap 파일을 남겨
+        다음 실행이 이어서 진행하도록 합니다. 최대 연결 성분 후처리는 중간에 멈췄더라도
+        다시 적용하면 같은 결과이므로, 두 방향이 모두 완료된 체크포인트도 그대로 남깁니다.
+        """
+        keep = keep_checkpoint and self.checkpoint_path is not None
+        if keep and self.mask is not None:
+            try:
+                self.save_checkpoint()
+            except Exception as e:
+                logger.warning(f"Failed to save propagation checkpoint for job {self.job_id}: {e}")
+                keep = False
+        if self.mask is not None:
+            del self.mask
+            self.mask = None
+        paths = [self.labels_path]
+        if not keep:
+            paths += [self.mask_path] + ([self.checkpoint_path] if self.checkpoint_path else [])
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,194 @@
+"""
+3D 결과 NIfTI 저장 모듈
+
+SimpleITK 기본 gzip(단일 스레드, 기본 압축 레벨) 대신 압축 수준과 스레드 수를
+선택할 수 있는 .nii.gz 작성기를 제공합니다.
+- 압축 수준: none(저장만), fast(level 1), best(level 9)
+- 블록 병렬 gzip: 블록별 raw deflate를 스레드 풀에서 압축한 뒤 하나의 gzip 멤버로 연결
+  (pigz 방식, 표준 gzip/nibabel/SimpleITK로 그대로 읽힘)
+- 볼륨을 z 슬랩 단위로 흘려보내므로 전체 바이트 사본을 만들지 않음
+"""
+
+import os
+import time
+import zlib
+import struct
+import hashlib
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, Optional
+
+import numpy as np
+import nibabel as nib
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_LEVELS = {
+    "none": 0,
+    "fast": 1,
+    "best": 9
+}
+
+# 희소 이진 마스크는 level 1로도 대부분 압축되므로 속도 우선 (기본값)
+RESULT_COMPRESSION = os.getenv("RESULT_COMPRESSION", "fast").lower()
+RESULT_COMPRESSION_THREADS = int(os.getenv("RESULT_COMPRESSION_THREADS", "0")) or min(4, os.cpu_count() or 1)
+RESULT_COMPRESSION_BLOCK_MB = int(os.getenv("RESULT_COMPRESSION_BLOCK_MB", "4"))
+
+# SimpleITK(LPS) → NIfTI(RAS) 좌표 변환
+_LPS_TO_RAS = np.diag([-1.0, -1.0, 1.0, 1.0])
+
+
+def build_nifti_header(shape: tuple, dtype: np.dtype, metadata: Optional[Dict] = None) -> bytes:
+    """
+    (z, y, x) 볼륨에 대한 NIfTI-1 헤더 바이트 생성 (확장 플래그 포함, 352 bytes)
+
+    SimpleITK.WriteImage와 동일하게 qform/sform 모두 scanner 좌표(code 1)로 기록합니다.
+    """
+    metadata = metadata or {}
+    spacing = np.asarray(metadata.get("spacing", (1.0, 1.0, 1.0)), dtype=np.float64)
+    origin = np.asarray(metadata.get("origin", (0.0, 0.0, 0.0)), dtype=np.float64)
+    direction = np.asarray(
+        metadata.get("direction", (1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0)), dtype=np.float64
+    ).reshape(3, 3)
+
+    affine = np.eye(4)
+    affine[:3, :3] = direction * spacing
+    affine[:3, 3] = origin
+    affine = _LPS_TO_RAS @ affine
+
+    header = nib.Nifti1Header()
+    header.set_data_shape(tuple(reversed(shape)))  # NIfTI는 (x, y, z)
+    header.set_data_dtype(dtype)
+    header.set_zooms(tuple(float(s) for s in spacing))
+    header.set_qform(affine, code=1)
+    header.set_sform(affine, code=1)
+    header.set_xyzt_units("mm", "sec")
+    header["vox_offset"] = 352
+
+    # 348바이트 헤더 + 확장 없음 표시 4바이트
+    return header.binaryblock + b"\x00\x00\x00\x00"
+
+
+def _iter_volume_bytes(volume: np.ndarray, slab_bytes: int) -> Iterator[bytes]:
+    """C-order (z, y, x) 볼륨을 z 슬랩 단위 바이트로 순회 (= NIfTI의 x 우선 순서)"""
+    slice_bytes = max(1, volume[0].nbytes) if volume.shape[0] > 0 else 1
+    slab = max(1, slab_bytes // slice_bytes)
+    for z in range(0, volume.shape[0], slab):
+        yield np.ascontiguousarray(volume[z:z + slab]).tobytes()
+
+
+def _iter_blocks(chunks: Iterator[bytes], block_size: int) -> Iterator[bytes]:
+    """임의 크기 바이트 조각을 고정 크기 블록으로 재분할"""
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= block_size:
+            yield bytes(buffer[:block_size])
+            del buffer[:block_size]
+    if buffer:
+        yield bytes(buffer)
+
+
+def _deflate_block(data: bytes, level: int, last: bool) -> bytes:
+    """블록 하나를 raw deflate로 압축 (마지막 블록만 스트림 종료)"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    # Z_SYNC_FLUSH는 바이트 경계에서 끝나므로 다음 블록을 그대로 이어 붙일 수 있음
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+def _gzip_header() -> bytes:
+    # magic, deflate, flags 없음, mtime 0, xfl 0, OS unknown
+    return b"\x1f\x8b\x08\x00" + struct.pack("<I", 0) + b"\x00\xff"
+
+
+def write_nifti_mask(volume: np.ndarray, file_path: str, metadata: Optional[Dict] = None,
+                     compression: Optional[str] = None, threads: Optional[int] = None) -> Dict[str, Any]:
+    """
+    (z, y, x) 볼륨을 .nii.gz로 저장
+
+    Args:
+        volume: 저장할 볼륨 (C-order로 슬랩 단위 변환)
+        file_path: 출력 경로 (.nii.gz)
+        metadata: spacing, origin, direction (SimpleITK 규약)
+        compression: "none", "fast", "best" (기본값: RESULT_COMPRESSION)
+        threads: 압축 스레드 수 (기본값: RESULT_COMPRESSION_THREADS)
+
+    Returns:
+        Dict with write_time, bytes_written, raw_bytes, compression, threads, sha256 (출력 파일)
+    """
+    compression = (compression or RESULT_COMPRESSION).lower()
+    if compression not in COMPRESSION_LEVELS:
+        raise ValueError(f"Unknown compression: {compression} (expected one of {list(COMPRESSION_LEVELS)})")
+    level = COMPRESSION_LEVELS[compression]
+    threads = max(1, threads or RESULT_COMPRESSION_THREADS)
+    block_size = max(1, RESULT_COMPRESSION_BLOCK_MB) * 1024 * 1024
+
+    start_time = time.time()
+    header = build_nifti_header(volume.shape, volume.dtype, metadata)
+    chunks = _iter_volume_bytes(volume, block_size)
+
+    def _all_chunks():
+        yield header
+        yield from chunks
+
+    crc = 0
+    raw_bytes = 0
+    bytes_written = 0
+    # 다운로드 ETag용 출력 파일 해시 (다시 읽지 않도록 쓰면서 계산)
+    digest = hashlib.sha256()
+    tmp_path = file_path + ".tmp"
+
+    try:
+        with open(tmp_path, "wb") as f, ThreadPoolExecutor(max_workers=threads) as executor:
+            gzip_header = _gzip_header()
+            f.write(gzip_header)
+            digest.update(gzip_header)
+            bytes_written += 10
+
+            # 진행 중인 블록 수를 제한해 메모리 사용량을 스레드 수에 비례하도록 유지
+            pending = deque()
+            blocks = _iter_blocks(_all_chunks(), block_size)
+            current = next(blocks, b"")
+            while True:
+                following = next(blocks, None)
+                last = following is None
+                crc = zlib.crc32(current, crc)
+                raw_bytes += len(current)
+                pending.append(executor.submit(_deflate_block, current, level, last))
+
+                while pending and (last or len(pending) >= threads * 2):
+                    compressed = pending.popleft().result()
+                    f.write(compressed)
+                    digest.update(compressed)
+                    bytes_written += len(compressed)
+
+                if last:
+                    break
+                current = following
+
+            trailer = struct.pack("<II", crc & 0xFFFFFFFF, raw_bytes & 0xFFFFFFFF)
+            f.write(trailer)
+            digest.update(trailer)
+            bytes_written += 8
+
+        os.replace(tmp_path, file_path)
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        logger.error(f"Failed to write NIfTI result {file_path}: {e}")
+        raise RuntimeError(f"Failed to write NIfTI result: {e}")
+
+    write_time = time.time() - start_time
+    logger.info(
+        f"Saved NIfTI: {file_path}, shape: {volume.shape}, {raw_bytes} -> {bytes_written} bytes "
+        f"({compression}, {threads} threads, {write_time:.2f}s)"
+    )
+    return {
+        "write_time": write_time,
+        "bytes_written": bytes_written,
+        "raw_bytes": raw_bytes,
+        "compression": compression,
+        "threads": threads,
+        "sha256": digest.hexdigest()
+    }
@@ -0,0 +1,171 @@
+"""
+GPU 작업 큐 스케줄링
+
+GPU 작업을 두 큐로 나눕니다.
+    gpu_interactive   2D 초기 마스크 (수백 ms, 사용자가 화면 앞에서 기다림)
+    gpu_batch         3D 전파 (수십 초)
+    gpu_speculative   추측 전파 (core/speculation.py, 다른 큐가 모두 비었을 때만 실행)
+
+워커는 큐를 선언 순서대로 소비합니다 (broker_transport_options의 queue_order_strategy=priority,
+Redis BRPOP이 앞 큐부터 확인). 따라서 대화형 작업이 있으면 항상 먼저 가져갑니다.
+
+배치 작업 기아 방지: 가장 오래 기다린 배치 작업이 BATCH_STARVATION_SECONDS를 넘기면
+대화형 큐의 소비 위치(오른쪽 끝)로 옮깁니다. 대화형 작업을 넣을 때마다 확인하므로
+대화형 요청이 계속 들어와 배치 작업이 밀리는 경우에만 동작합니다.
+
+분할 전파(opt-in): 대기 중인 GPU 작업이 PROPAGATION_SPLIT_MAX_QUEUE 이하로 여유가 있으면
+순방향/역방향을 별도 배치 작업으로 나눠 두 워커에서 동시에 실행하고 CPU 워커가 결과를 병합합니다.
+
+대기 시간은 메시지 헤더 enqueued_at(보낼 때 기록)으로 계산하고,
+워커가 작업을 시작할 때 큐별 누적 대기 시간을 작업 저장소 Redis에 기록합니다.
+
+키:
+    medsam:queue:stats   hash ({queue}:started, {queue}:wait_total, {queue}:last_wait, {queue}:promoted)
+"""
+
+import os
+import json
+import time
+import logging
+from typing import Dict, Any, Optional
+
+from medsam_api_server.core.job_store import KEY_PREFIX
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE_QUEUE = os.getenv("GPU_INTERACTIVE_QUEUE", "gpu_interactive")
+BATCH_QUEUE = os.getenv("GPU_BATCH_QUEUE", "gpu_batch")
+# 이전 버전이 넣은 작업도 마저 처리하도록 마지막 순위로 계속 소비
+LEGACY_GPU_QUEUE = "gpu_tasks"
+# 실제 요청 큐 (앞이 우선, 큐 길이/GPU 바쁨 판단 기준)
+GPU_QUEUES = (INTERACTIVE_QUEUE, BATCH_QUEUE, LEGACY_GPU_QUEUE)
+SPECULATIVE_QUEUE = os.getenv("GPU_SPECULATIVE_QUEUE", "gpu_speculative")
+# 워커 소비 순서 (추측 작업은 항상 마지막)
+WORKER_GPU_QUEUES = GPU_QUEUES + (SPECULATIVE_QUEUE,)
+
+# 배치 작업 최대 대기 시간 (초) - 넘기면 대화형 큐 앞으로 승격
+BATCH_STARVATION_SECONDS = float(os.getenv("BATCH_STARVATION_SECONDS", "120"))
+# 한 번 확인할 때 승격하는 최대 작업 수
+BATCH_PROMOTIONS_PER_CHECK = 1
+
+ENQUEUED_AT_HEADER = "enqueued_at"
+
+PROPAGATION_SPLIT_ENABLED = os.getenv("PROPAGATION_SPLIT_ENABLED", "false").lower() == "true"
+# 분할 전파를 사용하는 최대 GPU 큐 대기 작업 수 (바쁘면 워커를 하나만 사용)
+PROPAGATION_SPLIT_MAX_QUEUE = int(os.getenv("PROPAGATION_SPLIT_MAX_QUEUE", "0"))
+# 병합 작업 큐 (GPU 불필요, CPU 워커)
+MERGE_QUEUE = os.getenv("PROPAGATION_MERGE_QUEUE", "ingest_tasks")
+
+
+def _stats_key() -> str:
+    return f"{KEY_PREFIX}:queue:stats"
+
+
+def enqueue_headers() -> Dict[str, Any]:
+    """apply_async headers (대기 시간 계산용)"""
+    return {ENQUEUED_AT_HEADER: time.time()}
+
+
+def _message_enqueued_at(raw) -> Optional[float]:
+    """브로커 메시지(kombu JSON 봉투)의 enqueued_at 헤더"""
+    try:
+        return float(json.loads(raw)["headers"][ENQUEUED_AT_HEADER])
+    except Exception:
+        return None
+
+
+def _queue_stats(broker, queue: str, stats: Dict[str, str], now: float) -> Dict[str, Any]:
+    oldest = _message_enqueued_at(broker.lindex(queue, -1))
+    started = int(stats.get(f"{queue}:started", 0))
+    wait_total = float(stats.get(f"{queue}:wait_total", 0))
+    last_wait = stats.get(f"{queue}:last_wait")
+    return {
+        "depth": int(broker.llen(queue)),
+        "oldest_wait_seconds": round(now - oldest, 2) if oldest else None,
+        "started": started,
+        "avg_wait_seconds": round(wait_total / started, 3) if started else None,
+        "last_wait_seconds": round(float(last_wait), 3) if last_wait is not None else None,
+        "promoted": int(stats.get(f"{queue}:promoted", 0))
+    }
+
+
+def promote_starved_batch_tasks(broker) -> int:
+    """
+    오래 기다린 배치 작업을 대화형 큐로 승격 (broker: 브로커 Redis 동기 클라이언트)
+
+    가장 오래된 배치 메시지만 확인하고 LMOVE로 원자적으로 옮깁니다.
+    확인과 이동 사이에 워커가 그 메시지를 가져갔다면 다음으로 오래된 배치 작업이 옮겨지는데,
+    배치 작업이 조금 일찍 실행될 뿐이므로 되돌리지 않고 멈춥니다.
+    """
+    promoted = 0
+    while promoted < BATCH_PROMOTIONS_PER_CHECK:
+        raw = broker.lindex(BATCH_QUEUE, -1)
+        enqueued_at = _message_enqueued_at(raw) if raw is not None else None
+        if enqueued_at is None or time.time() - enqueued_at < BATCH_STARVATION_SECONDS:
+            break
+        moved = broker.lmove(BATCH_QUEUE, INTERACTIVE_QUEUE, "RIGHT", "RIGHT")
+        if moved is None:
+            break
+        promoted += 1
+        if moved != raw:
+            break
+    if promoted:
+        from medsam_api_server.core.job_store import get_job_store
+
+        get_job_store().client.hincrby(_stats_key(), f"{BATCH_QUEUE}:promoted", promoted)
+        logger.info(f"Promoted {promoted} starved batch task(s) to {INTERACTIVE_QUEUE}")
+    return promoted
+
+
+def check_batch_starvation() -> int:
+    """브로커 연결을 얻어 기아 방지 승격 실행 (실패해도 요청은 계속)"""
+    from medsam_api_server.celery_app import celery_app
+
+    try:
+        with celery_app.connection_or_acquire() as conn:
+            return promote_starved_batch_tasks(conn.default_channel.client)
+    except Exception as e:
+        logger.warning(f"Failed to check batch starvation: {e}")
+        return 0
+
+
+def gpu_queue_length(broker) -> int:
+    """GPU 큐 전체 대기 작업 수 (추측 작업 제외)"""
+    pipe = broker.pipeline(transaction=False)
+    for queue in GPU_QUEUES:
+        pipe.llen(queue)
+    return sum(int(length) for length in pipe.execute())
+
+
+def should_split_propagation(queue_length: Optional[int]) -> bool:
+    """분할 전파 사용 여부 (다른 요청을 밀어내지 않도록 GPU 큐에 여유가 있을 때만)"""
+    return PROPAGATION_SPLIT_ENABLED and (queue_length or 0) <= PROPAGATION_SPLIT_MAX_QUEUE
+
+
+def record_queue_wait(queue: Optional[str], enqueued_at: Optional[float]):
+    """워커가 작업을 시작할 때 큐 대기 시간 기록 (실패해도 작업은 계속)"""
+    if not queue or enqueued_at is None:
+        return
+    from medsam_api_server.core.job_store import get_job_store
+
+    wait = max(0.0, time.time() - float(enqueued_at))
+    try:
+        pipe = get_job_store().client.pipeline(transaction=False)
+        pipe.hincrby(_stats_key(), f"{queue}:started", 1)
+        pipe.hincrbyfloat(_stats_key(), f"{queue}:wait_total", wait)
+        pipe.hset(_stats_key(), f"{queue}:last_wait", wait)
+        pipe.execute()
+    except Exception as e:
+        logger.debug(f"Failed to record queue wait for {queue}: {e}")
+
+
+def get_queue_stats() -> Dict[str, Dict[str, Any]]:
+    """큐별 깊이, 가장 오래된 작업 대기 시간, 평균/최근 시작 대기 시간, 승격 수"""
+    from medsam_api_server.celery_app import celery_app
+    from medsam_api_server.core.job_store import get_job_store
+
+    stats = get_job_store().client.hgetall(_stats_key())
+    now = time.time()
+    with celery_app.connection_or_acquire() as conn:
+        broker = conn.default_channel.client
+        return {queue: _queue_stats(broker, queue, stats, now) for queue in WORKER_GPU_QUEUES}
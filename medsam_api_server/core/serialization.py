@@ -0,0 +1,210 @@
+"""
+Celery 메시지/결과 직렬화 모듈
+
+JSON 대신 msgpack 기반 바이너리 직렬화기("medsam")를 등록합니다.
+- 임계값 이상인 페이로드는 zlib으로 투명하게 압축 (첫 바이트로 구분)
+- content type으로 협상하므로 accept_content에 json을 함께 두면 기존 JSON 메시지/결과도 그대로 읽힘
+- SERIALIZER_STATS_SAMPLE을 켜면 N개 중 1개 페이로드의 직렬화 크기(msgpack, 압축 후, 동일 객체의 JSON 크기)를
+  Redis 해시에 누적해 /api/v1/system/serialization에서 확인
+
+페이로드 형식:
+    1바이트 플래그 (0: msgpack 그대로, 1: zlib 압축된 msgpack) | 본문
+"""
+
+import os
+import json
+import itertools
+import base64
+import zlib
+import uuid
+import logging
+import threading
+from datetime import datetime, date
+from decimal import Decimal
+from typing import Dict, Any, Optional
+
+from celery.signals import after_task_publish, task_success
+
+logger = logging.getLogger(__name__)
+
+SERIALIZER_NAME = "medsam"
+SERIALIZER_CONTENT_TYPE = "application/x-medsam-msgpack"
+
+# 사용할 직렬화기 (롤링 업그레이드 중에는 json으로 두고 모든 프로세스 교체 후 전환)
+CELERY_SERIALIZER = os.getenv("CELERY_SERIALIZER", SERIALIZER_NAME).lower()
+# 이 크기(bytes) 이상이면 zlib 압축
+SERIALIZER_COMPRESS_MIN_BYTES = int(os.getenv("SERIALIZER_COMPRESS_MIN_BYTES", "1024"))
+# N개 페이로드 중 1개의 직렬화 크기 기록 (0이면 끔)
+# 표본마다 JSON으로 한 번 더 인코딩하고 Redis에 기록하므로 운영에서는 끄거나 큰 N으로 둡니다
+SERIALIZER_STATS_SAMPLE = int(os.getenv("SERIALIZER_STATS_SAMPLE", "0"))
+SERIALIZER_STATS_KEY = "medsam:serialization"
+
+_FLAG_RAW = b"\x00"
+_FLAG_ZLIB = b"\x01"
+
+# 직전 인코딩 크기 (같은 스레드의 publish/결과 저장 직후 시그널에서 읽음)
+_last_encoded = threading.local()
+_encode_counter = itertools.count()
+
+
+def _default(obj):
+    """msgpack이 모르는 타입 변환 (Celery JSON 직렬화기와 같은 규칙)"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (uuid.UUID, Decimal)):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    # numpy 스칼라/배열 (numpy를 직접 import하지 않음)
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    import msgpack
+
+    packed = msgpack.packb(obj, default=_default, use_bin_type=True)
+    if len(packed) >= SERIALIZER_COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(packed)
+        payload = _FLAG_ZLIB + compressed if len(compressed) < len(packed) else _FLAG_RAW + packed
+    else:
+        payload = _FLAG_RAW + packed
+
+    if _sampled():
+        _last_encoded.sizes = {
+            "packed_bytes": len(packed),
+            "wire_bytes": len(payload),
+            "json_bytes": _json_size(obj)
+        }
+    return payload
+
+
+def _sampled() -> bool:
+    """이번 페이로드의 크기를 기록할지 (SERIALIZER_STATS_SAMPLE개 중 1개)"""
+    return SERIALIZER_STATS_SAMPLE > 0 and next(_encode_counter) % SERIALIZER_STATS_SAMPLE == 0
+
+
+def _json_size(obj: Any) -> int:
+    """같은 객체를 JSON으로 보냈을 때의 크기 (bytes는 base64 문자열 기준)"""
+    def _json_default(value):
+        if isinstance(value, (bytes, bytearray)):
+            return base64.b64encode(value).decode("ascii")
+        return _default(value)
+
+    try:
+        return len(json.dumps(obj, default=_json_default, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return 0
+
+
+def loads(payload: bytes) -> Any:
+    import msgpack
+
+    if isinstance(payload, str):
+        payload = payload.encode("latin-1")
+    flag, body = payload[:1], payload[1:]
+    if flag == _FLAG_ZLIB:
+        body = zlib.decompress(body)
+    elif flag != _FLAG_RAW:
+        # 결과 백엔드는 content type 없이 설정된 직렬화기로만 디코딩하므로
+        # 전환 전에 JSON으로 저장된 결과는 여기서 직접 처리
+        if flag in (b"{", b"["):
+            return json.loads(payload)
+        raise ValueError(f"Unknown serializer flag: {flag!r}")
+    return msgpack.unpackb(body, raw=False)
+
+
+def register_serializer() -> str:
+    """
+    kombu에 "medsam" 직렬화기 등록 후 사용할 직렬화기 이름 반환
+
+    msgpack이 설치되지 않았거나 CELERY_SERIALIZER=json이면 json을 사용합니다.
+    """
+    try:
+        import msgpack  # noqa: F401
+    except ImportError:
+        logger.warning("msgpack not installed, using json Celery serialization")
+        return "json"
+
+    from kombu.serialization import register
+
+    register(
+        SERIALIZER_NAME,
+        dumps,
+        loads,
+        content_type=SERIALIZER_CONTENT_TYPE,
+        content_encoding="binary"
+    )
+    return SERIALIZER_NAME if CELERY_SERIALIZER == SERIALIZER_NAME else "json"
+
+
+def _take_last_sizes() -> Optional[Dict[str, int]]:
+    sizes = getattr(_last_encoded, "sizes", None)
+    _last_encoded.sizes = None
+    return sizes
+
+
+def _record_sizes(task_name: str, kind: str, sizes: Dict[str, int]):
+    """작업별 누적 크기 기록 (실패해도 작업에는 영향 없음)"""
+    try:
+        from medsam_api_server.celery_app import celery_app
+
+        with celery_app.connection_or_acquire() as conn:
+            pipe = conn.default_channel.client.pipeline(transaction=False)
+            pipe.hincrby(SERIALIZER_STATS_KEY, f"{task_name}.{kind}.count", 1)
+            for field, value in sizes.items():
+                pipe.hincrby(SERIALIZER_STATS_KEY, f"{task_name}.{kind}.{field}", value)
+            pipe.execute()
+    except Exception as e:
+        logger.debug(f"Failed to record serialization stats: {e}")
+
+    logger.debug(
+        f"Serialized {task_name} {kind}: {sizes['wire_bytes']} bytes on wire "
+        f"(msgpack {sizes['packed_bytes']}, json {sizes['json_bytes']})"
+    )
+
+
+@after_task_publish.connect
+def _on_task_publish(sender=None, **kwargs):
+    sizes = _take_last_sizes()
+    if sizes:
+        _record_sizes(sender, "message", sizes)
+
+
+@task_success.connect
+def _on_task_success(sender=None, **kwargs):
+    # 결과 백엔드 저장은 task_success 시그널 직전에 같은 스레드에서 수행됨
+    sizes = _take_last_sizes()
+    if sizes and sender is not None:
+        _record_sizes(sender.name, "result", sizes)
+
+
+def get_serialization_stats() -> Dict[str, Any]:
+    """작업/종류(message, result)별 누적 직렬화 크기와 JSON 대비 절감률"""
+    from medsam_api_server.celery_app import celery_app
+
+    with celery_app.connection_or_acquire() as conn:
+        raw = conn.default_channel.client.hgetall(SERIALIZER_STATS_KEY)
+
+    stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for field, value in raw.items():
+        field = field.decode() if isinstance(field, bytes) else field
+        task_name, kind, metric = field.rsplit(".", 2)
+        stats.setdefault(task_name, {}).setdefault(kind, {})[metric] = int(value)
+
+    for kinds in stats.values():
+        for entry in kinds.values():
+            count = entry.get("count", 0) or 1
+            json_bytes = entry.get("json_bytes", 0)
+            entry["avg_wire_bytes"] = entry.get("wire_bytes", 0) / count
+            entry["avg_json_bytes"] = json_bytes / count
+            entry["savings_percent"] = (
+                (1 - entry.get("wire_bytes", 0) / json_bytes) * 100 if json_bytes else 0.0
+            )
+    return {
+        "serializer": celery_app.conf.task_serializer,
+        "compress_min_bytes": SERIALIZER_COMPRESS_MIN_BYTES,
+        "stats_sample": SERIALIZER_STATS_SAMPLE,
+        "tasks": stats
+    }
@@ -0,0 +1,117 @@
+"""
+3D 전파 슬라이스 스트림 (Redis Streams)
+
+전파 루프가 슬라이스를 기록할 때마다 2D RLE로 인코딩해 작업별 Redis Stream에 추가합니다.
+GET /api/v1/jobs/{job_id}/result/stream이 이를 SSE로 전달하므로, 클라이언트는 전체 NIfTI가
+저장되기 전에 전파된 슬라이스를 바로 그릴 수 있습니다.
+Stream 자체가 재생 버퍼이므로 늦게 연결한 클라이언트도 처음(또는 Last-Event-ID)부터 따라잡습니다.
+
+키:
+    medsam:job:{job_id}:slices:{task_id}   stream, SLICE_STREAM_TTL 후 만료
+
+항목:
+    type=slice  z, area, bbox ([y0, y1, x0, x1] JSON, 빈 슬라이스는 null), shape ([h, w] JSON),
+                rle (슬라이스 전체의 varint RLE, base64 - core/mask_codec.py 형식)
+    type=end    status (completed, failed, cancelled), error
+
+스트림의 슬라이스는 후처리(최대 연결 성분) 전 미리보기이며, 최종 결과는 /result로 받습니다.
+"""
+
+import os
+import json
+import time
+import base64
+import logging
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from medsam_api_server.core.job_store import KEY_PREFIX
+from medsam_api_server.core.mask_codec import encode_rle, mask_bbox_2d
+
+logger = logging.getLogger(__name__)
+
+SLICE_STREAM_ENABLED = os.getenv("SLICE_STREAM_ENABLED", "true").lower() == "true"
+# 완료 후 재생 버퍼 보관 시간 (초)
+SLICE_STREAM_TTL = int(os.getenv("SLICE_STREAM_TTL", "3600"))
+# GPU 루프를 막지 않도록 이 개수 또는 간격(초)마다 파이프라인으로 한 번에 기록
+SLICE_STREAM_BATCH = int(os.getenv("SLICE_STREAM_BATCH", "8"))
+SLICE_STREAM_FLUSH_SECONDS = float(os.getenv("SLICE_STREAM_FLUSH_SECONDS", "0.25"))
+
+
+def slice_stream_key(job_id: str, task_id: str) -> str:
+    return f"{KEY_PREFIX}:job:{job_id}:slices:{task_id}"
+
+
+def encode_slice_entry(z: int, mask_2d: np.ndarray) -> Dict[str, Any]:
+    """슬라이스 → stream 항목 필드"""
+    binary = np.asarray(mask_2d) > 0
+    bbox = mask_bbox_2d(binary)
+    return {
+        "type": "slice",
+        "z": int(z),
+        "area": int(np.count_nonzero(binary)) if bbox else 0,
+        "bbox": json.dumps(bbox),
+        "shape": json.dumps([int(s) for s in binary.shape]),
+        "rle": base64.b64encode(encode_rle(binary)).decode("ascii") if bbox else ""
+    }
+
+
+def decode_stream_entry(fields: Dict[str, str]) -> Dict[str, Any]:
+    """stream 항목 필드 → SSE 이벤트 데이터"""
+    if fields.get("type") == "slice":
+        return {
+            "type": "slice",
+            "z": int(fields["z"]),
+            "area": int(fields["area"]),
+            "bbox": json.loads(fields["bbox"]),
+            "shape": json.loads(fields["shape"]),
+            "rle": fields["rle"] or None
+        }
+    return {key: value for key, value in fields.items() if value != ""}
+
+
+class SliceStreamPublisher:
+    """전파 중 슬라이스를 Redis Stream에 추가 (Redis 오류 시 스트림만 끄고 전파는 계속)"""
+
+    def __init__(self, job_id: str, task_id: str, max_slices: int):
+        from medsam_api_server.core.job_store import get_job_store
+
+        self.key = slice_stream_key(job_id, task_id)
+        self.client = get_job_store().client
+        # 재시도로 같은 슬라이스가 다시 나와도 버퍼가 무한히 커지지 않도록 상한
+        self.maxlen = max(1, int(max_slices)) * 2 + 16
+        self.enabled = SLICE_STREAM_ENABLED
+        self._pending: List[Dict[str, Any]] = []
+        self._last_flush = time.time()
+
+    def publish(self, z: int, mask_2d: np.ndarray):
+        if not self.enabled:
+            return
+        self._pending.append(encode_slice_entry(z, mask_2d))
+        if len(self._pending) >= SLICE_STREAM_BATCH or time.time() - self._last_flush >= SLICE_STREAM_FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        if not self.enabled or not self._pending:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for fields in self._pending:
+                pipe.xadd(self.key, fields, maxlen=self.maxlen, approximate=True)
+            pipe.expire(self.key, SLICE_STREAM_TTL)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Disabling slice stream {self.key}: {e}")
+            self.enabled = False
+        self._pending = []
+        self._last_flush = time.time()
+
+    def close(self, status: str, error: Optional[str] = None):
+        """남은 슬라이스와 종료 항목 기록"""
+        if not self.enabled:
+            return
+        self._pending.append({"type": "end", "status": status, "error": error or ""})
+        self.flush()
+        # 종료 항목은 한 번만 (완료 기록 후 실패해도 두 번째 end를 쓰지 않음)
+        self.enabled = False
@@ -0,0 +1,319 @@
+"""
+추측 전파 (opt-in)
+
+대부분의 세션에서 사용자는 2D 마스크를 받은 직후 기본 범위(볼륨 전체, 참조 = 그 슬라이스)로
+3D 전파를 요청합니다. SPECULATIVE_PROPAGATION_ENABLED이면 초기 마스크 작업이 끝났을 때
+실제 GPU 작업이 대기 중이지 않으면 그 마스크로 전파를 미리 시작합니다.
+
+실제 요청을 늦추지 않도록
+- 최저 우선순위 큐(gpu_speculative)로 보내 워커가 다른 GPU 큐가 모두 비었을 때만 가져가고
+- 실행 중에도 프레임 사이에서 실제 작업이 대기 중이면 체크포인트를 남기고 자리를 내주며 (TaskYielded)
+- 추측 작업은 GPU 큐 길이(바쁨 판단)에 포함하지 않습니다.
+채택되기 전에는 사용자에게 보이지 않으므로 진행률과 작업 상태를 기록하지 않습니다.
+결과는 작업 결과 파일을 덮어쓰지 않도록 후처리 전 희소 컨테이너로 partials/에만 저장합니다.
+
+사용자의 propagate 요청이 같은 전파(지문 일치)이면
+    running          추측 task를 채택하고 그 task ID를 반환 (완료 시 정상 결과로 기록)
+    done             저장된 결과를 병합 작업(CPU, 후처리만)으로 바로 기록
+    queued, yielded  추측 task를 취소하고 일반 전파로 제출 (양보한 경우 체크포인트에서 이어감)
+다른 요청이면 추측 작업을 취소하고 기록을 지웁니다. 새 초기 마스크로 추측을 시작할 때도 이전 추측은 취소합니다.
+
+키:
+    medsam:job:{job_id}:speculative   {"task_id", "fingerprint", "state", "request", ...} JSON, SPECULATION_TTL 후 만료
+                                       state: queued, running, adopted, done, yielded
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+from medsam_api_server.core.job_store import KEY_PREFIX, MAX_UPDATE_RETRIES
+from medsam_api_server.core.cancellation import TaskYielded
+from medsam_api_server.core.fingerprint import params_hash, propagation_params
+
+logger = logging.getLogger(__name__)
+
+SPECULATIVE_PROPAGATION_ENABLED = os.getenv("SPECULATIVE_PROPAGATION_ENABLED", "false").lower() == "true"
+# 추측 기록 보관 시간 (초)
+SPECULATION_TTL = int(os.getenv("SPECULATION_TTL", "3600"))
+# 추측 전파가 실제 작업 대기 여부를 확인하는 간격 (초)
+SPECULATION_CHECK_INTERVAL = float(os.getenv("SPECULATION_CHECK_INTERVAL", "0.5"))
+
+# 기록을 바꾸지 않음 (_update_record)
+_UNCHANGED = object()
+
+
+def speculation_key(job_id: str) -> str:
+    return f"{KEY_PREFIX}:job:{job_id}:speculative"
+
+
+def propagation_fingerprint(mask_id: str, reference_slice: int, start_slice: int, end_slice: int,
+                            window_level: Optional[List[float]] = None) -> str:
+    """추측 전파와 사용자 전파 요청이 같은 전파인지 비교하는 지문"""
+    return params_hash(propagation_params(mask_id, reference_slice, start_slice, end_slice, window_level))
+
+
+def _update_record(job_id: str, update: Callable[[Optional[Dict[str, Any]]], Tuple[Any, Any]]):
+    """
+    WATCH로 기록을 읽고 update(current) → (새 기록 | None(삭제) | _UNCHANGED, 반환값) 적용
+
+    update는 경합 시 다시 호출되므로 부수 효과가 없어야 합니다.
+    """
+    import redis
+    from medsam_api_server.core.job_store import get_job_store
+
+    client = get_job_store().client
+    key = speculation_key(job_id)
+    for _ in range(MAX_UPDATE_RETRIES):
+        with client.pipeline(transaction=True) as pipe:
+            try:
+                pipe.watch(key)
+                raw = pipe.get(key)
+                record, value = update(json.loads(raw) if raw else None)
+                if record is _UNCHANGED:
+                    pipe.unwatch()
+                    return value
+                pipe.multi()
+                if record is None:
+                    pipe.delete(key)
+                else:
+                    pipe.set(key, json.dumps(record), ex=SPECULATION_TTL)
+                pipe.execute()
+                return value
+            except redis.WatchError:
+                continue
+    raise RuntimeError(f"Could not update speculation record {key}")
+
+
+def _discard(record: Optional[Dict[str, Any]]):
+    """더 이상 쓰지 않을 추측 정리 (대기/실행 중이면 취소, 완료 결과는 삭제, 실패해도 계속)"""
+    if not record:
+        return
+    try:
+        if record["state"] in ("queued", "running"):
+            from medsam_api_server.core.cancellation import request_cancel
+
+            request_cancel(record["task_id"])
+            logger.info(f"Cancelled speculative propagation {record['task_id']}")
+        elif record["state"] == "done" and record.get("partial"):
+            from medsam_api_server.core.storage import get_storage
+
+            get_storage().delete(record["partial"]["partial_key"])
+    except Exception as e:
+        logger.warning(f"Failed to discard speculative propagation {record.get('task_id')}: {e}")
+
+
+def start_speculation(job_id: str, slice_index: int, mask_id: str,
+                      window_level: Optional[List[float]] = None) -> Optional[str]:
+    """
+    초기 마스크 완료 후 기본 범위 추측 전파 시작 (시작한 task ID, 시작하지 않았으면 None)
+
+    실제 GPU 작업이 대기 중이거나, 같은 추측이 이미 있거나, 채택된 전파가 진행 중이면 시작하지 않습니다.
+    """
+    from medsam_api_server.celery_app import celery_app
+    from medsam_api_server.core.job_store import load_job_metadata
+    from medsam_api_server.core.scheduling import gpu_queue_length, enqueue_headers
+    from medsam_api_server.core.time_limits import propagation_time_limits, volume_depth
+
+    if not SPECULATIVE_PROPAGATION_ENABLED:
+        return None
+    depth = volume_depth(load_job_metadata(job_id))
+    if not depth or depth < 2:
+        return None
+    with celery_app.connection_or_acquire() as conn:
+        if gpu_queue_length(conn.default_channel.client) > 0:
+            return None
+
+    request = {
+        "reference_slice": int(slice_index),
+        "start_slice": 0,
+        "end_slice": depth - 1,
+        "mask_id": mask_id,
+        "window_level": window_level
+    }
+    fingerprint = propagation_fingerprint(
+        mask_id, request["reference_slice"], request["start_slice"], request["end_slice"], window_level
+    )
+    task_id = str(uuid.uuid4())
+
+    def replace(current):
+        if current and (current["state"] == "adopted" or (
+                current["fingerprint"] == fingerprint and current["state"] in ("queued", "running", "done"))):
+            return _UNCHANGED, None
+        record = {
+            "task_id": task_id,
+            "fingerprint": fingerprint,
+            "state": "queued",
+            "request": request,
+            "created_ts": time.time()
+        }
+        return record, {"previous": current}
+
+    replaced = _update_record(job_id, replace)
+    if replaced is None:
+        return None
+    _discard(replaced["previous"])
+
+    soft_limit, hard_limit = propagation_time_limits(depth)
+    celery_app.send_task(
+        "speculative_propagation",
+        kwargs={
+            "job_id": job_id,
+            "reference_slice": request["reference_slice"],
+            "start_slice": request["start_slice"],
+            "end_slice": request["end_slice"],
+            "reference_mask_id": mask_id,
+            "window_level": window_level
+        },
+        task_id=task_id,
+        soft_time_limit=soft_limit,
+        time_limit=hard_limit,
+        headers=enqueue_headers()
+    )
+    logger.info(f"Started speculative propagation {task_id} for job {job_id} from slice {slice_index}")
+    return task_id
+
+
+def mark_running(job_id: str, task_id: str) -> bool:
+    """추측 task 실행 시작 (대체/취소되어 기록이 다른 task이면 False)"""
+    def update(current):
+        if not current or current["task_id"] != task_id or current["state"] not in ("queued", "adopted"):
+            return _UNCHANGED, False
+        if current["state"] == "adopted":
+            # 채택된 뒤 양보했다가 다시 시작한 경우
+            return _UNCHANGED, True
+        return dict(current, state="running"), True
+
+    return _update_record(job_id, update)
+
+
+def mark_yielded(job_id: str, task_id: str) -> bool:
+    """양보 기록 (그 사이 채택되었으면 False, 호출 측에서 일반 전파로 이어가야 함)"""
+    def update(current):
+        if current and current["task_id"] == task_id and current["state"] == "adopted":
+            return _UNCHANGED, False
+        if current and current["task_id"] == task_id:
+            return dict(current, state="yielded"), True
+        return _UNCHANGED, True
+
+    return _update_record(job_id, update)
+
+
+def finish_speculation(job_id: str, task_id: str, partial: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """
+    추측 전파 완료 기록
+
+    Returns:
+        ("adopted", 기록) 채택됨 - 호출 측에서 후처리 후 정상 결과로 기록 (기록은 삭제)
+        ("done", None)    결과를 partial로 보관, 같은 요청이 오면 병합 작업으로 기록
+        ("discarded", None) 다른 추측으로 대체됨 - 호출 측에서 partial 삭제
+    """
+    def update(current):
+        if not current or current["task_id"] != task_id:
+            return _UNCHANGED, ("discarded", None)
+        if current["state"] == "adopted":
+            return None, ("adopted", current)
+        return dict(current, state="done", partial=partial), ("done", None)
+
+    return _update_record(job_id, update)
+
+
+def clear_speculation(job_id: str, task_id: str):
+    """추측 task 실패/취소 시 기록 삭제 (다른 task로 바뀌었으면 유지)"""
+    def update(current):
+        if current and current["task_id"] == task_id:
+            return None, None
+        return _UNCHANGED, None
+
+    try:
+        _update_record(job_id, update)
+    except Exception as e:
+        logger.warning(f"Failed to clear speculation record for job {job_id}: {e}")
+
+
+def speculation_state(job_id: str, task_id: str) -> Optional[str]:
+    """추측 task의 현재 상태 (기록이 없거나 다른 task로 바뀌었으면 None)"""
+    from medsam_api_server.core.job_store import get_job_store
+
+    raw = get_job_store().client.get(speculation_key(job_id))
+    record = json.loads(raw) if raw else None
+    return record["state"] if record and record["task_id"] == task_id else None
+
+
+def claim_speculation(job_id: str, fingerprint: str, cache_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    사용자 propagate 요청에 맞는 추측 확인 (API)
+
+    Returns:
+        {"action": "adopt", "task_id"}  실행 중인 추측 task 채택
+        {"action": "merge", "record"}   완료된 추측 결과를 병합 작업으로 기록
+        None                            일반 전파로 제출 (맞지 않는 추측은 취소)
+    """
+    def claim(current):
+        if not current or current["state"] == "adopted":
+            return _UNCHANGED, None
+        if current["fingerprint"] != fingerprint or current["state"] in ("queued", "yielded"):
+            return None, {"action": "discard", "record": current}
+        if current["state"] == "running":
+            adopted = dict(current, state="adopted", cache_key=cache_key, adopted_ts=time.time())
+            return adopted, {"action": "adopt", "task_id": current["task_id"]}
+        return None, {"action": "merge", "record": current}
+
+    decision = _update_record(job_id, claim)
+    if decision and decision["action"] == "discard":
+        _discard(decision["record"])
+        return None
+    return decision
+
+
+class SpeculationYield:
+    """
+    추측 전파의 yield_callback (프레임 사이마다 호출)
+
+    프레임 경계 선점으로 대화형 작업을 먼저 처리한 뒤에도 실제 GPU 작업이 대기 중이면
+    TaskYielded로 중단합니다. 사용자가 채택한 뒤에는 실제 요청이므로 양보하지 않습니다 (adopted).
+    """
+
+    def __init__(self, job_id: str, task_id: str, preemption: Optional[Callable[[], None]] = None,
+                 interval: float = SPECULATION_CHECK_INTERVAL):
+        self.job_id = job_id
+        self.task_id = task_id
+        self.preemption = preemption
+        self.interval = interval
+        self.adopted = False
+        self._last_check = 0.0
+
+    def __call__(self):
+        if self.preemption:
+            self.preemption()
+        if self.adopted:
+            return
+        now = time.time()
+        if now - self._last_check < self.interval:
+            return
+        self._last_check = now
+
+        waiting = self._check()
+        if waiting:
+            raise TaskYielded(f"Speculative propagation {self.task_id} yielded to {waiting} queued task(s)")
+
+    def _check(self) -> int:
+        """채택 여부 갱신 후 대기 중인 실제 GPU 작업 수 (채택되었거나 확인 실패 시 0)"""
+        from medsam_api_server.celery_app import celery_app
+        from medsam_api_server.core.job_store import get_job_store
+        from medsam_api_server.core.scheduling import gpu_queue_length
+
+        try:
+            raw = get_job_store().client.get(speculation_key(self.job_id))
+            record = json.loads(raw) if raw else None
+            if record and record["task_id"] == self.task_id and record["state"] == "adopted":
+                self.adopted = True
+                return 0
+            with celery_app.connection_or_acquire() as conn:
+                return gpu_queue_length(conn.default_channel.client)
+        except Exception as e:
+            logger.warning(f"Failed to check queued work for speculative propagation {self.task_id}: {e}")
+            return 0
@@ -0,0 +1,633 @@
+"""
+작업 저장소 모듈
+
+볼륨, 마스크, 결과 파일을 저장소 인터페이스 뒤로 추상화합니다.
+(작업 메타데이터는 core/job_store.py)
+- 로컬 파일시스템 백엔드 (단일 호스트, 기본값)
+- S3 호환 백엔드 (멀티 노드, MinIO로 로컬 테스트 가능)
+- 워커용 read-through 로컬 디스크 캐시 (같은 볼륨 반복 다운로드 방지)
+
+저장소 키는 "{job_id}/{name}" 형식의 상대 경로입니다.
+"""
+
+import os
+import hashlib
+import shutil
+import logging
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional, Dict, Any, List, Iterator, Callable, Iterable
+
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.exceptions import ClientError
+    BOTO3_AVAILABLE = True
+except ImportError:
+    BOTO3_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# === 작업 키 레이아웃 ===
+
+VOLUME_NAME = "volume.nii.gz"
+VOLUME_NPY_NAME = "volume.npy"
+VOLUME_HEADER_NAME = "volume_header.json"
+DICOM_UPLOAD_NAME = "upload.zip"
+METADATA_NAME = "metadata.json"  # 이전 형식 (core/job_store.py 마이그레이션에서만 사용)
+RESULT_NAME = "result.nii.gz"
+SPARSE_RESULT_NAME = "result.mskr"
+# 3D 전파 결과 (task별, 같은 작업의 전파/캐시 복원끼리 서로 덮어쓰지 않음)
+RESULTS_DIR = "results"
+MASKS_DIR = "masks"
+# 분할 전파의 방향별 중간 결과 (병합 후 삭제)
+PARTIALS_DIR = "partials"
+
+# 2D 마스크 blob 인코딩 (rle, bitpack, png)
+MASK_BLOB_ENCODING = os.getenv("MASK_BLOB_ENCODING", "rle").lower()
+
+
+def job_key(job_id: str, name: str) -> str:
+    """작업 내 객체의 저장소 키"""
+    return f"{job_id}/{name}"
+
+
+def mask_key(job_id: str, mask_id: str) -> str:
+    """2D 마스크 blob 키"""
+    return job_key(job_id, f"{MASKS_DIR}/{mask_id}")
+
+
+def task_result_key(job_id: str, task_id: str, name: str) -> str:
+    """3D 전파 task의 결과 파일 키 (RESULT_NAME, SPARSE_RESULT_NAME)"""
+    return job_key(job_id, f"{RESULTS_DIR}/{task_id}/{name}")
+
+
+def partial_result_key(job_id: str, task_id: str, direction: str) -> str:
+    """분할 전파 방향별 희소 컨테이너 키"""
+    return job_key(job_id, f"{PARTIALS_DIR}/{task_id}_{direction}.mskr")
+
+
+def job_prefix(job_id: str) -> str:
+    return f"{job_id}/"
+
+
+class StorageBackend(ABC):
+    """저장소 백엔드 인터페이스"""
+
+    # 로컬 경로로 직접 접근 가능한 백엔드인지 여부 (FileResponse 등 최적화용)
+    is_local = False
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def size(self, key: str) -> int:
+        ...
+
+    @abstractmethod
+    def put_file(self, key: str, local_path: str, move: bool = False):
+        """로컬 파일 업로드 (move=True면 원본 파일을 소비)"""
+
+    @abstractmethod
+    def put_bytes(self, key: str, data: bytes):
+        ...
+
+    @abstractmethod
+    def get_bytes(self, key: str, start: Optional[int] = None, end: Optional[int] = None) -> bytes:
+        """객체 읽기 (start/end는 포함 범위의 바이트 오프셋)"""
+
+    @abstractmethod
+    def iter_bytes(self, key: str, start: Optional[int] = None, end: Optional[int] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """객체를 청크 단위로 스트리밍"""
+
+    @abstractmethod
+    def download_file(self, key: str, local_path: str):
+        ...
+
+    @abstractmethod
+    def local_path(self, key: str) -> str:
+        """읽기용 로컬 파일 경로 (원격 백엔드는 캐시를 통해 내려받음)"""
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def list_keys(self, prefix: str) -> List[str]:
+        ...
+
+    def local_paths(self, keys: Iterable[str]) -> List[str]:
+        """여러 객체의 읽기용 로컬 경로 (함께 쓰는 파일을 한 번에 확보)"""
+        return [self.local_path(key) for key in keys]
+
+    def delete_prefix(self, prefix: str):
+        for key in self.list_keys(prefix):
+            self.delete(key)
+
+
+class LocalStorageBackend(StorageBackend):
+    """로컬 파일시스템 백엔드 (공유 볼륨의 DATA_ROOT)"""
+
+    is_local = True
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self._path(key))
+
+    def _temp_path(self, path: str) -> str:
+        """같은 디렉토리의 고유한 임시 파일 (같은 키에 동시에 쓰는 요청끼리 임시 파일을 공유하지 않도록)"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+        os.close(fd)
+        return tmp_path
+
+    def put_file(self, key: str, local_path: str, move: bool = False):
+        path = self._path(key)
+        tmp_path = self._temp_path(path)
+        try:
+            if move:
+                # 다른 파일시스템(TEMP_ROOT → DATA_ROOT)이면 복사로 폴백
+                shutil.move(local_path, tmp_path)
+            else:
+                shutil.copyfile(local_path, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def put_bytes(self, key: str, data: bytes):
+        path = self._path(key)
+        tmp_path = self._temp_path(path)
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get_bytes(self, key: str, start: Optional[int] = None, end: Optional[int] = None) -> bytes:
+        with open(self._path(key), "rb") as f:
+            if start is None:
+                return f.read()
+            f.seek(start)
+            return f.read() if end is None else f.read(end - start + 1)
+
+    def iter_bytes(self, key: str, start: Optional[int] = None, end: Optional[int] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        with open(self._path(key), "rb") as f:
+            position = start or 0
+            f.seek(position)
+            while end is None or position <= end:
+                to_read = chunk_size if end is None else min(chunk_size, end - position + 1)
+                chunk = f.read(to_read)
+                if not chunk:
+                    break
+                position += len(chunk)
+                yield chunk
+
+    def download_file(self, key: str, local_path: str):
+        shutil.copyfile(self._path(key), local_path)
+
+    def local_path(self, key: str) -> str:
+        path = self._path(key)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Storage object not found: {key}")
+        return path
+
+    def delete(self, key: str):
+        path = self._path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def list_keys(self, prefix: str) -> List[str]:
+        base = self._path(prefix) if prefix.strip("/") else os.path.normpath(self.root)
+        if os.path.isfile(base):
+            return [prefix]
+        keys = []
+        for dirpath, _, filenames in os.walk(base):
+            for filename in filenames:
+                if filename.startswith(".") and filename.endswith(".tmp"):
+                    continue  # 기록 중인 임시 파일
+                full_path = os.path.join(dirpath, filename)
+                keys.append(os.path.relpath(full_path, self.root).replace(os.sep, "/"))
+        return keys
+
+    def delete_prefix(self, prefix: str):
+        path = self._path(prefix)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+class LocalDiskCache:
+    """
+    read-through 로컬 디스크 캐시
+
+    원격 객체를 키 경로 그대로 캐시 디렉토리에 저장하므로 같은 작업의
+    파일(volume.npy, volume_header.json 등)은 같은 디렉토리에 모입니다.
+    용량을 넘으면 가장 오래 접근하지 않은 파일부터 제거합니다.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        # 경로별 고정 횟수 (get_many 진행 중)
+        self._pinned: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(self, key: str, fetch: Callable[[str], None]) -> str:
+        """캐시된 로컬 경로 반환 (없으면 fetch(tmp_path)로 내려받음)"""
+        return self.get_many([key], lambda _, tmp_path: fetch(tmp_path))[0]
+
+    def get_many(self, keys: Iterable[str], fetch: Callable[[str, str], None]) -> List[str]:
+        """
+        여러 객체를 함께 캐시하고 로컬 경로 반환 (없는 객체는 fetch(key, tmp_path)로 내려받음)
+
+        모두 받을 때까지 이번 객체들을 고정해 두고 용량 초과 제거는 마지막에 한 번만 하므로,
+        먼저 받은 객체(volume_header.json 등)가 다음 객체를 받으면서 제거되지 않습니다.
+        """
+        keys = list(keys)
+        paths = [self._path(key) for key in keys]
+        self._pin(paths)
+        try:
+            for key, path in zip(keys, paths):
+                self._fetch(key, path, fetch)
+            self._evict(keep=set(paths))
+        finally:
+            self._unpin(paths)
+        return paths
+
+    def _fetch(self, key: str, path: str, fetch: Callable[[str, str], None]):
+        with self._key_lock(key):
+            if os.path.exists(path):
+                self.hits += 1
+                os.utime(path)  # LRU 접근 시간 갱신
+                return
+
+            self.misses += 1
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                fetch(key, tmp_path)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def _pin(self, paths: List[str]):
+        """받는 중인 객체는 다른 스레드의 제거 대상에서 제외"""
+        with self._lock:
+            for path in paths:
+                self._pinned[path] = self._pinned.get(path, 0) + 1
+
+    def _unpin(self, paths: List[str]):
+        with self._lock:
+            for path in paths:
+                count = self._pinned.get(path, 0) - 1
+                if count > 0:
+                    self._pinned[path] = count
+                else:
+                    self._pinned.pop(path, None)
+
+    def invalidate(self, key: str):
+        path = self._path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def invalidate_prefix(self, prefix: str):
+        shutil.rmtree(self._path(prefix), ignore_errors=True)
+
+    def _evict(self, keep: set):
+        """용량 초과 시 LRU 제거 (keep과 고정된 경로 제외, mmap으로 열린 파일은 unlink 후에도 유효)"""
+        entries = []
+        total = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(".tmp"):
+                    continue
+                if filename.startswith(".") and filename.endswith(".tmp"):
+                    continue  # 기록 중인 임시 파일
+                full_path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(full_path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, full_path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        with self._lock:
+            protected = keep | set(self._pinned)
+        for _, file_size, full_path in sorted(entries):
+            if full_path in protected:
+                continue
+            try:
+                os.remove(full_path)
+                total -= file_size
+                logger.info(f"Evicted cached object: {full_path}")
+            except FileNotFoundError:
+                pass
+            if total <= self.max_bytes:
+                break
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"root": self.root, "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses}
+
+
+class S3StorageBackend(StorageBackend):
+    """S3 호환 백엔드 (AWS S3, MinIO 등)"""
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None,
+                 region: Optional[str] = None, access_key: Optional[str] = None,
+                 secret_key: Optional[str] = None, cache: Optional[LocalDiskCache] = None,
+                 multipart_chunk_mb: int = 16, max_concurrency: int = 8):
+        if not BOTO3_AVAILABLE:
+            raise RuntimeError("boto3 is not installed; S3 storage backend is not available")
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.cache = cache
+        self._client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key
+        )
+        # 큰 볼륨은 멀티파트 업로드 / 병렬 ranged GET 다운로드
+        self._transfer_config = TransferConfig(
+            multipart_threshold=multipart_chunk_mb * 1024 * 1024,
+            multipart_chunksize=multipart_chunk_mb * 1024 * 1024,
+            max_concurrency=max_concurrency
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    @staticmethod
+    def _range_header(start: Optional[int], end: Optional[int]) -> Optional[str]:
+        if start is None:
+            return None
+        return f"bytes={start}-{'' if end is None else end}"
+
+    def exists(self, key: str) -> bool:
+        try:
+            self._client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def size(self, key: str) -> int:
+        return int(self._client.head_object(Bucket=self.bucket, Key=self._key(key))["ContentLength"])
+
+    def put_file(self, key: str, local_path: str, move: bool = False):
+        self._client.upload_file(local_path, self.bucket, self._key(key), Config=self._transfer_config)
+        if self.cache:
+            self.cache.invalidate(key)
+        if move:
+            os.remove(local_path)
+
+    def put_bytes(self, key: str, data: bytes):
+        self._client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data)
+        if self.cache:
+            self.cache.invalidate(key)
+
+    def get_bytes(self, key: str, start: Optional[int] = None, end: Optional[int] = None) -> bytes:
+        kwargs = {"Bucket": self.bucket, "Key": self._key(key)}
+        range_header = self._range_header(start, end)
+        if range_header:
+            kwargs["Range"] = range_header
+        return self._client.get_object(**kwargs)["Body"].read()
+
+    def iter_bytes(self, key: str, start: Optional[int] = None, end: Optional[int] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        kwargs = {"Bucket": self.bucket, "Key": self._key(key)}
+        range_header = self._range_header(start, end)
+        if range_header:
+            kwargs["Range"] = range_header
+        body = self._client.get_object(**kwargs)["Body"]
+        try:
+            for chunk in body.iter_chunks(chunk_size):
+                yield chunk
+        finally:
+            body.close()
+
+    def download_file(self, key: str, local_path: str):
+        self._client.download_file(self.bucket, self._key(key), local_path, Config=self._transfer_config)
+
+    def local_path(self, key: str) -> str:
+        if self.cache is None:
+            raise RuntimeError("S3 backend requires a local cache for local_path()")
+        return self.cache.get(key, lambda tmp_path: self.download_file(key, tmp_path))
+
+    def local_paths(self, keys: Iterable[str]) -> List[str]:
+        if self.cache is None:
+            raise RuntimeError("S3 backend requires a local cache for local_paths()")
+        return self.cache.get_many(keys, self.download_file)
+
+    def delete(self, key: str):
+        self._client.delete_object(Bucket=self.bucket, Key=self._key(key))
+        if self.cache:
+            self.cache.invalidate(key)
+
+    def list_keys(self, prefix: str) -> List[str]:
+        keys = []
+        strip = len(self.prefix) + 1 if self.prefix else 0
+        paginator = self._client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            for obj in page.get("Contents", []):
+                keys.append(obj["Key"][strip:])
+        return keys
+
+    def delete_prefix(self, prefix: str):
+        keys = self.list_keys(prefix)
+        # delete_objects는 요청당 최대 1000개
+        for i in range(0, len(keys), 1000):
+            self._client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": self._key(k)} for k in keys[i:i + 1000]], "Quiet": True}
+            )
+        if self.cache:
+            self.cache.invalidate_prefix(prefix)
+
+
+# === 작업 메타데이터 헬퍼 ===
+
+def save_mask(job_id: str, mask_id: str, mask, encoding: Optional[str] = None) -> Dict[str, Any]:
+    """
+    2D 마스크를 blob으로 저장하고 참조(요약 통계 포함) 반환
+
+    Celery 결과에는 이 참조만 담고, 마스크 자체는 작업 저장소에 둡니다.
+    """
+    from medsam_api_server.core.mask_codec import encode_mask_blob
+
+    blob, header = encode_mask_blob(mask, encoding or MASK_BLOB_ENCODING)
+    key = mask_key(job_id, mask_id)
+    get_storage().put_bytes(key, blob)
+    return {
+        "mask_id": mask_id,
+        "url": f"/api/v1/jobs/{job_id}/masks/{mask_id}",
+        "encoding": header["encoding"],
+        "shape": header["shape"],
+        "area": header["area"],
+        "bbox": header["bbox"],
+        "size_bytes": len(blob),
+        "sha256": hashlib.sha256(blob).hexdigest()
+    }
+
+
+def load_mask(job_id: str, mask_id: str):
+    """저장된 2D 마스크 blob 디코딩 → (uint8 마스크, 헤더)"""
+    from medsam_api_server.core.mask_codec import decode_mask_blob
+
+    return decode_mask_blob(get_storage().get_bytes(mask_key(job_id, mask_id)))
+
+
+def record_job_result(job_id: str, result: Dict[str, Any]) -> bool:
+    """
+    완료된 3D 전파 결과({"task_id", "files": {이름: {"key", ...}}, ...})를 작업 메타데이터에 기록
+
+    이전 결과 파일은 새 결과를 기록한 뒤 삭제합니다. 나중에 제출된 전파의 결과가 이미 기록되어 있으면
+    (늦게 끝난 이전 전파) 기록하지 않고 이 결과 파일을 삭제한 뒤 False를 반환합니다.
+    """
+    from medsam_api_server.core.job_store import load_job_metadata, update_job_metadata
+
+    metadata = load_job_metadata(job_id) or {}
+    previous = metadata.get("result") or {}
+    order = [task.get("task_id") for task in metadata.get("tasks", [])]
+    task_id, previous_task_id = result["task_id"], previous.get("task_id")
+    if task_id in order and previous_task_id in order and order.index(previous_task_id) > order.index(task_id):
+        logger.info(f"Not recording result of task {task_id} for job {job_id}: newer result from {previous_task_id}")
+        _delete_result_files(result, keep=previous)
+        return False
+
+    update_job_metadata(job_id, {"result": result})
+    _delete_result_files(previous, keep=result)
+    return True
+
+
+def _delete_result_files(result: Dict[str, Any], keep: Dict[str, Any]):
+    """결과 기록의 파일 삭제 (keep 기록이 가리키는 키는 유지, 실패해도 계속)"""
+    keep_keys = {info.get("key") for info in (keep.get("files") or {}).values()}
+    storage = get_storage()
+    for info in (result.get("files") or {}).values():
+        key = info.get("key")
+        if not key or key in keep_keys:
+            continue
+        try:
+            storage.delete(key)
+        except Exception as e:
+            logger.warning(f"Failed to delete replaced result file {key}: {e}")
+
+
+def describe_object(key: str) -> Dict[str, Any]:
+    """객체 크기와 sha256 (기록된 값이 없는 객체의 ETag 계산용, 전체를 한 번 읽음)"""
+    storage = get_storage()
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in storage.iter_bytes(key):
+        digest.update(chunk)
+        size += len(chunk)
+    return {"key": key, "size": size, "sha256": digest.hexdigest()}
+
+
+def copy_object(src_key: str, dst_key: str):
+    """저장소 내 객체 복사 (원격 저장소는 임시 파일을 거쳐 업로드)"""
+    storage = get_storage()
+    if storage.is_local:
+        storage.put_file(dst_key, storage.local_path(src_key))
+        return
+    fd, tmp_path = tempfile.mkstemp(dir=os.getenv("TEMP_ROOT", "/app/temp"))
+    os.close(fd)
+    try:
+        storage.download_file(src_key, tmp_path)
+        storage.put_file(dst_key, tmp_path, move=True)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def get_job_volume_path(job_id: str) -> str:
+    """
+    워커용 작업 볼륨의 로컬 경로
+
+    인제스트 변환본(volume.npy + 헤더)이 있으면 그것만 내려받아 캐시에 두고,
+    MedicalImageProcessor.load_volume이 같은 디렉토리에서 찾도록 경로를 돌려줍니다.
+    """
+    storage = get_storage()
+    header_key = job_key(job_id, VOLUME_HEADER_NAME)
+    if storage.exists(header_key):
+        # 헤더와 볼륨을 함께 확보 (캐시 용량 초과 제거로 헤더만 사라지지 않도록)
+        header_path, _ = storage.local_paths([header_key, job_key(job_id, VOLUME_NPY_NAME)])
+        return os.path.join(os.path.dirname(header_path), VOLUME_NAME)
+    return storage.local_path(job_key(job_id, VOLUME_NAME))
+
+
+# 전역 저장소 인스턴스
+_storage: Optional[StorageBackend] = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> StorageBackend:
+    """저장소 싱글톤 인스턴스 반환 (STORAGE_BACKEND=local|s3)"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            # Double-check locking pattern
+            if _storage is None:
+                backend = os.getenv("STORAGE_BACKEND", "local").lower()
+                if backend == "s3":
+                    temp_root = os.getenv("TEMP_ROOT", "/app/temp")
+                    cache = LocalDiskCache(
+                        os.getenv("STORAGE_CACHE_DIR", os.path.join(temp_root, "storage_cache")),
+                        int(float(os.getenv("STORAGE_CACHE_MAX_GB", "20")) * 1024 ** 3)
+                    )
+                    _storage = S3StorageBackend(
+                        bucket=os.getenv("S3_BUCKET", "medsam2"),
+                        prefix=os.getenv("S3_PREFIX", "jobs"),
+                        endpoint_url=os.getenv("S3_ENDPOINT_URL") or None,
+                        region=os.getenv("S3_REGION") or None,
+                        access_key=os.getenv("S3_ACCESS_KEY_ID") or None,
+                        secret_key=os.getenv("S3_SECRET_ACCESS_KEY") or None,
+                        cache=cache,
+                        multipart_chunk_mb=int(os.getenv("S3_MULTIPART_CHUNK_MB", "16"))
+                    )
+                    logger.info(f"Using S3 storage backend (bucket={_storage.bucket})")
+                else:
+                    _storage = LocalStorageBackend(os.getenv("DATA_ROOT", "/app/data"))
+                    logger.info(f"Using local storage backend ({_storage.root})")
+    return _storage
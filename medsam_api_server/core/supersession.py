@@ -0,0 +1,107 @@
+"""
+대화형 요청 대체/병합 (작업+슬라이스 단위)
+
+박스를 드래그하는 동안 뷰어는 같은 슬라이스에 initial-mask 요청을 연달아 보냅니다.
+작업+슬라이스마다 마지막 요청(task ID와 요청 지문)을 기록해 두고,
+
+- 같은 요청(지문 일치)이 아직 진행 중이면 새 task를 만들지 않고 기존 task를 공유 (병합)
+- 다른 요청이면 새 task로 자리를 바꾸고 이전 task는 취소 (대체)
+  대기 중이면 revoke되어 실행되지 않고, 실행 중이면 모델 추론 직전 취소 확인에서 중단
+
+하므로 GPU 큐 길이는 마우스 이벤트 수가 아니라 사용자 수를 따라갑니다.
+
+키:
+    medsam:job:{job_id}:interactive:{slice_index}   {"task_id", "fingerprint"} JSON, INTERACTIVE_SLOT_TTL 후 만료
+"""
+
+import os
+import json
+import logging
+from typing import Dict, Any, List, Optional
+
+from medsam_api_server.core.job_store import KEY_PREFIX, MAX_UPDATE_RETRIES
+from medsam_api_server.core.fingerprint import params_hash, normalize_window_level
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE_SUPERSEDE_ENABLED = os.getenv("INTERACTIVE_SUPERSEDE_ENABLED", "true").lower() == "true"
+# 슬롯 기록 보관 시간 (초)
+INTERACTIVE_SLOT_TTL = int(os.getenv("INTERACTIVE_SLOT_TTL", "3600"))
+
+# 더 이상 공유/취소할 필요가 없는 task 상태
+FINISHED_STATES = frozenset({"SUCCESS", "FAILURE", "REVOKED", "CANCELLED"})
+
+
+def interactive_slot_key(job_id: str, slice_index: int) -> str:
+    return f"{KEY_PREFIX}:job:{job_id}:interactive:{slice_index}"
+
+
+def request_fingerprint(slice_index: int, bounding_box: List[int],
+                        window_level: Optional[List[float]] = None) -> str:
+    """초기 마스크 요청 지문 (슬라이스, 박스, 윈도우 레벨)"""
+    return params_hash({
+        "slice_index": int(slice_index),
+        "bounding_box": [int(v) for v in bounding_box],
+        "window_level": normalize_window_level(window_level)
+    })
+
+
+def _task_active(task_id: str) -> bool:
+    """아직 실행 전/실행 중이고 취소 요청도 없는 task"""
+    from celery.result import AsyncResult
+    from medsam_api_server.celery_app import celery_app
+    from medsam_api_server.core.cancellation import is_cancel_requested
+
+    if is_cancel_requested(task_id):
+        return False
+    return AsyncResult(task_id, app=celery_app).state not in FINISHED_STATES
+
+
+def claim_interactive_slot(job_id: str, slice_index: int, fingerprint: str, task_id: str) -> Dict[str, Any]:
+    """
+    작업+슬라이스 슬롯을 새 task로 차지 (WATCH로 동시 요청 간 원자성 보장)
+
+    Returns:
+        {"task_id": 실제로 사용할 task ID, "coalesced": 기존 task 공유 여부,
+         "superseded": 취소한 이전 task ID 또는 None}
+    """
+    import redis
+    from medsam_api_server.core.job_store import get_job_store
+    from medsam_api_server.core.cancellation import request_cancel
+
+    if not INTERACTIVE_SUPERSEDE_ENABLED:
+        return {"task_id": task_id, "coalesced": False, "superseded": None}
+
+    client = get_job_store().client
+    key = interactive_slot_key(job_id, slice_index)
+    slot = json.dumps({"task_id": task_id, "fingerprint": fingerprint})
+    previous = None
+    for _ in range(MAX_UPDATE_RETRIES):
+        with client.pipeline(transaction=True) as pipe:
+            try:
+                pipe.watch(key)
+                raw = pipe.get(key)
+                current = json.loads(raw) if raw else None
+                previous_active = bool(current) and _task_active(current["task_id"])
+                if previous_active and current["fingerprint"] == fingerprint:
+                    pipe.unwatch()
+                    return {"task_id": current["task_id"], "coalesced": True, "superseded": None}
+                pipe.multi()
+                pipe.set(key, slot, ex=INTERACTIVE_SLOT_TTL)
+                pipe.execute()
+                previous = current["task_id"] if previous_active else None
+                break
+            except redis.WatchError:
+                continue
+    else:
+        # 경합이 계속되면 대체/병합 없이 새 task로 진행
+        logger.warning(f"Could not claim interactive slot {key}, submitting without supersession")
+        return {"task_id": task_id, "coalesced": False, "superseded": None}
+
+    if previous:
+        try:
+            request_cancel(previous)
+            logger.info(f"Superseded task {previous} with {task_id} for job {job_id}, slice {slice_index}")
+        except Exception as e:
+            logger.warning(f"Failed to cancel superseded task {previous}: {e}")
+    return {"task_id": task_id, "coalesced": False, "superseded": previous}
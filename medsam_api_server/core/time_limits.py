@@ -0,0 +1,147 @@
+"""
+작업별 시간 제한
+
+전역 task_soft_time_limit/task_time_limit(1분/2분)은 2D 작업 기준이라 큰 볼륨의 3D 전파를 중간에 끊습니다.
+전파 작업은 제출할 때 볼륨 깊이와 지금까지 측정한 슬라이스당 처리 시간으로 제한을 계산해
+apply_async(soft_time_limit=..., time_limit=...)로 전달합니다.
+
+    soft = PROPAGATION_TIME_OVERHEAD + 깊이 × 슬라이스당 시간 × PROPAGATION_TIME_SAFETY × (재개 횟수 + 1)
+           (PROPAGATION_MIN_SOFT_LIMIT ~ PROPAGATION_MAX_SOFT_LIMIT 범위로 제한)
+    hard = soft + PROPAGATION_HARD_LIMIT_GRACE
+
+전파는 참조 슬라이스에서 볼륨 양 끝까지 진행하므로 깊이는 요청 범위가 아니라 볼륨 전체 슬라이스 수입니다.
+GPU 워커는 threads 풀(--pool=threads)로 실행하는데, Celery는 threads 풀에서 시간 제한을 적용하지 않습니다
+(SoftTimeLimitExceeded를 보내지 않고 하드 제한으로 종료하지도 않음). 그래서 전파 작업은 PropagationDeadline을
+프레임 사이 콜백으로 넘겨 작업 시작부터 소프트 제한이 지나면 직접 PropagationTimeBudgetExceeded
+(SoftTimeLimitExceeded 하위 클래스)를 발생시킵니다. 체크포인트 저장과 재개는 prefork 풀의 소프트 제한과 같은 경로를 탑니다.
+하드 제한은 여전히 적용되지 않으므로 프레임 루프 밖(볼륨/모델 로딩, 후처리)에서 멈춘 작업은 끊지 못합니다.
+
+슬라이스당 시간은 완료된 전파의 (전파한 프레임 수, 전파 루프 시간)으로 지수 이동 평균을 갱신하며,
+측정값이 없으면 PROPAGATION_DEFAULT_SLICE_SECONDS를 사용합니다.
+
+키:
+    medsam:propagation:rate   hash (seconds_per_slice, samples)
+"""
+
+import os
+import time
+import logging
+from typing import Dict, Any, Optional, Tuple, Callable
+
+from celery.exceptions import SoftTimeLimitExceeded
+
+from medsam_api_server.core.job_store import KEY_PREFIX
+
+logger = logging.getLogger(__name__)
+
+# 측정값이 없을 때 슬라이스당 처리 시간 (초)
+PROPAGATION_DEFAULT_SLICE_SECONDS = float(os.getenv("PROPAGATION_DEFAULT_SLICE_SECONDS", "0.5"))
+# 볼륨/모델 로딩, 상태 초기화, 후처리, 결과 저장 (초)
+PROPAGATION_TIME_OVERHEAD = float(os.getenv("PROPAGATION_TIME_OVERHEAD", "60"))
+PROPAGATION_TIME_SAFETY = float(os.getenv("PROPAGATION_TIME_SAFETY", "3.0"))
+PROPAGATION_MIN_SOFT_LIMIT = int(os.getenv("PROPAGATION_MIN_SOFT_LIMIT", "120"))
+PROPAGATION_MAX_SOFT_LIMIT = int(os.getenv("PROPAGATION_MAX_SOFT_LIMIT", "3600"))
+# 소프트 제한 후 체크포인트 저장과 정리에 주는 시간 (초)
+PROPAGATION_HARD_LIMIT_GRACE = int(os.getenv("PROPAGATION_HARD_LIMIT_GRACE", "60"))
+# 소프트 제한을 넘긴 전파를 체크포인트에서 재개하는 최대 횟수
+PROPAGATION_MAX_RESUMES = int(os.getenv("PROPAGATION_MAX_RESUMES", "2"))
+
+# 슬라이스당 시간 지수 이동 평균 가중치
+RATE_SMOOTHING = 0.2
+
+
+def _rate_key() -> str:
+    return f"{KEY_PREFIX}:propagation:rate"
+
+
+def volume_depth(metadata: Optional[Dict[str, Any]]) -> Optional[int]:
+    """작업 메타데이터의 볼륨 슬라이스 수 (인제스트 전이면 None)"""
+    shape = ((metadata or {}).get("volume_info") or {}).get("shape")
+    return int(shape[0]) if shape else None
+
+
+def get_seconds_per_slice() -> float:
+    """지금까지 측정한 슬라이스당 전파 시간 (없거나 조회 실패 시 기본값)"""
+    from medsam_api_server.core.job_store import get_job_store
+
+    try:
+        value = get_job_store().client.hget(_rate_key(), "seconds_per_slice")
+        return float(value) if value else PROPAGATION_DEFAULT_SLICE_SECONDS
+    except Exception as e:
+        logger.warning(f"Failed to read propagation rate: {e}")
+        return PROPAGATION_DEFAULT_SLICE_SECONDS
+
+
+def record_propagation_rate(frames: int, seconds: float):
+    """완료된 전파의 슬라이스당 시간 반영 (실패해도 작업은 계속)"""
+    if frames <= 0 or seconds <= 0:
+        return
+    from medsam_api_server.core.job_store import get_job_store
+
+    sample = seconds / frames
+    try:
+        client = get_job_store().client
+        current = client.hget(_rate_key(), "seconds_per_slice")
+        # 동시에 완료된 전파끼리 덮어써도 평균이 한 샘플만큼 덜 반영될 뿐이므로 잠그지 않음
+        updated = sample if current is None else RATE_SMOOTHING * sample + (1 - RATE_SMOOTHING) * float(current)
+        pipe = client.pipeline(transaction=False)
+        pipe.hset(_rate_key(), "seconds_per_slice", updated)
+        pipe.hincrby(_rate_key(), "samples", 1)
+        pipe.execute()
+    except Exception as e:
+        logger.debug(f"Failed to record propagation rate: {e}")
+
+
+def propagation_time_limits(depth: Optional[int], attempt: int = 0) -> Tuple[int, int]:
+    """
+    전파 작업의 (soft_time_limit, time_limit) 초
+
+    depth를 모르면 최대 소프트 제한을 사용합니다. attempt는 체크포인트 재개 횟수로,
+    예상보다 느린 경우이므로 재개할 때마다 예산을 늘립니다.
+    """
+    if not depth:
+        soft = PROPAGATION_MAX_SOFT_LIMIT
+    else:
+        budget = depth * get_seconds_per_slice() * PROPAGATION_TIME_SAFETY * (attempt + 1)
+        soft = int(min(PROPAGATION_MAX_SOFT_LIMIT, max(PROPAGATION_MIN_SOFT_LIMIT, PROPAGATION_TIME_OVERHEAD + budget)))
+    return soft, soft + PROPAGATION_HARD_LIMIT_GRACE
+
+
+
+class PropagationTimeBudgetExceeded(SoftTimeLimitExceeded):
+    """프레임 루프에서 확인한 소프트 시간 제한 초과 (체크포인트에서 재개 가능)"""
+
+
+def request_soft_limit(task) -> Optional[float]:
+    """task 실행의 소프트 시간 제한 (작업별 제한, 없으면 앱 기본값, 둘 다 없으면 None)"""
+    timelimit = task.request.timelimit or (None, None)
+    soft_limit = timelimit[1] or task.app.conf.task_soft_time_limit
+    return float(soft_limit) if soft_limit else None
+
+
+class PropagationDeadline:
+    """
+    프레임 사이 콜백 (소프트 시간 제한 확인 후 callback 호출)
+
+    propagate_3d_from_mask의 yield_callback으로 넘기며, callback은 선점/추측 양보 콜백입니다.
+    """
+
+    def __init__(self, soft_limit: Optional[float], callback: Optional[Callable[[], None]] = None):
+        self.soft_limit = soft_limit
+        self.callback = callback
+        self.started = time.monotonic()
+
+    @classmethod
+    def for_task(cls, task, callback: Optional[Callable[[], None]] = None) -> "PropagationDeadline":
+        return cls(request_soft_limit(task), callback)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def __call__(self):
+        if self.soft_limit is not None and self.elapsed() >= self.soft_limit:
+            raise PropagationTimeBudgetExceeded(
+                f"Propagation exceeded its soft time limit ({self.elapsed():.1f}s >= {self.soft_limit:.0f}s)"
+            )
+        if self.callback is not None:
+            self.callback()
@@ -10,6 +10,7 @@ from fastapi.concurrency import run_in_threadpool
 from medsam_api_server.api.v1 import jobs, system
 from medsam_api_server.core.gpu_manager import get_gpu_manager
 from medsam_api_server.core.model_manager import get_model_manager
+from medsam_api_server.core.async_redis import close_async_redis
 from medsam_api_server.schemas.api_models import HealthResponse, SystemInfo
 
 # 서버 시작 시간 기록
@@ -160,4 +161,7 @@ async def shutdown_event():
     except Exception as e:
         print(f"⚠️ Error unloading model: {e}")
     
+    # 비동기 Redis 커넥션 풀 정리
+    await close_async_redis()
+    
     print("👋 MedSAM2 GPU Service stopped")
\ No newline at end of file
@@ -5,12 +5,13 @@
 """
 
 from typing import Optional, List, Dict, Any, Literal
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, validator, root_validator
 from enum import Enum
 
 
 class TaskStatus(str, Enum):
     """작업 상태"""
+    INGESTING = "ingesting"
     PENDING = "pending"
     PROCESSING = "processing"
     COMPLETED = "completed"
@@ -86,9 +87,18 @@ class PropagationRequest(BaseModel):
     reference_slice: int = Field(..., ge=0, description="참조 슬라이스 인덱스")
     start_slice: int = Field(..., ge=0, description="시작 슬라이스 인덱스")
     end_slice: int = Field(..., ge=0, description="끝 슬라이스 인덱스")
-    mask_data: str = Field(..., description="Base64 인코딩된 2D 마스크 데이터")
+    mask_id: Optional[str] = Field(None, description="작업 저장소의 2D 마스크 ID (초기 마스크 결과 또는 POST /masks 업로드)")
+    initial_mask_task_id: Optional[str] = Field(None, description="같은 작업의 초기 마스크 task ID")
+    mask_data: Optional[str] = Field(None, description="(호환용) Base64 인코딩된 2D 마스크 PNG")
     window_level: Optional[List[float]] = Field(None, description="윈도우 레벨 [window, level]")
     
+    @root_validator(skip_on_failure=True)
+    def exactly_one_mask_source(cls, values):
+        sources = [k for k in ('mask_id', 'initial_mask_task_id', 'mask_data') if values.get(k)]
+        if len(sources) != 1:
+            raise ValueError('exactly one of mask_id, initial_mask_task_id, mask_data is required')
+        return values
+    
     @validator('window_level')
     def validate_window_level(cls, v):
         if v is not None and len(v) != 2:
@@ -117,6 +127,7 @@ class TaskProgress(BaseModel):
     total_steps: int = Field(..., gt=0)
     percentage: float = Field(..., ge=0, le=100)
     estimated_remaining_time: Optional[float] = None  # seconds
+    slices_per_second: Optional[float] = None
     current_operation: Optional[str] = None
 
 
@@ -132,9 +143,29 @@ class JobStatusResponse(BaseResponse):
     estimated_start_time: Optional[float] = None  # Unix timestamp
 
 
+class JobStatusBatchRequest(BaseModel):
+    """여러 작업 상태 일괄 조회 요청"""
+    job_ids: List[str] = Field(..., min_length=1, max_length=500, description="조회할 작업 ID 목록")
+    since: Optional[float] = Field(
+        None, description="이 시각(Unix timestamp) 이후 변경된 작업만 반환 (이전 응답의 server_time 사용)"
+    )
+
+
+class MaskBlobRef(BaseModel):
+    """작업 저장소에 저장된 2D 마스크 blob 참조"""
+    mask_id: str
+    url: str = Field(..., description="마스크 조회 URL (?format=png로 PNG 변환)")
+    encoding: str = Field(..., description="rle, bitpack, png")
+    shape: List[int]
+    area: int = Field(..., ge=0, description="양성 픽셀 수")
+    bbox: Optional[List[int]] = Field(None, description="[y0, y1, x0, x1] (끝 포함), 빈 마스크는 None")
+    size_bytes: int
+    sha256: str
+
+
 class MaskResult(BaseModel):
     """마스크 결과"""
-    mask_data: str = Field(..., description="Base64 인코딩된 마스크 데이터")
+    mask: MaskBlobRef
     slice_index: int = Field(..., ge=0)
     confidence_score: Optional[float] = Field(None, ge=0, le=1)
     processing_time: Optional[float] = None  # seconds
@@ -143,6 +174,10 @@ class MaskResult(BaseModel):
 class InitialMaskResponse(BaseResponse):
     """초기 마스크 생성 응답"""
     job_id: str
+    task_id: Optional[str] = None
+    coalesced: bool = False  # 진행 중인 같은 요청의 task를 공유
+    superseded_task_id: Optional[str] = None  # 이 요청으로 취소된 이전 task
+    cached: bool = False  # 결과 캐시로 바로 완료 (result 포함)
     result: Optional[MaskResult] = None
 
 
@@ -158,6 +193,9 @@ class PropagationResult(BaseModel):
 class PropagationResponse(BaseResponse):
     """3D 전파 응답"""
     job_id: str
+    task_id: Optional[str] = None
+    cached: bool = False  # 결과 캐시로 바로 완료 (result 포함)
+    speculative: bool = False  # 미리 시작한 추측 전파를 채택 (task_id는 그 작업)
     result: Optional[PropagationResult] = None
 
 
@@ -184,6 +222,22 @@ class SystemInfo(BaseModel):
     gpu: Optional[GPUInfo] = None
 
 
+class QueueStats(BaseModel):
+    """GPU 작업 큐 상태"""
+    depth: int
+    oldest_wait_seconds: Optional[float] = None  # 가장 오래 기다린 작업의 현재 대기 시간
+    started: int = 0
+    avg_wait_seconds: Optional[float] = None  # 시작된 작업의 평균 큐 대기 시간
+    last_wait_seconds: Optional[float] = None
+    promoted: int = 0  # 기아 방지로 대화형 큐로 승격된 수 (배치 큐)
+
+
+class SystemStatusResponse(BaseResponse):
+    """시스템 상태 응답"""
+    system_info: SystemInfo
+    queues: Dict[str, QueueStats] = {}
+
+
 class HealthResponse(BaseResponse):
     """헬스체크 응답"""
     system_info: SystemInfo
@@ -0,0 +1,173 @@
+"""
+볼륨 인제스트 작업
+
+업로드 직후 API는 헤더만 검증하고, 전체 디코딩/통계/포맷 변환은
+이 작업에서 백그라운드로 처리합니다.
+"""
+
+import os
+import time
+import hashlib
+import shutil
+import logging
+import traceback
+from datetime import datetime
+from typing import Dict, Any
+
+import numpy as np
+
+from medsam_api_server.celery_app import celery_app
+from medsam_api_server.core.model_manager import MedicalImageProcessor
+from medsam_api_server.core import dicom_ingest
+from medsam_api_server.core.job_store import update_job_metadata
+from medsam_api_server.core.job_events import publish_job_event
+from medsam_api_server.core.storage import (
+    get_storage, job_key,
+    VOLUME_NAME, VOLUME_NPY_NAME, VOLUME_HEADER_NAME, DICOM_UPLOAD_NAME
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _compute_volume_statistics(volume: np.ndarray) -> Dict[str, float]:
+    """볼륨 강도 통계 계산"""
+    p1, p99 = np.percentile(volume, [1, 99])
+    return {
+        "min": float(np.min(volume)),
+        "max": float(np.max(volume)),
+        "mean": float(np.mean(volume)),
+        "std": float(np.std(volume)),
+        "p1": float(p1),
+        "p99": float(p99)
+    }
+
+
+def _describe_local_file(key: str, path: str) -> Dict[str, Any]:
+    """다운로드 ETag용 크기/sha256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return {"key": key, "size": os.path.getsize(path), "sha256": digest.hexdigest()}
+
+
+def _ingest_nifti(job_id: str, scratch_dir: str) -> tuple:
+    """NIfTI 전체 디코딩 후 volume.npy로 변환"""
+    storage = get_storage()
+    volume, metadata = MedicalImageProcessor.load_nifti(storage.local_path(job_key(job_id, VOLUME_NAME)))
+    MedicalImageProcessor.convert_to_npy(volume, metadata, os.path.join(scratch_dir, VOLUME_NPY_NAME))
+    return volume, metadata
+
+
+def _ingest_dicom_series(job_id: str, scratch_dir: str) -> tuple:
+    """zip DICOM 시리즈를 volume.npy(병렬 디코딩)와 volume.nii.gz로 변환"""
+    storage = get_storage()
+    source_path = storage.local_path(job_key(job_id, DICOM_UPLOAD_NAME))
+
+    series = dicom_ingest.read_series_headers(source_path)
+    volume, metadata = dicom_ingest.convert_series_to_volume(
+        source_path, os.path.join(scratch_dir, VOLUME_NPY_NAME), series
+    )
+
+    # NIfTI 업로드와 동일한 산출물 유지 (다운로드 및 기존 로더 호환)
+    nifti_path = os.path.join(scratch_dir, VOLUME_NAME)
+    MedicalImageProcessor.save_nifti(np.asarray(volume), nifti_path, metadata)
+    metadata["volume_file"] = _describe_local_file(job_key(job_id, VOLUME_NAME), nifti_path)
+    storage.put_file(job_key(job_id, VOLUME_NAME), nifti_path, move=True)
+
+    MedicalImageProcessor.save_volume_header(
+        metadata, volume.shape, volume.dtype, os.path.join(scratch_dir, VOLUME_HEADER_NAME)
+    )
+    return volume, metadata
+
+
+@celery_app.task(bind=True, name="ingest_volume")
+def ingest_volume_task(self, job_id: str, source_format: str = "nifti") -> Dict[str, Any]:
+    """
+    업로드된 볼륨 인제스트 작업
+
+    Args:
+        job_id: 작업 ID
+        source_format: 업로드 형식 ("nifti" 또는 "dicom")
+
+    Returns:
+        Dict containing ingest result
+    """
+    logger.info(f"Starting volume ingest for job {job_id} ({source_format})")
+    storage = get_storage()
+    scratch_dir = os.path.join(os.getenv("TEMP_ROOT", "/app/temp"), "ingest", job_id)
+    os.makedirs(scratch_dir, exist_ok=True)
+
+    try:
+        start_time = time.time()
+
+        if source_format == "dicom":
+            # 1-3. 헤더 정렬, 병렬 디코딩, 포맷 변환
+            volume, metadata = _ingest_dicom_series(job_id, scratch_dir)
+        else:
+            # 1, 3. 전체 디코딩 및 포맷 변환 (워커가 gzip 디코딩 없이 mmap으로 열 수 있도록)
+            volume, metadata = _ingest_nifti(job_id, scratch_dir)
+
+        # 2. 통계 계산
+        statistics = _compute_volume_statistics(volume)
+        shape, dtype = list(volume.shape), str(volume.dtype)
+        del volume
+
+        # 변환본 업로드 (헤더 JSON은 마지막 - load_volume이 완성된 npy만 사용하도록)
+        storage.put_file(job_key(job_id, VOLUME_NPY_NAME), os.path.join(scratch_dir, VOLUME_NPY_NAME), move=True)
+        storage.put_file(job_key(job_id, VOLUME_HEADER_NAME), os.path.join(scratch_dir, VOLUME_HEADER_NAME), move=True)
+        if source_format == "dicom":
+            storage.delete(job_key(job_id, DICOM_UPLOAD_NAME))
+
+        processing_time = time.time() - start_time
+
+        updates = {
+            "status": "pending",
+            "volume_info": {
+                "shape": shape,
+                "spacing": list(metadata["spacing"]),
+                "origin": list(metadata["origin"]),
+                "direction": list(metadata["direction"]),
+                "dtype": dtype,
+                "statistics": statistics
+            },
+            "ingest": {
+                "status": "completed",
+                "completed_at": datetime.utcnow().isoformat(),
+                "processing_time": processing_time
+            }
+        }
+        if "volume_file" in metadata:
+            updates["volume_file"] = metadata["volume_file"]
+        update_job_metadata(job_id, updates)
+        publish_job_event(job_id, "status", self.request.id, "ingest", status="pending", shape=shape)
+
+        logger.info(f"Volume ingest completed for job {job_id} in {processing_time:.2f}s")
+        return {
+            "job_id": job_id,
+            "task_type": "ingest",
+            "status": "completed",
+            "processing_time": processing_time,
+            "shape": shape,
+            "statistics": statistics
+        }
+
+    except Exception as e:
+        logger.error(f"Volume ingest failed for job {job_id}: {e}")
+        logger.error(traceback.format_exc())
+
+        try:
+            update_job_metadata(job_id, {
+                "status": "failed",
+                "ingest": {
+                    "status": "failed",
+                    "error": str(e)
+                }
+            })
+        except Exception as meta_error:
+            logger.error(f"Failed to record ingest failure for job {job_id}: {meta_error}")
+        publish_job_event(job_id, "status", self.request.id, "ingest", status="failed", error=str(e))
+
+        raise
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
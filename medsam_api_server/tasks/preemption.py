@@ -0,0 +1,157 @@
+"""
+프레임 경계 선점
+
+전파 중인 워커는 끝날 때까지 대기 중인 2D 클릭을 처리할 수 없습니다 (워커당 동시 실행 1).
+FrameBoundaryPreemption은 전파 루프의 프레임 사이에서 대화형 큐를 확인하고,
+대기 중인 초기 마스크 작업을 브로커에서 직접 꺼내 이미 로드된 모델로 이 자리에서 실행한 뒤 전파를 이어갑니다.
+전파 상태(inference_state, 결과 sink, 진행률)는 그대로 메모리에 남아 있으므로 잃는 것이 없습니다.
+
+- 한 프레임 경계에서 멈추는 최대 시간은 PREEMPT_MAX_PAUSE_SECONDS (남은 대화형 작업은 다른 워커/다음 경계)
+- 대화형 큐 확인(LLEN)은 PREEMPT_CHECK_INTERVAL마다
+- 꺼낸 메시지가 초기 마스크 작업이 아니면(기아 방지로 승격된 배치 작업 등) 제자리로 되돌림
+- 메시지는 LMOVE로 워커별 처리 중 리스트로 옮기고 실행이 끝난 뒤 삭제 (실행 중 실패하면 큐로 되돌리고,
+  워커가 비정상 종료하면 다음 시작 시 requeue_preempted()가 되돌림 - acks_late와 같은 최소 1회 실행)
+- 이 워커가 revoke 통지를 받은 작업은 실행하지 않고 REVOKED로 기록
+- 선점 횟수/처리한 작업 수/멈춘 시간은 전파 결과의 preemption 항목에 기록
+"""
+
+import os
+import json
+import time
+import socket
+import logging
+from typing import Dict, Any, Optional
+
+from celery.worker import state as worker_state
+
+from medsam_api_server.celery_app import celery_app
+from medsam_api_server.core.gpu_manager import get_gpu_manager
+from medsam_api_server.core.scheduling import INTERACTIVE_QUEUE
+
+logger = logging.getLogger(__name__)
+
+PREEMPTION_ENABLED = os.getenv("PREEMPTION_ENABLED", "true").lower() == "true"
+# 한 프레임 경계에서 대화형 작업 처리에 쓰는 최대 시간 (초)
+PREEMPT_MAX_PAUSE_SECONDS = float(os.getenv("PREEMPT_MAX_PAUSE_SECONDS", "2.0"))
+# 대화형 큐 확인 간격 (초)
+PREEMPT_CHECK_INTERVAL = float(os.getenv("PREEMPT_CHECK_INTERVAL", "0.2"))
+
+# 선점으로 실행하는 작업 (짧고 모델만 쓰는 작업)
+PREEMPTIBLE_TASKS = ("generate_initial_mask",)
+
+
+def processing_key(worker: Optional[str] = None) -> str:
+    """선점으로 꺼낸 메시지를 실행이 끝날 때까지 보관하는 워커별 리스트"""
+    return f"{INTERACTIVE_QUEUE}:preempting:{worker or socket.gethostname()}"
+
+
+def requeue_preempted(worker: Optional[str] = None) -> int:
+    """비정상 종료로 남은 처리 중 메시지를 대화형 큐의 소비 위치로 되돌림 (워커 시작 시)"""
+    key = processing_key(worker)
+    count = 0
+    with celery_app.connection_or_acquire() as conn:
+        broker = conn.default_channel.client
+        while broker.lmove(key, INTERACTIVE_QUEUE, "RIGHT", "RIGHT") is not None:
+            count += 1
+    if count:
+        logger.warning(f"Requeued {count} interactive task(s) left by frame-boundary preemption")
+    return count
+
+
+class FrameBoundaryPreemption:
+    """전파 루프의 yield_callback으로 전달 (프레임 사이마다 호출)"""
+
+    def __init__(self, job_id: str, max_pause: float = PREEMPT_MAX_PAUSE_SECONDS,
+                 check_interval: float = PREEMPT_CHECK_INTERVAL, worker: Optional[str] = None):
+        self.job_id = job_id
+        self.processing_key = processing_key(worker)
+        self.max_pause = max_pause
+        self.check_interval = check_interval
+        self.enabled = PREEMPTION_ENABLED
+
+        self.count = 0  # 대화형 작업을 처리하려고 멈춘 프레임 경계 수
+        self.tasks_served = 0
+        self.paused_seconds = 0.0
+        self._last_check = 0.0
+
+    def __call__(self):
+        if not self.enabled:
+            return
+        now = time.time()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        served = 0
+        started = time.time()
+        try:
+            with celery_app.connection_or_acquire() as conn:
+                channel = conn.default_channel
+                broker = channel.client
+                if not broker.llen(INTERACTIVE_QUEUE):
+                    return
+                # 같은 작업의 2D 요청이 전파의 GPU 슬롯 기록을 지우지 않도록 슬롯을 잠시 내줌
+                with get_gpu_manager().yield_slot(self.job_id):
+                    while time.time() - started < self.max_pause:
+                        raw = broker.lmove(INTERACTIVE_QUEUE, self.processing_key, "RIGHT", "LEFT")
+                        if raw is None:
+                            break
+                        payload = json.loads(raw)
+                        headers = payload.get("headers", {})
+                        if headers.get("task") not in PREEMPTIBLE_TASKS:
+                            # 소비 위치(오른쪽 끝)로 되돌려 다른 워커가 가져가도록 함
+                            self._requeue(broker, raw)
+                            break
+                        if headers.get("id") in worker_state.revoked:
+                            logger.info(f"Discarding revoked task {headers['id']} at a propagation frame boundary")
+                            celery_app.backend.mark_as_revoked(headers["id"], reason="revoked")
+                            broker.lrem(self.processing_key, 1, raw)
+                            continue
+                        try:
+                            self._run(channel, payload)
+                        except Exception:
+                            self._requeue(broker, raw)
+                            raise
+                        broker.lrem(self.processing_key, 1, raw)
+                        served += 1
+        except Exception as e:
+            # 브로커 문제면 이 전파에서는 선점하지 않고 계속 진행
+            logger.warning(f"Disabling frame-boundary preemption for job {self.job_id}: {e}")
+            self.enabled = False
+        finally:
+            if served:
+                elapsed = time.time() - started
+                self.count += 1
+                self.tasks_served += served
+                self.paused_seconds += elapsed
+                logger.info(
+                    f"Propagation for job {self.job_id} yielded for {served} interactive task(s) "
+                    f"({elapsed:.2f}s)"
+                )
+
+    def _requeue(self, broker, raw):
+        """처리 중 리스트의 메시지를 대화형 큐의 소비 위치로 되돌림"""
+        pipe = broker.pipeline(transaction=True)
+        pipe.lrem(self.processing_key, 1, raw)
+        pipe.rpush(INTERACTIVE_QUEUE, raw)
+        pipe.execute()
+
+    def _run(self, channel, payload: Dict[str, Any]):
+        """
+        브로커 메시지를 이 자리에서 실행 (결과는 task_store_eager_result로 결과 백엔드에 기록)
+
+        routing_key와 헤더를 넘겨 task_prerun 핸들러가 워커가 받은 작업과 같이 큐 대기 시간을 기록합니다.
+        """
+        message = channel.Message(payload, channel=channel)
+        args, kwargs, _ = message.decode()
+        headers = message.headers
+        task = celery_app.tasks[headers["task"]]
+        logger.info(f"Running {headers['task']} {headers['id']} at a propagation frame boundary")
+        task.apply(args=args, kwargs=kwargs, task_id=headers["id"], headers=headers, routing_key=INTERACTIVE_QUEUE)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "tasks_served": self.tasks_served,
+            "paused_seconds": round(self.paused_seconds, 3)
+        }
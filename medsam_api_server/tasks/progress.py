@@ -0,0 +1,166 @@
+"""
+작업 진행률 보고
+
+전파 루프는 프레임마다 진행률을 알리지만, 매번 Celery 결과 백엔드(Redis)에 기록하면
+600장 전파에 1200번 넘게 쓰게 됩니다. ProgressReporter는 시간 간격과 최소 진행률 변화량으로
+갱신을 합치고, 처리 속도(slices/s)와 남은 시간(ETA)을 함께 기록합니다.
+마지막 상태(finish)와 강제 갱신(force)은 항상 기록됩니다.
+
+분할 전파의 방향별 하위 작업은 SplitProgress로 두 방향의 프레임 수를 합쳐
+사용자에게 보이는 부모 task ID로 진행률을 기록합니다.
+"""
+
+import os
+import time
+import logging
+from typing import Dict, Any, Optional
+
+from medsam_api_server.core.job_events import publish_job_event
+from medsam_api_server.core.job_store import KEY_PREFIX
+
+logger = logging.getLogger(__name__)
+
+# 최소 기록 간격(초)과 최소 진행률 변화량(%)
+PROGRESS_MIN_INTERVAL = float(os.getenv("PROGRESS_MIN_INTERVAL", "1.0"))
+PROGRESS_MIN_DELTA = float(os.getenv("PROGRESS_MIN_DELTA", "1.0"))
+# 진행률이 멈춰 있어도 이 간격(초)마다 ETA 갱신
+PROGRESS_MAX_INTERVAL = float(os.getenv("PROGRESS_MAX_INTERVAL", "10.0"))
+# 처리 속도 지수 이동 평균 가중치
+RATE_SMOOTHING = 0.3
+# 분할 전파 진행률 합산 키 보관 시간 (초)
+SPLIT_PROGRESS_TTL = 3600
+
+
+class ProgressReporter:
+    """Celery 진행률 기록과 진행률 이벤트 발행을 합쳐서 수행"""
+
+    def __init__(self, task, job_id: str, task_type: str,
+                 min_interval: float = PROGRESS_MIN_INTERVAL,
+                 min_delta: float = PROGRESS_MIN_DELTA,
+                 task_id: Optional[str] = None):
+        self.task = task
+        self.job_id = job_id
+        self.task_type = task_type
+        # 진행률을 기록할 task ID (분할 전파 하위 작업은 부모 task ID)
+        self.task_id = task_id or task.request.id
+        self.min_interval = min_interval
+        self.min_delta = min_delta
+
+        self.updates = 0
+        self.writes = 0
+        self._last_write_time = 0.0
+        self._last_progress: Optional[float] = None
+        self._pending: Optional[Dict[str, Any]] = None
+
+        # 처리 속도 (슬라이스 단위)
+        self._rate: Optional[float] = None
+        self._last_frames: Optional[int] = None
+        self._last_frames_time = 0.0
+
+    def update(self, progress: float, operation: str, frames_done: Optional[int] = None,
+               frames_total: Optional[int] = None, force: bool = False):
+        """진행률 보고 (조건을 만족할 때만 기록, 나머지는 다음 기록까지 보류)"""
+        now = time.time()
+        self.updates += 1
+        if frames_done is not None:
+            self._update_rate(frames_done, now)
+
+        meta = {
+            "job_id": self.job_id,
+            "task_type": self.task_type,
+            "progress": progress,
+            "current_operation": operation,
+            "slices_per_second": round(self._rate, 2) if self._rate else None,
+            "eta_seconds": self._eta(frames_done, frames_total)
+        }
+
+        elapsed = now - self._last_write_time
+        delta = abs(progress - self._last_progress) if self._last_progress is not None else float("inf")
+        if force or elapsed >= PROGRESS_MAX_INTERVAL or (elapsed >= self.min_interval and delta >= self.min_delta):
+            self._write(meta, now)
+        else:
+            self._pending = meta
+
+    def flush(self):
+        """보류 중인 마지막 상태 기록"""
+        if self._pending is not None:
+            self._write(self._pending, time.time())
+
+    def finish(self, progress: float, operation: str):
+        """최종 상태는 항상 기록"""
+        self.update(progress, operation, force=True)
+        logger.info(
+            f"Progress for job {self.job_id} ({self.task_type}): "
+            f"{self.updates} updates, {self.writes} writes"
+        )
+
+    def _update_rate(self, frames_done: int, now: float):
+        # 방향 전환 등으로 프레임 수가 되돌아가면 기준점만 다시 잡음
+        if self._last_frames is not None and frames_done > self._last_frames and now > self._last_frames_time:
+            instant = (frames_done - self._last_frames) / (now - self._last_frames_time)
+            self._rate = instant if self._rate is None else (
+                RATE_SMOOTHING * instant + (1 - RATE_SMOOTHING) * self._rate
+            )
+        if self._last_frames is None or frames_done != self._last_frames:
+            self._last_frames = frames_done
+            self._last_frames_time = now
+
+    def _eta(self, frames_done: Optional[int], frames_total: Optional[int]) -> Optional[float]:
+        if not self._rate or frames_done is None or frames_total is None:
+            return None
+        return round(max(0, frames_total - frames_done) / self._rate, 1)
+
+    def _write(self, meta: Dict[str, Any], now: float):
+        self.task.update_state(task_id=self.task_id, state="PROCESSING", meta=meta)
+        publish_job_event(
+            self.job_id, "progress", self.task_id, self.task_type,
+            progress=meta["progress"], current_operation=meta["current_operation"],
+            slices_per_second=meta["slices_per_second"], eta_seconds=meta["eta_seconds"]
+        )
+        self.writes += 1
+        self._last_write_time = now
+        self._last_progress = meta["progress"]
+        self._pending = None
+
+
+class SplitProgress:
+    """
+    분할 전파 하위 작업의 progress_callback
+
+    방향별 (완료 프레임, 전체 프레임)을 Redis hash에 기록하고 합계로 부모 진행률(20~90%)을 보고합니다.
+    Redis 왕복은 min_interval마다 한 번이며, 실제 기록 빈도는 ProgressReporter가 다시 조절합니다.
+    """
+
+    def __init__(self, reporter: ProgressReporter, direction: str, min_interval: float = PROGRESS_MIN_INTERVAL):
+        from medsam_api_server.core.job_store import get_job_store
+
+        self.reporter = reporter
+        self.direction = direction
+        self.min_interval = min_interval
+        self.key = f"{KEY_PREFIX}:job:{reporter.job_id}:split:{reporter.task_id}"
+        self.client = get_job_store().client
+        self._last_sync = 0.0
+
+    def __call__(self, progress: float, operation: str, frames_done: Optional[int] = None,
+                 frames_total: Optional[int] = None):
+        now = time.time()
+        if frames_done is None or frames_total is None or now - self._last_sync < self.min_interval:
+            return
+        self._last_sync = now
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.hset(self.key, mapping={
+                f"{self.direction}:done": frames_done,
+                f"{self.direction}:total": frames_total
+            })
+            pipe.expire(self.key, SPLIT_PROGRESS_TTL)
+            pipe.hgetall(self.key)
+            counts = pipe.execute()[-1]
+        except Exception as e:
+            logger.debug(f"Failed to sync split progress {self.key}: {e}")
+            counts = {f"{self.direction}:done": frames_done, f"{self.direction}:total": frames_total}
+
+        done = sum(int(v) for k, v in counts.items() if k.endswith(":done"))
+        total = sum(int(v) for k, v in counts.items() if k.endswith(":total"))
+        if total > 0:
+            self.reporter.update(int(20 + done / total * 70), operation, done, total)
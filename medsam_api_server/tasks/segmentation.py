@@ -8,52 +8,196 @@ import os
 import time
 import logging
 import traceback
+from datetime import datetime
 from typing import Dict, Any, Optional
-from celery import current_task
-from celery.exceptions import Retry
+from celery.exceptions import Retry, Ignore, SoftTimeLimitExceeded
 
 from medsam_api_server.celery_app import celery_app
 from medsam_api_server.core.inference_engine import get_inference_engine
 from medsam_api_server.core.gpu_manager import get_gpu_manager
+from medsam_api_server.core.job_store import get_job_store, load_job_metadata
+from medsam_api_server.core.job_events import publish_job_event
+from medsam_api_server.core.slice_stream import SliceStreamPublisher
+from medsam_api_server.tasks.progress import ProgressReporter, SplitProgress
+from medsam_api_server.tasks.preemption import FrameBoundaryPreemption
+from medsam_api_server.core.cancellation import CancellationCheck, TaskCancelled, TaskYielded, CANCELLED_STATE
+from medsam_api_server.core.result_cache import get_result_cache
+from medsam_api_server.core.scheduling import BATCH_QUEUE, enqueue_headers
+from medsam_api_server.core import speculation
+from medsam_api_server.core.result_sink import DIRECTIONS, PropagationInProgress
+from medsam_api_server.core.time_limits import (
+    PROPAGATION_MAX_RESUMES, PropagationDeadline, propagation_time_limits, record_propagation_rate, volume_depth
+)
+from medsam_api_server.core.storage import (
+    get_storage, get_job_volume_path, mask_key, partial_result_key, record_job_result
+)
 
 logger = logging.getLogger(__name__)
 
 
+def _set_job_status(job_id: str, task_id: str, task_type: str, status: str, **event_data):
+    """작업 저장소의 상태 색인 갱신 (최신 task일 때만, 실패해도 작업은 계속) 후 상태 이벤트 발행"""
+    try:
+        get_job_store().set_task_status(job_id, task_id, status)
+    except Exception as e:
+        logger.warning(f"Failed to update job status for {job_id}: {e}")
+    publish_job_event(job_id, "status", task_id, task_type, status=status, **event_data)
+
+
+def _store_in_cache(cache_key: Optional[str], task_type: str, result: Dict[str, Any], files: Dict[str, str]):
+    """완료된 결과를 결과 캐시에 기록 (실패해도 작업은 완료)"""
+    if not cache_key:
+        return
+    try:
+        get_result_cache().put(cache_key, task_type, result, files)
+    except Exception as e:
+        logger.warning(f"Failed to cache {task_type} result {cache_key}: {e}")
+
+
+def _finish_cancelled(task, job_id: str, task_type: str, task_id: Optional[str] = None):
+    """
+    취소 상태 기록 후 Ignore (Celery가 결과를 SUCCESS/FAILURE로 덮어쓰지 않도록)
+
+    task_id: 상태를 기록할 task ID (분할 전파 하위 작업은 부모 task ID, 기본값은 현재 task)
+    """
+    task_id = task_id or task.request.id
+    logger.info(f"{task_type} task {task_id} for job {job_id} cancelled")
+    task.update_state(
+        task_id=task_id,
+        state=CANCELLED_STATE,
+        meta={
+            "job_id": job_id,
+            "task_type": task_type,
+            "cancelled_at": datetime.utcnow().isoformat()
+        }
+    )
+    _set_job_status(job_id, task_id, task_type, "cancelled")
+    raise Ignore()
+
+
+def _resume_after_time_limit(task, job_id: str, slice_stream: SliceStreamPublisher, **options):
+    """
+    소프트 시간 제한을 넘긴 전파를 예산을 늘려 같은 task ID로 재시도 (체크포인트는 엔진이 남겨 둠)
+
+    options: task.retry에 그대로 전달 (채택된 추측 전파는 queue로 배치 큐 지정)
+    """
+    slice_stream.flush()
+    soft_limit, hard_limit = propagation_time_limits(
+        volume_depth(load_job_metadata(job_id)), attempt=task.request.retries + 1
+    )
+    logger.warning(
+        f"3D propagation task {task.request.id} for job {job_id} exceeded its soft time limit, "
+        f"resuming from checkpoint (attempt {task.request.retries + 1}, soft limit {soft_limit}s)"
+    )
+    raise task.retry(
+        countdown=0,
+        max_retries=PROPAGATION_MAX_RESUMES,
+        soft_time_limit=soft_limit,
+        time_limit=hard_limit,
+        headers=enqueue_headers(),
+        **options
+    )
+
+
+def _sink_lock_options(task) -> Dict[str, Any]:
+    """전파 결과 파일 잠금 옵션 (task ID로 잠그고, 하드 시간 제한이 있으면 그 시간 후 만료)"""
+    hard_limit = (task.request.timelimit or (None, None))[0]
+    return {"lock_owner": task.request.id, "lock_ttl": int(hard_limit) if hard_limit else None}
+
+
+def _complete_propagation(task, job_id: str, result: Dict[str, Any], processing_time: float,
+                          cache_key: Optional[str], **extra) -> Dict[str, Any]:
+    """전파 결과를 작업 메타데이터/결과 캐시에 기록하고 최종 결과 반환 (단일/분할 전파 공용)"""
+    # 결과 파일 URL 생성 (파일은 task별 키에 있음)
+    result_key = result["result_key"]
+    sparse_key = result["sparse_key"]
+    result_url = f"/api/v1/jobs/{job_id}/result"
+    
+    # 완료된 결과 기록 (API가 Redis 조회 없이 ETag와 함께 바로 서빙, 이전 결과 파일은 삭제)
+    write_stats = result["result_write"]
+    record_job_result(job_id, {
+        "task_id": task.request.id,
+        "status": "completed",
+        "completed_at": datetime.utcnow().isoformat(),
+        "cached": False,
+        "files": {
+            "nifti": {
+                "key": result_key,
+                "size": write_stats["bytes_written"],
+                "sha256": write_stats["sha256"]
+            },
+            "sparse": {
+                "key": sparse_key,
+                "size": write_stats["sparse_bytes"],
+                "sha256": write_stats["sparse_sha256"]
+            }
+        }
+    })
+    
+    # 최종 결과
+    final_result = {
+        "job_id": job_id,
+        "task_type": "propagation",
+        "status": "completed",
+        "processing_time": processing_time,
+        "cached": False,
+        "result": {
+            "result_file_url": result_url,
+            "result_key": result_key,  # 내부용 (저장소 키)
+            "total_slices": result["total_slices"],
+            "processed_slices": result["processed_slices"],
+            "volume_statistics": result["volume_statistics"],
+            "slice_range": result["slice_range"],
+            "reference_slice": result["reference_slice"],
+            "result_write": result["result_write"]  # write_time, bytes_written, compression
+        },
+        **extra
+    }
+    
+    _store_in_cache(cache_key, "propagation", final_result["result"], {
+        "nifti": result_key,
+        "sparse": sparse_key
+    })
+    _set_job_status(job_id, task.request.id, "propagation", "completed", result_url=result_url)
+    return final_result
+
+
 @celery_app.task(bind=True, name="generate_initial_mask")
 def generate_initial_mask_task(
     self,
     job_id: str,
-    volume_path: str,
     slice_index: int,
     bounding_box: list,
-    window_level: Optional[list] = None
+    window_level: Optional[list] = None,
+    cache_key: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     2D 초기 마스크 생성 작업
     
     Args:
         job_id: 작업 ID
-        volume_path: NIfTI 파일 경로
         slice_index: 대상 슬라이스 인덱스
         bounding_box: [x1, y1, x2, y2] 좌표
         window_level: [window, level] 윈도우 레벨
+        cache_key: 결과 캐시 키 (완료 후 결과 기록, 없으면 기록하지 않음)
         
     Returns:
         Dict containing task result
     """
     logger.info(f"Starting initial mask generation task for job {job_id}")
     
+    # 진행률 기록 (짧은 간격의 단계 갱신은 합쳐서 기록)
+    reporter = ProgressReporter(self, job_id, "initial_mask")
+    # 대체된 요청이 모델에 닿기 전에 멈추도록 매번 확인 (호출은 시작/추론 직전 두 번뿐)
+    cancel_check = CancellationCheck(self.request.id, interval=0)
+    
     try:
+        # 실행 전에 취소된 작업 (revoke 이전에 워커가 받은 경우 포함)
+        cancel_check()
+        
         # 작업 상태 업데이트
-        current_task.update_state(
-            state="PROCESSING",
-            meta={
-                "job_id": job_id,
-                "task_type": "initial_mask",
-                "progress": 0,
-                "current_operation": "Initializing..."
-            }
-        )
+        reporter.update(0, "Initializing...", force=True)
+        _set_job_status(job_id, self.request.id, "initial_mask", "processing")
         
         # GPU 자원 확인
         gpu_manager = get_gpu_manager()
@@ -61,28 +205,15 @@ def generate_initial_mask_task(
             raise RuntimeError("Resources not available")
         
         # 진행률 업데이트
-        current_task.update_state(
-            state="PROCESSING",
-            meta={
-                "job_id": job_id,
-                "task_type": "initial_mask",
-                "progress": 20,
-                "current_operation": "Loading model..."
-            }
-        )
+        reporter.update(20, "Loading model...")
         
         # 추론 엔진 실행
         inference_engine = get_inference_engine()
         
-        current_task.update_state(
-            state="PROCESSING",
-            meta={
-                "job_id": job_id,
-                "task_type": "initial_mask",
-                "progress": 50,
-                "current_operation": "Running inference..."
-            }
-        )
+        reporter.update(50, "Running inference...")
+        
+        # 저장소에서 볼륨 확보 (원격 저장소는 워커 로컬 캐시를 통해 read-through)
+        volume_path = get_job_volume_path(job_id)
         
         start_time = time.time()
         result = inference_engine.generate_initial_mask(
@@ -90,7 +221,9 @@ def generate_initial_mask_task(
             volume_path=volume_path,
             slice_index=slice_index,
             bounding_box=bounding_box,
-            window_level=window_level
+            window_level=window_level,
+            mask_id=self.request.id,
+            cancel_check=cancel_check
         )
         processing_time = time.time() - start_time
         
@@ -100,12 +233,24 @@ def generate_initial_mask_task(
             "task_type": "initial_mask",
             "status": "completed",
             "processing_time": processing_time,
+            "cached": False,
             "result": result
         }
         
+        _store_in_cache(cache_key, "initial_mask", result, {"mask": mask_key(job_id, self.request.id)})
+        _set_job_status(job_id, self.request.id, "initial_mask", "completed", result=result)
         logger.info(f"Initial mask generation completed for job {job_id} in {processing_time:.2f}s")
+        
+        # GPU가 놀고 있으면 이 마스크로 기본 범위 전파를 미리 시작 (opt-in, 실패해도 마스크는 완료)
+        if speculation.SPECULATIVE_PROPAGATION_ENABLED:
+            try:
+                speculation.start_speculation(job_id, slice_index, self.request.id, window_level)
+            except Exception as e:
+                logger.warning(f"Failed to start speculative propagation for job {job_id}: {e}")
         return final_result
         
+    except TaskCancelled:
+        _finish_cancelled(self, job_id, "initial_mask")
     except Exception as e:
         error_msg = f"Initial mask generation failed for job {job_id}: {str(e)}"
         logger.error(error_msg)
@@ -123,6 +268,8 @@ def generate_initial_mask_task(
             }
         )
         
+        _set_job_status(job_id, self.request.id, "initial_mask", "failed", error=str(e))
+        
         # 예외를 다시 발생시켜 Celery가 처리하도록 함
         raise
 
@@ -131,126 +278,329 @@ def generate_initial_mask_task(
 def propagate_3d_mask_task(
     self,
     job_id: str,
-    volume_path: str,
     reference_slice: int,
     start_slice: int,
     end_slice: int,
-    reference_mask_b64: str,
-    window_level: Optional[list] = None
+    reference_mask_id: str,
+    window_level: Optional[list] = None,
+    cache_key: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     3D 마스크 전파 작업
     
     Args:
         job_id: 작업 ID
-        volume_path: NIfTI 파일 경로
         reference_slice: 참조 슬라이스 인덱스
         start_slice: 시작 슬라이스 인덱스
         end_slice: 끝 슬라이스 인덱스
-        reference_mask_b64: Base64 인코딩된 참조 마스크
+        reference_mask_id: 참조 2D 마스크 ID (작업 저장소의 blob)
+        cache_key: 결과 캐시 키 (완료 후 결과 기록, 없으면 기록하지 않음)
+    
+    시간 제한은 제출 시 볼륨 깊이로 계산해 전달합니다 (core/time_limits.py).
+    소프트 제한을 넘기면 같은 task ID로 재시도하며, 재시도는 결과 싱크의 체크포인트에서 이어갑니다.
         
     Returns:
         Dict containing task result
     """
     logger.info(f"Starting 3D propagation task for job {job_id}")
     
+    # 전파된 슬라이스 미리보기 스트림 (늦게 연결한 클라이언트용 재생 버퍼 포함)
+    slice_stream = SliceStreamPublisher(job_id, self.request.id, end_slice - start_slice + 1)
+    # 프레임별 진행률은 시간 간격/변화량 기준으로 합쳐서 기록 (처리 속도와 ETA 포함)
+    reporter = ProgressReporter(self, job_id, "propagation")
+    cancel_check = CancellationCheck(self.request.id)
+    # 프레임 사이에서 대기 중인 2D 요청을 이 워커가 바로 처리
+    preemption = FrameBoundaryPreemption(job_id)
+    # threads 풀은 시간 제한을 적용하지 않으므로 프레임 사이에서 소프트 제한 확인
+    deadline = PropagationDeadline.for_task(self, preemption)
+    
     try:
+        # 실행 전에 취소된 작업 (revoke 이전에 워커가 받은 경우 포함)
+        cancel_check()
+        
         # 작업 상태 업데이트
-        current_task.update_state(
-            state="PROCESSING",
+        reporter.update(0, "Initializing 3D propagation...", force=True)
+        _set_job_status(job_id, self.request.id, "propagation", "processing")
+        
+        # GPU 자원 확인 (슬롯은 아래 acquire_gpu에서 점유, 취소/실패 시에도 해제)
+        gpu_manager = get_gpu_manager()
+        if not gpu_manager.can_accept_job("propagation"):
+            raise RuntimeError("Resources not available")
+        
+        # 진행률 콜백 함수
+        def progress_callback(progress: float, operation: str, frames_done: Optional[int] = None,
+                              frames_total: Optional[int] = None):
+            # 최대 95%까지 (마지막 5%는 후처리용)
+            reporter.update(min(progress, 95), operation, frames_done, frames_total)
+        
+        # 진행률 업데이트
+        reporter.update(10, "Loading model and data...")
+        
+        # 추론 엔진 실행
+        inference_engine = get_inference_engine()
+        
+        # 저장소에서 볼륨 확보 (원격 저장소는 워커 로컬 캐시를 통해 read-through)
+        volume_path = get_job_volume_path(job_id)
+        
+        start_time = time.time()
+        with gpu_manager.acquire_gpu(job_id, "propagation", estimated_duration=300):
+            result = inference_engine.propagate_3d_from_mask(
+                job_id=job_id,
+                volume_path=volume_path,
+                reference_slice=reference_slice,
+                start_slice=start_slice,
+                end_slice=end_slice,
+                reference_mask_id=reference_mask_id,
+                window_level=window_level,
+                progress_callback=progress_callback,
+                slice_callback=slice_stream.publish,
+                cancel_check=cancel_check,
+                yield_callback=deadline,
+                **_sink_lock_options(self)
+            )
+        slice_stream.close("completed")
+        processing_time = time.time() - start_time
+        checkpoint = result["checkpoint"]
+        record_propagation_rate(checkpoint["frames_propagated"], checkpoint["propagation_time"])
+        
+        # 최종 후처리
+        reporter.finish(100, "Finalizing results...")
+        
+        final_result = _complete_propagation(
+            self, job_id, result, processing_time, cache_key,
+            preemption=preemption.stats(),  # count, tasks_served, paused_seconds
+            checkpoint={
+                "resumed": checkpoint["resumed"],
+                "resumes": self.request.retries,
+                "frames_propagated": checkpoint["frames_propagated"]
+            }
+        )
+        logger.info(f"3D propagation completed for job {job_id} in {processing_time:.2f}s")
+        return final_result
+        
+    except TaskCancelled:
+        slice_stream.close("cancelled")
+        _finish_cancelled(self, job_id, "propagation")
+    except Exception as e:
+        if isinstance(e, SoftTimeLimitExceeded) and self.request.retries < PROPAGATION_MAX_RESUMES:
+            _resume_after_time_limit(self, job_id, slice_stream)
+        error_msg = f"3D propagation failed for job {job_id}: {str(e)}"
+        logger.error(error_msg)
+        logger.error(traceback.format_exc())
+        
+        # Celery 표준 방식으로 실패 처리
+        self.update_state(
+            state="FAILURE",
             meta={
                 "job_id": job_id,
                 "task_type": "propagation",
-                "progress": 0,
-                "current_operation": "Initializing 3D propagation..."
+                "error": str(e),
+                "exc_type": type(e).__name__,
+                "traceback": traceback.format_exc()
             }
         )
         
-        # GPU 자원 확인
+        slice_stream.close("failed", str(e))
+        _set_job_status(job_id, self.request.id, "propagation", "failed", error=str(e))
+        
+        # 예외를 다시 발생시켜 Celery가 처리하도록 함
+        raise
+
+
+@celery_app.task(bind=True, name="propagate_3d_direction")
+def propagate_3d_direction_task(
+    self,
+    job_id: str,
+    parent_task_id: str,
+    direction: str,
+    reference_slice: int,
+    start_slice: int,
+    end_slice: int,
+    reference_mask_id: str,
+    window_level: Optional[list] = None
+) -> Dict[str, Any]:
+    """
+    분할 전파의 방향별 하위 작업 (chord 헤더)
+    
+    한 방향만 전파해 partials/에 희소 컨테이너로 저장하고, 진행률/슬라이스 스트림/취소는
+    사용자에게 보이는 부모 task ID(병합 작업 ID)를 기준으로 처리합니다.
+    
+    Args:
+        parent_task_id: 부모 task ID (API가 반환한 ID, 병합 작업의 ID)
+        direction: "forward" 또는 "backward"
+        
+    Returns:
+        Dict with direction, partial_key, processing_time, preemption, checkpoint
+    """
+    logger.info(f"Starting {direction} propagation subtask for job {job_id} (parent {parent_task_id})")
+    
+    slice_stream = SliceStreamPublisher(job_id, parent_task_id, end_slice - start_slice + 1)
+    reporter = ProgressReporter(self, job_id, "propagation", task_id=parent_task_id)
+    # 두 방향의 프레임 수를 합쳐 부모 진행률로 보고
+    progress_callback = SplitProgress(reporter, direction)
+    # 부모 task 취소 요청으로 두 방향 모두 중단
+    cancel_check = CancellationCheck(parent_task_id)
+    preemption = FrameBoundaryPreemption(job_id)
+    deadline = PropagationDeadline.for_task(self, preemption)
+    
+    try:
+        cancel_check()
+        
+        _set_job_status(job_id, parent_task_id, "propagation", "processing")
+        
         gpu_manager = get_gpu_manager()
         if not gpu_manager.can_accept_job("propagation"):
             raise RuntimeError("Resources not available")
         
-        # 진행률 콜백 함수
-        def progress_callback(progress: float, operation: str):
-            current_task.update_state(
-                state="PROCESSING",
-                meta={
-                    "job_id": job_id,
-                    "task_type": "propagation",
-                    "progress": min(progress, 95),  # 최대 95%까지 (마지막 5%는 후처리용)
-                    "current_operation": operation
-                }
+        inference_engine = get_inference_engine()
+        volume_path = get_job_volume_path(job_id)
+        
+        start_time = time.time()
+        with gpu_manager.acquire_gpu(job_id, "propagation", estimated_duration=300):
+            result = inference_engine.propagate_3d_from_mask(
+                job_id=job_id,
+                volume_path=volume_path,
+                reference_slice=reference_slice,
+                start_slice=start_slice,
+                end_slice=end_slice,
+                reference_mask_id=reference_mask_id,
+                window_level=window_level,
+                progress_callback=progress_callback,
+                slice_callback=slice_stream.publish,
+                cancel_check=cancel_check,
+                yield_callback=deadline,
+                directions=(direction,),
+                partial_key=partial_result_key(job_id, parent_task_id, direction),
+                **_sink_lock_options(self)
             )
+        # 종료 항목은 병합 작업이 기록
+        slice_stream.flush()
+        processing_time = time.time() - start_time
+        checkpoint = result["checkpoint"]
+        record_propagation_rate(checkpoint["frames_propagated"], checkpoint["propagation_time"])
         
-        # 진행률 업데이트
-        current_task.update_state(
-            state="PROCESSING",
+        logger.info(f"{direction} propagation subtask for job {job_id} completed in {processing_time:.2f}s")
+        return {
+            "direction": direction,
+            "partial_key": result["partial_key"],
+            "processing_time": processing_time,
+            "preemption": preemption.stats(),
+            "checkpoint": {
+                "resumed": checkpoint["resumed"],
+                "resumes": self.request.retries,
+                "frames_propagated": checkpoint["frames_propagated"]
+            }
+        }
+        
+    except TaskCancelled:
+        slice_stream.close("cancelled")
+        _finish_cancelled(self, job_id, "propagation", task_id=parent_task_id)
+    except Exception as e:
+        if isinstance(e, SoftTimeLimitExceeded) and self.request.retries < PROPAGATION_MAX_RESUMES:
+            _resume_after_time_limit(self, job_id, slice_stream)
+        logger.error(f"{direction} propagation subtask failed for job {job_id}: {str(e)}")
+        logger.error(traceback.format_exc())
+        
+        # 하위 작업 실패는 chord가 부모 task(병합 작업)를 ChordError로 실패 처리
+        self.update_state(
+            state="FAILURE",
             meta={
                 "job_id": job_id,
                 "task_type": "propagation",
-                "progress": 10,
-                "current_operation": "Loading model and data..."
+                "direction": direction,
+                "error": str(e),
+                "exc_type": type(e).__name__,
+                "traceback": traceback.format_exc()
             }
         )
         
-        # 추론 엔진 실행
-        inference_engine = get_inference_engine()
+        slice_stream.close("failed", str(e))
+        _set_job_status(job_id, parent_task_id, "propagation", "failed", error=str(e))
+        raise
+
+
+@celery_app.task(bind=True, name="merge_propagation")
+def merge_propagation_task(
+    self,
+    partials: list,
+    job_id: str,
+    reference_slice: int,
+    start_slice: int,
+    end_slice: int,
+    cache_key: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    분할 전파 병합 작업 (chord 본문, GPU 불필요)
+    
+    방향별 결과를 합쳐 최대 연결 성분 후처리 후 저장하며, 완료 결과 형식은 propagate_3d_mask와 같습니다.
+    
+    완료된 추측 전파 결과를 기록할 때도 사용합니다 (partials에 양방향 결과 하나).
+    
+    Args:
+        partials: 방향별 하위 작업 결과 (chord가 전달)
+        
+    Returns:
+        Dict containing task result
+    """
+    logger.info(f"Merging split propagation for job {job_id}")
+    
+    slice_stream = SliceStreamPublisher(job_id, self.request.id, end_slice - start_slice + 1)
+    reporter = ProgressReporter(self, job_id, "propagation")
+    cancel_check = CancellationCheck(self.request.id, interval=0)
+    
+    try:
+        cancel_check()
+        reporter.update(90, "Merging propagation directions...", force=True)
         
         start_time = time.time()
-        result = inference_engine.propagate_3d_from_mask(
+        partial_keys = [partial["partial_key"] for partial in partials]
+        result = get_inference_engine().merge_propagation_partials(
             job_id=job_id,
-            volume_path=volume_path,
+            partial_keys=partial_keys,
             reference_slice=reference_slice,
             start_slice=start_slice,
             end_slice=end_slice,
-            reference_mask_b64=reference_mask_b64,
-            window_level=window_level,
-            progress_callback=progress_callback
+            result_id=self.request.id
         )
-        processing_time = time.time() - start_time
-        
-        # 최종 후처리
-        current_task.update_state(
-            state="PROCESSING",
-            meta={
-                "job_id": job_id,
-                "task_type": "propagation",
-                "progress": 100,
-                "current_operation": "Finalizing results..."
+        slice_stream.close("completed")
+        merge_time = time.time() - start_time
+        
+        reporter.finish(100, "Finalizing results...")
+        
+        # 방향은 병렬로 실행되므로 처리 시간은 가장 느린 방향 + 병합
+        processing_time = max(partial["processing_time"] for partial in partials) + merge_time
+        final_result = _complete_propagation(
+            self, job_id, result, processing_time, cache_key,
+            split={
+                "directions": {
+                    partial["direction"]: {
+                        "processing_time": partial["processing_time"],
+                        "preemption": partial["preemption"],
+                        "checkpoint": partial["checkpoint"]
+                    }
+                    for partial in partials
+                },
+                "merge_time": merge_time
             }
         )
         
-        # 결과 파일 URL 생성
-        result_file_path = result["result_file_path"]
-        result_url = f"/api/v1/jobs/{job_id}/result"
-        
-        # 최종 결과
-        final_result = {
-            "job_id": job_id,
-            "task_type": "propagation",
-            "status": "completed",
-            "processing_time": processing_time,
-            "result": {
-                "result_file_url": result_url,
-                "result_file_path": result_file_path,  # 내부용
-                "total_slices": result["total_slices"],
-                "processed_slices": result["processed_slices"],
-                "volume_statistics": result["volume_statistics"],
-                "slice_range": result["slice_range"],
-                "reference_slice": result["reference_slice"]
-            }
-        }
+        storage = get_storage()
+        for key in partial_keys:
+            try:
+                storage.delete(key)
+            except Exception as e:
+                logger.warning(f"Failed to delete partial propagation {key}: {e}")
         
-        logger.info(f"3D propagation completed for job {job_id} in {processing_time:.2f}s")
+        logger.info(f"Split 3D propagation completed for job {job_id} in {processing_time:.2f}s")
         return final_result
         
+    except TaskCancelled:
+        slice_stream.close("cancelled")
+        _finish_cancelled(self, job_id, "propagation")
     except Exception as e:
-        error_msg = f"3D propagation failed for job {job_id}: {str(e)}"
-        logger.error(error_msg)
+        logger.error(f"Merging split propagation failed for job {job_id}: {str(e)}")
         logger.error(traceback.format_exc())
         
-        # Celery 표준 방식으로 실패 처리
         self.update_state(
             state="FAILURE",
             meta={
@@ -262,7 +612,222 @@ def propagate_3d_mask_task(
             }
         )
         
-        # 예외를 다시 발생시켜 Celery가 처리하도록 함
+        slice_stream.close("failed", str(e))
+        _set_job_status(job_id, self.request.id, "propagation", "failed", error=str(e))
+        raise
+
+
+def dispatch_split_propagation(task_id: str, job_id: str, reference_slice: int, start_slice: int,
+                               end_slice: int, reference_mask_id: str, window_level: Optional[list] = None,
+                               cache_key: Optional[str] = None, soft_time_limit: Optional[int] = None,
+                               time_limit: Optional[int] = None):
+    """
+    방향별 하위 작업을 chord로 시작 (병합 작업이 task_id를 가지므로 상태/결과 조회는 단일 전파와 같음)
+    
+    방향이 아닌 구간 단위 분할은 하지 않습니다. 참조 슬라이스에서 떨어진 구간은
+    앞 구간의 전파 결과가 있어야 시작할 수 있어 병렬로 실행할 수 없습니다.
+    """
+    from celery import chord
+    
+    limits = {"soft_time_limit": soft_time_limit, "time_limit": time_limit} if soft_time_limit else {}
+    header = [
+        propagate_3d_direction_task.signature(
+            kwargs={
+                "job_id": job_id,
+                "parent_task_id": task_id,
+                "direction": direction,
+                "reference_slice": reference_slice,
+                "start_slice": start_slice,
+                "end_slice": end_slice,
+                "reference_mask_id": reference_mask_id,
+                "window_level": window_level
+            },
+            headers=enqueue_headers(),
+            **limits
+        )
+        for direction in DIRECTIONS
+    ]
+    body = merge_propagation_task.signature(
+        kwargs={
+            "job_id": job_id,
+            "reference_slice": reference_slice,
+            "start_slice": start_slice,
+            "end_slice": end_slice,
+            "cache_key": cache_key
+        },
+        **limits
+    )
+    return chord(header, body).apply_async(task_id=task_id)
+
+
+@celery_app.task(bind=True, name="speculative_propagation")
+def speculative_propagation_task(
+    self,
+    job_id: str,
+    reference_slice: int,
+    start_slice: int,
+    end_slice: int,
+    reference_mask_id: str,
+    window_level: Optional[list] = None
+) -> Dict[str, Any]:
+    """
+    추측 전파 작업 (core/speculation.py, gpu_speculative 큐)
+    
+    초기 마스크 직후 기본 범위로 미리 전파해 partials/에 저장합니다. 실제 GPU 작업이 대기 중이면
+    체크포인트를 남기고 양보하며, 같은 요청이 오면 일반 전파가 그 체크포인트에서 이어갑니다.
+    실행 중에 채택되면 후처리까지 마치고 propagate_3d_mask와 같은 형식으로 완료합니다.
+    
+    Returns:
+        채택된 경우 전파 최종 결과, 아니면 추측 상태 (done, yielded, superseded)
+    """
+    task_id = self.request.id
+    if not speculation.mark_running(job_id, task_id):
+        logger.info(f"Speculative propagation {task_id} for job {job_id} was superseded before it started")
+        return {"job_id": job_id, "task_type": "speculative_propagation", "status": "superseded"}
+    logger.info(f"Starting speculative propagation {task_id} for job {job_id}")
+    
+    slice_stream = SliceStreamPublisher(job_id, task_id, end_slice - start_slice + 1)
+    reporter = ProgressReporter(self, job_id, "propagation")
+    cancel_check = CancellationCheck(task_id)
+    preemption = FrameBoundaryPreemption(job_id)
+    # 선점 후에도 실제 작업이 대기 중이면 양보 (채택된 뒤에는 양보하지 않음)
+    yield_check = speculation.SpeculationYield(job_id, task_id, preemption)
+    deadline = PropagationDeadline.for_task(self, yield_check)
+    
+    def progress_callback(progress: float, operation: str, frames_done: Optional[int] = None,
+                          frames_total: Optional[int] = None):
+        # 채택 전에는 사용자에게 보이지 않으므로 기록하지 않음
+        if yield_check.adopted:
+            reporter.update(min(progress, 95), operation, frames_done, frames_total)
+    
+    try:
+        cancel_check()
+        
+        gpu_manager = get_gpu_manager()
+        inference_engine = get_inference_engine()
+        volume_path = get_job_volume_path(job_id)
+        partial_key = partial_result_key(job_id, task_id, "speculative")
+        
+        start_time = time.time()
+        with gpu_manager.acquire_gpu(job_id, "propagation", estimated_duration=300):
+            result = inference_engine.propagate_3d_from_mask(
+                job_id=job_id,
+                volume_path=volume_path,
+                reference_slice=reference_slice,
+                start_slice=start_slice,
+                end_slice=end_slice,
+                reference_mask_id=reference_mask_id,
+                window_level=window_level,
+                progress_callback=progress_callback,
+                slice_callback=slice_stream.publish,
+                cancel_check=cancel_check,
+                yield_callback=deadline,
+                partial_key=partial_key,
+                **_sink_lock_options(self)
+            )
+        slice_stream.flush()
+        processing_time = time.time() - start_time
+        checkpoint = result["checkpoint"]
+        record_propagation_rate(checkpoint["frames_propagated"], checkpoint["propagation_time"])
+        
+        checkpoint_stats = {
+            "resumed": checkpoint["resumed"],
+            "resumes": self.request.retries,
+            "frames_propagated": checkpoint["frames_propagated"]
+        }
+        state, record = speculation.finish_speculation(job_id, task_id, {
+            "direction": "speculative",
+            "partial_key": partial_key,
+            "processing_time": processing_time,
+            "preemption": preemption.stats(),
+            "checkpoint": checkpoint_stats
+        })
+        if state != "adopted":
+            if state == "discarded":
+                get_storage().delete(partial_key)
+            logger.info(f"Speculative propagation {task_id} for job {job_id} finished ({state})")
+            return {"job_id": job_id, "task_type": "speculative_propagation", "status": state}
+        
+        # 채택됨 - 후처리 후 일반 전파 결과로 기록
+        reporter.update(95, "Finalizing results...", force=True)
+        merged = inference_engine.merge_propagation_partials(
+            job_id=job_id,
+            partial_keys=[partial_key],
+            reference_slice=reference_slice,
+            start_slice=start_slice,
+            end_slice=end_slice,
+            result_id=task_id
+        )
+        slice_stream.close("completed")
+        processing_time = time.time() - start_time
+        reporter.finish(100, "Finalizing results...")
+        
+        final_result = _complete_propagation(
+            self, job_id, merged, processing_time, record.get("cache_key"),
+            preemption=preemption.stats(),
+            checkpoint=checkpoint_stats,
+            speculative={
+                "adopted": True,
+                "lead_seconds": round(record["adopted_ts"] - record["created_ts"], 3)
+            }
+        )
+        try:
+            get_storage().delete(partial_key)
+        except Exception as e:
+            logger.warning(f"Failed to delete partial propagation {partial_key}: {e}")
+        
+        logger.info(f"Adopted speculative propagation completed for job {job_id} in {processing_time:.2f}s")
+        return final_result
+        
+    except TaskYielded as e:
+        slice_stream.flush()
+        if not speculation.mark_yielded(job_id, task_id):
+            # 양보하는 사이 채택됨 - 체크포인트에서 배치 작업으로 이어감
+            raise self.retry(countdown=0, queue=BATCH_QUEUE, headers=enqueue_headers(),
+                             max_retries=PROPAGATION_MAX_RESUMES + 1)
+        logger.info(str(e))
+        return {"job_id": job_id, "task_type": "speculative_propagation", "status": "yielded"}
+    except TaskCancelled:
+        slice_stream.close("cancelled")
+        adopted = speculation.speculation_state(job_id, task_id) == "adopted"
+        speculation.clear_speculation(job_id, task_id)
+        if adopted:
+            _finish_cancelled(self, job_id, "propagation")
+        # 다른 추측으로 대체되었거나 맞지 않는 요청이 와서 취소됨
+        logger.info(f"Speculative propagation {task_id} for job {job_id} cancelled")
+        return {"job_id": job_id, "task_type": "speculative_propagation", "status": "cancelled"}
+    except Exception as e:
+        adopted = speculation.speculation_state(job_id, task_id) == "adopted"
+        if isinstance(e, PropagationInProgress) and not adopted:
+            # 같은 전파가 이미 다른 task에서 실행 중 - 추측은 필요 없음
+            slice_stream.flush()
+            speculation.clear_speculation(job_id, task_id)
+            logger.info(f"Speculative propagation {task_id} for job {job_id} superseded: {e}")
+            return {"job_id": job_id, "task_type": "speculative_propagation", "status": "superseded"}
+        if isinstance(e, SoftTimeLimitExceeded):
+            if not adopted and speculation.mark_yielded(job_id, task_id):
+                slice_stream.flush()
+                logger.info(f"Speculative propagation {task_id} for job {job_id} hit its time limit, leaving checkpoint")
+                return {"job_id": job_id, "task_type": "speculative_propagation", "status": "yielded"}
+            if self.request.retries < PROPAGATION_MAX_RESUMES:
+                _resume_after_time_limit(self, job_id, slice_stream, queue=BATCH_QUEUE)
+        logger.error(f"Speculative propagation {task_id} failed for job {job_id}: {str(e)}")
+        logger.error(traceback.format_exc())
+        
+        if adopted:
+            self.update_state(
+                state="FAILURE",
+                meta={
+                    "job_id": job_id,
+                    "task_type": "propagation",
+                    "error": str(e),
+                    "exc_type": type(e).__name__,
+                    "traceback": traceback.format_exc()
+                }
+            )
+            _set_job_status(job_id, task_id, "propagation", "failed", error=str(e))
+        slice_stream.close("failed", str(e))
+        speculation.clear_speculation(job_id, task_id)
         raise
 
 
@@ -293,7 +858,8 @@ def cleanup_old_results_task(max_age_hours: int = 24) -> Dict[str, Any]:
         total_size = 0
         
         # 임시 파일 정리
-        for pattern in ["*.nii.gz", "*.png", "*.jpg"]:
+        # 전파 체크포인트(mmap 마스크와 JSON)는 재개되지 않은 채 남은 것만 시간 기준으로 정리됨
+        for pattern in ["*.nii.gz", "*.png", "*.jpg", "*_result_mask.npy", "*_checkpoint.json"]:
             files = glob.glob(os.path.join(temp_root, pattern))
             for file_path in files:
                 try:
@@ -0,0 +1,39 @@
+"""
+테스트 공용 fixture
+
+서버 코드는 PYTHONPATH=/app 기준(medsam_api_server.*)으로 import하므로 저장소 루트를 경로에 추가합니다.
+Redis가 필요한 테스트는 fakeredis로 작업 저장소 싱글톤을 바꿔 실행합니다.
+필요한 패키지(numpy, fakeredis 등)가 없으면 해당 테스트는 건너뜁니다 (requirements-dev.txt).
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+
+@pytest.fixture
+def redis_client():
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture
+def job_store(monkeypatch, redis_client):
+    """fakeredis 기반 작업 저장소 (get_job_store()가 이 인스턴스를 반환)"""
+    pytest.importorskip("redis")
+    from medsam_api_server.core import job_store as job_store_module
+
+    store = job_store_module.JobStore.__new__(job_store_module.JobStore)
+    store.client = redis_client
+    monkeypatch.setattr(job_store_module, "_job_store", store)
+    return store
+
+
+@pytest.fixture
+def temp_root(tmp_path, monkeypatch):
+    """TEMP_ROOT를 테스트 임시 디렉터리로 지정"""
+    monkeypatch.setenv("TEMP_ROOT", str(tmp_path))
+    return str(tmp_path)
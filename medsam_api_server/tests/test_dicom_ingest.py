@@ -0,0 +1,97 @@
+"""DICOM 시리즈 인제스트 (정렬, 기하 정보, 출력 데이터 타입)"""
+
+import zipfile
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pydicom = pytest.importorskip("pydicom")
+
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import ExplicitVRLittleEndian, generate_uid
+
+from medsam_api_server.core import dicom_ingest
+
+
+def _instance(pixels, z: float, series_uid: str, signed: bool, slope: float = 1.0, intercept: float = 0.0):
+    ds = Dataset()
+    ds.preamble = b"\0" * 128
+    ds.file_meta = FileMetaDataset()
+    ds.file_meta.TransferSyntaxUID = ExplicitVRLittleEndian
+    ds.file_meta.MediaStorageSOPClassUID = "1.2.840.10008.5.1.4.1.1.4"
+    ds.file_meta.MediaStorageSOPInstanceUID = generate_uid()
+    ds.SOPClassUID = ds.file_meta.MediaStorageSOPClassUID
+    ds.SOPInstanceUID = ds.file_meta.MediaStorageSOPInstanceUID
+    ds.SeriesInstanceUID = series_uid
+    ds.ImagePositionPatient = [0.0, 0.0, z]
+    ds.ImageOrientationPatient = [1.0, 0.0, 0.0, 0.0, 1.0, 0.0]
+    ds.PixelSpacing = [0.5, 0.7]
+    ds.Rows, ds.Columns = pixels.shape
+    ds.SamplesPerPixel = 1
+    ds.PhotometricInterpretation = "MONOCHROME2"
+    ds.BitsAllocated = 16
+    ds.BitsStored = 16
+    ds.HighBit = 15
+    ds.PixelRepresentation = 1 if signed else 0
+    ds.RescaleSlope = slope
+    ds.RescaleIntercept = intercept
+    ds.PixelData = pixels.astype(np.int16 if signed else np.uint16).tobytes()
+    return ds
+
+
+def _write_series(path, slices, **kwargs):
+    series_uid = generate_uid()
+    with zipfile.ZipFile(path, "w") as archive:
+        # 위치 역순으로 넣어도 정렬되어야 함
+        for z, pixels in reversed(list(enumerate(slices))):
+            name = str(path.parent / f"slice_{z}.dcm")
+            _instance(pixels, z * 2.0, series_uid, **kwargs).save_as(name)
+            archive.write(name, f"series/slice_{z}.dcm")
+    return str(path)
+
+
+@pytest.mark.parametrize("signed, slope, intercept, expected", [
+    (True, 1.0, 0.0, "int16"),
+    (True, 1.0, -1024.0, "int32"),  # 부호 있는 16비트 전체 범위에서 -1024는 int16을 벗어남
+    (False, 1.0, 0.0, "int32"),  # 부호 없는 16비트는 int16에 들어가지 않음
+    (True, 0.5, 0.0, "float32"),
+])
+def test_output_dtype(signed, slope, intercept, expected):
+    ds = Dataset()
+    ds.BitsAllocated = 16
+    ds.BitsStored = 16
+    ds.PixelRepresentation = 1 if signed else 0
+    integral = float(slope).is_integer() and float(intercept).is_integer()
+    assert dicom_ingest._output_dtype(ds, [(slope, intercept)], integral) == expected
+
+
+def test_output_dtype_uses_bits_stored():
+    # 12비트 CT (-1024 intercept)는 int16
+    ds = Dataset()
+    ds.BitsAllocated = 16
+    ds.BitsStored = 12
+    ds.PixelRepresentation = 0
+    assert dicom_ingest._output_dtype(ds, [(1.0, -1024.0)], True) == "int16"
+
+
+def test_unsigned_series_does_not_wrap(tmp_path):
+    slices = [np.full((4, 5), 40000 + z, dtype=np.uint16) for z in range(3)]
+    zip_path = _write_series(tmp_path / "series.zip", slices, signed=False)
+
+    series = dicom_ingest.read_series_headers(zip_path)
+    assert series["shape"] == (3, 4, 5)
+    assert series["spacing"] == (0.7, 0.5, 2.0)
+    assert series["dtype"] == "int32"
+
+    volume, metadata = dicom_ingest.convert_series_to_volume(zip_path, str(tmp_path / "volume.npy"), series)
+    assert metadata["shape"] == (3, 4, 5)
+    assert [int(volume[z, 0, 0]) for z in range(3)] == [40000, 40001, 40002]
+
+
+def test_rescaled_series(tmp_path):
+    slices = [np.full((4, 5), 100 * z, dtype=np.int16) for z in range(3)]
+    zip_path = _write_series(tmp_path / "series.zip", slices, signed=True, slope=2.0, intercept=-1024.0)
+
+    series = dicom_ingest.read_series_headers(zip_path)
+    volume, _ = dicom_ingest.convert_series_to_volume(zip_path, str(tmp_path / "volume.npy"), series)
+    assert [int(volume[z, 0, 0]) for z in range(3)] == [-1024, -824, -624]
@@ -0,0 +1,53 @@
+"""요청 지문 (중복 판별, 결과 캐시, 체크포인트, 추측 전파가 같은 규칙을 사용)"""
+
+import pytest
+
+from medsam_api_server.core.fingerprint import normalize_window_level, params_hash, propagation_params
+from medsam_api_server.core.supersession import request_fingerprint
+from medsam_api_server.core.result_cache import initial_mask_cache_key, propagation_cache_key
+
+
+def test_normalize_window_level():
+    assert normalize_window_level(None) is None
+    assert normalize_window_level([]) is None
+    assert normalize_window_level([400, 40.00049]) == [400.0, 40.0]
+
+
+def test_params_hash_ignores_key_order():
+    assert params_hash({"a": 1, "b": 2}) == params_hash({"b": 2, "a": 1})
+    assert len(params_hash({"a": 1})) == 40
+    assert len(params_hash({"a": 1}, "sha256")) == 64
+
+
+def test_request_fingerprint_normalizes_types():
+    assert request_fingerprint(3, [1, 2, 3, 4], [400, 40]) == request_fingerprint("3", [1.0, 2, 3, 4], [400.0, 40.0001])
+    assert request_fingerprint(3, [1, 2, 3, 4]) != request_fingerprint(4, [1, 2, 3, 4])
+
+
+def test_propagation_params_share_one_rule():
+    assert propagation_params("m", "5", 0, 9, [400, 40]) == propagation_params("m", 5, 0.0, 9, [400.0, 40.0])
+
+
+def test_cache_keys(monkeypatch):
+    from medsam_api_server.core import result_cache
+
+    monkeypatch.setattr(result_cache, "RESULT_CACHE_ENABLED", True)
+    assert initial_mask_cache_key(None, 1, [0, 0, 1, 1]) is None
+    assert propagation_cache_key("vol", None, 1, 0, 2) is None
+    key = propagation_cache_key("vol", "mask", 1, 0, 2, [400, 40])
+    assert key == propagation_cache_key("vol", "mask", 1, 0, 2, [400.0, 40.0])
+    assert key != propagation_cache_key("vol", "mask", 1, 0, 3, [400, 40])
+    assert initial_mask_cache_key("vol", 1, [0, 0, 1, 1]) != initial_mask_cache_key("vol", 2, [0, 0, 1, 1])
+
+
+def test_checkpoint_and_speculation_fingerprints():
+    pytest.importorskip("numpy")
+    from medsam_api_server.core.result_sink import propagation_checkpoint_id
+    from medsam_api_server.core.speculation import propagation_fingerprint
+
+    full = propagation_checkpoint_id("mask", 5, 0, 9, [400, 40])
+    assert full == propagation_checkpoint_id("mask", 5, 0, 9, [400.0, 40.0], directions=("forward", "backward"))
+    assert full != propagation_checkpoint_id("mask", 5, 0, 9, [400, 40], directions=("forward",))
+    assert propagation_checkpoint_id("mask", 5, 0, 9, directions=("forward",)) != \
+        propagation_checkpoint_id("mask", 5, 0, 9, directions=("backward",))
+    assert propagation_fingerprint("mask", 5, 0, 9, [400, 40]) == propagation_fingerprint("mask", 5, 0, 9, [400.0, 40.0])
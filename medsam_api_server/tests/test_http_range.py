@@ -0,0 +1,54 @@
+"""결과/볼륨 다운로드의 byte range 파싱"""
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("torch")
+
+from fastapi import HTTPException
+
+from medsam_api_server.api.v1.jobs import _parse_range, _etag_matches
+
+ETAG = '"abc"'
+
+
+def test_no_range_returns_full_body():
+    assert _parse_range(None, None, ETAG, 1000) is None
+
+
+def test_simple_and_open_ended_ranges():
+    assert _parse_range("bytes=0-99", None, ETAG, 1000) == (0, 99)
+    assert _parse_range("bytes=900-", None, ETAG, 1000) == (900, 999)
+    # 끝이 크기를 넘으면 마지막 바이트까지
+    assert _parse_range("bytes=900-5000", None, ETAG, 1000) == (900, 999)
+
+
+def test_suffix_range():
+    assert _parse_range("bytes=-100", None, ETAG, 1000) == (900, 999)
+    assert _parse_range("bytes=-5000", None, ETAG, 1000) == (0, 999)
+
+
+@pytest.mark.parametrize("header", ["bytes=500-100", "bytes=-", "items=0-10", "bytes=0-1,5-6", "garbage"])
+def test_invalid_range_is_ignored(header):
+    # RFC 7233 2.1: 잘못된 범위는 무시하고 전체 응답
+    assert _parse_range(header, None, ETAG, 1000) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=1000-2000", "bytes=-0"])
+def test_unsatisfiable_range_is_416(header):
+    with pytest.raises(HTTPException) as exc:
+        _parse_range(header, None, ETAG, 1000)
+    assert exc.value.status_code == 416
+    assert exc.value.headers["Content-Range"] == "bytes */1000"
+
+
+def test_if_range_mismatch_returns_full_body():
+    assert _parse_range("bytes=0-9", '"other"', ETAG, 1000) is None
+    assert _parse_range("bytes=0-9", ETAG, ETAG, 1000) == (0, 9)
+
+
+def test_etag_matches():
+    assert _etag_matches(ETAG, ETAG)
+    assert _etag_matches('"x", "abc"', ETAG)
+    assert _etag_matches("*", ETAG)
+    assert not _etag_matches('"x"', ETAG)
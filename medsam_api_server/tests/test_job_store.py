@@ -0,0 +1,177 @@
+"""Redis 작업 저장소와 metadata.json 마이그레이션"""
+
+import json
+import asyncio
+import threading
+
+import pytest
+
+from medsam_api_server.core import job_store as job_store_module
+
+
+def _create(store, job_id, status="pending", created_at="2024-05-01T10:00:00", **metadata):
+    store.create(job_id, {
+        "job_id": job_id,
+        "status": status,
+        "created_at": created_at,
+        "file_info": {"filename": f"{job_id}.nii.gz", "source_format": "nifti"},
+        **metadata
+    })
+
+
+def test_create_and_load(job_store):
+    _create(job_store, "job-1", tasks=[{"task_id": "t0", "task_type": "initial_mask", "started_at": "2024-05-01T10:01:00"}])
+    metadata = job_store.load("job-1")
+    assert metadata["status"] == "pending"
+    assert metadata["file_info"]["filename"] == "job-1.nii.gz"
+    assert metadata["tasks"] == [{"task_id": "t0", "task_type": "initial_mask", "started_at": "2024-05-01T10:01:00"}]
+    assert job_store.client.hget("medsam:job:job-1", "latest_task_id") == "t0"
+    assert job_store.exists("job-1")
+    assert job_store.load("missing") is None
+
+
+def test_update_merges_dicts(job_store):
+    _create(job_store, "job-1", result={"status": "completed", "files": {"nifti": {"size": 1}}})
+    job_store.update("job-1", {"result": {"task_id": "t1"}, "status": "completed"})
+    metadata = job_store.load("job-1")
+    assert metadata["result"] == {"status": "completed", "files": {"nifti": {"size": 1}}, "task_id": "t1"}
+    assert metadata["status"] == "completed"
+    assert job_store.client.zscore("medsam:jobs:status:completed", "job-1") is not None
+    assert job_store.client.zscore("medsam:jobs:status:pending", "job-1") is None
+    with pytest.raises(FileNotFoundError):
+        job_store.update("missing", {"status": "failed"})
+
+
+def test_concurrent_updates_are_not_lost(job_store):
+    _create(job_store, "job-1", counters={})
+
+    def update(i):
+        job_store.update("job-1", {"counters": {f"worker{i}": i}})
+
+    threads = [threading.Thread(target=update, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert job_store.load("job-1")["counters"] == {f"worker{i}": i for i in range(8)}
+
+
+def test_task_status_only_from_latest_task(job_store):
+    _create(job_store, "job-1")
+    job_store.append_task("job-1", {"task_id": "t1", "task_type": "propagation"}, status="pending")
+    job_store.append_task("job-1", {"task_id": "t2", "task_type": "propagation"}, status="pending")
+    # 이전 task의 늦은 완료는 상태를 바꾸지 않음
+    assert not job_store.set_task_status("job-1", "t1", "completed")
+    assert job_store.set_task_status("job-1", "t2", "processing")
+    metadata = job_store.load("job-1")
+    assert metadata["status"] == "processing"
+    assert [task["task_id"] for task in metadata["tasks"]] == ["t1", "t2"]
+
+
+def test_list_jobs_uses_indexes(job_store):
+    _create(job_store, "old", created_at="2024-01-01T00:00:00")
+    _create(job_store, "new", created_at="2024-06-01T00:00:00")
+    _create(job_store, "done", status="completed", created_at="2024-03-01T00:00:00")
+    job_store.append_task("new", {"task_id": "t1", "task_type": "propagation"}, status="processing")
+
+    total, items = job_store.list_jobs()
+    assert total == 3
+    assert [item["job_id"] for item in items] == ["new", "done", "old"]
+    assert items[0]["latest_task_type"] == "propagation"
+    assert items[0]["filename"] == "new.nii.gz"
+
+    assert job_store.list_jobs(limit=1, offset=1)[1][0]["job_id"] == "done"
+    assert [item["job_id"] for item in job_store.list_jobs(status="completed")[1]] == ["done"]
+    assert [item["job_id"] for item in job_store.list_jobs(status="processing", task_type="propagation")[1]] == ["new"]
+    assert job_store.list_jobs(status="failed") == (0, [])
+    assert not job_store.client.keys("medsam:jobs:tmp:*")
+
+    job_store.delete("new")
+    assert job_store.list_jobs()[0] == 2
+    assert job_store.list_jobs(task_type="propagation") == (0, [])
+
+
+def test_async_load_reads_same_records(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    store = job_store_module.JobStore.__new__(job_store_module.JobStore)
+    store.client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    _create(store, "job-1")
+
+    from medsam_api_server.core import async_redis
+
+    async_client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    monkeypatch.setattr(async_redis, "get_async_redis", lambda *args, **kwargs: async_client)
+    results = asyncio.run(job_store_module.aload_jobs_metadata(["job-1", "missing"]))
+    assert results["missing"] is None
+    assert results["job-1"] == store.load("job-1")
+
+
+def test_migrate_from_storage(job_store, tmp_path, monkeypatch):
+    from medsam_api_server.core import storage
+
+    backend = storage.LocalStorageBackend(str(tmp_path))
+    monkeypatch.setattr(storage, "_storage", backend)
+    backend.put_bytes("legacy/metadata.json", json.dumps({
+        "created_at": "2024-02-01T00:00:00",
+        "result": {"status": "completed"},
+        "tasks": [{"task_id": "t1", "task_type": "propagation"}]
+    }).encode())
+    backend.put_bytes("failed/metadata.json", json.dumps({"ingest": {"status": "failed"}}).encode())
+    backend.put_bytes("fresh/metadata.json", json.dumps({"created_at": "2024-02-02T00:00:00"}).encode())
+    backend.put_bytes("broken/metadata.json", b"{not json")
+    backend.put_bytes("legacy/masks/metadata.json", b"{}")
+    _create(job_store, "existing", status="completed")
+    backend.put_bytes("existing/metadata.json", json.dumps({"status": "failed", "ingest": {"status": "failed"}}).encode())
+
+    counts = job_store_module.migrate_from_storage()
+    assert counts == {"imported": 3, "skipped": 1, "failed": 1}
+    assert job_store.load("legacy")["status"] == "completed"
+    assert job_store.load("legacy")["job_id"] == "legacy"
+    assert job_store.load("legacy")["tasks"][0]["task_id"] == "t1"
+    assert job_store.load("failed")["status"] == "failed"
+    assert job_store.load("fresh")["status"] == "pending"
+    assert job_store.load("existing")["status"] == "completed"
+
+    # 다시 실행해도 안전하고, overwrite면 덮어씀
+    assert job_store_module.migrate_from_storage()["imported"] == 0
+    assert job_store_module.migrate_from_storage(overwrite=True)["imported"] == 4
+    assert job_store.load("existing")["status"] == "failed"
+
+
+def test_migrate_derives_status_of_baseline_metadata(job_store, tmp_path, monkeypatch):
+    # 이전 형식은 항상 "pending"을 기록하고 결과 파일만 작업 디렉토리에 남김
+    from medsam_api_server.core import storage
+
+    backend = storage.LocalStorageBackend(str(tmp_path))
+    monkeypatch.setattr(storage, "_storage", backend)
+    baseline = {
+        "job_id": "done",
+        "status": "pending",
+        "created_at": "2024-02-01T00:00:00",
+        "tasks": [
+            {"task_id": "t1", "task_type": "initial_mask", "started_at": "2024-02-01T00:01:00"},
+            {"task_id": "t2", "task_type": "propagation", "started_at": "2024-02-01T00:02:00"}
+        ]
+    }
+    backend.put_bytes("done/metadata.json", json.dumps(baseline).encode())
+    backend.put_bytes(storage.job_key("done", storage.RESULT_NAME), b"nifti")
+    backend.put_bytes("recorded/metadata.json", json.dumps({
+        **baseline, "job_id": "recorded", "tasks": [{"task_id": "t3", "task_type": "propagation", "status": "failed"}]
+    }).encode())
+    backend.put_bytes("waiting/metadata.json", json.dumps({**baseline, "job_id": "waiting", "tasks": []}).encode())
+
+    assert job_store_module.migrate_from_storage()["imported"] == 3
+    assert job_store.load("done")["status"] == "completed"
+    assert job_store.load("recorded")["status"] == "failed"
+    assert job_store.load("waiting")["status"] == "pending"
+    total, jobs = job_store.list_jobs(status="completed")
+    assert total == 1 and jobs[0]["job_id"] == "done"
+
+
+def test_task_type_index_follows_latest_task(job_store):
+    _create(job_store, "job-1")
+    job_store.append_task("job-1", {"task_id": "t1", "task_type": "initial_mask"})
+    job_store.append_task("job-1", {"task_id": "t2", "task_type": "propagation"})
+    assert job_store.client.zscore("medsam:jobs:task_type:initial_mask", "job-1") is None
+    assert job_store.client.zscore("medsam:jobs:task_type:propagation", "job-1") is not None
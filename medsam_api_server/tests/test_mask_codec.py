@@ -0,0 +1,129 @@
+"""희소 마스크 인코딩 (2D RLE, 희소 3D 컨테이너)"""
+
+import hashlib
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from medsam_api_server.core.mask_codec import (
+    SPARSE_MAGIC, decode_rle, decode_sparse_volume, encode_rle, iter_sparse_slices, mask_bbox_2d,
+    read_sparse_header, write_sparse_volume
+)
+
+
+@pytest.mark.parametrize("mask", [
+    np.zeros((4, 5), dtype=np.uint8),
+    np.ones((4, 5), dtype=np.uint8),
+    np.eye(6, dtype=np.uint8),
+    (np.arange(300 * 7).reshape(300, 7) % 3 == 0).astype(np.uint8),
+])
+def test_rle_round_trip(mask):
+    assert np.array_equal(decode_rle(encode_rle(mask), mask.shape), mask)
+
+
+def test_rle_runs_start_with_zero():
+    # 첫 픽셀이 양성이면 길이 0인 run으로 시작
+    assert encode_rle(np.array([[1, 1, 0]])) == bytes([0, 2, 1])
+    assert encode_rle(np.array([[0, 1, 1]])) == bytes([1, 2])
+    # 128 이상의 run은 여러 바이트 varint
+    assert encode_rle(np.zeros((1, 300))) == bytes([0xAC, 0x02])
+
+
+def test_rle_rejects_wrong_shape():
+    with pytest.raises(ValueError):
+        decode_rle(encode_rle(np.ones((2, 2))), (3, 3))
+
+
+def test_mask_bbox_2d():
+    mask = np.zeros((6, 8), dtype=np.uint8)
+    assert mask_bbox_2d(mask) is None
+    mask[2:4, 1:6] = 1
+    assert mask_bbox_2d(mask) == [2, 3, 1, 5]
+
+
+def test_sparse_volume_round_trip(tmp_path):
+    volume = np.zeros((10, 32, 24), dtype=np.uint8)
+    volume[3, 5:9, 4:10] = 1
+    volume[6, 12:20, 2:3] = 1
+    volume[7, 8, 8] = 1
+    path = str(tmp_path / "result.mskr")
+
+    stats = write_sparse_volume(volume, path, {"spacing": (0.5, 0.5, 2.0)}, slab_slices=4)
+    with open(path, "rb") as f:
+        data = f.read()
+
+    assert data[:4] == SPARSE_MAGIC
+    assert stats["bytes_written"] == len(data)
+    assert stats["sha256"] == hashlib.sha256(data).hexdigest()
+    assert stats["bbox"] == [3, 7, 5, 19, 2, 9]
+    assert stats["nonempty_slices"] == 3
+
+    header, data_offset = read_sparse_header(data)
+    assert header["shape"] == [10, 32, 24]
+    assert header["spacing"] == [0.5, 0.5, 2.0]
+    assert [entry[0] for entry in header["slices"]] == [3, 6, 7]
+    assert [entry[3] for entry in header["slices"]] == [24, 8, 1]
+    assert data_offset < len(data)
+
+    decoded, _ = decode_sparse_volume(data)
+    assert np.array_equal(decoded, volume)
+    assert [z for z, _, _, _ in iter_sparse_slices(data)] == [3, 6, 7]
+
+
+def test_empty_sparse_volume(tmp_path):
+    path = str(tmp_path / "empty.mskr")
+    stats = write_sparse_volume(np.zeros((3, 4, 4), dtype=np.uint8), path)
+    with open(path, "rb") as f:
+        data = f.read()
+    assert stats["bbox"] is None
+    assert list(iter_sparse_slices(data)) == []
+    assert not decode_sparse_volume(data)[0].any()
+
+
+def test_sparse_header_rejects_other_data():
+    with pytest.raises(ValueError):
+        read_sparse_header(b"NIFTI" + bytes(20))
+
+
+@pytest.mark.parametrize("encoding", ["rle", "bitpack", "png"])
+def test_mask_blob_round_trip(encoding):
+    if encoding == "png":
+        pytest.importorskip("PIL")
+    from medsam_api_server.core.mask_codec import decode_mask_blob, encode_mask_blob
+
+    mask = np.zeros((13, 21), dtype=np.uint8)
+    mask[2:7, 3:19] = 1
+    blob, header = encode_mask_blob(mask * 255, encoding)
+    assert header == {"version": 1, "encoding": encoding, "shape": [13, 21], "area": 80, "bbox": [2, 6, 3, 18]}
+
+    decoded, decoded_header = decode_mask_blob(blob)
+    assert decoded_header == header
+    assert decoded.dtype == np.uint8
+    assert np.array_equal(decoded, mask)
+
+
+def test_mask_blob_rejects_unknown_input():
+    from medsam_api_server.core.mask_codec import decode_mask_blob, encode_mask_blob
+
+    with pytest.raises(ValueError):
+        encode_mask_blob(np.zeros((2, 2)), "jpeg")
+    with pytest.raises(ValueError):
+        decode_mask_blob(b"MSKR" + bytes(8))
+
+
+def test_save_and_load_mask(tmp_path, monkeypatch):
+    from medsam_api_server.core import storage
+
+    monkeypatch.setattr(storage, "_storage", storage.LocalStorageBackend(str(tmp_path)))
+    mask = np.zeros((8, 8), dtype=bool)
+    mask[1:3, 1:3] = True
+
+    ref = storage.save_mask("job", "mask-1", mask, encoding="rle")
+    assert ref["url"] == "/api/v1/jobs/job/masks/mask-1"
+    assert ref["area"] == 4 and ref["bbox"] == [1, 2, 1, 2]
+    assert ref["size_bytes"] == storage.get_storage().size(storage.mask_key("job", "mask-1"))
+
+    loaded, header = storage.load_mask("job", "mask-1")
+    assert np.array_equal(loaded, mask.astype(np.uint8))
+    assert header["encoding"] == "rle"
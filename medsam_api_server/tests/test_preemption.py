@@ -0,0 +1,164 @@
+"""프레임 경계 선점"""
+
+import json
+import contextlib
+from types import SimpleNamespace
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("celery")
+
+from medsam_api_server.tasks import preemption
+from medsam_api_server.tasks.preemption import FrameBoundaryPreemption, processing_key, requeue_preempted
+from medsam_api_server.core.scheduling import INTERACTIVE_QUEUE
+
+
+def _message(task_name, task_id):
+    return json.dumps({"headers": {"task": task_name, "id": task_id}, "body": ""})
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    client = fakeredis.FakeRedis()
+    conn = SimpleNamespace(default_channel=SimpleNamespace(client=client))
+    monkeypatch.setattr(preemption.celery_app, "connection_or_acquire", lambda: contextlib.nullcontext(conn))
+
+    yielded = []
+
+    @contextlib.contextmanager
+    def yield_slot(job_id):
+        yielded.append(job_id)
+        yield
+
+    monkeypatch.setattr(preemption, "get_gpu_manager", lambda: SimpleNamespace(yield_slot=yield_slot))
+    client.yielded = yielded
+    return client
+
+
+@pytest.fixture
+def served(monkeypatch):
+    ran = []
+    monkeypatch.setattr(FrameBoundaryPreemption, "_run", lambda self, channel, payload: ran.append(payload["headers"]["id"]))
+    return ran
+
+
+def _preemption(**kwargs):
+    check = FrameBoundaryPreemption("job", worker="w1", **kwargs)
+    check.enabled = True
+    return check
+
+
+def test_no_waiting_work(broker, served):
+    check = _preemption(check_interval=0)
+    check()
+    assert served == [] and broker.yielded == []
+    assert check.stats() == {"count": 0, "tasks_served": 0, "paused_seconds": 0.0}
+
+
+def test_serves_waiting_initial_masks_in_queue_order(broker, served):
+    # Celery는 LPUSH로 넣고 오른쪽 끝에서 꺼냄
+    for task_id in ("first", "second"):
+        broker.lpush(INTERACTIVE_QUEUE, _message("generate_initial_mask", task_id))
+    check = _preemption(check_interval=0)
+    check()
+    assert served == ["first", "second"]
+    assert broker.yielded == ["job"]
+    assert broker.llen(INTERACTIVE_QUEUE) == 0
+    # 실행이 끝난 메시지는 처리 중 리스트에서 삭제
+    assert broker.llen(processing_key("w1")) == 0
+    assert check.stats()["count"] == 1 and check.stats()["tasks_served"] == 2
+
+
+def test_other_tasks_are_put_back(broker, served):
+    broker.lpush(INTERACTIVE_QUEUE, _message("generate_initial_mask", "first"))
+    broker.lpush(INTERACTIVE_QUEUE, _message("propagate_3d_mask", "promoted"))
+    broker.lpush(INTERACTIVE_QUEUE, _message("generate_initial_mask", "later"))
+
+    check = _preemption(check_interval=0)
+    check()
+    assert served == ["first"]
+    # 승격된 배치 작업은 다음에 꺼낼 위치에 그대로
+    assert json.loads(broker.lindex(INTERACTIVE_QUEUE, -1))["headers"]["id"] == "promoted"
+    assert broker.llen(INTERACTIVE_QUEUE) == 2
+    assert broker.llen(processing_key("w1")) == 0
+
+
+def test_pause_is_bounded(broker, served):
+    for i in range(5):
+        broker.lpush(INTERACTIVE_QUEUE, _message("generate_initial_mask", f"t{i}"))
+    check = _preemption(check_interval=0, max_pause=0)
+    check()
+    assert served == []
+    assert broker.llen(INTERACTIVE_QUEUE) == 5
+
+
+def test_checks_are_rate_limited(broker, served):
+    check = _preemption(check_interval=60)
+    check()
+    broker.lpush(INTERACTIVE_QUEUE, _message("generate_initial_mask", "late"))
+    check()
+    assert served == []
+
+
+def test_broker_errors_disable_preemption(monkeypatch, served):
+    def broken():
+        raise ConnectionError("broker down")
+
+    monkeypatch.setattr(preemption.celery_app, "connection_or_acquire", broken)
+    check = _preemption(check_interval=0)
+    check()
+    assert not check.enabled
+    check()
+    assert served == []
+
+
+def test_failed_run_puts_message_back(broker, monkeypatch):
+    def crash(self, channel, payload):
+        # 실행 중에는 처리 중 리스트에 보관
+        assert broker.llen(processing_key("w1")) == 1
+        raise RuntimeError("decode failed")
+
+    monkeypatch.setattr(FrameBoundaryPreemption, "_run", crash)
+    broker.lpush(INTERACTIVE_QUEUE, _message("generate_initial_mask", "first"))
+    check = _preemption(check_interval=0)
+    check()
+    assert not check.enabled
+    assert json.loads(broker.lindex(INTERACTIVE_QUEUE, -1))["headers"]["id"] == "first"
+    assert broker.llen(processing_key("w1")) == 0
+
+
+def test_revoked_tasks_are_not_run(broker, served, monkeypatch):
+    revoked = []
+    monkeypatch.setattr(preemption.worker_state, "revoked", {"stale"})
+    monkeypatch.setattr(preemption.celery_app.backend, "mark_as_revoked",
+                        lambda task_id, reason="": revoked.append(task_id))
+    broker.lpush(INTERACTIVE_QUEUE, _message("generate_initial_mask", "stale"))
+    broker.lpush(INTERACTIVE_QUEUE, _message("generate_initial_mask", "fresh"))
+    check = _preemption(check_interval=0)
+    check()
+    assert served == ["fresh"]
+    assert revoked == ["stale"]
+    assert broker.llen(INTERACTIVE_QUEUE) == 0 and broker.llen(processing_key("w1")) == 0
+    assert check.stats()["tasks_served"] == 1
+
+
+def test_requeue_messages_left_by_crashed_worker(broker):
+    broker.lpush(INTERACTIVE_QUEUE, _message("generate_initial_mask", "queued"))
+    broker.lpush(processing_key("w1"), _message("generate_initial_mask", "interrupted"))
+    assert requeue_preempted("w1") == 1
+    # 중단된 작업이 다음에 꺼낼 위치로
+    assert json.loads(broker.lindex(INTERACTIVE_QUEUE, -1))["headers"]["id"] == "interrupted"
+    assert broker.llen(processing_key("w1")) == 0
+    assert requeue_preempted("w1") == 0
+
+
+def test_prerun_records_queue_wait_of_applied_task(monkeypatch):
+    from medsam_api_server import celery_app as celery_module
+
+    waits = []
+    monkeypatch.setattr(celery_module, "record_queue_wait", lambda queue, enqueued_at: waits.append((queue, enqueued_at)))
+    request = SimpleNamespace(delivery_info={"is_eager": True, "routing_key": INTERACTIVE_QUEUE},
+                              headers={"id": "t1", "enqueued_at": 100.0})
+    celery_module.task_prerun_handler(task_id="t1", task=SimpleNamespace(request=request))
+    assert waits == [(INTERACTIVE_QUEUE, 100.0)]
@@ -0,0 +1,106 @@
+"""진행률 보고 (기록 합치기, 처리 속도/ETA, 분할 전파 합산)"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from medsam_api_server.tasks import progress
+from medsam_api_server.tasks.progress import ProgressReporter, SplitProgress
+
+
+class FakeTask:
+    def __init__(self, task_id="task-1"):
+        self.request = SimpleNamespace(id=task_id)
+        self.states = []
+
+    def update_state(self, task_id=None, state=None, meta=None):
+        self.states.append((task_id, state, meta))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(progress.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def events(monkeypatch):
+    published = []
+    monkeypatch.setattr(progress, "publish_job_event", lambda *args, **kwargs: published.append((args, kwargs)))
+    return published
+
+
+def test_updates_are_coalesced(clock, events):
+    task = FakeTask()
+    reporter = ProgressReporter(task, "job", "propagation", min_interval=1.0, min_delta=1.0)
+
+    reporter.update(0, "start", force=True)
+    for i in range(1, 100):
+        clock[0] += 0.05
+        reporter.update(i * 0.2, "propagating")
+    # 5초 동안 99번 보고 → 1초마다 한 번씩만 기록
+    assert reporter.updates == 100
+    assert reporter.writes == 5
+    assert len(task.states) == len(events) == 5
+
+    reporter.flush()
+    assert task.states[-1][2]["progress"] == pytest.approx(19.8)
+    reporter.flush()
+    assert reporter.writes == 6
+
+    reporter.finish(100, "done")
+    assert task.states[-1][2]["progress"] == 100
+    assert task.states[-1][:2] == ("task-1", "PROCESSING")
+
+
+def test_small_changes_wait_for_max_interval(clock, events):
+    task = FakeTask()
+    reporter = ProgressReporter(task, "job", "propagation", min_interval=1.0, min_delta=5.0)
+    reporter.update(10, "a", force=True)
+    clock[0] += 2
+    reporter.update(11, "b")
+    assert reporter.writes == 1
+    clock[0] += progress.PROGRESS_MAX_INTERVAL
+    reporter.update(11, "b")
+    assert reporter.writes == 2
+
+
+def test_rate_and_eta(clock, events):
+    task = FakeTask()
+    reporter = ProgressReporter(task, "job", "propagation", min_interval=0, min_delta=0)
+    reporter.update(10, "a", frames_done=0, frames_total=100)
+    assert task.states[-1][2]["eta_seconds"] is None
+    clock[0] += 2
+    reporter.update(20, "a", frames_done=20, frames_total=100)
+    meta = task.states[-1][2]
+    assert meta["slices_per_second"] == 10.0
+    assert meta["eta_seconds"] == 8.0
+    # 프레임 수가 되돌아가면(방향 전환) 속도는 유지하고 기준점만 갱신
+    clock[0] += 1
+    reporter.update(30, "b", frames_done=5, frames_total=50)
+    assert task.states[-1][2]["slices_per_second"] == 10.0
+    assert task.states[-1][2]["eta_seconds"] == 4.5
+
+
+def test_split_progress_reports_both_directions(job_store, clock, events):
+    task = FakeTask("child")
+    reporter = ProgressReporter(task, "job", "propagation", task_id="parent", min_interval=0, min_delta=0)
+    forward = SplitProgress(reporter, "forward", min_interval=0)
+    backward = SplitProgress(ProgressReporter(task, "job", "propagation", task_id="parent", min_interval=0, min_delta=0),
+                             "backward", min_interval=0)
+
+    clock[0] += 1
+    forward(0, "forward", 30, 60)
+    assert task.states[-1][2]["progress"] == 55
+    clock[0] += 1
+    backward(0, "backward", 10, 40)
+    # (30 + 10) / (60 + 40)
+    assert task.states[-1][0] == "parent"
+    assert task.states[-1][2]["progress"] == 48
+    assert job_store.client.ttl("medsam:job:job:split:parent") > 0
+
+    # 프레임 수가 없거나 간격이 짧으면 기록하지 않음
+    writes = len(task.states)
+    forward(0, "forward")
+    assert len(task.states) == writes
@@ -0,0 +1,85 @@
+"""결과 캐시 (WATCH/MULTI 기록, 항목별 사본 제거)"""
+
+import threading
+
+import pytest
+
+pytest.importorskip("redis")
+
+from medsam_api_server.core import storage
+from medsam_api_server.core.result_cache import ResultCache, _bytes_key, _lru_key
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch, temp_root):
+    local = storage.LocalStorageBackend(str(tmp_path / "data"))
+    monkeypatch.setattr(storage, "_storage", local)
+    local.put_bytes("job/result.nii.gz", b"n" * 100)
+    local.put_bytes("job/result.mskr", b"s" * 20)
+    return local
+
+
+@pytest.fixture
+def cache(redis_client):
+    return ResultCache(redis_client, max_bytes=10 ** 6)
+
+
+FILES = {"nifti": "job/result.nii.gz", "sparse": "job/result.mskr"}
+
+
+def test_put_and_get(cache, backend):
+    cache.put("k1", "propagation", {"total_slices": 3}, FILES)
+    entry = cache.get("k1")
+    assert entry["result"] == {"total_slices": 3}
+    assert backend.get_bytes(entry["files"]["nifti"]["key"]) == b"n" * 100
+    assert cache.get_stats()["bytes"] == 120
+    assert cache.get("missing") is None
+
+
+def test_concurrent_puts_count_bytes_once(cache, backend):
+    threads = [
+        threading.Thread(target=cache.put, args=("k1", "propagation", {"run": i}, FILES))
+        for i in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert int(cache.client.get(_bytes_key())) == 120
+    # 기록되지 않은 사본은 남지 않음
+    entry = cache.get("k1")
+    kept = {info["key"] for info in entry["files"].values()}
+    assert set(backend.list_keys("result_cache/")) == kept
+
+
+def test_invalidate_removes_only_entry_files(cache, backend):
+    cache.put("k1", "propagation", {}, FILES)
+    stale = cache.get("k1")
+    cache.invalidate("k1")
+    cache.invalidate("k1")
+    assert cache.get("k1") is None
+    assert int(cache.client.get(_bytes_key())) == 0
+    assert cache.client.zscore(_lru_key(), "k1") is None
+    assert backend.list_keys("result_cache/") == []
+
+    # 같은 키로 다시 기록한 항목은 이전 조회의 복원 실패로 지워지지 않음
+    cache.put("k1", "propagation", {}, FILES)
+    assert not cache.restore_file(stale, "nifti", "job2/result.nii.gz")
+    assert cache.get("k1") is not None
+    assert int(cache.client.get(_bytes_key())) == 120
+
+
+def test_restore_file(cache, backend):
+    cache.put("k1", "propagation", {}, FILES)
+    entry = cache.get("k1")
+    assert cache.restore_file(entry, "sparse", "job2/result.mskr")
+    assert backend.get_bytes("job2/result.mskr") == b"s" * 20
+
+
+def test_eviction_keeps_total_under_limit(redis_client, backend):
+    cache = ResultCache(redis_client, max_bytes=200)
+    cache.put("old", "propagation", {}, FILES)
+    cache.put("new", "propagation", {}, FILES)
+    assert cache.get("old") is None
+    assert cache.get("new") is not None
+    assert cache.get_stats()["bytes"] == 120
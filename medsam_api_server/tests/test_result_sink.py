@@ -0,0 +1,155 @@
+"""전파 결과 싱크 (체크포인트 재개, 분할 전파 병합)"""
+
+import os
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from medsam_api_server.core import result_sink
+from medsam_api_server.core.mask_codec import write_sparse_volume
+from medsam_api_server.core.result_sink import DIRECTIONS, ResultSink, propagation_checkpoint_id
+
+SHAPE = (12, 16, 16)
+REFERENCE_SLICE = 5
+
+
+def _expected_volume():
+    volume = np.zeros(SHAPE, dtype=np.uint8)
+    for z in range(SHAPE[0]):
+        volume[z, 4:10, 3 + z % 4:9 + z % 4] = 1
+    return volume
+
+
+def _open_sink(directions, temp_root, checkpoint=True):
+    """inference_engine.propagate_3d_from_mask와 같은 방식으로 싱크 생성"""
+    checkpoint_id = propagation_checkpoint_id("mask", REFERENCE_SLICE, 0, SHAPE[0] - 1, directions=directions) \
+        if checkpoint else None
+    sink_key = "-".join(directions) if tuple(directions) != DIRECTIONS else None
+    sink = ResultSink("job", SHAPE, temp_root=temp_root, checkpoint_id=checkpoint_id, sink_key=sink_key)
+    for direction in DIRECTIONS:
+        if direction not in directions and not sink.direction_complete(direction):
+            sink.complete_direction(direction)
+    return sink
+
+
+def _direction_slices(direction):
+    if direction == "forward":
+        return range(REFERENCE_SLICE, SHAPE[0])
+    return range(REFERENCE_SLICE - 1, -1, -1)
+
+
+@pytest.mark.parametrize("checkpoint", [True, False])
+def test_split_directions_run_concurrently(tmp_path, checkpoint):
+    expected = _expected_volume()
+    barrier = threading.Barrier(2)
+    partials = {}
+    errors = []
+
+    def propagate(direction):
+        try:
+            sink = _open_sink((direction,), str(tmp_path), checkpoint)
+            barrier.wait()
+            for z in _direction_slices(direction):
+                sink.write_slice(z, expected[z])
+                sink.mark_progress(direction, z)
+            sink.complete_direction(direction)
+            barrier.wait()
+            partial_path = os.path.join(str(tmp_path), f"partial_{direction}.bin")
+            write_sparse_volume(sink.mask, partial_path)
+            with open(partial_path, "rb") as f:
+                partials[direction] = f.read()
+            sink.close()
+        except Exception as e:
+            errors.append(e)
+            barrier.abort()
+
+    threads = [threading.Thread(target=propagate, args=(direction,)) for direction in DIRECTIONS]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+    merged = ResultSink("job", SHAPE, temp_root=str(tmp_path))
+    try:
+        for direction in DIRECTIONS:
+            merged.merge_sparse(partials[direction])
+        np.testing.assert_array_equal(np.asarray(merged.mask), expected)
+        assert merged.slice_areas.sum() == expected.sum()
+    finally:
+        merged.close()
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".npy") or name.endswith(".json")]
+
+
+def test_checkpoint_resume(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_sink, "CHECKPOINT_INTERVAL_SLICES", 2)
+    expected = _expected_volume()
+
+    sink = _open_sink(DIRECTIONS, str(tmp_path))
+    assert not sink.resumed
+    for z in range(REFERENCE_SLICE, REFERENCE_SLICE + 4):
+        sink.write_slice(z, expected[z])
+        sink.mark_progress("forward", z)
+    sink.close(keep_checkpoint=True)
+    assert os.path.exists(sink.checkpoint_path) and os.path.exists(sink.mask_path)
+
+    resumed = _open_sink(DIRECTIONS, str(tmp_path))
+    try:
+        assert resumed.resumed
+        assert resumed.resume_point("forward") == REFERENCE_SLICE + 3
+        assert resumed.resume_point("backward") is None
+        assert not resumed.direction_complete("forward")
+        assert resumed.slice_areas.sum() == expected[REFERENCE_SLICE:REFERENCE_SLICE + 4].sum()
+    finally:
+        resumed.close()
+    assert not os.path.exists(resumed.checkpoint_path) and not os.path.exists(resumed.mask_path)
+
+
+def test_checkpoint_shape_mismatch_starts_over(tmp_path):
+    sink = _open_sink(DIRECTIONS, str(tmp_path))
+    sink.write_slice(0, np.ones(SHAPE[1:], dtype=np.uint8))
+    sink.mark_progress("backward", 0)
+    sink.close(keep_checkpoint=True)
+
+    checkpoint_id = propagation_checkpoint_id("mask", REFERENCE_SLICE, 0, SHAPE[0] - 1)
+    other = ResultSink("job", (SHAPE[0] + 1,) + SHAPE[1:], temp_root=str(tmp_path), checkpoint_id=checkpoint_id)
+    try:
+        assert not other.resumed
+        assert other.slice_areas.sum() == 0
+    finally:
+        other.close()
+
+
+def test_keep_largest_component_and_statistics(tmp_path):
+    sink = ResultSink("job", SHAPE, temp_root=str(tmp_path))
+    try:
+        sink.write_slice(2, np.pad(np.ones((4, 4), dtype=np.uint8), ((0, 12), (0, 12))))
+        sink.write_slice(9, np.pad(np.ones((1, 1), dtype=np.uint8), ((15, 0), (15, 0))))
+        sink.keep_largest_component()
+        assert sink.slice_areas[2] == 16 and sink.slice_areas[9] == 0
+        stats = sink.statistics({"spacing": (1.0, 1.0, 2.0)})
+        assert stats["positive_voxels"] == 16
+        assert stats["volume_mm3"] == 32.0
+    finally:
+        sink.close()
+
+
+def test_sink_lock_refuses_other_tasks(job_store):
+    from medsam_api_server.core.result_sink import acquire_sink_lock, release_sink_lock, sink_prefix
+
+    prefix = sink_prefix("job", propagation_checkpoint_id("mask", REFERENCE_SLICE, 0, SHAPE[0] - 1))
+    assert acquire_sink_lock(prefix, "task-a", ttl=60) is None
+    # 같은 task의 재시도는 잠금을 이어받음
+    assert acquire_sink_lock(prefix, "task-a", ttl=120) is None
+    assert job_store.client.ttl(f"medsam:propagation:lock:{prefix}") > 60
+    assert acquire_sink_lock(prefix, "task-b") == "task-a"
+    # 분할 전파의 방향별 싱크는 별도 잠금
+    assert acquire_sink_lock(sink_prefix("job", None, "forward"), "task-b") is None
+
+    release_sink_lock(prefix, "task-b")
+    assert acquire_sink_lock(prefix, "task-b") == "task-a"
+    release_sink_lock(prefix, "task-a")
+    assert acquire_sink_lock(prefix, "task-b") is None
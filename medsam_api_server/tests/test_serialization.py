@@ -0,0 +1,107 @@
+"""Celery msgpack 직렬화기"""
+
+import os
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("msgpack")
+pytest.importorskip("celery")
+
+from medsam_api_server.core import serialization
+from medsam_api_server.core.serialization import SERIALIZER_CONTENT_TYPE, SERIALIZER_NAME, dumps, loads
+
+
+def test_small_payload_is_not_compressed():
+    payload = dumps({"job_id": "abc", "slice": 3})
+    assert payload[:1] == b"\x00"
+    assert loads(payload) == {"job_id": "abc", "slice": 3}
+
+
+def test_large_payload_is_compressed(monkeypatch):
+    monkeypatch.setattr(serialization, "SERIALIZER_COMPRESS_MIN_BYTES", 64)
+    obj = {"mask": [0] * 5000, "blob": b"\x01" * 2048}
+    payload = dumps(obj)
+    assert payload[:1] == b"\x01"
+    assert len(payload) < 1000
+    assert loads(payload) == obj
+
+
+def test_incompressible_payload_is_sent_raw(monkeypatch):
+    monkeypatch.setattr(serialization, "SERIALIZER_COMPRESS_MIN_BYTES", 16)
+    obj = {"blob": os.urandom(4096)}
+    payload = dumps(obj)
+    assert payload[:1] == b"\x00"
+    assert loads(payload) == obj
+
+
+def test_non_msgpack_types_follow_json_rules():
+    np = pytest.importorskip("numpy")
+    task_id = uuid.uuid4()
+    obj = {
+        "created": datetime(2024, 5, 1, 12, 30),
+        "task_id": task_id,
+        "tags": {"a"},
+        "area": np.int64(42),
+        "bbox": np.array([1, 2, 3, 4])
+    }
+    assert loads(dumps(obj)) == {
+        "created": "2024-05-01T12:30:00",
+        "task_id": str(task_id),
+        "tags": ["a"],
+        "area": 42,
+        "bbox": [1, 2, 3, 4]
+    }
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
+
+
+def test_loads_reads_json_results_stored_before_switch():
+    assert loads(json.dumps({"status": "SUCCESS", "result": [1, 2]}).encode()) == {"status": "SUCCESS", "result": [1, 2]}
+    assert loads(json.dumps([1, 2])) == [1, 2]
+    with pytest.raises(ValueError):
+        loads(b"\x07garbage")
+
+
+def test_stats_are_off_by_default(monkeypatch):
+    monkeypatch.setattr(serialization, "_json_size", lambda obj: pytest.fail("JSON size computed"))
+    dumps({"data": b"abc"})
+    assert serialization._take_last_sizes() is None
+
+
+def test_stats_sample_one_in_n(monkeypatch):
+    import itertools
+
+    monkeypatch.setattr(serialization, "SERIALIZER_STATS_SAMPLE", 3)
+    monkeypatch.setattr(serialization, "_encode_counter", itertools.count())
+    sampled = []
+    for _ in range(6):
+        dumps({"data": 1})
+        sampled.append(serialization._take_last_sizes() is not None)
+    assert sampled == [True, False, False, True, False, False]
+
+
+def test_sizes_are_recorded_for_signals(monkeypatch):
+    monkeypatch.setattr(serialization, "SERIALIZER_STATS_SAMPLE", 1)
+    dumps({"data": b"abc"})
+    sizes = serialization._take_last_sizes()
+    assert sizes["wire_bytes"] == sizes["packed_bytes"] + 1
+    # JSON 비교 크기는 bytes를 base64 문자열로 계산
+    assert sizes["json_bytes"] == len('{"data":"YWJj"}')
+    assert serialization._take_last_sizes() is None
+
+
+def test_registered_with_kombu(monkeypatch):
+    from kombu.serialization import dumps as kombu_dumps, loads as kombu_loads
+
+    monkeypatch.setattr(serialization, "CELERY_SERIALIZER", SERIALIZER_NAME)
+    assert serialization.register_serializer() == SERIALIZER_NAME
+    content_type, content_encoding, body = kombu_dumps({"args": [1, "x"]}, serializer=SERIALIZER_NAME)
+    assert content_type == SERIALIZER_CONTENT_TYPE
+    assert content_encoding == "binary"
+    assert kombu_loads(body, content_type, content_encoding, accept=[SERIALIZER_CONTENT_TYPE]) == {"args": [1, "x"]}
+
+    monkeypatch.setattr(serialization, "CELERY_SERIALIZER", "json")
+    assert serialization.register_serializer() == "json"
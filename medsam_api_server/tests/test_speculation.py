@@ -0,0 +1,141 @@
+"""추측 전파 상태 전이 (queued → running → adopted/done/yielded)"""
+
+import contextlib
+from types import SimpleNamespace
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("celery")
+
+from medsam_api_server.celery_app import celery_app
+from medsam_api_server.core import cancellation, speculation
+from medsam_api_server.core.cancellation import TaskYielded
+from medsam_api_server.core.scheduling import BATCH_QUEUE
+from medsam_api_server.core.speculation import (
+    SpeculationYield, claim_speculation, clear_speculation, finish_speculation, mark_running, mark_yielded,
+    propagation_fingerprint, speculation_state, start_speculation
+)
+
+DEPTH = 40
+
+
+@pytest.fixture
+def env(job_store, monkeypatch):
+    """추측 전파 사용, fakeredis 브로커, 제출/취소 기록"""
+    broker = fakeredis.FakeRedis()
+    conn = SimpleNamespace(default_channel=SimpleNamespace(client=broker))
+    sent, cancelled = [], []
+    monkeypatch.setattr(speculation, "SPECULATIVE_PROPAGATION_ENABLED", True)
+    monkeypatch.setattr(celery_app, "connection_or_acquire", lambda: contextlib.nullcontext(conn))
+    monkeypatch.setattr(celery_app, "send_task", lambda name, **kwargs: sent.append((name, kwargs)))
+    monkeypatch.setattr(cancellation, "request_cancel", lambda task_id, *args, **kwargs: cancelled.append(task_id))
+    job_store.create("job", {"job_id": "job", "status": "completed", "volume_info": {"shape": [DEPTH, 64, 64]}})
+    return SimpleNamespace(broker=broker, sent=sent, cancelled=cancelled)
+
+
+def _fingerprint(mask_id="mask-1", reference_slice=12):
+    return propagation_fingerprint(mask_id, reference_slice, 0, DEPTH - 1)
+
+
+def test_start_submits_default_range(env):
+    task_id = start_speculation("job", 12, "mask-1")
+    assert speculation_state("job", task_id) == "queued"
+    name, kwargs = env.sent[0]
+    assert name == "speculative_propagation"
+    assert kwargs["task_id"] == task_id
+    assert kwargs["kwargs"]["start_slice"] == 0 and kwargs["kwargs"]["end_slice"] == DEPTH - 1
+    # 같은 추측은 다시 시작하지 않음
+    assert start_speculation("job", 12, "mask-1") is None
+    assert len(env.sent) == 1
+
+
+def test_not_started_when_gpu_work_is_waiting(env):
+    env.broker.lpush(BATCH_QUEUE, b"{}")
+    assert start_speculation("job", 12, "mask-1") is None
+    assert env.sent == []
+
+
+def test_new_mask_replaces_previous_speculation(env):
+    first = start_speculation("job", 12, "mask-1")
+    second = start_speculation("job", 12, "mask-2")
+    assert second != first
+    assert env.cancelled == [first]
+    assert speculation_state("job", first) is None
+    assert mark_running("job", first) is False
+    assert finish_speculation("job", first, {"partial_key": "p"}) == ("discarded", None)
+
+
+def test_running_speculation_is_adopted(env):
+    task_id = start_speculation("job", 12, "mask-1")
+    assert mark_running("job", task_id)
+    assert claim_speculation("job", _fingerprint(), cache_key="cache") == {"action": "adopt", "task_id": task_id}
+    assert speculation_state("job", task_id) == "adopted"
+    # 채택된 추측은 양보하지 않고 배치 작업으로 이어감
+    assert mark_yielded("job", task_id) is False
+    assert mark_running("job", task_id) is True
+    # 채택 중에는 새 추측을 시작하지 않음
+    assert start_speculation("job", 20, "mask-2") is None
+
+    state, record = finish_speculation("job", task_id, {"partial_key": "p"})
+    assert state == "adopted"
+    assert record["cache_key"] == "cache" and record["adopted_ts"] >= record["created_ts"]
+    assert speculation_state("job", task_id) is None
+
+
+def test_finished_speculation_is_merged(env):
+    task_id = start_speculation("job", 12, "mask-1")
+    mark_running("job", task_id)
+    assert finish_speculation("job", task_id, {"partial_key": "p"}) == ("done", None)
+    decision = claim_speculation("job", _fingerprint())
+    assert decision["action"] == "merge"
+    assert decision["record"]["partial"] == {"partial_key": "p"}
+    assert speculation_state("job", task_id) is None
+
+
+@pytest.mark.parametrize("state", ["queued", "yielded"])
+def test_unstarted_or_yielded_speculation_is_discarded(env, state):
+    task_id = start_speculation("job", 12, "mask-1")
+    if state == "yielded":
+        mark_running("job", task_id)
+        assert mark_yielded("job", task_id) is True
+        assert speculation_state("job", task_id) == "yielded"
+    assert claim_speculation("job", _fingerprint()) is None
+    # 대기 중인 task만 취소 (양보한 task는 이미 끝났고 일반 전파가 체크포인트에서 이어감)
+    assert env.cancelled == ([task_id] if state == "queued" else [])
+    assert speculation_state("job", task_id) is None
+
+
+def test_different_request_cancels_speculation(env):
+    task_id = start_speculation("job", 12, "mask-1")
+    mark_running("job", task_id)
+    assert claim_speculation("job", _fingerprint(reference_slice=13)) is None
+    assert env.cancelled == [task_id]
+    assert claim_speculation("job", _fingerprint()) is None
+
+
+def test_clear_only_own_record(env):
+    task_id = start_speculation("job", 12, "mask-1")
+    clear_speculation("job", "other")
+    assert speculation_state("job", task_id) == "queued"
+    clear_speculation("job", task_id)
+    assert speculation_state("job", task_id) is None
+
+
+def test_yield_callback(env):
+    task_id = start_speculation("job", 12, "mask-1")
+    mark_running("job", task_id)
+    preempted = []
+    check = SpeculationYield("job", task_id, lambda: preempted.append(1), interval=0)
+
+    check()
+    env.broker.lpush(BATCH_QUEUE, b"{}")
+    with pytest.raises(TaskYielded):
+        check()
+    assert len(preempted) == 2
+
+    claim_speculation("job", _fingerprint())
+    check()
+    assert check.adopted
+    check()
+    assert len(preempted) == 4
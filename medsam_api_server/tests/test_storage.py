@@ -0,0 +1,154 @@
+"""작업 저장소 (로컬 백엔드, read-through 디스크 캐시)"""
+
+import os
+
+import pytest
+
+from medsam_api_server.core import storage
+from medsam_api_server.core.storage import (
+    StorageBackend, LocalStorageBackend, LocalDiskCache, job_key, get_job_volume_path, task_result_key,
+    record_job_result, VOLUME_HEADER_NAME, VOLUME_NPY_NAME, VOLUME_NAME, RESULT_NAME
+)
+
+
+@pytest.fixture
+def local_storage(tmp_path):
+    return LocalStorageBackend(str(tmp_path / "data"))
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        StorageBackend()
+
+
+def test_put_and_ranged_reads(local_storage):
+    local_storage.put_bytes("job/a.bin", bytes(range(100)))
+    assert local_storage.exists("job/a.bin")
+    assert local_storage.size("job/a.bin") == 100
+    assert local_storage.get_bytes("job/a.bin", 10, 19) == bytes(range(10, 20))
+    assert local_storage.get_bytes("job/a.bin", 95) == bytes(range(95, 100))
+    assert b"".join(local_storage.iter_bytes("job/a.bin", 5, 54, chunk_size=16)) == bytes(range(5, 55))
+
+
+def test_put_file_move(local_storage, tmp_path):
+    src = tmp_path / "upload.bin"
+    src.write_bytes(b"payload")
+    local_storage.put_file("job/upload.bin", str(src), move=True)
+    assert not src.exists()
+    assert local_storage.get_bytes("job/upload.bin") == b"payload"
+
+
+def test_list_and_delete_prefix(local_storage):
+    for name in ("job1/a", "job1/masks/m1", "job2/a"):
+        local_storage.put_bytes(name, b"x")
+    assert sorted(local_storage.list_keys("job1/")) == ["job1/a", "job1/masks/m1"]
+    local_storage.delete_prefix("job1/")
+    assert local_storage.list_keys("job1/") == []
+    assert local_storage.exists("job2/a")
+
+
+def test_put_uses_unique_temp_files(local_storage, tmp_path, monkeypatch):
+    # 같은 키에 대한 두 쓰기의 임시 파일이 겹치지 않음
+    temp_paths = []
+    original = local_storage._temp_path
+    monkeypatch.setattr(local_storage, "_temp_path", lambda path: temp_paths.append(original(path)) or temp_paths[-1])
+    local_storage.put_bytes("job/result.bin", b"first")
+    local_storage.put_bytes("job/result.bin", b"second")
+    assert len(set(temp_paths)) == 2
+    assert local_storage.get_bytes("job/result.bin") == b"second"
+    assert os.listdir(tmp_path / "data" / "job") == ["result.bin"]
+
+
+def test_list_keys_skips_temp_files(local_storage, tmp_path):
+    local_storage.put_bytes("job/a", b"x")
+    (tmp_path / "data" / "job" / ".b.abc123.tmp").write_bytes(b"partial")
+    assert local_storage.list_keys("job/") == ["job/a"]
+
+
+def test_rejects_keys_outside_root(local_storage):
+    with pytest.raises(ValueError):
+        local_storage.put_bytes("../escape", b"x")
+
+
+def _fetcher(sizes, calls):
+    def fetch(key, tmp_path):
+        calls.append(key)
+        with open(tmp_path, "wb") as f:
+            f.write(b"x" * sizes[key])
+    return fetch
+
+
+def test_cache_hits_and_lru_eviction(tmp_path):
+    cache = LocalDiskCache(str(tmp_path / "cache"), max_bytes=250)
+    sizes = {"a": 100, "b": 100, "c": 100}
+    calls = []
+    fetch = _fetcher(sizes, calls)
+
+    path_a = cache.get("a", lambda tmp: fetch("a", tmp))
+    cache.get("a", lambda tmp: fetch("a", tmp))
+    assert calls == ["a"] and cache.hits == 1 and cache.misses == 1
+
+    os.utime(path_a, (1, 1))  # 가장 오래 접근하지 않은 객체
+    cache.get("b", lambda tmp: fetch("b", tmp))
+    cache.get("c", lambda tmp: fetch("c", tmp))
+    assert not os.path.exists(path_a)
+    assert os.path.exists(cache._path("b")) and os.path.exists(cache._path("c"))
+
+
+def test_get_many_keeps_all_fetched_keys(tmp_path):
+    # 헤더를 먼저 받고 볼륨을 받으면 용량을 넘지만, 이번에 받은 두 객체는 모두 남아야 함
+    cache = LocalDiskCache(str(tmp_path / "cache"), max_bytes=150)
+    sizes = {"old": 50, "job/volume_header.json": 10, "job/volume.npy": 120}
+    calls = []
+    fetch = _fetcher(sizes, calls)
+
+    cache.get("old", lambda tmp: fetch("old", tmp))
+    header_path, npy_path = cache.get_many(["job/volume_header.json", "job/volume.npy"], fetch)
+    assert os.path.exists(header_path) and os.path.exists(npy_path)
+    assert not os.path.exists(cache._path("old"))
+    assert cache._pinned == {}
+
+
+def test_job_volume_path_prefers_converted_volume(local_storage, monkeypatch):
+    monkeypatch.setattr(storage, "_storage", local_storage)
+    local_storage.put_bytes(job_key("job", VOLUME_HEADER_NAME), b"{}")
+    local_storage.put_bytes(job_key("job", VOLUME_NPY_NAME), b"npy")
+    path = get_job_volume_path("job")
+    assert os.path.basename(path) == VOLUME_NAME
+    assert os.path.exists(os.path.join(os.path.dirname(path), VOLUME_NPY_NAME))
+
+
+def _result(job_id, task_id, backend):
+    key = task_result_key(job_id, task_id, RESULT_NAME)
+    backend.put_bytes(key, task_id.encode())
+    return {"task_id": task_id, "status": "completed", "files": {"nifti": {"key": key}}}
+
+
+def test_record_job_result_replaces_older_result(job_store, local_storage, monkeypatch):
+    monkeypatch.setattr(storage, "_storage", local_storage)
+    job_store.create("job-1", {"job_id": "job-1", "status": "pending", "created_at": "2024-05-01T10:00:00"})
+    job_store.append_task("job-1", {"task_id": "t1", "task_type": "propagation"})
+    job_store.append_task("job-1", {"task_id": "t2", "task_type": "propagation"})
+
+    first, second = _result("job-1", "t1", local_storage), _result("job-1", "t2", local_storage)
+    assert task_result_key("job-1", "t1", RESULT_NAME) != task_result_key("job-1", "t2", RESULT_NAME)
+    assert record_job_result("job-1", first)
+    assert record_job_result("job-1", second)
+    assert job_store.load("job-1")["result"]["task_id"] == "t2"
+    # 교체된 결과 파일은 삭제
+    assert not local_storage.exists(first["files"]["nifti"]["key"])
+    assert local_storage.get_bytes(second["files"]["nifti"]["key"]) == b"t2"
+
+
+def test_record_job_result_ignores_late_older_task(job_store, local_storage, monkeypatch):
+    monkeypatch.setattr(storage, "_storage", local_storage)
+    job_store.create("job-1", {"job_id": "job-1", "status": "pending", "created_at": "2024-05-01T10:00:00"})
+    job_store.append_task("job-1", {"task_id": "t1", "task_type": "propagation"})
+    job_store.append_task("job-1", {"task_id": "t2", "task_type": "propagation"})
+
+    newer, late = _result("job-1", "t2", local_storage), _result("job-1", "t1", local_storage)
+    assert record_job_result("job-1", newer)
+    assert not record_job_result("job-1", late)
+    assert job_store.load("job-1")["result"]["task_id"] == "t2"
+    assert local_storage.exists(newer["files"]["nifti"]["key"])
+    assert not local_storage.exists(late["files"]["nifti"]["key"])
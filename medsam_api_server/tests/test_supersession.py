@@ -0,0 +1,70 @@
+"""대화형 요청 대체/병합"""
+
+import json
+
+import pytest
+
+from medsam_api_server.core import cancellation, supersession
+from medsam_api_server.core.supersession import claim_interactive_slot, interactive_slot_key, request_fingerprint
+
+
+@pytest.fixture
+def tasks(job_store, monkeypatch):
+    """실행 중인 task 집합과 취소 요청 기록"""
+    state = {"active": set(), "cancelled": []}
+    monkeypatch.setattr(supersession, "INTERACTIVE_SUPERSEDE_ENABLED", True)
+    monkeypatch.setattr(supersession, "_task_active", lambda task_id: task_id in state["active"])
+
+    def request_cancel(task_id, *args, **kwargs):
+        state["cancelled"].append(task_id)
+        state["active"].discard(task_id)
+
+    monkeypatch.setattr(cancellation, "request_cancel", request_cancel)
+    return state
+
+
+def _claim(tasks, task_id, box, slice_index=7):
+    result = claim_interactive_slot("job", slice_index, request_fingerprint(slice_index, box), task_id)
+    if not result["coalesced"]:
+        tasks["active"].add(task_id)
+    return result
+
+
+def test_first_request_takes_slot(tasks, job_store):
+    assert _claim(tasks, "t1", [0, 0, 10, 10]) == {"task_id": "t1", "coalesced": False, "superseded": None}
+    slot = json.loads(job_store.client.get(interactive_slot_key("job", 7)))
+    assert slot["task_id"] == "t1"
+    assert job_store.client.ttl(interactive_slot_key("job", 7)) > 0
+
+
+def test_identical_request_coalesces(tasks):
+    _claim(tasks, "t1", [0, 0, 10, 10])
+    assert _claim(tasks, "t2", [0, 0, 10, 10]) == {"task_id": "t1", "coalesced": True, "superseded": None}
+    assert tasks["cancelled"] == []
+
+
+def test_different_request_supersedes(tasks):
+    _claim(tasks, "t1", [0, 0, 10, 10])
+    assert _claim(tasks, "t2", [0, 0, 12, 10]) == {"task_id": "t2", "coalesced": False, "superseded": "t1"}
+    assert tasks["cancelled"] == ["t1"]
+    # 대체된 요청과 같은 요청이 다시 오면 새 task로 실행
+    assert _claim(tasks, "t3", [0, 0, 10, 10])["superseded"] == "t2"
+
+
+def test_finished_task_is_neither_shared_nor_cancelled(tasks):
+    _claim(tasks, "t1", [0, 0, 10, 10])
+    tasks["active"].clear()
+    assert _claim(tasks, "t2", [0, 0, 10, 10]) == {"task_id": "t2", "coalesced": False, "superseded": None}
+    assert tasks["cancelled"] == []
+
+
+def test_slots_are_per_slice(tasks):
+    _claim(tasks, "t1", [0, 0, 10, 10], slice_index=1)
+    assert _claim(tasks, "t2", [0, 0, 12, 10], slice_index=2)["superseded"] is None
+    assert tasks["cancelled"] == []
+
+
+def test_disabled(tasks, monkeypatch):
+    monkeypatch.setattr(supersession, "INTERACTIVE_SUPERSEDE_ENABLED", False)
+    _claim(tasks, "t1", [0, 0, 10, 10])
+    assert _claim(tasks, "t2", [0, 0, 10, 10]) == {"task_id": "t2", "coalesced": False, "superseded": None}
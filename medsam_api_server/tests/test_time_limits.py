@@ -0,0 +1,83 @@
+"""전파 시간 제한 (예산 계산, 프레임 루프의 소프트 제한 확인)"""
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("celery")
+from celery.exceptions import SoftTimeLimitExceeded
+
+from medsam_api_server.core import time_limits
+from medsam_api_server.core.time_limits import (
+    PropagationDeadline, PropagationTimeBudgetExceeded, propagation_time_limits, record_propagation_rate,
+    request_soft_limit, volume_depth
+)
+
+
+def _task(timelimit=None, default_soft=60):
+    return SimpleNamespace(
+        request=SimpleNamespace(timelimit=timelimit),
+        app=SimpleNamespace(conf=SimpleNamespace(task_soft_time_limit=default_soft))
+    )
+
+
+def test_request_soft_limit():
+    assert request_soft_limit(_task((900, 840))) == 840.0
+    assert request_soft_limit(_task((None, None))) == 60.0
+    assert request_soft_limit(_task(None, default_soft=None)) is None
+
+
+def test_deadline_raises_resumable_exception(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time_limits.time, "monotonic", lambda: now[0])
+    calls = []
+    deadline = PropagationDeadline(30, lambda: calls.append(now[0]))
+
+    deadline()
+    now[0] = 129.9
+    deadline()
+    assert calls == [100.0, 129.9]
+
+    now[0] = 130.0
+    with pytest.raises(SoftTimeLimitExceeded) as excinfo:
+        deadline()
+    assert isinstance(excinfo.value, PropagationTimeBudgetExceeded)
+    # 제한을 넘긴 뒤에는 선점 콜백을 호출하지 않음
+    assert len(calls) == 2
+
+
+def test_deadline_without_limit_only_calls_callback():
+    calls = []
+    deadline = PropagationDeadline.for_task(_task(None, default_soft=None), lambda: calls.append(1))
+    deadline()
+    assert calls == [1]
+
+
+def test_volume_depth():
+    assert volume_depth(None) is None
+    assert volume_depth({"volume_info": {}}) is None
+    assert volume_depth({"volume_info": {"shape": [120, 512, 512]}}) == 120
+
+
+def test_time_limits_grow_with_depth_and_attempts(job_store, monkeypatch):
+    monkeypatch.setattr(time_limits, "PROPAGATION_TIME_OVERHEAD", 60)
+    monkeypatch.setattr(time_limits, "PROPAGATION_TIME_SAFETY", 3.0)
+    monkeypatch.setattr(time_limits, "PROPAGATION_MIN_SOFT_LIMIT", 120)
+    monkeypatch.setattr(time_limits, "PROPAGATION_MAX_SOFT_LIMIT", 3600)
+    monkeypatch.setattr(time_limits, "PROPAGATION_HARD_LIMIT_GRACE", 60)
+    monkeypatch.setattr(time_limits, "PROPAGATION_DEFAULT_SLICE_SECONDS", 0.5)
+
+    assert propagation_time_limits(None) == (3600, 3660)
+    assert propagation_time_limits(10) == (120, 180)
+    assert propagation_time_limits(200) == (360, 420)
+    assert propagation_time_limits(200, attempt=1) == (660, 720)
+    assert propagation_time_limits(100000) == (3600, 3660)
+
+    record_propagation_rate(100, 100.0)
+    assert time_limits.get_seconds_per_slice() == 1.0
+    record_propagation_rate(100, 200.0)
+    assert time_limits.get_seconds_per_slice() == pytest.approx(1.2)
+    assert job_store.client.hget("medsam:propagation:rate", "samples") == "2"
+    # 잘못된 측정값은 무시
+    record_propagation_rate(0, 5.0)
+    assert time_limits.get_seconds_per_slice() == pytest.approx(1.2)
@@ -1,6 +1,7 @@
 import os
 import time
 import json
+import logging
 import requests
 import numpy as np
 import nibabel as nib
@@ -9,6 +10,8 @@ from typing import Optional, Tuple
 
 API_BASE = os.getenv("API_BASE", "http://127.0.0.1:8000")
 
+logger = logging.getLogger(__name__)
+
 # Patch gradio_client JSON schema utils to handle boolean schemas
 try:
     import gradio_client.utils as _gc_utils  # type: ignore
@@ -120,6 +123,15 @@ def create_job(fileobj):
         job_id = resp.json().get("job_id")
         if not job_id:
             return None, f"Job 생성 응답 이상: {resp.text}", None
+        # 서버는 헤더만 검증하고 즉시 응답하므로 백그라운드 인제스트 완료까지 대기
+        for _ in range(120):
+            st_resp = requests.get(f"{API_BASE}/api/v1/jobs/{job_id}/status", timeout=10)
+            status = st_resp.json().get("status") if st_resp.status_code == 200 else None
+            if status == "failed":
+                return None, f"볼륨 인제스트 실패: {st_resp.json().get('error_details')}", None
+            if status and status != "ingesting":
+                break
+            time.sleep(1)
         return job_id, f"Job 생성됨: {job_id}", job_id
     except Exception as e:
         print(f"[create_job][ERROR] {e}")
@@ -139,6 +151,48 @@ def show_slice(state, slice_index, x1=None, y1=None, x2=None, y2=None):
     return disp
 
 
+def _overlay_mask(base: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """표시용 슬라이스에 빨간색 마스크 오버레이"""
+    overlay = np.stack([base, base, base], axis=-1) if base.ndim == 2 else base.copy()
+    overlay[mask, 0] = 1.0
+    overlay[mask, 1] = 0.0
+    overlay[mask, 2] = 0.0
+    return overlay
+
+
+def fetch_result_slice(job_id, slice_index: int):
+    """3D 결과의 단일 슬라이스만 PNG로 조회 (전체 결과 다운로드 없이)"""
+    from PIL import Image
+    import io
+
+    resp = requests.get(
+        f"{API_BASE}/api/v1/jobs/{job_id}/result/slices/{int(slice_index)}",
+        params={"format": "png"},
+        timeout=10
+    )
+    if resp.status_code != 200:
+        print(f"[fetch_result_slice] {resp.status_code} {resp.text[:200]}")
+        return None
+    if resp.headers.get("X-Mask-Area") == "0":
+        return None
+    return np.array(Image.open(io.BytesIO(resp.content))) > 0
+
+
+def show_slice_with_result(state, slice_index, x1, y1, x2, y2, result_job_id):
+    """3D 결과가 있으면 현재 슬라이스 마스크를 겹쳐 표시"""
+    disp = show_slice(state, int(slice_index), x1, y1, x2, y2)
+    if disp is None or not result_job_id:
+        return disp
+    try:
+        mask = fetch_result_slice(result_job_id, slice_index)
+    except Exception as e:
+        print(f"[show_slice_with_result] Exception: {e}")
+        return disp
+    if mask is None or mask.shape != disp.shape[:2]:
+        return disp
+    return _overlay_mask(disp, mask)
+
+
 def trigger_segmentation(job_id, img_state, slice_index, x1d, y1d, x2d, y2d):
     if not job_id:
         return "먼저 Job을 생성하세요."
@@ -168,12 +222,97 @@ def trigger_segmentation(job_id, img_state, slice_index, x1d, y1d, x2d, y2d):
     return "PROCESSING"
 
 
+def iter_job_events(job_id, timeout: float = 120):
+    """작업 이벤트 스트림(SSE)을 읽어 이벤트 dict를 순서대로 반환 (timeout 초가 지나면 종료)"""
+    deadline = time.time() + timeout
+    # 서버는 15초마다 heartbeat를 보내므로 읽기 타임아웃은 그보다 길게
+    with requests.get(f"{API_BASE}/api/v1/jobs/{job_id}/events", stream=True, timeout=(5, 40)) as resp:
+        resp.raise_for_status()
+        data_lines = []
+        for line in resp.iter_lines(decode_unicode=True):
+            if time.time() > deadline:
+                return
+            if line is None:
+                continue
+            if line.startswith("data:"):
+                data_lines.append(line[5:].strip())
+            elif line == "" and data_lines:
+                yield json.loads("\n".join(data_lines))
+                data_lines = []
+
+
+def wait_for_task_event(job_id, task_type: str, timeout: float = 120):
+    """
+    해당 작업 유형의 completed/failed/cancelled 이벤트까지 대기 후 그 이벤트 반환
+
+    이벤트 스트림을 사용할 수 없으면 None (호출 측은 상태 폴링으로 대체)
+    """
+    try:
+        for event in iter_job_events(job_id, timeout):
+            if event.get("type") == "status" and event.get("task_type") == task_type \
+                    and event.get("status") in ("completed", "failed", "cancelled"):
+                return event
+    except Exception as e:
+        logger.warning(f"[wait_for_task_event] Event stream unavailable, falling back to polling: {e}")
+    return None
+
+
+def _render_mask_overlay(mask_url, slice_index, img_state):
+    """저장된 2D 마스크를 PNG로 받아 원본 슬라이스 위에 빨간색으로 표시"""
+    # 결과에는 마스크 참조만 있으므로 PNG로 따로 조회
+    from PIL import Image
+    import io
+    
+    mask_resp = requests.get(f"{API_BASE}{mask_url}", params={"format": "png"}, timeout=10)
+    mask_resp.raise_for_status()
+    mask_img = Image.open(io.BytesIO(mask_resp.content))
+    mask = np.array(mask_img) > 0  # 바이너리 마스크로 변환
+    
+    print(f"[poll_segmentation] Mask shape: {mask.shape}")
+    
+    # 원본 이미지와 오버레이
+    base = show_slice(img_state, slice_index)
+    if base is None:
+        return None, "원본 이미지를 불러올 수 없습니다."
+    
+    # RGB 변환
+    if base.ndim == 2:
+        overlay = np.stack([base, base, base], axis=-1)
+    else:
+        overlay = base.copy()
+    
+    # 마스크 크기를 원본에 맞게 조정
+    if mask.shape != base.shape[:2]:
+        from PIL import Image as PILImage
+        mask_pil = PILImage.fromarray(mask.astype(np.uint8) * 255)
+        mask_pil = mask_pil.resize((base.shape[1], base.shape[0]), PILImage.NEAREST)
+        mask = np.array(mask_pil) > 128
+    
+    # 빨간색으로 마스크 영역 표시
+    overlay[mask, 0] = 1.0  # Red channel
+    overlay[mask, 1] = 0.0  # Green channel  
+    overlay[mask, 2] = 0.0  # Blue channel
+    
+    return overlay, "✅ 세그멘테이션 완료!"
+
+
 def poll_segmentation(job_id, slice_index, img_state):
     if not job_id:
         return None, "Job이 없습니다."
     
     print(f"[poll_segmentation] Polling job {job_id} for slice {slice_index}")
     
+    # 이벤트 스트림으로 완료 즉시 처리 (완료 이벤트에 마스크 참조가 포함됨)
+    event = wait_for_task_event(job_id, "initial_mask", timeout=120)
+    if event is not None:
+        if event.get("status") == "failed":
+            return None, f"❌ 작업 실패: {event.get('error') or event.get('error_details') or '알 수 없는 오류'}"
+        if event.get("status") == "cancelled":
+            return None, "⏹ 작업이 취소되었습니다."
+        mask_ref = (event.get("result") or {}).get("mask")
+        if mask_ref:
+            return _render_mask_overlay(mask_ref["url"], slice_index, img_state)
+    
     for i in range(40):  # 40 * 3초 = 2분 대기
         try:
             # 작업 상태 확인
@@ -200,42 +339,7 @@ def poll_segmentation(job_id, slice_index, img_state):
                 if result_resp.status_code == 200:
                     result_data = result_resp.json()
                     if result_data.get("success") and "result" in result_data:
-                        # 마스크 데이터 디코딩
-                        import base64
-                        from PIL import Image
-                        import io
-                        
-                        mask_b64 = result_data["result"]["mask_data"]
-                        mask_bytes = base64.b64decode(mask_b64)
-                        mask_img = Image.open(io.BytesIO(mask_bytes))
-                        mask = np.array(mask_img) > 0  # 바이너리 마스크로 변환
-                        
-                        print(f"[poll_segmentation] Mask shape: {mask.shape}")
-                        
-                        # 원본 이미지와 오버레이
-                        base = show_slice(img_state, slice_index)
-                        if base is None:
-                            return None, "원본 이미지를 불러올 수 없습니다."
-                        
-                        # RGB 변환
-                        if base.ndim == 2:
-                            overlay = np.stack([base, base, base], axis=-1)
-                        else:
-                            overlay = base.copy()
-                        
-                        # 마스크 크기를 원본에 맞게 조정
-                        if mask.shape != base.shape[:2]:
-                            from PIL import Image as PILImage
-                            mask_pil = PILImage.fromarray(mask.astype(np.uint8) * 255)
-                            mask_pil = mask_pil.resize((base.shape[1], base.shape[0]), PILImage.NEAREST)
-                            mask = np.array(mask_pil) > 128
-                        
-                        # 빨간색으로 마스크 영역 표시
-                        overlay[mask, 0] = 1.0  # Red channel
-                        overlay[mask, 1] = 0.0  # Green channel  
-                        overlay[mask, 2] = 0.0  # Blue channel
-                        
-                        return overlay, "✅ 세그멘테이션 완료!"
+                        return _render_mask_overlay(result_data["result"]["mask"]["url"], slice_index, img_state)
                     else:
                         return None, f"결과 데이터 오류: {result_data}"
                 else:
@@ -243,6 +347,8 @@ def poll_segmentation(job_id, slice_index, img_state):
                     
             elif status == "failed":
                 return None, f"❌ 작업 실패: {info.get('error_details', '알 수 없는 오류')}"
+            elif status == "cancelled":
+                return None, "⏹ 작업이 취소되었습니다."
             
             # 진행 중이면 계속 대기
             time.sleep(3)
@@ -261,7 +367,7 @@ def trigger_propagation(job_id, start_slice, end_slice, initial_mask_slice_index
     print(f"[trigger_propagation] Starting 3D propagation for job {job_id}")
     print(f"[trigger_propagation] Range: {start_slice} -> {end_slice}, reference: {initial_mask_slice_index}")
     
-    # 먼저 2D 분할 결과에서 마스크 데이터를 가져오기
+    # 먼저 2D 분할 결과에서 마스크 참조를 가져오기 (마스크 자체는 서버 저장소에 있음)
     try:
         result_resp = requests.get(f"{API_BASE}/api/v1/jobs/{job_id}/result", timeout=10)
         if result_resp.status_code != 200:
@@ -271,15 +377,15 @@ def trigger_propagation(job_id, start_slice, end_slice, initial_mask_slice_index
         if not result_data.get("success") or "result" not in result_data:
             return f"2D 분할 결과가 없습니다: {result_data}"
         
-        mask_data = result_data["result"]["mask_data"]
-        print(f"[trigger_propagation] Got mask data (length: {len(mask_data)})")
+        mask_id = result_data["result"]["mask"]["mask_id"]
+        print(f"[trigger_propagation] Using stored mask {mask_id}")
         
         # 3D propagation 요청
         data = {
             "start_slice": int(start_slice),
             "end_slice": int(end_slice), 
             "reference_slice": int(initial_mask_slice_index),
-            "mask_data": mask_data
+            "mask_id": mask_id
         }
         
         print(f"[trigger_propagation] Sending 3D propagation request...")
@@ -299,12 +405,50 @@ def trigger_propagation(job_id, start_slice, end_slice, initial_mask_slice_index
         return f"3D 전파 시작 실패: {str(e)}"
 
 
+def _propagation_completed(job_id):
+    """3D 전파 완료 (이벤트/상태 폴링 공용) - 결과 파일 다운로드 URL 포함"""
+    logger.info(f"[poll_propagation] 3D propagation completed for job {job_id}")
+    return 100, "✅ 3D 전파 완료!", f"{API_BASE}/api/v1/jobs/{job_id}/result"
+
+
+def _propagation_failed(job_id, error_msg):
+    logger.warning(f"[poll_propagation] 3D propagation failed for job {job_id}: {error_msg}")
+    return 0, f"❌ 3D 전파 실패: {error_msg}", None
+
+
 def poll_propagation(job_id):
     if not job_id:
         return 0, "Job이 없습니다.", None
     
     print(f"[poll_propagation] Starting to poll job {job_id}")
     
+    # 이벤트 스트림으로 진행률/완료를 바로 받음 (사용할 수 없으면 아래 상태 폴링으로 대체)
+    try:
+        yield 1, "⏳ 3D 전파 작업 준비 중...", None
+        for event in iter_job_events(job_id, timeout=3600):
+            if event.get("task_type") != "propagation":
+                continue
+            status = event.get("status")
+            if event.get("type") == "progress" or (status == "processing" and event.get("progress") is not None):
+                prog = int(event.get("progress") or 0)
+                operation = event.get("current_operation") or "처리 중..."
+                eta = event.get("eta_seconds")
+                eta_text = f", 약 {int(eta)}초 남음" if eta is not None else ""
+                yield prog, f"🔄 {operation} ({prog}%{eta_text})", None
+            elif status == "completed":
+                yield _propagation_completed(job_id)
+                return
+            elif status == "failed":
+                yield _propagation_failed(job_id, event.get("error") or event.get("error_details") or "알 수 없는 오류")
+                return
+            elif status == "cancelled":
+                yield 0, "⏹ 3D 전파가 취소되었습니다.", None
+                return
+            elif status == "pending":
+                yield 5, "⏳ 3D 전파 작업 대기 중...", None
+    except Exception as e:
+        logger.warning(f"[poll_propagation] Event stream unavailable, falling back to polling: {e}")
+    
     for i in range(1200):  # 1200 * 3초 = 1시간 대기
         try:
             st_resp = requests.get(f"{API_BASE}/api/v1/jobs/{job_id}/status", timeout=10)
@@ -326,15 +470,13 @@ def poll_propagation(job_id):
             # propagation 작업 상태만 확인
             if task_type == "propagation":
                 if status == "completed":
-                    print(f"[poll_propagation] 3D propagation completed!")
-                    # 결과 파일 다운로드 URL 생성
-                    download_url = f"{API_BASE}/api/v1/jobs/{job_id}/result"
-                    yield 100, "✅ 3D 전파 완료!", download_url
+                    yield _propagation_completed(job_id)
                     return
                 elif status == "failed":
-                    error_msg = info.get("error_details", "알 수 없는 오류")
-                    print(f"[poll_propagation] 3D propagation failed: {error_msg}")
-                    yield 0, f"❌ 3D 전파 실패: {error_msg}", None
+                    yield _propagation_failed(job_id, info.get("error_details", "알 수 없는 오류"))
+                    return
+                elif status == "cancelled":
+                    yield 0, "⏹ 3D 전파가 취소되었습니다.", None
                     return
                 elif status == "processing":
                     # 진행률 정보가 있으면 사용
@@ -342,7 +484,9 @@ def poll_propagation(job_id):
                     if progress_info and isinstance(progress_info, dict):
                         prog = progress_info.get("percentage", 0)
                         operation = progress_info.get("current_operation", "처리 중...")
-                        yield prog, f"🔄 {operation} ({prog}%)", None
+                        eta = progress_info.get("estimated_remaining_time")
+                        eta_text = f", 약 {int(eta)}초 남음" if eta is not None else ""
+                        yield prog, f"🔄 {operation} ({prog}%{eta_text})", None
                     else:
                         # 기본 진행률 표시 (최대 95%까지)
                         basic_progress = min(95, 10 + (i * 0.1))  # 천천히 증가
@@ -379,6 +523,7 @@ with gr.Blocks(title="MedSAM2 3D 뷰어") as demo:
         z_state = gr.State()
         mid_state = gr.State()
         status_box = gr.Markdown()
+        result_job_state = gr.State()  # 3D 결과가 준비된 job_id (슬라이스 오버레이용)
     with gr.Row():
         slice_slider = gr.Slider(0, 0, value=0, step=1, label="슬라이스")
     with gr.Row():
@@ -442,11 +587,11 @@ with gr.Blocks(title="MedSAM2 3D 뷰어") as demo:
             end_val = 1
             init_val = 0
         print(f"[on_create] Setting 3D propagation range: {start_val} to {end_val}, reference: {init_val}")
-        return jobid_state, msg, start_val, end_val, init_val
+        return jobid_state, msg, start_val, end_val, init_val, None
 
-    create_btn.click(fn=on_create, inputs=[nifti_file, z_state], outputs=[job_state, status_box, start_slice, end_slice, init_slice])
+    create_btn.click(fn=on_create, inputs=[nifti_file, z_state], outputs=[job_state, status_box, start_slice, end_slice, init_slice, result_job_state])
 
-    slice_slider.release(fn=show_slice, inputs=[img_state, slice_slider, x1, y1, x2, y2], outputs=image)
+    slice_slider.release(fn=show_slice_with_result, inputs=[img_state, slice_slider, x1, y1, x2, y2, result_job_state], outputs=image)
 
     def update_box(img_state_v, slice_index_v, x1v, y1v, x2v, y2v):
         return show_slice(img_state_v, int(slice_index_v), x1v, y1v, x2v, y2v)
@@ -490,12 +635,13 @@ with gr.Blocks(title="MedSAM2 3D 뷰어") as demo:
             final_msg = msg
         
         if final_url:
-            return gr.update(value=f"[3D 마스크 다운로드]({final_url})", visible=True), "✅ 3D 전파 완료!"
+            return gr.update(value=f"[3D 마스크 다운로드]({final_url})", visible=True), "✅ 3D 전파 완료! 슬라이더로 결과를 확인하세요.", job_id
         else:
-            return gr.update(visible=False), final_msg
+            return gr.update(visible=False), final_msg, None
 
     prop_chain = run_3d.click(fn=start_prop, inputs=[job_state, start_slice, end_slice, init_slice, mid_state, z_state], outputs=[status_box])
-    prop_chain.then(fn=poll3, inputs=[job_state], outputs=[result_link, status_box])
+    prop_chain.then(fn=poll3, inputs=[job_state], outputs=[result_link, status_box, result_job_state])
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     demo.launch(server_name="0.0.0.0", server_port=7860, share=False, show_api=False)
\ No newline at end of file
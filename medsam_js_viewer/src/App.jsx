@@ -5,9 +5,9 @@ import SliceViewer from './components/SliceViewer';
 import ControlPanel from './components/ControlPanel';
 import StatusLog from './components/StatusLog';
 import { loadNiftiFile, getSlice, getMaskSlice } from './utils/nifti';
-import { createJob, triggerSegmentation, getJobStatus, getJobResult, triggerPropagation, getJobResultBlob } from './utils/api';
+import { createJob, waitForIngest, triggerSegmentation, getJobStatus, cancelJob, subscribeJobEvents, subscribeResultSlices, getJobResult, triggerPropagation, getJobResultSparse, getJobResultUrl, getMaskBlob, uploadMask } from './utils/api';
+import { decodeSparseMask, decodeMaskBlob, decodeSliceRle, encodeMaskBlob } from './utils/sparseMask';
 import { Loader2 } from 'lucide-react';
-import * as nifti from 'nifti-reader-js';
 
 const API_BASE = import.meta.env.VITE_API_URL || 'http://127.0.0.1:8000';
 
@@ -19,6 +19,8 @@ function App() {
   // Slice-specific state
   const [bboxes, setBboxes] = useState({}); // { sliceIndex: {x1, y1, x2, y2} }
   const [maskOverlays, setMaskOverlays] = useState({}); // { sliceIndex: ImageData }
+  const [maskIds, setMaskIds] = useState({}); // { sliceIndex: server mask id } (unedited masks only)
+  const [previewOverlays, setPreviewOverlays] = useState({}); // { sliceIndex: ImageData } streamed while propagating
 
   // 3D Volume state
   const [maskVolume, setMaskVolume] = useState(null); // Parsed NIfTI object for 3D mask
@@ -72,7 +74,7 @@ function App() {
         return null;
       }
     }
-    return maskOverlays[currentSlice] || null;
+    return maskOverlays[currentSlice] || previewOverlays[currentSlice] || null;
   };
 
   const handleUpload = async (file) => {
@@ -92,6 +94,8 @@ function App() {
       // Reset state
       setBboxes({});
       setMaskOverlays({});
+      setMaskIds({});
+      setPreviewOverlays({});
       setMaskVolume(null);
       maskCache.current = {};
 
@@ -102,6 +106,15 @@ function App() {
       if (response.job_id) {
         setJobId(response.job_id);
         addLog(`Job created: ${response.job_id} `);
+
+        // Server validates only the header on upload; wait for background ingest
+        addLog('Waiting for server-side volume ingest...');
+        const ingestStatus = await waitForIngest(response.job_id);
+        if (ingestStatus.status === 'failed') {
+          addLog(`Ingest failed: ${ingestStatus.error_details?.error || 'Unknown error'}`);
+        } else {
+          addLog('Volume ingest completed.');
+        }
       } else {
         addLog('Error: No job ID returned');
       }
@@ -113,6 +126,62 @@ function App() {
     }
   };
 
+  const handleCancel = async () => {
+    if (!jobId) return;
+    try {
+      await cancelJob(jobId);
+      addLog('Cancellation requested...');
+    } catch (err) {
+      addLog(`Cancel failed: ${err.response?.data?.detail?.message || err.message}`);
+    }
+  };
+
+  // Wait for completion over the server-sent event stream; fall back to polling if it cannot be used
+  // taskId: only settle on events for that task (a superseded request's cancellation is ignored)
+  const watchJob = (jid, onComplete, onError, taskId = null) => {
+    const TIMEOUT_MS = 300000; // 5 minutes timeout
+    let settled = false;
+
+    const settle = () => {
+      if (settled) return false;
+      settled = true;
+      clearTimeout(timer);
+      close();
+      return true;
+    };
+
+    const close = subscribeJobEvents(jid, (event) => {
+      if (event.type !== 'status') return;
+      if (taskId && event.task_id && event.task_id !== taskId) return;
+      if (event.status === 'completed') {
+        if (settle()) onComplete(event);
+      } else if (event.status === 'failed') {
+        if (!settle()) return;
+        console.error("Job Failed:", event);
+        const errorMsg = event.error || event.error_details?.error || "Unknown error";
+        if (onError) onError(errorMsg);
+        addLog(`Job failed: ${errorMsg}`);
+        setIsProcessing(false);
+      } else if (event.status === 'cancelled') {
+        if (!settle()) return;
+        if (onError) onError('Job cancelled');
+        addLog('Job cancelled.');
+        setIsProcessing(false);
+      }
+    }, () => {
+      if (!settle()) return;
+      addLog('Event stream unavailable, polling job status...');
+      pollJobStatus(jid, onComplete, onError);
+    });
+
+    const timer = setTimeout(() => {
+      if (!settle()) return;
+      addLog('Error: Job timed out (5 minutes limit)');
+      if (onError) onError('Job timed out');
+      setIsProcessing(false);
+    }, TIMEOUT_MS);
+  };
+
   const pollJobStatus = async (jid, onComplete, onError) => {
     const startTime = Date.now();
     const TIMEOUT_MS = 300000; // 5 minutes timeout
@@ -136,6 +205,11 @@ function App() {
           addLog(`Job failed: ${errorMsg}`);
           setIsProcessing(false);
           return;
+        } else if (statusData.status === 'cancelled') {
+          if (onError) onError('Job cancelled');
+          addLog('Job cancelled.');
+          setIsProcessing(false);
+          return;
         }
 
         // Continue polling
@@ -203,54 +277,45 @@ function App() {
         addLog(`Sending Window Level: [${windowWidth}, ${windowLevel}]`);
       }
 
-      await triggerSegmentation(jobId, safeSlice, safeBbox, windowLevelData);
+      // Repeated requests for the same slice supersede (or join) earlier ones on the server
+      const { task_id: segTaskId } = await triggerSegmentation(jobId, safeSlice, safeBbox, windowLevelData);
 
-      pollJobStatus(jobId, async () => {
+      watchJob(jobId, async (status) => {
         addLog('2D Segmentation completed. Fetching result...');
-        const result = await getJobResult(jobId);
-        if (result.success && result.result.mask_data) {
-          // Process mask data for display
-          // result.result.mask_data is base64 encoded string
-          const maskBase64 = result.result.mask_data;
-          const img = new Image();
-          img.onload = () => {
-            // Draw mask directly to canvas
-            const c = document.createElement('canvas');
-            c.width = img.width;
-            c.height = img.height;
-            const ctx = c.getContext('2d');
-            ctx.drawImage(img, 0, 0);
-            const imageData = ctx.getImageData(0, 0, c.width, c.height);
-
-            // Colorize the mask (red)
-            const data = imageData.data;
-            for (let i = 0; i < data.length; i += 4) {
-              // Assuming mask is grayscale or binary
-              if (data[i] > 0) { // If pixel is not black
-                data[i] = 255;     // R
-                data[i + 1] = 0;     // G
-                data[i + 2] = 0;     // B
-                data[i + 3] = 128;   // A (semi-transparent)
-              } else {
-                data[i + 3] = 0; // Transparent
-              }
+        // The completion event carries the mask reference; a status snapshot or poll does not
+        const result = status.result?.mask ? { success: true, result: status.result } : await getJobResult(jobId);
+        if (result.success && result.result.mask) {
+          // The task result only carries a reference; the mask itself is a compact blob
+          const buffer = await getMaskBlob(result.result.mask.url);
+          const { width, height, data: maskBits } = decodeMaskBlob(buffer);
+
+          // Colorize the mask (red, semi-transparent)
+          const imageData = new ImageData(width, height);
+          const data = imageData.data;
+          for (let i = 0; i < maskBits.length; i++) {
+            if (maskBits[i]) {
+              data[i * 4] = 255;       // R
+              data[i * 4 + 3] = 128;   // A
             }
+          }
 
-            setMaskOverlays(prev => ({
-              ...prev,
-              [currentSlice]: imageData
-            }));
+          setMaskOverlays(prev => ({
+            ...prev,
+            [currentSlice]: imageData
+          }));
+          setMaskIds(prev => ({
+            ...prev,
+            [currentSlice]: result.result.mask.mask_id
+          }));
 
-            addLog('Mask overlay updated.');
-            setIsProcessing(false);
-            setRefSlice(currentSlice); // Update ref slice to current
-          };
-          img.src = `data: image / png; base64, ${maskBase64} `;
+          addLog(`Mask overlay updated (${result.result.mask.area} px).`);
+          setIsProcessing(false);
+          setRefSlice(currentSlice); // Update ref slice to current
         } else {
           addLog('Error: Invalid result data');
           setIsProcessing(false);
         }
-      });
+      }, null, segTaskId);
     } catch (err) {
       addLog(`Error: ${err.message} `);
       setIsProcessing(false);
@@ -263,56 +328,36 @@ function App() {
     addLog(`Starting 3D propagation(${startSlice} -> ${endSlice}, ref: ${refSlice})...`);
 
     try {
-      // We need the mask data from the previous result to pass it back?
-      // Actually the backend stores state? 
-      // Looking at app.py: trigger_propagation fetches result from backend first.
-      // So we just need to trigger it.
-
-      // Wait, app.py fetches result from backend and sends it back in 'mask_data'.
-      // So we need to do the same.
-      // Use the local mask data (which might be edited)
+      // Propagate by reference: the worker reads the mask from job storage.
+      // Unedited server masks are referenced by id; brush-edited masks are uploaded once
+      // as a compact RLE blob and referenced by the returned id.
+      let maskRef = null;
       const currentMaskData = maskOverlays[refSlice];
 
-      let maskBase64 = null;
-      if (currentMaskData) {
-        const canvas = document.createElement('canvas');
-        canvas.width = currentMaskData.width;
-        canvas.height = currentMaskData.height;
-        const ctx = canvas.getContext('2d');
-
-        // Check if data is 1-channel compressed (Uint8Array)
-        if (currentMaskData.data instanceof Uint8Array && !(currentMaskData instanceof ImageData)) {
-          // Reconstruct ImageData from 1-channel
-          const { data, width, height } = currentMaskData;
-          const rgbaData = new Uint8ClampedArray(width * height * 4);
-          for (let i = 0; i < width * height; i++) {
-            const val = data[i];
-            if (val > 0) {
-              const idx = i * 4;
-              rgbaData[idx] = 255;     // R
-              rgbaData[idx + 1] = 255; // G
-              rgbaData[idx + 2] = 255; // B
-              rgbaData[idx + 3] = 255; // A
-            }
+      if (maskIds[refSlice]) {
+        maskRef = { maskId: maskIds[refSlice] };
+      } else if (currentMaskData) {
+        const { data, width, height } = currentMaskData;
+        let maskBits = data;
+        if (currentMaskData instanceof ImageData) {
+          // RGBA overlay -> one value per pixel
+          maskBits = new Uint8Array(width * height);
+          for (let i = 0; i < maskBits.length; i++) {
+            maskBits[i] = data[i * 4] | data[i * 4 + 1] | data[i * 4 + 2];
           }
-          const imageData = new ImageData(rgbaData, width, height);
-          ctx.putImageData(imageData, 0, 0);
-        } else {
-          // Legacy/Fallback: ImageData
-          ctx.putImageData(currentMaskData, 0, 0);
         }
-
-        const dataURL = canvas.toDataURL('image/png');
-        maskBase64 = dataURL.split(',')[1]; // Remove prefix
+        const uploaded = await uploadMask(jobId, encodeMaskBlob(maskBits, width, height));
+        addLog(`Uploaded edited mask (${uploaded.size_bytes} bytes, ${uploaded.area} px).`);
+        maskRef = { maskId: uploaded.mask_id };
       } else {
-        // Fallback to backend result if local not found (shouldn't happen if segmented)
+        // Fallback to the latest initial-mask result if local not found (shouldn't happen if segmented)
         const prevResult = await getJobResult(jobId);
-        if (prevResult.success && prevResult.result.mask_data) {
-          maskBase64 = prevResult.result.mask_data;
+        if (prevResult.success && prevResult.result.mask) {
+          maskRef = { maskId: prevResult.result.mask.mask_id };
         }
       }
 
-      if (!maskBase64) {
+      if (!maskRef) {
         throw new Error("No mask available for propagation. Please segment a slice first.");
       }
 
@@ -323,54 +368,47 @@ function App() {
         addLog(`Sending Window Level for 3D: [${windowWidth}, ${windowLevel}]`);
       }
 
-      await triggerPropagation(jobId, startSlice, endSlice, refSlice, maskBase64, windowLevelData);
+      await triggerPropagation(jobId, startSlice, endSlice, refSlice, maskRef, windowLevelData);
 
-      pollJobStatus(jobId, async (status) => {
+      // Show propagated slices as they are produced (replaced by the final volume below)
+      setMaskVolume(null);
+      maskCache.current = {};
+      setPreviewOverlays({});
+      const closePreview = subscribeResultSlices(jobId, (slice) => {
+        const [height, width] = slice.shape;
+        const maskBits = decodeSliceRle(slice.rle, width, height);
+        const imageData = new ImageData(width, height);
+        for (let i = 0; i < maskBits.length; i++) {
+          if (maskBits[i]) {
+            imageData.data[i * 4] = 255;       // R
+            imageData.data[i * 4 + 3] = 96;    // A (lighter than final masks)
+          }
+        }
+        setPreviewOverlays(prev => ({ ...prev, [slice.z]: imageData }));
+      });
+
+      watchJob(jobId, async () => {
+        closePreview();
         addLog('3D Propagation completed!');
 
-        // 1. Download result for visualization
+        // 1. Download compact sparse result for visualization
         try {
           addLog('Downloading 3D result for visualization...');
-          const blob = await getJobResultBlob(jobId);
-
-          // Parse NIfTI
-          if (nifti.isCompressed(blob)) {
-            const data = nifti.decompress(blob);
-            if (nifti.isNIFTI(data)) {
-              const header = nifti.readHeader(data);
-              const image = nifti.readImage(header, data);
-
-              // Create object compatible with our getSlice utility
-              const volumeObject = {
-                header: header,
-                image: image,
-                // Add helper to get slice data like our loadNiftiFile does
-                getSlice: (sliceIdx) => {
-                  // This logic is duplicated from nifti.js, we should reuse or mock it
-                  // For now, we rely on the fact that getSlice utility takes this object
-                  return null; // getSlice utility handles the extraction
-                }
-              };
-              // Actually, our getSlice utility expects {header, image}. 
-              // We need to make sure the data format matches what getSlice expects.
-              // loadNiftiFile returns an object with getSlice method attached.
-              // Let's just attach the raw data and let getSlice utility handle it if we export it properly.
-              // Wait, getSlice in nifti.js is exported.
-
-              setMaskVolume({ header, image });
-              addLog('3D Mask Volume loaded for visualization.');
-            }
-            // 2. Prepare for manual download
-            const blobUrl = URL.createObjectURL(new Blob([blob]));
-            setResultBlobUrl(blobUrl);
-            addLog('3D Result ready for download.');
-          }
+          const buffer = await getJobResultSparse(jobId);
+          const maskObject = decodeSparseMask(buffer);
+          setMaskVolume(maskObject);
+          setPreviewOverlays({});
+          addLog(`3D Mask Volume loaded for visualization (${(buffer.byteLength / 1024).toFixed(1)} KB).`);
+
+          // 2. Prepare for manual download (full NIfTI)
+          setResultBlobUrl(getJobResultUrl(jobId));
+          addLog('3D Result ready for download.');
         } catch (e) {
           addLog(`Error loading 3D result: ${e.message} `);
         }
 
         setIsProcessing(false);
-      });
+      }, closePreview);
 
     } catch (err) {
       console.error("Propagation Error:", err);
@@ -415,6 +453,11 @@ function App() {
                     ...prev,
                     [currentSlice]: newMaskData
                   }));
+                  // Edited masks are uploaded on propagation instead of referenced
+                  setMaskIds(prev => {
+                    const { [currentSlice]: _, ...rest } = prev;
+                    return rest;
+                  });
                 }}
                 // Windowing Props
                 windowWidth={windowWidth}
@@ -430,6 +473,11 @@ function App() {
               <div className="glass-panel p-8 flex flex-col items-center gap-4">
                 <Loader2 className="w-10 h-10 text-primary-500 animate-spin" />
                 <p className="text-lg font-medium text-primary-200">Processing...</p>
+                {jobId && (
+                  <button onClick={handleCancel} className="btn-secondary text-sm">
+                    Cancel
+                  </button>
+                )}
               </div>
             </div>
           )}
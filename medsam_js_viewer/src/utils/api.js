@@ -1,4 +1,5 @@
 import axios from 'axios';
+import { SPARSE_MEDIA_TYPE, MASK_BLOB_MEDIA_TYPE } from './sparseMask';
 
 const API_BASE = import.meta.env.VITE_API_URL || 'http://127.0.0.1:8000';
 
@@ -37,19 +38,68 @@ export const getJobStatus = async (jobId) => {
     return response.data;
 };
 
+// Cancel the job's latest task (queued tasks never run; running ones stop at the next frame)
+export const cancelJob = async (jobId) => {
+    const response = await api.post(`/api/v1/jobs/${jobId}/cancel`);
+    return response.data;
+};
+
+// Server-sent job events ("status" and "progress"); returns a function that closes the stream
+export const subscribeJobEvents = (jobId, onEvent, onError) => {
+    const source = new EventSource(`${API_BASE}/api/v1/jobs/${jobId}/events`);
+    const handleEvent = (e) => onEvent(JSON.parse(e.data));
+    source.addEventListener('status', handleEvent);
+    source.addEventListener('progress', handleEvent);
+    source.onerror = (err) => {
+        if (onError) onError(err);
+    };
+    return () => source.close();
+};
+
+// Live propagated slices (preview before post-processing); returns a function that closes the stream.
+// Completion and errors are tracked by subscribeJobEvents, so a broken preview stream is just closed.
+export const subscribeResultSlices = (jobId, onSlice, onEnd) => {
+    const source = new EventSource(`${API_BASE}/api/v1/jobs/${jobId}/result/stream`);
+    source.addEventListener('slice', (e) => onSlice(JSON.parse(e.data)));
+    source.addEventListener('end', (e) => {
+        source.close();
+        if (onEnd) onEnd(JSON.parse(e.data));
+    });
+    source.onerror = () => source.close();
+    return () => source.close();
+};
+
+export const waitForIngest = async (jobId, intervalMs = 1000, timeoutMs = 300000) => {
+    const startTime = Date.now();
+    while (Date.now() - startTime < timeoutMs) {
+        const status = await getJobStatus(jobId);
+        if (status.status !== 'ingesting') {
+            return status;
+        }
+        await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+    throw new Error('Volume ingest timed out');
+};
+
 export const getJobResult = async (jobId) => {
     const response = await api.get(`/api/v1/jobs/${jobId}/result`);
     return response.data;
 };
 
-export const triggerPropagation = async (jobId, startSlice, endSlice, referenceSlice, maskData, windowLevel = null) => {
+// maskRef: { maskId } for a stored mask, or { initialMaskTaskId } for a completed initial-mask task
+export const triggerPropagation = async (jobId, startSlice, endSlice, referenceSlice, maskRef, windowLevel = null) => {
     const payload = {
         start_slice: startSlice,
         end_slice: endSlice,
         reference_slice: referenceSlice,
-        mask_data: maskData,
     };
 
+    if (maskRef.maskId) {
+        payload.mask_id = maskRef.maskId;
+    } else {
+        payload.initial_mask_task_id = maskRef.initialMaskTaskId;
+    }
+
     if (windowLevel) {
         payload.window_level = windowLevel;
     }
@@ -57,6 +107,15 @@ export const triggerPropagation = async (jobId, startSlice, endSlice, referenceS
     const response = await api.post(`/api/v1/jobs/${jobId}/propagate`, payload);
     return response.data;
 };
+
+// Upload an edited mask (blob from encodeMaskBlob); returns the stored mask reference
+export const uploadMask = async (jobId, maskBlob) => {
+    const response = await api.post(`/api/v1/jobs/${jobId}/masks`, maskBlob, {
+        headers: { 'Content-Type': MASK_BLOB_MEDIA_TYPE },
+    });
+    return response.data.mask;
+};
+
 export const getJobResultBlob = async (jobId) => {
     try {
         const response = await axios.get(`${API_BASE}/api/v1/jobs/${jobId}/result`, {
@@ -68,3 +127,26 @@ export const getJobResultBlob = async (jobId) => {
         throw error;
     }
 };
+
+// Compact sparse RLE result (see utils/sparseMask.js)
+export const getJobResultSparse = async (jobId) => {
+    const response = await api.get(`/api/v1/jobs/${jobId}/result`, {
+        params: { format: 'sparse' },
+        headers: { Accept: SPARSE_MEDIA_TYPE },
+        responseType: 'arraybuffer'
+    });
+    return response.data;
+};
+
+// 2D mask blob referenced by an initial-mask result (see utils/sparseMask.js)
+export const getMaskBlob = async (maskUrl, format = 'blob') => {
+    const response = await api.get(maskUrl, {
+        params: { format },
+        headers: format === 'blob' ? { Accept: MASK_BLOB_MEDIA_TYPE } : {},
+        responseType: 'arraybuffer'
+    });
+    return response.data;
+};
+
+// Direct NIfTI download URL (served with Content-Disposition: attachment)
+export const getJobResultUrl = (jobId) => `${API_BASE}/api/v1/jobs/${jobId}/result`;
@@ -0,0 +1,156 @@
+// Sparse 3D mask container decoder (server: medsam_api_server/core/mask_codec.py)
+//
+// Layout: "MSKR" | uint32 LE header length | JSON header | per-slice varint RLE
+// Each slice is cropped to the volume bounding box (y, x) and run-length encoded
+// row-major, alternating 0/1 runs starting with 0.
+//
+// 2D mask blobs (GET /jobs/{id}/masks/{mask_id}) use the same prefix with magic "MSK2"
+// and a single rle or bitpack payload covering the whole slice.
+
+const MAGIC = 'MSKR';
+const BLOB_MAGIC = 'MSK2';
+const PREFIX_SIZE = 8;
+
+export const SPARSE_MEDIA_TYPE = 'application/vnd.medsam.sparse-mask';
+export const MASK_BLOB_MEDIA_TYPE = 'application/vnd.medsam.mask-blob';
+
+// Decode one RLE chunk directly into a cropped rectangle of the output volume
+export const decodeRleInto = (bytes, start, end, target, sliceOffset, rowStride, x0, y0, cropWidth) => {
+    let value = 0;
+    let pixel = 0;
+    let i = start;
+    while (i < end) {
+        let run = 0;
+        let shift = 0;
+        let byte;
+        do {
+            byte = bytes[i++];
+            run |= (byte & 0x7f) << shift;
+            shift += 7;
+        } while (byte & 0x80);
+
+        if (value === 1) {
+            for (let k = 0; k < run; k++) {
+                const p = pixel + k;
+                const row = (p / cropWidth) | 0;
+                const col = p - row * cropWidth;
+                target[sliceOffset + (y0 + row) * rowStride + x0 + col] = 1;
+            }
+        }
+        pixel += run;
+        value ^= 1;
+    }
+};
+
+const readPrefixedHeader = (buffer, expectedMagic) => {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3));
+    if (magic !== expectedMagic) {
+        throw new Error(`Unexpected mask container magic: ${magic}`);
+    }
+    const headerLength = view.getUint32(4, true);
+    const headerText = new TextDecoder().decode(new Uint8Array(buffer, PREFIX_SIZE, headerLength));
+    return { header: JSON.parse(headerText), dataOffset: PREFIX_SIZE + headerLength };
+};
+
+export const readSparseHeader = (buffer) => readPrefixedHeader(buffer, MAGIC);
+
+// Decode a 2D mask blob into { width, height, data } with data as a 0/1 Uint8Array
+export const decodeMaskBlob = (buffer) => {
+    const { header, dataOffset } = readPrefixedHeader(buffer, BLOB_MAGIC);
+    const [height, width] = header.shape;
+    const data = new Uint8Array(width * height);
+    const bytes = new Uint8Array(buffer, dataOffset);
+
+    if (header.encoding === 'rle') {
+        decodeRleInto(bytes, 0, bytes.length, data, 0, width, 0, 0, width);
+    } else if (header.encoding === 'bitpack') {
+        const rowBytes = Math.ceil(width / 8);
+        for (let y = 0; y < height; y++) {
+            for (let x = 0; x < width; x++) {
+                data[y * width + x] = (bytes[y * rowBytes + (x >> 3)] >> (7 - (x & 7))) & 1;
+            }
+        }
+    } else {
+        // png payloads are served decoded via ?format=png
+        throw new Error(`Unsupported mask blob encoding: ${header.encoding}`);
+    }
+
+    return { width, height, data, area: header.area, bbox: header.bbox };
+};
+
+// Decode a base64 whole-slice RLE (live propagation stream) into a 0/1 Uint8Array
+export const decodeSliceRle = (rleBase64, width, height) => {
+    const data = new Uint8Array(width * height);
+    if (rleBase64) {
+        const bytes = Uint8Array.from(atob(rleBase64), (c) => c.charCodeAt(0));
+        decodeRleInto(bytes, 0, bytes.length, data, 0, width, 0, 0, width);
+    }
+    return data;
+};
+
+// Returns an object compatible with getMaskSlice / niftiWorker ({ header: { dims, datatypeCode }, image })
+export const decodeSparseMask = (buffer) => {
+    const { header, dataOffset } = readSparseHeader(buffer);
+    const [zDim, yDim, xDim] = header.shape;
+    const image = new Uint8Array(zDim * yDim * xDim);
+
+    if (header.bbox) {
+        const [, , y0, y1, x0, x1] = header.bbox;
+        const cropWidth = x1 - x0 + 1;
+        const bytes = new Uint8Array(buffer, dataOffset);
+        for (const entry of header.slices) {
+            const [z, offset, length] = entry;
+            decodeRleInto(bytes, offset, offset + length, image, z * yDim * xDim, xDim, x0, y0, cropWidth);
+        }
+    }
+
+    return {
+        header: {
+            dims: [3, xDim, yDim, zDim, 1, 1, 1, 1],
+            pixDims: [1, ...header.spacing, 1, 1, 1, 1],
+            datatypeCode: 2,
+        },
+        image: image.buffer,
+    };
+};
+
+const pushVarint = (out, value) => {
+    while (value >= 0x80) {
+        out.push((value & 0x7f) | 0x80);
+        value >>>= 7;
+    }
+    out.push(value);
+};
+
+// Encode a 0/non-zero mask ({ width, height, data } with one value per pixel) as an rle mask blob
+export const encodeMaskBlob = (data, width, height) => {
+    const runs = [];
+    let value = 0;
+    let run = 0;
+    for (let i = 0; i < width * height; i++) {
+        const bit = data[i] > 0 ? 1 : 0;
+        if (bit !== value) {
+            pushVarint(runs, run);
+            value = bit;
+            run = 0;
+        }
+        run++;
+    }
+    pushVarint(runs, run);
+
+    const headerBytes = new TextEncoder().encode(JSON.stringify({
+        version: 1,
+        encoding: 'rle',
+        shape: [height, width],
+    }));
+    const buffer = new ArrayBuffer(PREFIX_SIZE + headerBytes.length + runs.length);
+    const bytes = new Uint8Array(buffer);
+    for (let i = 0; i < 4; i++) {
+        bytes[i] = BLOB_MAGIC.charCodeAt(i);
+    }
+    new DataView(buffer).setUint32(4, headerBytes.length, true);
+    bytes.set(headerBytes, PREFIX_SIZE);
+    bytes.set(runs, PREFIX_SIZE + headerBytes.length);
+    return buffer;
+};